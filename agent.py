@@ -1,6 +1,6 @@
 """Phase 4 — single-pass agent with retrieval-narrowed native tool calling.
 
-Per-turn flow (`run_agent_turn`):
+Per-turn flow (`arun_agent_turn`, or `run_agent_turn` from a thread):
 
 1. Heuristic fast-path: if the user message matches a regex pattern with
    well-defined parameters, run the tool directly and have the LLM only
@@ -10,31 +10,40 @@ Per-turn flow (`run_agent_turn`):
    `tools=[...]` payload; top RAG chunks get inlined into the system prompt
    as <KNOWLEDGE> blocks.
 3. Single LLM call (streaming) with the narrowed tools list and
-   `tool_choice="auto"`. If the model emits `tool_calls`, run them, append
-   `role:tool` feedback messages, and make a follow-up streaming call so the
-   LLM can summarise in natural language.
+   `tool_choice="auto"`. If the model emits `tool_calls`, run them
+   (concurrently when there are several), append `role:tool` feedback
+   messages, and make a follow-up streaming call so the LLM can summarise in
+   natural language.
+
+The turn is a coroutine so that independent work overlaps: retrieval runs on
+a worker thread while the prompt's fixed parts are assembled, and one pass's
+tool calls run side by side. `run_agent_turn` drives it on a private event
+loop for the UI's worker thread.
 
 Cross-turn memory uses compact "[Tool memory]" assistant messages (prefix
 preserved from Phase 3) so session reload UX keeps working.
 """
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import json
 import os
 import re
 import sys
 from datetime import datetime
-from collections.abc import Iterator
+from collections.abc import AsyncIterator, Iterator
 from dataclasses import dataclass, field
 from typing import Any
 
+import tracing
 from embeddings import EmbeddingUnavailableError
-from inference import stream_llm_events, supports_tools
+from inference import astream_llm_events, routing_policy, supports_tools
 from retrieval import IndexHit, RetrievalResult, retrieve
 from retrieval.query import _debug_retrieval_enabled
 from tools.registry import TOOLS, get_tool
-from tools.runner import run_tool
-from tools.schema import ToolParam, ToolResult, ToolSpec
+from tools.runner import arun_tool
+from tools.schema import ToolParam, ToolResult, ToolSpec, param_enum, param_range
 
 # ---- Cross-turn history prefixes (kept stable for session reload UX) -------
 TOOL_FEEDBACK_PREFIX = "[Tool result]\n"
@@ -272,13 +281,27 @@ def match_fastpath(user_text: str) -> dict[str, Any] | None:
 
 
 def _param_to_jsonschema(p: ToolParam) -> dict[str, Any]:
+    """JSON schema of one param, with enum and range constraints.
+
+    llama-server compiles the tools' parameter schemas into the grammar
+    that constrains tool-call output, so these constraints make every call
+    parse and pass validation on the first attempt.
+    """
     base: dict[str, Any] = {"description": p.description}
     if p.param_type == "integer":
         base["type"] = "integer"
+        lo, hi = param_range(p)
+        if lo is not None:
+            base["minimum"] = lo
+        if hi is not None:
+            base["maximum"] = hi
     elif p.param_type == "boolean":
         base["type"] = "boolean"
     else:
         base["type"] = "string"
+        values = param_enum(p)
+        if values:
+            base["enum"] = list(values)
     return base
 
 
@@ -342,6 +365,30 @@ def _debug_log_model_tool_calls(phase: str, tool_calls: list[dict[str, Any]]) ->
     print(f"[retrieval] model tool_calls ({phase}):\n{payload}", file=sys.stderr, flush=True)
 
 
+def _parse_tool_call(tc: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+    """Name and argument dict of a streamed tool call.
+
+    The tool schemas constrain decoding, so arguments normally parse (calls cut
+    off by the tool-call token cap never get here); malformed ones fall back
+    to {} and fail validation.
+    """
+    fn = tc.get("function") or {}
+    tool_name = fn.get("name") or ""
+    args_str = fn.get("arguments") or "{}"
+    try:
+        params = json.loads(args_str)
+    except json.JSONDecodeError:
+        params = None
+    if not isinstance(params, dict):
+        # Always worth seeing: the model produced something the schema should have ruled out.
+        print(f"[agent] unparseable arguments for {tool_name!r}: {args_str[:200]!r}", file=sys.stderr, flush=True)
+        trace = tracing.current_turn()
+        if trace is not None:
+            trace.set(unparseable_tool_args=[*trace.attrs.get("unparseable_tool_args", []), tool_name])
+        params = {}
+    return tool_name, params
+
+
 def _format_rag_block(rag_hits: list[IndexHit]) -> str:
     if not rag_hits:
         return ""
@@ -374,14 +421,11 @@ def build_agent_system_prompt(
     clock for scheduling tools, and (when present) inlined <KNOWLEDGE> blocks
     for retrieved RAG chunks.
     """
-    rag_block = _format_rag_block(rag_hits or [])
-    clock = _local_clock_context_for_prompt() if _needs_clock_context(candidate_tools) else ""
-    if clock and _debug_retrieval_enabled():
-        print(
-            f"[retrieval] system_prompt clock (in model system message): {clock}",
-            file=sys.stderr,
-            flush=True,
-        )
+    return _system_prompt_head(distro, base_identity) + _system_prompt_tail(rag_hits, candidate_tools)
+
+
+def _system_prompt_head(distro: str, base_identity: str) -> str:
+    """The part of the system prompt that does not depend on retrieval."""
     return (
         f"{base_identity.strip()}\n\n"
         "You have a small set of local tools that can read or change this "
@@ -391,11 +435,22 @@ def build_agent_system_prompt(
         "Never claim you ran, executed, set, changed, or applied anything "
         "unless a tool result is actually present in this conversation.\n\n"
         f"Host distro: {distro}.\n\n"
-        f"{clock}"
-        f"{rag_block}"
     )
 
 
+def _system_prompt_tail(rag_hits: list[IndexHit] | None, candidate_tools: list[str] | None) -> str:
+    """Clock context (for scheduling tools) and <KNOWLEDGE> blocks: what retrieval decided."""
+    rag_block = _format_rag_block(rag_hits or [])
+    clock = _local_clock_context_for_prompt() if _needs_clock_context(candidate_tools) else ""
+    if clock and _debug_retrieval_enabled():
+        print(
+            f"[retrieval] system_prompt clock (in model system message): {clock}",
+            file=sys.stderr,
+            flush=True,
+        )
+    return f"{clock}{rag_block}"
+
+
 # ---- Turn planning ---------------------------------------------------------
 
 
@@ -418,9 +473,12 @@ def decide_turn(user_text: str) -> TurnPlan:
        tools clear the threshold, plan an LLM call with a narrow tools list.
     3. Otherwise plan a chat-only LLM call (still inject RAG context).
 
-    Embedding outages collapse the plan to "llm_chat" (no tools, no RAG).
+    When the embedding server is unreachable, retrieve() answers from its
+    lexical (BM25) index instead; only a retrieval error that still escapes
+    collapses the plan to "llm_chat" (no tools, no RAG).
     """
-    fp = match_fastpath(user_text)
+    with tracing.span("fastpath_match"):
+        fp = match_fastpath(user_text)
     if fp is not None:
         _debug_tool(f"fastpath match → {fp['tool']} params={fp['params']!r}")
         return TurnPlan(kind="fastpath", fastpath_call=fp)
@@ -442,14 +500,20 @@ def decide_turn(user_text: str) -> TurnPlan:
     rag_hits = result.rag
 
     if candidate_tools:
-        top_tool = result.tools[0].score if result.tools else float("-inf")
-        top_rag = rag_hits[0].score if rag_hits else float("-inf")
+        # Hybrid results are in fused order, so take the best score, not the first.
+        top_tool = max((h.score for h in result.tools), default=float("-inf"))
+        # While the index is partial, RAG chunks are not embedded yet and their
+        # scores are lexical coverage (often 1.0), not cosine similarity: they
+        # cannot outbid dense tool scores, so they stay out of the comparison.
+        rag_comparable = not (result.partial and result.mode != "lexical")
+        scored_rag = rag_hits if rag_comparable else []
+        top_rag = max((h.score for h in scored_rag), default=float("-inf"))
         margin = _retrieval_tool_margin()
-        tools_win = (not rag_hits) or (top_tool >= (top_rag + margin))
+        tools_win = (not scored_rag) or (top_tool >= (top_rag + margin))
         if _debug_tools_enabled():
             _debug_tool(
-                "router "
-                f"top_tool={top_tool:.3f} top_rag={(top_rag if rag_hits else float('nan')):.3f} "
+                f"router mode={result.mode} partial={result.partial} "
+                f"top_tool={top_tool:.3f} top_rag={(top_rag if scored_rag else float('nan')):.3f} "
                 f"margin={margin:.3f} tools_win={tools_win}"
             )
         if not tools_win:
@@ -536,16 +600,207 @@ def _format_role_tool_content(result: ToolResult) -> str:
     return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
 
 
+# ---- Prompt accounting -----------------------------------------------------
+
+# Order the parts appear in the rendered prompt: the system message (identity,
+# then RAG blocks), the tool schemas the chat template appends to it, the
+# earlier conversation, then this turn's user message and tool exchanges.
+PROMPT_SECTIONS = ("system", "rag", "tools", "history", "turn")
+
+
+def _message_chars(messages: list[dict[str, Any]]) -> int:
+    return sum(len(json.dumps(m, ensure_ascii=False)) for m in messages)
+
+
+def prompt_sections(
+    sys_prompt: str,
+    rag_block: str,
+    history: list[dict[str, Any]],
+    msgs: list[dict[str, Any]],
+    tools_payload: list[dict[str, Any]] | None = None,
+    history_chars: int | None = None,
+) -> dict[str, int]:
+    """Characters each part of a request contributes to the prompt.
+
+    `history_chars` is `_message_chars(history)` when the caller already has it.
+    """
+    return {
+        "system": len(sys_prompt) - len(rag_block),
+        "rag": len(rag_block),
+        "tools": len(json.dumps(tools_payload, ensure_ascii=False)) if tools_payload else 0,
+        "history": _message_chars(history) if history_chars is None else history_chars,
+        "turn": _message_chars(msgs[1 + len(history):]),
+    }
+
+
+def _prefill_split(sections: dict[str, int], usage: dict[str, Any]) -> dict[str, float]:
+    """Share `prompt_ms` out over the sections that were actually prefilled.
+
+    Tokens reused from the KV cache are a prefix of the prompt, so the
+    uncached share is charged to the sections at the end; within that span
+    time is split by character count (a token estimate, not a tokenization).
+    """
+    total = sum(sections.values())
+    prompt_ms = float(usage.get("prompt_ms") or 0.0)
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    cached = int(usage.get("cached_tokens") or 0)
+    if total <= 0 or prompt_ms <= 0:
+        return {name: 0.0 for name in PROMPT_SECTIONS}
+    fresh = total * (max(0.0, 1.0 - cached / prompt_tokens) if prompt_tokens > 0 else 1.0)
+    charged: dict[str, float] = {}
+    for name in reversed(PROMPT_SECTIONS):
+        charged[name] = min(float(sections.get(name, 0)), fresh)
+        fresh -= charged[name]
+    used = sum(charged.values())
+    return {name: round(prompt_ms * charged[name] / used, 2) if used else 0.0 for name in PROMPT_SECTIONS}
+
+
+class TurnUsage:
+    """Token counts and prefill/generation time of every model call in a turn."""
+
+    def __init__(self) -> None:
+        self.passes: list[dict[str, Any]] = []
+
+    def add(self, label: str, usage: dict[str, Any], sections: dict[str, int]) -> None:
+        if self.passes:
+            # A follow-up extends the previous request, so its slot should have that prompt cached.
+            prev = int(self.passes[-1].get("prompt_tokens") or 0)
+            if int(usage.get("cached_tokens") or 0) < prev // 2:
+                _debug_tool(f"{label}: only {usage.get('cached_tokens')} of {prev} prompt tokens reused from the KV cache")
+        record = {"pass": label, **{k: v for k, v in usage.items() if k != "kind"}}
+        record["prompt_chars"] = dict(sections)
+        record["prefill_ms"] = _prefill_split(sections, usage)
+        self.passes.append(record)
+
+    def summary(self) -> dict[str, Any] | None:
+        """Per-turn totals plus the per-call records (None when nothing was reported)."""
+        if not self.passes:
+            return None
+        out: dict[str, Any] = {"calls": len(self.passes)}
+        for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+            out[key] = sum(int(p.get(key) or 0) for p in self.passes)
+        for key in ("prompt_ms", "generation_ms"):
+            out[key] = round(sum(float(p.get(key) or 0.0) for p in self.passes), 2)
+        out["prefill_ms"] = {
+            name: round(sum(p["prefill_ms"][name] for p in self.passes), 2) for name in PROMPT_SECTIONS
+        }
+        followups = self.passes[1:]
+        followup_prompt = sum(int(p.get("prompt_tokens") or 0) for p in followups)
+        if followup_prompt:
+            cached = sum(int(p.get("cached_tokens") or 0) for p in followups)
+            out["followup_cached_share"] = round(cached / followup_prompt, 3)
+        out["passes"] = list(self.passes)
+        return out
+
+
+async def _stream_pass(
+    msgs: list[dict[str, Any]],
+    usage: TurnUsage,
+    label: str,
+    sections: dict[str, int],
+    **kwargs: Any,
+) -> AsyncIterator[dict[str, Any]]:
+    """Stream one model call, keeping its usage event for the turn's accounting."""
+    async for ev in astream_llm_events(msgs, **kwargs):
+        if ev.get("kind") == "usage":
+            usage.add(label, ev, sections)
+        else:
+            yield ev
+
+
+async def _run_tool_calls(
+    tool_calls: list[dict[str, Any]],
+    msgs: list[dict[str, Any]],
+    memory_messages: list[str],
+) -> AsyncIterator[dict[str, Any]]:
+    """Run one pass's tool calls concurrently and append their role:tool messages.
+
+    Events and messages stay in the order the model emitted the calls.
+    """
+    parsed = [_parse_tool_call(tc) for tc in tool_calls]
+    for tool_name, params in parsed:
+        yield {"kind": "tool_running", "tool": tool_name, "params": params}
+    results = await asyncio.gather(*(arun_tool(tool_name, dict(params)) for tool_name, params in parsed))
+    for tc, (tool_name, _params), result in zip(tool_calls, parsed, results):
+        memory_msg = format_tool_memory_message(tool_name, result)
+        memory_messages.append(memory_msg)
+        yield {
+            "kind": "tool_result",
+            "tool": tool_name,
+            "result": result,
+            "memory_message": memory_msg,
+        }
+        msgs.append(
+            {
+                "role": "tool",
+                "tool_call_id": tc.get("id") or f"call_{len(memory_messages)}",
+                "name": tool_name,
+                "content": _format_role_tool_content(result),
+            }
+        )
+
+
 # ---- Main per-turn driver --------------------------------------------------
 
 
+@dataclass
+class TurnPrefix:
+    """The parts of a turn's prompt that do not depend on retrieval."""
+    system_head: str  # system prompt up to the clock and <KNOWLEDGE> blocks
+    history: list[dict[str, Any]]
+    history_chars: int
+
+
+def _turn_prefix(history: list[dict[str, Any]], distro: str, base_identity: str) -> TurnPrefix:
+    return TurnPrefix(
+        system_head=_system_prompt_head(distro, base_identity),
+        history=list(history),
+        history_chars=_message_chars(history),
+    )
+
+
 def run_agent_turn(
     history_messages: list[dict[str, Any]],
     user_text: str,
     distro: str,
     base_identity: str = DEFAULT_BASE_IDENTITY,
 ) -> Iterator[dict[str, Any]]:
-    """Drive one user→assistant turn. Generator yielding events for the UI.
+    """arun_agent_turn for threads: the same events, driven on a private event loop.
+
+    The turn runs in one copy of the caller's context, so a tracing turn the
+    caller began collects its spans. Closing the generator early (the UI
+    stops at "done" or on cancel) closes the turn.
+    """
+    loop = asyncio.new_event_loop()
+    context = contextvars.copy_context()
+    turn = arun_agent_turn(history_messages, user_text, distro, base_identity)
+    end = object()
+
+    async def step() -> Any:
+        return await anext(turn, end)
+
+    async def close() -> None:
+        await turn.aclose()
+
+    try:
+        while (ev := loop.run_until_complete(loop.create_task(step(), context=context))) is not end:
+            yield ev
+    finally:
+        try:
+            loop.run_until_complete(loop.create_task(close(), context=context))
+            loop.run_until_complete(loop.shutdown_asyncgens())  # open model streams, if closed early
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            loop.close()
+
+
+async def arun_agent_turn(
+    history_messages: list[dict[str, Any]],
+    user_text: str,
+    distro: str,
+    base_identity: str = DEFAULT_BASE_IDENTITY,
+) -> AsyncIterator[dict[str, Any]]:
+    """Drive one user→assistant turn. Async generator yielding events for the UI.
 
     Event shapes:
         {"kind": "thinking", "stage": "fastpath"|"retrieval"|"chat",
@@ -554,19 +809,55 @@ def run_agent_turn(
         {"kind": "tool_result", "tool": str, "result": ToolResult,
          "memory_message": str}
         {"kind": "content", "text": str}
+        {"kind": "usage", "calls": int, "prompt_tokens": int, "cached_tokens": int,
+         "completion_tokens": int, "prompt_ms": float, "generation_ms": float,
+         "prefill_ms": {section: float}, "followup_cached_share": float,
+         "passes": [...]}   (see TurnUsage; the share only with follow-up passes)
         {"kind": "done", "memory_messages": [str, ...]}
-    """
-    plan = decide_turn(user_text)
 
-    if plan.kind == "fastpath":
-        yield from _run_fastpath_turn(history_messages, user_text, distro, plan, base_identity)
-        return
+    The usage event comes right before "done" when the backend reported
+    token counts; the same summary is stored on the trace as `usage`.
 
-    if plan.kind == "llm_tools":
-        yield from _run_llm_tools_turn(history_messages, user_text, distro, plan, base_identity)
-        return
+    Retrieval (`decide_turn`) runs on a worker thread while the loop builds
+    the retrieval-independent part of the prompt. When a pass asks for
+    several tools, they run concurrently (`arun_tool`); their "tool_running"
+    events all come first, then the results in call order.
 
-    yield from _run_llm_chat_turn(history_messages, user_text, distro, plan, base_identity)
+    Stage timings go to the caller's tracing turn when one is current (the
+    UI starts one to add render time); otherwise the turn is traced and
+    logged here.
+    """
+    owned_trace = None
+    if tracing.current_turn() is None:
+        owned_trace = tracing.begin_turn(source="agent")
+    try:
+        planning = asyncio.create_task(asyncio.to_thread(decide_turn, user_text))
+        await asyncio.sleep(0)  # let the task hand retrieval to its worker thread
+        with tracing.span("prompt_assembly"):
+            prefix = _turn_prefix(history_messages, distro, base_identity)
+        plan = await planning
+        trace = tracing.current_turn()
+        if trace is not None:
+            trace.set(plan=plan.kind)
+
+        if plan.kind == "fastpath":
+            runner = _run_fastpath_turn
+        elif plan.kind == "llm_tools":
+            runner = _run_llm_tools_turn
+        else:
+            runner = _run_llm_chat_turn
+
+        usage = TurnUsage()
+        async for ev in runner(prefix, user_text, plan, usage):
+            if ev.get("kind") == "done":
+                summary = usage.summary()
+                if summary is not None:
+                    if trace is not None:
+                        trace.set(usage=summary)
+                    yield {"kind": "usage", **summary}
+            yield ev
+    finally:
+        tracing.end_turn(owned_trace)
 
 
 def _user_message(text: str) -> dict[str, Any]:
@@ -577,19 +868,29 @@ def _system_message(text: str) -> dict[str, Any]:
     return {"role": "system", "content": text}
 
 
-def _run_fastpath_turn(
-    history: list[dict[str, Any]],
+def _rag_summary(plan: TurnPlan) -> list[tuple[str, str, float]]:
+    return [
+        (
+            (h.entry.rag_chunk.doc_path if h.entry.rag_chunk else "?"),
+            (h.entry.rag_chunk.section if h.entry.rag_chunk else "?"),
+            round(h.score, 3),
+        )
+        for h in plan.rag_hits
+    ]
+
+
+async def _run_fastpath_turn(
+    prefix: TurnPrefix,
     user_text: str,
-    distro: str,
     plan: TurnPlan,
-    base_identity: str,
-) -> Iterator[dict[str, Any]]:
+    usage: TurnUsage,
+) -> AsyncIterator[dict[str, Any]]:
     assert plan.fastpath_call is not None
     tool_name = plan.fastpath_call["tool"]
     params = plan.fastpath_call.get("params", {})
     yield {"kind": "thinking", "stage": "fastpath", "tools": [tool_name], "rag": []}
     yield {"kind": "tool_running", "tool": tool_name, "params": params}
-    result = run_tool(tool_name, dict(params))
+    result = await arun_tool(tool_name, dict(params))
     memory_msg = format_tool_memory_message(tool_name, result)
     yield {
         "kind": "tool_result",
@@ -598,92 +899,89 @@ def _run_fastpath_turn(
         "memory_message": memory_msg,
     }
 
-    sys_prompt = build_agent_system_prompt(rag_hits=[], distro=distro, base_identity=base_identity)
-    role_tool_call_id = "fp_call_1"
-    msgs: list[dict[str, Any]] = [
-        _system_message(sys_prompt),
-        *history,
-        _user_message(user_text),
-        {
-            "role": "assistant",
-            "content": "",
-            "tool_calls": [
-                {
-                    "id": role_tool_call_id,
-                    "type": "function",
-                    "function": {"name": tool_name, "arguments": json.dumps(params, ensure_ascii=False)},
-                }
-            ],
-        },
-        {
-            "role": "tool",
-            "tool_call_id": role_tool_call_id,
-            "name": tool_name,
-            "content": _format_role_tool_content(result),
-        },
-    ]
-    if not supports_tools():
-        # Ollama path: collapse tool-calling messages into a "[Tool result]" user message
-        # so the model can summarize without OpenAI-tools schema.
-        msgs = [
+    history = prefix.history
+    with tracing.span("prompt_assembly"):
+        sys_prompt = prefix.system_head + _system_prompt_tail([], None)
+        role_tool_call_id = "fp_call_1"
+        msgs: list[dict[str, Any]] = [
             _system_message(sys_prompt),
             *history,
             _user_message(user_text),
-            _user_message(format_tool_result_message(tool_name, result)),
+            {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [
+                    {
+                        "id": role_tool_call_id,
+                        "type": "function",
+                        "function": {"name": tool_name, "arguments": json.dumps(params, ensure_ascii=False)},
+                    }
+                ],
+            },
+            {
+                "role": "tool",
+                "tool_call_id": role_tool_call_id,
+                "name": tool_name,
+                "content": _format_role_tool_content(result),
+            },
         ]
-
-    for ev in stream_llm_events(msgs):
+        if not supports_tools():
+            # Ollama path: collapse tool-calling messages into a "[Tool result]" user message
+            # so the model can summarize without OpenAI-tools schema.
+            msgs = [
+                _system_message(sys_prompt),
+                *history,
+                _user_message(user_text),
+                _user_message(format_tool_result_message(tool_name, result)),
+            ]
+        sections = prompt_sections(sys_prompt, "", history, msgs, history_chars=prefix.history_chars)
+
+    async for ev in _stream_pass(msgs, usage, "summary", sections):
         if ev.get("kind") == "content":
             yield ev
 
     yield {"kind": "done", "memory_messages": [memory_msg]}
 
 
-def _run_llm_tools_turn(
-    history: list[dict[str, Any]],
+async def _run_llm_tools_turn(
+    prefix: TurnPrefix,
     user_text: str,
-    distro: str,
     plan: TurnPlan,
-    base_identity: str,
-) -> Iterator[dict[str, Any]]:
-    rag_summary = [
-        (
-            (h.entry.rag_chunk.doc_path if h.entry.rag_chunk else "?"),
-            (h.entry.rag_chunk.section if h.entry.rag_chunk else "?"),
-            round(h.score, 3),
-        )
-        for h in plan.rag_hits
-    ]
+    usage: TurnUsage,
+) -> AsyncIterator[dict[str, Any]]:
     yield {
         "kind": "thinking",
         "stage": "retrieval",
         "tools": list(plan.candidate_tools),
-        "rag": rag_summary,
+        "rag": _rag_summary(plan),
     }
 
-    sys_prompt = build_agent_system_prompt(
-        plan.rag_hits,
-        distro=distro,
-        base_identity=base_identity,
-        candidate_tools=plan.candidate_tools,
-    )
-    msgs: list[dict[str, Any]] = [
-        _system_message(sys_prompt),
-        *history,
-        _user_message(user_text),
-    ]
-    tools_payload: list[dict[str, Any]] = []
-    for name in plan.candidate_tools:
-        spec = get_tool(name)
-        if spec is None:
-            continue
-        tools_payload.append(toolspec_to_openai_tool(spec))
+    history = prefix.history
+    with tracing.span("prompt_assembly"):
+        sys_prompt = prefix.system_head + _system_prompt_tail(plan.rag_hits, plan.candidate_tools)
+        msgs: list[dict[str, Any]] = [
+            _system_message(sys_prompt),
+            *history,
+            _user_message(user_text),
+        ]
+        tools_payload: list[dict[str, Any]] = []
+        for name in plan.candidate_tools:
+            spec = get_tool(name)
+            if spec is None:
+                continue
+            tools_payload.append(toolspec_to_openai_tool(spec))
+        rag_block = _format_rag_block(plan.rag_hits)
+        sections = prompt_sections(
+            sys_prompt, rag_block, history, msgs, tools_payload, history_chars=prefix.history_chars
+        )
 
     memory_messages: list[str] = []
     accumulated_tool_calls: list[dict[str, Any]] = []
     accumulated_content = ""
 
-    for ev in stream_llm_events(msgs, tools=tools_payload, tool_choice="auto"):
+    async for ev in _stream_pass(
+        msgs, usage, "tools", sections, tools=tools_payload, tool_choice="auto", policy=routing_policy()
+    ):
         kind = ev.get("kind")
         if kind == "content":
             chunk = ev.get("text") or ""
@@ -707,34 +1005,8 @@ def _run_llm_tools_turn(
             "tool_calls": accumulated_tool_calls,
         }
     )
-    for tc in accumulated_tool_calls:
-        fn = tc.get("function") or {}
-        tool_name = fn.get("name") or ""
-        args_str = fn.get("arguments") or "{}"
-        try:
-            params = json.loads(args_str) if args_str else {}
-        except json.JSONDecodeError:
-            params = {}
-        if not isinstance(params, dict):
-            params = {}
-        yield {"kind": "tool_running", "tool": tool_name, "params": params}
-        result = run_tool(tool_name, dict(params))
-        memory_msg = format_tool_memory_message(tool_name, result)
-        memory_messages.append(memory_msg)
-        yield {
-            "kind": "tool_result",
-            "tool": tool_name,
-            "result": result,
-            "memory_message": memory_msg,
-        }
-        msgs.append(
-            {
-                "role": "tool",
-                "tool_call_id": tc.get("id") or f"call_{len(memory_messages)}",
-                "name": tool_name,
-                "content": _format_role_tool_content(result),
-            }
-        )
+    async for ev in _run_tool_calls(accumulated_tool_calls, msgs, memory_messages):
+        yield ev
 
     # Bound the assistant↔tool loop. Each pass: stream model, run any new
     # tool calls, append role:tool messages, repeat. We already executed pass
@@ -744,73 +1016,57 @@ def _run_llm_tools_turn(
     while passes < cap:
         passes += 1
         new_tool_calls: list[dict[str, Any]] = []
-        for ev in stream_llm_events(msgs, tools=tools_payload, tool_choice="auto"):
+        pass_content = ""
+        sections = prompt_sections(
+            sys_prompt, rag_block, history, msgs, tools_payload, history_chars=prefix.history_chars
+        )
+        async for ev in _stream_pass(
+            msgs,
+            usage,
+            f"followup_{passes}",
+            sections,
+            tools=tools_payload,
+            tool_choice="auto",
+            policy=routing_policy(),
+        ):
             kind = ev.get("kind")
             if kind == "content":
+                pass_content += ev.get("text") or ""
                 yield ev
             elif kind == "tool_calls":
                 new_tool_calls = ev.get("tool_calls") or []
         if not new_tool_calls:
             break
         _debug_log_model_tool_calls(f"followup_pass_{passes}", new_tool_calls)
-        msgs.append({"role": "assistant", "content": "", "tool_calls": new_tool_calls})
-        for tc in new_tool_calls:
-            fn = tc.get("function") or {}
-            tool_name = fn.get("name") or ""
-            args_str = fn.get("arguments") or "{}"
-            try:
-                params = json.loads(args_str) if args_str else {}
-            except json.JSONDecodeError:
-                params = {}
-            if not isinstance(params, dict):
-                params = {}
-            yield {"kind": "tool_running", "tool": tool_name, "params": params}
-            result = run_tool(tool_name, dict(params))
-            memory_msg = format_tool_memory_message(tool_name, result)
-            memory_messages.append(memory_msg)
-            yield {
-                "kind": "tool_result",
-                "tool": tool_name,
-                "result": result,
-                "memory_message": memory_msg,
-            }
-            msgs.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tc.get("id") or f"call_{len(memory_messages)}",
-                    "name": tool_name,
-                    "content": _format_role_tool_content(result),
-                }
-            )
+        # Keep the assistant message as generated so the next request extends this one's prefix.
+        msgs.append({"role": "assistant", "content": pass_content, "tool_calls": new_tool_calls})
+        async for ev in _run_tool_calls(new_tool_calls, msgs, memory_messages):
+            yield ev
 
     yield {"kind": "done", "memory_messages": memory_messages}
 
 
-def _run_llm_chat_turn(
-    history: list[dict[str, Any]],
+async def _run_llm_chat_turn(
+    prefix: TurnPrefix,
     user_text: str,
-    distro: str,
     plan: TurnPlan,
-    base_identity: str,
-) -> Iterator[dict[str, Any]]:
-    rag_summary = [
-        (
-            (h.entry.rag_chunk.doc_path if h.entry.rag_chunk else "?"),
-            (h.entry.rag_chunk.section if h.entry.rag_chunk else "?"),
-            round(h.score, 3),
+    usage: TurnUsage,
+) -> AsyncIterator[dict[str, Any]]:
+    yield {"kind": "thinking", "stage": "chat", "tools": [], "rag": _rag_summary(plan)}
+
+    history = prefix.history
+    with tracing.span("prompt_assembly"):
+        sys_prompt = prefix.system_head + _system_prompt_tail(plan.rag_hits, None)
+        msgs: list[dict[str, Any]] = [
+            _system_message(sys_prompt),
+            *history,
+            _user_message(user_text),
+        ]
+        sections = prompt_sections(
+            sys_prompt, _format_rag_block(plan.rag_hits), history, msgs, history_chars=prefix.history_chars
         )
-        for h in plan.rag_hits
-    ]
-    yield {"kind": "thinking", "stage": "chat", "tools": [], "rag": rag_summary}
-
-    sys_prompt = build_agent_system_prompt(plan.rag_hits, distro=distro, base_identity=base_identity)
-    msgs: list[dict[str, Any]] = [
-        _system_message(sys_prompt),
-        *history,
-        _user_message(user_text),
-    ]
 
-    for ev in stream_llm_events(msgs):
+    async for ev in _stream_pass(msgs, usage, "chat", sections):
         if ev.get("kind") == "content":
             yield ev
 
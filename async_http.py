@@ -0,0 +1,151 @@
+"""Minimal asyncio HTTP/1.1 client for Meera's local llama-servers.
+
+The async inference API (`inference.astream_llm_events`,
+`embeddings.aembed_batch`) needs a transport that does not block the event
+loop. Meera only talks to llama-server instances: JSON POSTs, answered with
+either a JSON body or an SSE stream. This module covers exactly that with
+asyncio streams, so it needs nothing beyond the standard library. The sync
+clients keep using `requests`.
+
+One connection per request (`Connection: close`). Response bodies may be
+chunked, sized by Content-Length, or end when the server closes the
+connection. `timeout` applies to connecting and to each read, like
+`requests`. Every failure is an OSError: connection errors, TimeoutError,
+and `HTTPError` for error statuses and malformed responses.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+from urllib.parse import urlsplit
+
+
+class HTTPError(OSError):
+    """The server answered with an error status (`status`) or an unreadable response."""
+
+    def __init__(self, message: str, status: int | None = None):
+        super().__init__(message)
+        self.status = status
+
+
+class _Response:
+    def __init__(self, status: int, headers: dict[str, str], reader: asyncio.StreamReader, timeout: float):
+        self.status = status
+        self.headers = headers
+        self._reader = reader
+        self._timeout = timeout
+
+    async def _read(self, awaitable: Any) -> Any:
+        return await asyncio.wait_for(awaitable, self._timeout)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """The body as it arrives, with chunked transfer encoding removed."""
+        if "chunked" in self.headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await self._read(self._reader.readline())
+                try:
+                    size = int(size_line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise HTTPError(f"bad chunk size line: {size_line[:40]!r}") from None
+                if size == 0:
+                    while (await self._read(self._reader.readline())).strip():
+                        pass  # trailers
+                    return
+                yield await self._read(self._reader.readexactly(size))
+                await self._read(self._reader.readexactly(2))  # CRLF after each chunk
+        elif "content-length" in self.headers:
+            remaining = int(self.headers["content-length"])
+            while remaining > 0:
+                data = await self._read(self._reader.read(min(remaining, 65536)))
+                if not data:
+                    raise HTTPError("connection closed before the end of the body")
+                remaining -= len(data)
+                yield data
+        else:
+            while data := await self._read(self._reader.read(65536)):
+                yield data
+
+    async def body(self) -> bytes:
+        return b"".join([data async for data in self.chunks()])
+
+    async def lines(self) -> AsyncIterator[str]:
+        """Decoded body lines without their line endings (for SSE)."""
+        pending = b""
+        async for data in self.chunks():
+            pending += data
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+        if pending:
+            yield pending.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+@asynccontextmanager
+async def _post(url: str, payload: Any, timeout: float) -> AsyncIterator[_Response]:
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"unsupported URL: {url!r}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    body = json.dumps(payload).encode("utf-8")
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, port, ssl=True if parts.scheme == "https" else None),
+        timeout,
+    )
+    try:
+        head = (
+            f"POST {target} HTTP/1.1\r\n"
+            f"Host: {parts.netloc}\r\n"
+            "Connection: close\r\n"
+            "Accept: */*\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await asyncio.wait_for(writer.drain(), timeout)
+
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        fields = status_line.decode("latin-1").split(None, 2)
+        if len(fields) < 2 or not fields[0].startswith("HTTP/") or not fields[1].isdigit():
+            raise HTTPError(f"bad status line from {url}: {status_line[:80]!r}")
+        status = int(fields[1])
+        headers: dict[str, str] = {}
+        while line := (await asyncio.wait_for(reader.readline(), timeout)).strip():
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        response = _Response(status, headers, reader, timeout)
+        if status >= 400:
+            status_text = f"{status} {fields[2].strip()}" if len(fields) > 2 else str(status)
+            raise HTTPError(f"{status_text} for url: {url}", status)
+        yield response
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass  # the server may already have reset the connection
+
+
+async def post_json(url: str, payload: Any, *, timeout: float = 30.0) -> Any:
+    """POST `payload` as JSON and return the decoded JSON response."""
+    async with _post(url, payload, timeout) as response:
+        body = await response.body()
+    try:
+        return json.loads(body)
+    except ValueError as exc:
+        raise HTTPError(f"non-JSON response from {url}: {exc}") from exc
+
+
+async def stream_lines(url: str, payload: Any, *, timeout: float = 300.0) -> AsyncIterator[str]:
+    """POST `payload` as JSON and yield the response body line by line.
+
+    Closing the generator early (`aclose()`, e.g. through
+    `contextlib.aclosing`) closes the connection, which is how llama-server
+    is told to stop generating.
+    """
+    async with _post(url, payload, timeout) as response:
+        async for line in response.lines():
+            yield line
@@ -4,22 +4,24 @@ import json
 OLLAMA_URL = "http://localhost:11434/api/chat"
 MODEL_NAME = "qwen3.5:2b-q4_K_M"
 
-def stream_llm_events(messages: list, model: str = MODEL_NAME):
+def stream_llm_events(messages: list, model: str = MODEL_NAME, num_predict: int = 1024):
     """
     Generator that yields small chunks of text from the model as they arrive.
     
     Args:
         messages: List of message dicts with 'role' ('user' or 'assistant') and 'content'
         model: Model name to use
+        num_predict: Maximum tokens to generate
     
     Yields:
-        Event dicts: {"kind":"content"|"thinking","text": "..."}
+        Event dicts: {"kind":"content"|"thinking","text": "..."}, then one
+        {"kind":"usage", ...} from the final packet's eval counters
     """
     payload = {
         "model": model,
         "messages": messages,
         "options": {
-            "num_predict": 1024,
+            "num_predict": num_predict,
             "num_ctx": 4096
         },
         "stream": True,
@@ -42,6 +44,23 @@ def stream_llm_events(messages: list, model: str = MODEL_NAME):
                 if chunk:
                     yield {"kind": "content", "text": chunk}
 
+            if packet.get("done"):
+                # Durations are in nanoseconds; Ollama does not report cache reuse.
+                prompt_ms = (packet.get("prompt_eval_duration") or 0) / 1e6
+                generation_ms = (packet.get("eval_duration") or 0) / 1e6
+                prompt_n = packet.get("prompt_eval_count") or 0
+                completion_n = packet.get("eval_count") or 0
+                yield {
+                    "kind": "usage",
+                    "prompt_tokens": prompt_n,
+                    "cached_tokens": 0,
+                    "completion_tokens": completion_n,
+                    "prompt_ms": round(prompt_ms, 2),
+                    "generation_ms": round(generation_ms, 2),
+                    "prompt_tps": round(1000.0 * prompt_n / prompt_ms, 1) if prompt_ms else 0.0,
+                    "generation_tps": round(1000.0 * completion_n / generation_ms, 1) if generation_ms else 0.0,
+                }
+
             # If Ollama returns an error field
             if "error" in packet:
                 yield {"kind": "content", "text": f"[Model error: {packet['error']}]"}
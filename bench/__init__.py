@@ -0,0 +1,4 @@
+"""Offline benchmarks: agent turns against a mock llama-server, retrieval scaling.
+
+Run from the repository root, e.g. `python3 -m bench.agent_bench --json out.json`.
+"""
@@ -0,0 +1,270 @@
+"""Offline agent benchmark: `agent.run_agent_turn` over a prompt corpus.
+
+Everything runs locally with no model or GPU:
+
+- chat completions go to `bench.mock_llama_server` (paced token stream with
+  configurable first-token latency and token rate);
+- embeddings use the deterministic MEERA_EMBED_FAKE embedder (prompts that
+  are exact tool exemplars still retrieve their tool with score 1.0);
+- tool handlers are replaced by a stub that only sleeps `--tool-ms`, so the
+  benchmark never changes the machine it runs on.
+
+Per turn the stage spans from `tracing` are collected together with the
+mock server's request and token counters. The report gives p50/p95 for
+every stage, HTTP calls per turn, prompt tokens sent per turn, and the
+agent's own usage accounting (tokens and prefill ms per prompt section).
+
+    python3 -m bench.agent_bench                       # bench/prompts.jsonl
+    python3 -m bench.agent_bench --prompts my.jsonl --repeat 3 --json out.json
+
+Prompt files are JSONL (keys "prompt", "text", "query" or "title" are
+accepted) or plain text with one prompt per line.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+import agent  # noqa: E402
+import tracing  # noqa: E402
+from bench.mock_llama_server import MockLlamaConfig, MockLlamaServer  # noqa: E402
+from retrieval import get_index, reset_index  # noqa: E402
+from tools.schema import ToolResult, tool_result_ok  # noqa: E402
+
+DEFAULT_PROMPTS = Path(__file__).resolve().parent / "prompts.jsonl"
+
+
+def load_prompts(path: Path) -> list[str]:
+    prompts: list[str] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                text = next(
+                    (obj[k] for k in ("prompt", "text", "query", "title") if isinstance(obj.get(k), str)),
+                    "",
+                )
+            else:
+                text = line
+            if text.strip():
+                prompts.append(text.strip())
+    return prompts
+
+
+def _synthetic_history(turns: int) -> list[dict[str, Any]]:
+    history: list[dict[str, Any]] = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"earlier question number {i} about my system"})
+        history.append({"role": "assistant", "content": "Here is a short earlier answer. " * 4})
+    return history
+
+
+def _make_stub_run_tool(tool_ms: float):
+    def _stub_run_tool(name: str, params: dict[str, Any] | None = None, **_kwargs: Any) -> ToolResult:
+        with tracing.span("run_tool", tool=name, stub=True) as attrs:
+            if tool_ms > 0:
+                time.sleep(tool_ms / 1000.0)
+            attrs["ok"] = True
+            return tool_result_ok(f"[bench] {name} ok", data={"params": dict(params or {})})
+
+    return _stub_run_tool
+
+
+def _make_stub_arun_tool(tool_ms: float):
+    run = _make_stub_run_tool(tool_ms)
+
+    async def _stub_arun_tool(name: str, params: dict[str, Any] | None = None, **_kwargs: Any) -> ToolResult:
+        return await asyncio.to_thread(run, name, params)
+
+    return _stub_arun_tool
+
+
+def run_turn(
+    server: MockLlamaServer,
+    prompt: str,
+    history: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Run one agent turn; returns its trace record plus server counters."""
+    server.reset_stats()
+    trace = tracing.begin_turn(source="bench")
+    events = 0
+    content_chars = 0
+    try:
+        for ev in agent.run_agent_turn(history, prompt, distro="bench"):
+            events += 1
+            if ev.get("kind") == "content":
+                content_chars += len(ev.get("text") or "")
+    finally:
+        tracing.end_turn(trace)
+    record = trace.to_record()
+    stats = server.stats()
+    record.update(
+        prompt=prompt,
+        http_calls=stats["requests"],
+        prompt_tokens=stats["prompt_tokens"],
+        cached_tokens=stats["cached_tokens"],
+        completion_tokens=stats["completion_tokens"],
+        events=events,
+        content_chars=content_chars,
+    )
+    return record
+
+
+def summarize(records: list[dict[str, Any]]) -> dict[str, Any]:
+    def dist(key: str) -> dict[str, float]:
+        vals = [float(r.get(key) or 0) for r in records]
+        return {
+            "mean": round(sum(vals) / len(vals), 2) if vals else 0.0,
+            "p50": tracing.percentile(vals, 50),
+            "p95": tracing.percentile(vals, 95),
+            "max": max(vals) if vals else 0.0,
+        }
+
+    plans: dict[str, int] = {}
+    for r in records:
+        plans[str(r.get("plan", "?"))] = plans.get(str(r.get("plan", "?")), 0) + 1
+    return {
+        "turns": len(records),
+        "plans": plans,
+        "stages": tracing.stage_stats(records),
+        "http_calls_per_turn": dist("http_calls"),
+        "prompt_tokens_per_turn": dist("prompt_tokens"),
+        "cached_tokens_per_turn": dist("cached_tokens"),
+        "completion_tokens_per_turn": dist("completion_tokens"),
+        "usage": tracing.usage_stats(records),
+    }
+
+
+def run_benchmark(
+    prompts: list[str],
+    *,
+    config: MockLlamaConfig,
+    repeat: int = 1,
+    history_turns: int = 0,
+    tool_ms: float = 0.0,
+) -> dict[str, Any]:
+    """Drive every prompt through the agent against a fresh mock server."""
+    env = {
+        "MEERA_BACKEND": "llamacpp",
+        "MEERA_EMBED_FAKE": "1",
+        "MEERA_AGENT_TOOLS": "1",
+        "MEERA_TRACE": "0",  # keep benchmark turns out of the user's trace log
+    }
+    saved_env = {k: os.environ.get(k) for k in [*env, "MEERA_LLAMACPP_URL"]}
+    saved_arun_tool = agent.arun_tool
+    history = _synthetic_history(history_turns)
+    try:
+        with MockLlamaServer(config=config) as server:
+            os.environ.update(env)
+            os.environ["MEERA_LLAMACPP_URL"] = server.url
+            agent.arun_tool = _make_stub_arun_tool(tool_ms)
+
+            reset_index()
+            t0 = time.perf_counter()
+            get_index()
+            index_build_ms = round((time.perf_counter() - t0) * 1000.0, 2)
+
+            records = [
+                run_turn(server, prompt, history)
+                for _ in range(max(1, repeat))
+                for prompt in prompts
+            ]
+    finally:
+        agent.arun_tool = saved_arun_tool
+        for k, v in saved_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        reset_index()
+
+    return {
+        "config": {
+            "tokens_per_sec": config.tokens_per_sec,
+            "first_token_ms": config.first_token_ms,
+            "reply_tokens": config.reply_tokens,
+            "repeat": repeat,
+            "history_turns": history_turns,
+            "tool_ms": tool_ms,
+            "prompts": len(prompts),
+        },
+        "index_build_ms": index_build_ms,
+        "summary": summarize(records),
+        "turns": records,
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    summary = report["summary"]
+    cfg = report["config"]
+    print(
+        f"{summary['turns']} turns  ({cfg['prompts']} prompts x {cfg['repeat']}), "
+        f"mock {cfg['tokens_per_sec']:g} tok/s, first token {cfg['first_token_ms']:g} ms"
+    )
+    print(f"index build: {report['index_build_ms']:.1f} ms   plans: {summary['plans']}")
+    stages = summary["stages"]
+    width = max(len(n) for n in stages) if stages else 5
+    print(f"  {'stage'.ljust(width)}  {'n':>5}  {'p50 ms':>9}  {'p95 ms':>9}")
+    for name, s in sorted(stages.items(), key=lambda kv: -kv[1]["p50_ms"]):
+        print(f"  {name.ljust(width)}  {s['count']:>5}  {s['p50_ms']:>9.2f}  {s['p95_ms']:>9.2f}")
+    for key, label in (
+        ("http_calls_per_turn", "HTTP calls/turn"),
+        ("prompt_tokens_per_turn", "prompt tokens/turn"),
+        ("cached_tokens_per_turn", "cached tokens/turn"),
+    ):
+        d = summary[key]
+        print(f"{label}: mean {d['mean']:g}  p50 {d['p50']:g}  p95 {d['p95']:g}  max {d['max']:g}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline agent latency benchmark")
+    parser.add_argument("--prompts", type=Path, default=DEFAULT_PROMPTS)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--history-turns", type=int, default=0, help="synthetic prior user/assistant pairs")
+    parser.add_argument("--tokens-per-sec", type=float, default=MockLlamaConfig.tokens_per_sec)
+    parser.add_argument("--first-token-ms", type=float, default=MockLlamaConfig.first_token_ms)
+    parser.add_argument("--reply-tokens", type=int, default=MockLlamaConfig.reply_tokens)
+    parser.add_argument("--tool-ms", type=float, default=0.0, help="simulated tool runtime")
+    parser.add_argument("--json", type=Path, help="write the full machine-readable report here")
+    args = parser.parse_args(argv)
+
+    prompts = load_prompts(args.prompts)
+    if not prompts:
+        print(f"no prompts found in {args.prompts}", file=sys.stderr)
+        return 2
+    report = run_benchmark(
+        prompts,
+        config=MockLlamaConfig(
+            tokens_per_sec=args.tokens_per_sec,
+            first_token_ms=args.first_token_ms,
+            reply_tokens=args.reply_tokens,
+        ),
+        repeat=args.repeat,
+        history_turns=args.history_turns,
+        tool_ms=args.tool_ms,
+    )
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
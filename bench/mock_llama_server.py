@@ -0,0 +1,277 @@
+"""Mock OpenAI-compatible llama-server for offline benchmarks.
+
+Serves `POST /v1/chat/completions` as an SSE stream paced by a configurable
+first-token latency and token rate, `GET /health`, and `GET /props` (reporting
+`slots` as `total_slots`). Behaviour is
+deterministic so runs are comparable:
+
+- request with `tools` whose last message is from the user → one tool call
+  to the first listed tool, with arguments synthesized from its JSON schema;
+- anything else → `reply_tokens` words of content.
+
+The final chunk carries llama-server style `timings` (every chunk does when
+the request sets `timings_per_token`) and, when the request asks for
+`stream_options.include_usage`, an OpenAI `usage` block. Prompt tokens are
+estimated as serialized request characters / 4.
+
+Prompt caching is simulated per slot (`id_slot`, default 0): the part of a
+request's serialized tools + messages shared with the slot's previous
+request counts as cached tokens, and the first-token delay shrinks to the
+uncached share.
+
+The server counts requests and tokens (`stats()`), which the agent benchmark
+reads per turn. Standalone use (e.g. to click through the UI without a GPU):
+
+    python3 -m bench.mock_llama_server --port 8080 --tokens-per-sec 40
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+_WORDS = (
+    "the quick local assistant reads your request and answers with a short "
+    "helpful reply about this linux desktop"
+).split()
+
+
+@dataclass
+class MockLlamaConfig:
+    tokens_per_sec: float = 200.0
+    first_token_ms: float = 50.0
+    reply_tokens: int = 48
+    tool_calls: bool = True
+    slots: int = 1
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _example_value(schema: dict[str, Any]) -> Any:
+    if schema.get("enum"):
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "integer":
+        return int(schema.get("minimum", 1))
+    if kind == "boolean":
+        return False
+    return "benchmark"
+
+
+def synthesize_arguments(tool: dict[str, Any]) -> dict[str, Any]:
+    """Arguments for every required parameter of an OpenAI function tool."""
+    params = (tool.get("function") or {}).get("parameters") or {}
+    props = params.get("properties") or {}
+    return {name: _example_value(props.get(name) or {}) for name in params.get("required") or []}
+
+
+class MockLlamaServer:
+    """Threaded mock server; use as a context manager or start()/stop()."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: MockLlamaConfig | None = None):
+        self.config = config or MockLlamaConfig()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        self._slot_prompts: dict[int, str] = {}
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLlamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-llama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockLlamaServer":
+        return self.start()
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.stop()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def _count(self, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> None:
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["cached_tokens"] += cached_tokens
+            self._stats["completion_tokens"] += completion_tokens
+
+    def _use_slot(self, slot: int, prompt: str, cache: bool) -> int:
+        """Characters of `prompt` already in the slot's cache; the slot then holds `prompt`."""
+        with self._lock:
+            previous = self._slot_prompts.get(slot, "") if cache else ""
+            self._slot_prompts[slot] = prompt
+        return len(os.path.commonprefix([previous, prompt]))
+
+
+def _make_handler(server: MockLlamaServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") in ("/health", "/v1/models"):
+                self._send_json({"status": "ok"})
+            elif self.path.rstrip("/") == "/props":
+                self._send_json({"total_slots": server.config.slots})
+            else:
+                self.send_error(404)
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/") != "/v1/chat/completions":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                self.send_error(400)
+                return
+            self._stream(payload)
+
+        def _send_json(self, obj: dict[str, Any]) -> None:
+            body = json.dumps(obj).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _event(self, obj: Any) -> None:
+            data = obj if isinstance(obj, str) else json.dumps(obj)
+            self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def _stream(self, payload: dict[str, Any]) -> None:
+            cfg = server.config
+            messages = payload.get("messages") or []
+            tools = payload.get("tools") or []
+            prompt = json.dumps(tools) + json.dumps(messages)
+            prompt_tokens = estimate_tokens(prompt)
+            slot = payload.get("id_slot")
+            shared = server._use_slot(slot if isinstance(slot, int) and slot >= 0 else 0, prompt,
+                                      payload.get("cache_prompt", True) is not False)
+            cached_tokens = min(shared // 4, prompt_tokens - 1)  # the last token is always evaluated
+            prompt_ms = cfg.first_token_ms * (prompt_tokens - cached_tokens) / prompt_tokens
+            last_role = (messages[-1] or {}).get("role") if messages else None
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+
+            started = time.perf_counter()
+            time.sleep(max(0.0, prompt_ms) / 1000.0)
+            gap = 1.0 / cfg.tokens_per_sec if cfg.tokens_per_sec > 0 else 0.0
+            pieces: list[dict[str, Any]] = []
+            if cfg.tool_calls and tools and last_role == "user":
+                tool = tools[0]
+                name = (tool.get("function") or {}).get("name") or ""
+                args = json.dumps(synthesize_arguments(tool))
+                pieces.append({"tool_calls": [{
+                    "index": 0, "id": "call_1", "type": "function",
+                    "function": {"name": name, "arguments": ""},
+                }]})
+                for i in range(0, len(args), 4):
+                    pieces.append({"tool_calls": [{"index": 0, "function": {"arguments": args[i:i + 4]}}]})
+                finish = "tool_calls"
+            else:
+                for i in range(max(0, cfg.reply_tokens)):
+                    word = _WORDS[i % len(_WORDS)]
+                    pieces.append({"content": word if i == 0 else " " + word})
+                finish = "stop"
+
+            per_token = bool(payload.get("timings_per_token"))
+            try:
+                for i, delta in enumerate(pieces):
+                    if i and gap:
+                        time.sleep(gap)
+                    chunk: dict[str, Any] = {"choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                    if per_token:
+                        chunk["timings"] = {
+                            "cache_n": cached_tokens,
+                            "prompt_n": prompt_tokens - cached_tokens,
+                            "prompt_ms": round(prompt_ms, 3),
+                            "predicted_n": i + 1,
+                            "predicted_ms": round((time.perf_counter() - started) * 1000.0 - prompt_ms, 3),
+                        }
+                    self._event(chunk)
+                elapsed_ms = (time.perf_counter() - started) * 1000.0
+                final: dict[str, Any] = {
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": finish}],
+                    "timings": {
+                        "cache_n": cached_tokens,
+                        "prompt_n": prompt_tokens - cached_tokens,
+                        "prompt_ms": round(prompt_ms, 3),
+                        "predicted_n": len(pieces),
+                        "predicted_ms": round(elapsed_ms - prompt_ms, 3),
+                    },
+                }
+                if (payload.get("stream_options") or {}).get("include_usage"):
+                    final["usage"] = {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(pieces),
+                        "total_tokens": prompt_tokens + len(pieces),
+                        "prompt_tokens_details": {"cached_tokens": cached_tokens},
+                    }
+                self._event(final)
+                self._event("[DONE]")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client stopped reading (e.g. early stop)
+            server._count(prompt_tokens, cached_tokens, len(pieces))
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--tokens-per-sec", type=float, default=MockLlamaConfig.tokens_per_sec)
+    parser.add_argument("--first-token-ms", type=float, default=MockLlamaConfig.first_token_ms)
+    parser.add_argument("--reply-tokens", type=int, default=MockLlamaConfig.reply_tokens)
+    parser.add_argument("--no-tool-calls", action="store_true")
+    parser.add_argument("--slots", type=int, default=MockLlamaConfig.slots)
+    args = parser.parse_args()
+    cfg = MockLlamaConfig(
+        tokens_per_sec=args.tokens_per_sec,
+        first_token_ms=args.first_token_ms,
+        reply_tokens=args.reply_tokens,
+        tool_calls=not args.no_tool_calls,
+        slots=max(1, args.slots),
+    )
+    server = MockLlamaServer(args.host, args.port, cfg)
+    print(f"mock llama-server on {server.url}", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
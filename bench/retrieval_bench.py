@@ -0,0 +1,330 @@
+"""Retrieval micro-benchmark and scaling suite.
+
+For each index size (default 1k / 10k / 100k synthetic entries, 20% tool
+exemplars and 80% RAG chunks) and each scoring backend in `BACKENDS`, the
+suite measures:
+
+- `build()` wall time, peak allocation during build and memory retained by
+  the built index (tracemalloc), plus the packed vector bytes;
+- `query()` and `query_split()` latency (dense and hybrid), p50/p95 over
+  `--queries` queries.
+
+Vectors are synthetic unit vectors generated once per size and served to the
+index through a lookup that replaces the embedder (returning fresh lists, as
+the HTTP client does), so the numbers isolate retrieval's own storage and
+scoring cost from embedding time.
+
+It also measures `chunk_rag_directory` throughput over a generated Markdown
+tree. The report is JSON (`--json`); `--compare OLD.json` prints the ratio
+of each metric to a previous report.
+
+    python3 -m bench.retrieval_bench --json retrieval.json
+    python3 -m bench.retrieval_bench --sizes 1000,10000 --compare retrieval.json
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from collections.abc import Callable
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+_ROOT = Path(__file__).resolve().parent.parent
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+
+from retrieval.index import KIND_RAG, KIND_TOOL, IndexEntry, RetrievalIndex  # noqa: E402
+from retrieval.rag_chunker import RagChunk, chunk_rag_directory  # noqa: E402
+from tracing import percentile  # noqa: E402
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_DIM = 384
+_N_TOOLS = 40
+
+# name -> factory returning an empty index exposing add/build/query/query_split.
+BACKENDS: dict[str, Callable[[], Any]] = {
+    "python": partial(RetrievalIndex, precision="f32"),
+    "f16": partial(RetrievalIndex, precision="f16"),
+    "int8": partial(RetrievalIndex, precision="int8"),
+}
+
+
+def _unit_vector(rng: random.Random, dim: int) -> list[float]:
+    vec = [rng.random() * 2.0 - 1.0 for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+def synthetic_corpus(size: int, dim: int, seed: int = 0) -> tuple[list[IndexEntry], dict[str, array]]:
+    """Entries plus a text -> vector table (tool exemplars ~20%, RAG chunks ~80%)."""
+    rng = random.Random(seed)
+    entries: list[IndexEntry] = []
+    vectors: dict[str, array] = {}
+    for i in range(size):
+        if i % 5 == 0:
+            text = f"tool exemplar {i} for tool_{i % _N_TOOLS}"
+            entry = IndexEntry(kind=KIND_TOOL, index_text=text, tool_name=f"tool_{i % _N_TOOLS}")
+        else:
+            doc = f"rag_data/doc_{i // 20}.md"
+            chunk = RagChunk(doc_path=doc, doc_title=f"Doc {i // 20}", section=f"Section {i % 20}",
+                             body=f"synthetic body text number {i} about linux usage")
+            entry = IndexEntry(kind=KIND_RAG, index_text=chunk.index_text, rag_chunk=chunk)
+        entries.append(entry)
+        vectors[entry.index_text] = array("d", _unit_vector(rng, dim))
+    return entries, vectors
+
+
+def _lookup_embedder(vectors: dict[str, array]) -> Callable[[Any], list[list[float]]]:
+    def embed(texts: Any, **_: Any) -> list[list[float]]:
+        # Fresh float lists, as the HTTP client returns, so memory is attributed to the index.
+        return [vectors[t].tolist() for t in texts]
+
+    return embed
+
+
+def _latency(fn: Callable[[], Any], runs: int) -> dict[str, float]:
+    samples = []
+    for _ in range(max(1, runs)):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return {
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "runs": len(samples),
+    }
+
+
+def bench_backend(
+    name: str,
+    factory: Callable[[], Any],
+    entries: list[IndexEntry],
+    vectors: dict[str, array],
+    queries: list[str],
+    *,
+    measure_memory: bool = True,
+) -> dict[str, Any]:
+    embed = _lookup_embedder(vectors)
+    with patch("retrieval.index.embed_batch", embed):
+        index = factory()
+        index.add_many(entries)
+        gc.collect()
+        t0 = time.perf_counter()
+        index.build()
+        build_ms = (time.perf_counter() - t0) * 1000.0
+
+        memory: dict[str, float] = {}
+        if measure_memory:
+            # Second build under tracemalloc (it slows allocation-heavy code).
+            del index
+            gc.collect()
+            tracemalloc.start()
+            index = factory()
+            index.add_many(entries)
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            index.build()
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory = {
+                "build_peak_kb": round((peak - base) / 1024.0, 1),
+                "retained_kb": round((retained - base) / 1024.0, 1),
+            }
+
+        query_iter = iter(queries * 2)
+        query = _latency(lambda: index.query(next(query_iter), k=8), len(queries))
+        split_iter = iter(queries * 2)
+        query_split = _latency(
+            lambda: index.query_split(next(split_iter), k_tools=4, k_rag=2, tool_threshold=0.1, rag_threshold=0.1),
+            len(queries),
+        )
+        hybrid_iter = iter(queries * 2)
+        query_hybrid = _latency(
+            lambda: index.query_split(
+                next(hybrid_iter), k_tools=4, k_rag=2, tool_threshold=0.1, rag_threshold=0.1, mode="hybrid"
+            ),
+            len(queries),
+        )
+    return {
+        "backend": name,
+        "size": len(entries),
+        "build_ms": round(build_ms, 2),
+        "vector_kb": round(getattr(index, "vector_bytes", 0) / 1024.0, 1),
+        **memory,
+        "query": query,
+        "query_split": query_split,
+        "query_hybrid": query_hybrid,
+    }
+
+
+def _write_markdown_tree(root: Path, files: int, sections: int) -> int:
+    total = 0
+    para = "Use the command line to inspect your system. " * 6
+    for f in range(files):
+        parts = [f"# Synthetic doc {f}\n\nOne line summary.\n"]
+        for s in range(sections):
+            parts.append(f"\n## Section {s}\n\n{para}\n\n```bash\nls -la /tmp/{f}/{s}\n```\n\n### Detail\n\n{para}\n")
+        text = "".join(parts)
+        (root / f"doc_{f:05d}.md").write_text(text, encoding="utf-8")
+        total += len(text.encode("utf-8"))
+    return total
+
+
+def bench_chunking(files: int, sections: int, runs: int = 3) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        total_bytes = _write_markdown_tree(root, files, sections)
+        chunks = chunk_rag_directory(root)
+        samples = []
+        for _ in range(max(1, runs)):
+            t0 = time.perf_counter()
+            chunk_rag_directory(root)
+            samples.append(time.perf_counter() - t0)
+    best = min(samples)
+    return {
+        "files": files,
+        "bytes": total_bytes,
+        "chunks": len(chunks),
+        "best_ms": round(best * 1000.0, 2),
+        "files_per_s": round(files / best, 1) if best else None,
+        "mb_per_s": round(total_bytes / best / 1e6, 2) if best else None,
+        "chunks_per_s": round(len(chunks) / best, 1) if best else None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=_ROOT, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_suite(
+    sizes: list[int],
+    backends: list[str],
+    *,
+    dim: int = DEFAULT_DIM,
+    queries: int = 20,
+    measure_memory: bool = True,
+    rag_files: int = 2000,
+    rag_sections: int = 6,
+) -> dict[str, Any]:
+    results = []
+    for size in sizes:
+        entries, vectors = synthetic_corpus(size, dim)
+        rng = random.Random(size)
+        query_texts = [f"benchmark query {i}" for i in range(max(1, queries))]
+        for q in query_texts:
+            vectors[q] = array("d", _unit_vector(rng, dim))
+        for name in backends:
+            results.append(
+                bench_backend(name, BACKENDS[name], entries, vectors, query_texts, measure_memory=measure_memory)
+            )
+            print(_format_row(results[-1]), flush=True)
+        del entries, vectors
+        gc.collect()
+    report: dict[str, Any] = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dim": dim,
+        },
+        "results": results,
+    }
+    if rag_files > 0:
+        report["rag_chunking"] = bench_chunking(rag_files, rag_sections)
+        c = report["rag_chunking"]
+        print(f"chunk_rag_directory: {c['files']} files, {c['chunks']} chunks in {c['best_ms']} ms "
+              f"({c['mb_per_s']} MB/s, {c['chunks_per_s']} chunks/s)", flush=True)
+    return report
+
+
+def _format_row(r: dict[str, Any]) -> str:
+    mem = f"  retained {r['retained_kb']:.0f} KiB" if "retained_kb" in r else ""
+    return (
+        f"{r['backend']:>8} n={r['size']:>7}  build {r['build_ms']:>9.1f} ms"
+        f"  query p50 {r['query']['p50_ms']:>8.2f} ms  split p50 {r['query_split']['p50_ms']:>8.2f} ms{mem}"
+    )
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> list[str]:
+    """Lines of new/old ratios for matching (backend, size) results."""
+    old_rows = {(r["backend"], r["size"]): r for r in old.get("results", [])}
+    lines = []
+    for r in new.get("results", []):
+        prev = old_rows.get((r["backend"], r["size"]))
+        if prev is None:
+            continue
+        parts = []
+        for label, get in (
+            ("build", lambda x: x.get("build_ms")),
+            ("query p50", lambda x: x["query"]["p50_ms"]),
+            ("split p50", lambda x: x["query_split"]["p50_ms"]),
+            ("retained", lambda x: x.get("retained_kb")),
+        ):
+            a, b = get(prev), get(r)
+            if a and b is not None:
+                parts.append(f"{label} x{b / a:.2f}")
+        lines.append(f"{r['backend']} n={r['size']}: " + ", ".join(parts))
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Retrieval micro-benchmark")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--backends", default=",".join(BACKENDS), help=f"any of: {', '.join(BACKENDS)}")
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc build pass")
+    parser.add_argument("--rag-files", type=int, default=2000, help="0 skips the chunking benchmark")
+    parser.add_argument("--json", type=Path, help="write the report here")
+    parser.add_argument("--compare", type=Path, help="previous report to compare against")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        parser.error("--sizes must be comma-separated integers")
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backend(s): {', '.join(unknown)}")
+
+    report = run_suite(
+        sizes,
+        backends,
+        dim=args.dim,
+        queries=args.queries,
+        measure_memory=not args.no_memory,
+        rag_files=args.rag_files,
+    )
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"report written to {args.json}")
+    if args.compare:
+        old = json.loads(args.compare.read_text(encoding="utf-8"))
+        for line in compare(old, report):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,14 @@ MEERA_EMBED_URL (default http://127.0.0.1:8081) and exposes /v1/embeddings.
 
 Vectors are L2-normalized so cosine similarity reduces to a dot product.
 
+Failed requests feed a circuit breaker: after MEERA_EMBED_BREAKER_FAILURES
+consecutive failures, calls fail fast with EmbeddingUnavailableError for
+MEERA_EMBED_COOLDOWN seconds, then a single trial request decides whether to
+close it again. Query-time callers pass a short `timeout` (query_timeout()).
+
+`aembed_batch` is the asyncio version of `embed_batch` (same chunking,
+breaker and errors) over the `async_http` transport.
+
 Test/dev: set MEERA_EMBED_FAKE=1 to use a deterministic hash-based fake embedder
 that does not require the embedding server to be running.
 """
@@ -16,13 +24,21 @@ import hashlib
 import math
 import os
 import struct
-from typing import Iterable
+import threading
+import time
+from typing import Any, Callable, Iterable
 
 import requests
 
+import async_http
+
 
 _FAKE_DIM = 384
+_DEFAULT_MODEL_FILE = "bge-small-en-v1.5-q8_0.gguf"
 _DEFAULT_TIMEOUT = 30.0
+_DEFAULT_QUERY_TIMEOUT = 5.0
+_DEFAULT_BREAKER_FAILURES = 3
+_DEFAULT_COOLDOWN = 30.0
 _DEFAULT_BATCH_SIZE = 128
 
 
@@ -42,6 +58,18 @@ def _model_name() -> str:
     return os.environ.get("MEERA_EMBED_MODEL", "local")
 
 
+def model_fingerprint() -> str:
+    """Identity of the vectors embed_batch() returns, for reusing stored embeddings.
+
+    Derived from configuration only (MEERA_EMBED_MODEL_FILE, the GGUF the
+    launcher starts), so it is known before the embedding server is up.
+    """
+    if _fake_enabled():
+        return f"fake-sha256-{_FAKE_DIM}"
+    name = os.environ.get("MEERA_EMBED_MODEL_FILE", "").strip() or _DEFAULT_MODEL_FILE
+    return f"{os.path.basename(name)}+l2"
+
+
 def _fake_enabled() -> bool:
     return os.environ.get("MEERA_EMBED_FAKE", "").strip().lower() in ("1", "true", "yes", "on")
 
@@ -61,6 +89,102 @@ def _batch_size() -> int:
     return max(1, n)
 
 
+def query_timeout() -> float:
+    """HTTP timeout for single query embeddings (MEERA_EMBED_QUERY_TIMEOUT, 0.1-30 s)."""
+    try:
+        value = float(os.environ.get("MEERA_EMBED_QUERY_TIMEOUT", str(_DEFAULT_QUERY_TIMEOUT)))
+    except ValueError:
+        return _DEFAULT_QUERY_TIMEOUT
+    return max(0.1, min(value, _DEFAULT_TIMEOUT))
+
+
+def _breaker_failures() -> int:
+    try:
+        n = int(os.environ.get("MEERA_EMBED_BREAKER_FAILURES", str(_DEFAULT_BREAKER_FAILURES)))
+    except ValueError:
+        return _DEFAULT_BREAKER_FAILURES
+    return max(1, min(n, 20))
+
+
+def _breaker_cooldown() -> float:
+    try:
+        value = float(os.environ.get("MEERA_EMBED_COOLDOWN", str(_DEFAULT_COOLDOWN)))
+    except ValueError:
+        return _DEFAULT_COOLDOWN
+    return max(0.0, min(value, 600.0))
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open (cool-down) → half-open → closed.
+
+    While open, allow() is False until the cool-down elapses; then exactly one
+    caller is let through as a trial and its outcome closes or re-opens the
+    breaker. A cool-down of 0 disables the breaker.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: Callable[[], int] = _breaker_failures,
+        cooldown_s: Callable[[], float] = _breaker_cooldown,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._failure_threshold = failure_threshold
+        self._cooldown_s = cooldown_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or self._clock() - self._opened_at < self._cooldown_s():
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or (self._failures >= self._failure_threshold() and self._cooldown_s() > 0):
+                self._opened_at = self._clock()
+            self._trial = False
+
+    def reset(self) -> None:
+        self.record_success()
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            if self._opened_at is None:
+                return {"state": "closed", "failures": self._failures}
+            remaining = self._cooldown_s() - (self._clock() - self._opened_at)
+            return {
+                "state": "half_open" if self._trial or remaining <= 0 else "open",
+                "failures": self._failures,
+                "retry_in_s": round(max(0.0, remaining), 1),
+            }
+
+
+_breaker = CircuitBreaker()
+
+
+def breaker_status() -> dict[str, Any]:
+    """Embedding-server circuit state: {"state": "closed"|"open"|"half_open", ...}."""
+    return _breaker.status()
+
+
+def reset_breaker() -> None:
+    _breaker.reset()
+
+
 def _l2_normalize(vec: list[float]) -> list[float]:
     norm = math.sqrt(sum(v * v for v in vec))
     if norm <= 0.0:
@@ -90,12 +214,12 @@ def _fake_embed_one(text: str) -> list[float]:
     return _l2_normalize(floats[:_FAKE_DIM])
 
 
-def _post_embed_chunk(items: list[str]) -> list[list[float]]:
+def _post_embed_chunk(items: list[str], timeout: float = _DEFAULT_TIMEOUT) -> list[list[float]]:
     """POST one chunk to /v1/embeddings and return one normalized vector per item."""
     url = f"{_base_url()}/v1/embeddings"
     payload = {"model": _model_name(), "input": items}
     try:
-        resp = requests.post(url, json=payload, timeout=_DEFAULT_TIMEOUT)
+        resp = requests.post(url, json=payload, timeout=timeout)
         resp.raise_for_status()
     except requests.exceptions.RequestException as exc:
         raise EmbeddingUnavailableError(
@@ -108,19 +232,36 @@ def _post_embed_chunk(items: list[str]) -> list[list[float]]:
         raise EmbeddingUnavailableError(
             f"Embedding server returned non-JSON response: {exc}"
         ) from exc
+    return _parse_embed_response(body, len(items))
 
+
+async def _apost_embed_chunk(items: list[str], timeout: float = _DEFAULT_TIMEOUT) -> list[list[float]]:
+    """_post_embed_chunk over the asyncio transport."""
+    url = f"{_base_url()}/v1/embeddings"
+    payload = {"model": _model_name(), "input": items}
+    try:
+        body = await async_http.post_json(url, payload, timeout=timeout)
+    except OSError as exc:  # async_http raises OSError for every transport and HTTP failure
+        raise EmbeddingUnavailableError(
+            f"Embedding server unreachable at {url}: {exc}"
+        ) from exc
+    return _parse_embed_response(body, len(items))
+
+
+def _parse_embed_response(body: Any, count: int) -> list[list[float]]:
+    """One normalized vector per input from a /v1/embeddings response body."""
     err = body.get("error") if isinstance(body, dict) else None
     if err is not None:
         msg = err if isinstance(err, str) else err.get("message", str(err))
         raise EmbeddingUnavailableError(f"Embedding server error: {msg}")
 
     data = body.get("data") if isinstance(body, dict) else None
-    if not isinstance(data, list) or len(data) != len(items):
+    if not isinstance(data, list) or len(data) != count:
         raise EmbeddingUnavailableError(
-            f"Embedding server returned malformed payload (expected {len(items)} items)"
+            f"Embedding server returned malformed payload (expected {count} items)"
         )
 
-    out: list[list[float]] = [None] * len(items)  # type: ignore[list-item]
+    out: list[list[float]] = [None] * count  # type: ignore[list-item]
     for entry in data:
         if not isinstance(entry, dict):
             raise EmbeddingUnavailableError("Embedding payload contains non-dict entry")
@@ -128,7 +269,7 @@ def _post_embed_chunk(items: list[str]) -> list[list[float]]:
         vec = entry.get("embedding")
         if not isinstance(idx, int) or not isinstance(vec, list):
             raise EmbeddingUnavailableError("Embedding payload missing index/embedding")
-        if idx < 0 or idx >= len(items):
+        if idx < 0 or idx >= count:
             raise EmbeddingUnavailableError(f"Embedding index out of range: {idx}")
         try:
             floats = [float(v) for v in vec]
@@ -141,25 +282,64 @@ def _post_embed_chunk(items: list[str]) -> list[list[float]]:
     return out  # type: ignore[return-value]
 
 
-def embed_batch(texts: Iterable[str]) -> list[list[float]]:
+def _prepare_batch(texts: Iterable[str]) -> tuple[list[str], list[list[float]] | None]:
+    """Inputs as strings, plus the answer when no request is needed (empty or fake)."""
+    items = [t if isinstance(t, str) else str(t) for t in texts]
+    if not items:
+        return items, []
+    if _fake_enabled():
+        return items, [_fake_embed_one(t) for t in items]
+    if not _breaker.allow():
+        retry = _breaker.status().get("retry_in_s", 0.0)
+        raise EmbeddingUnavailableError(
+            f"Embedding server marked unhealthy; not retrying for {retry:.0f}s"
+        )
+    return items, None
+
+
+def embed_batch(texts: Iterable[str], *, timeout: float | None = None) -> list[list[float]]:
     """Return one L2-normalized vector per input text, in the same order.
 
     Inputs are split into chunks of MEERA_EMBED_BATCH_SIZE (default 128) and
     POSTed sequentially, then concatenated. This keeps each /v1/embeddings
     request well within llama-server's parallel-slot budget regardless of how
     many tools / RAG chunks the index has accumulated.
+
+    `timeout` is the per-request HTTP timeout (default 30 s). Raises
+    EmbeddingUnavailableError immediately while the circuit breaker is open.
+    A call that does not finish, for whatever reason, counts as a failure.
     """
-    items = [t if isinstance(t, str) else str(t) for t in texts]
-    if not items:
-        return []
+    items, ready = _prepare_batch(texts)
+    if ready is not None:
+        return ready
+    chunk = _batch_size()
+    out: list[list[float]] = []
+    try:
+        for start in range(0, len(items), chunk):
+            out.extend(_post_embed_chunk(items[start : start + chunk], timeout or _DEFAULT_TIMEOUT))
+    except BaseException:
+        # Any unfinished call counts, or a half-open trial would never be released.
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
+    return out
 
-    if _fake_enabled():
-        return [_fake_embed_one(t) for t in items]
 
+async def aembed_batch(texts: Iterable[str], *, timeout: float | None = None) -> list[list[float]]:
+    """embed_batch for asyncio: same chunking, breaker and errors, without blocking the loop."""
+    items, ready = _prepare_batch(texts)
+    if ready is not None:
+        return ready
     chunk = _batch_size()
     out: list[list[float]] = []
-    for start in range(0, len(items), chunk):
-        out.extend(_post_embed_chunk(items[start : start + chunk]))
+    try:
+        for start in range(0, len(items), chunk):
+            out.extend(await _apost_embed_chunk(items[start : start + chunk], timeout or _DEFAULT_TIMEOUT))
+    except BaseException:
+        # Including cancellation (a caller's deadline): it must release a half-open trial.
+        _breaker.record_failure()
+        raise
+    _breaker.record_success()
     return out
 
 
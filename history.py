@@ -1,10 +1,95 @@
+"""Chat session storage.
+
+Each session is an append-only JSONL file (one message per line) under the
+history directory. A small SQLite index next to the files keeps per-session
+metadata (timestamp, message count, title) plus the byte size and a digest of
+the last stored message, so:
+
+- saving a conversation only appends the messages added since the last save;
+- listing sessions reads the index and never opens the session files.
+
+The same database holds a full-text index of every stored message (SQLite
+FTS5, or a plain table searched with LIKE where FTS5 is unavailable), used by
+`search_history`. Message rows use `session_rowid << 20 | position` as their
+rowid, so a session's messages can be dropped with one range delete.
+
+Sessions saved by older versions as a single JSON document are migrated into
+this layout the first time the index is created.
+
+`SessionAutosaver` runs `save_session` on a background thread, debounced,
+so the UI never blocks on disk I/O and a crash loses at most the last turn.
+
+`SessionTitler` asks the model for a short title once a session has its first
+reply, as background work (`inference.complete_background`). Generated titles
+live in their own table and replace the last-user-message title in listings.
+"""
 import os
+import re
 import json
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
-# Maximum number of sessions to keep
-MAX_SESSIONS = 10
+def _max_sessions_from_env():
+    try:
+        return max(0, int(os.environ.get("MEERA_HISTORY_MAX_SESSIONS", "0")))
+    except ValueError:
+        return 0
+
+# Maximum number of sessions to keep (0 = keep all)
+MAX_SESSIONS = _max_sessions_from_env()
+
+SESSION_SUFFIX = ".jsonl"
+LEGACY_SESSION_SUFFIX = ".json"
+INDEX_FILENAME = "index.sqlite3"
+# Characters of the last user message kept as the session title.
+TITLE_MAX_CHARS = 120
+# Bumped when the index layout changes; older indexes are backfilled.
+INDEX_SCHEMA_VERSION = 2
+_POSITION_BITS = 20
+_POSITION_MASK = (1 << _POSITION_BITS) - 1
+# Lexical candidates re-ranked by embeddings in semantic search.
+_SEMANTIC_CANDIDATES = 200
+# A generated title (session_labels) wins over the last user message.
+_TITLE_SQL = "COALESCE(NULLIF(label, ''), title)"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    filename TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    message_count INTEGER NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    size INTEGER NOT NULL DEFAULT 0,
+    tail TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS sessions_by_time ON sessions(timestamp);
+CREATE TABLE IF NOT EXISTS session_labels (
+    filename TEXT PRIMARY KEY,
+    label TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS message_vectors (
+    id INTEGER PRIMARY KEY,
+    vec BLOB NOT NULL
+);
+"""
+_FTS_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5("
+    "content, role UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+)
+_PLAIN_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS messages ("
+    "id INTEGER PRIMARY KEY, content TEXT NOT NULL, role TEXT NOT NULL)"
+)
+
+def _history_semantic_enabled():
+    v = os.environ.get("MEERA_HISTORY_SEMANTIC", "").strip().lower()
+    return v in ("1", "true", "yes", "on")
 
 def get_history_dir():
     """Get the directory where chat history is stored."""
@@ -14,122 +99,676 @@ def get_history_dir():
     os.makedirs(history_dir, exist_ok=True)
     return history_dir
 
+def _encode_message(message):
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+def _digest(encoded_line):
+    return hashlib.sha1(encoded_line).hexdigest()
+
+def _session_title(messages):
+    for msg in reversed(messages):
+        if msg.get("role") == "user" and msg.get("content"):
+            return str(msg["content"])[:TITLE_MAX_CHARS]
+    return ""
+
+def _new_session_filename(timestamp):
+    # Generate filename from timestamp (sanitized)
+    return timestamp.replace(":", "-").replace(".", "-") + SESSION_SUFFIX
+
+def new_session_path():
+    """Allocate the file path for a session that has not been saved yet."""
+    return os.path.join(get_history_dir(), _new_session_filename(datetime.now().isoformat()))
+
+@contextmanager
+def _open_index(history_dir):
+    """Open (creating and populating if needed) the session index; commits on exit."""
+    path = os.path.join(history_dir, INDEX_FILENAME)
+    created = not os.path.exists(path)
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        conn.executescript(_SCHEMA)
+        try:
+            conn.execute(_FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            conn.execute(_PLAIN_SCHEMA)  # SQLite built without FTS5
+        if created:
+            _rebuild_index(conn, history_dir)
+        elif conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_SCHEMA_VERSION:
+            _backfill_search_index(conn, history_dir)
+        conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+def _write_session_file(filepath, messages):
+    """Atomically (re)write a whole session file. Returns (size, tail digest)."""
+    lines = [_encode_message(m) for m in messages]
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.writelines(lines)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+    return sum(len(line) for line in lines), (_digest(lines[-1]) if lines else "")
+
+def _uses_fts(conn):
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'messages'").fetchone()
+    return bool(row and "fts5" in (row[0] or "").lower())
+
+def _upsert(conn, filename, timestamp, messages, size, tail, indexed_count=0):
+    """Record session metadata and add messages[indexed_count:] to the search index."""
+    conn.execute(
+        "INSERT INTO sessions (filename, timestamp, message_count, title, size, tail)"
+        " VALUES (?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT(filename) DO UPDATE SET timestamp = excluded.timestamp,"
+        " message_count = excluded.message_count, title = excluded.title,"
+        " size = excluded.size, tail = excluded.tail",
+        (filename, timestamp, len(messages), _session_title(messages), size, tail),
+    )
+    (session_rowid,) = conn.execute(
+        "SELECT rowid FROM sessions WHERE filename = ?", (filename,)
+    ).fetchone()
+    if indexed_count == 0:
+        _unindex_session(conn, session_rowid)
+    conn.executemany(
+        "INSERT INTO messages (rowid, content, role) VALUES (?, ?, ?)",
+        [
+            ((session_rowid << _POSITION_BITS) | position, msg["content"], str(msg.get("role") or ""))
+            for position, msg in enumerate(messages[indexed_count:], start=indexed_count)
+            if position <= _POSITION_MASK and isinstance(msg.get("content"), str) and msg["content"]
+        ],
+    )
+
+def _unindex_session(conn, session_rowid):
+    low = session_rowid << _POSITION_BITS
+    high = low | _POSITION_MASK
+    conn.execute("DELETE FROM messages WHERE rowid BETWEEN ? AND ?", (low, high))
+    conn.execute("DELETE FROM message_vectors WHERE id BETWEEN ? AND ?", (low, high))
+
+def _backfill_search_index(conn, history_dir):
+    """Index message bodies for sessions recorded before search existed."""
+    for filename, timestamp, size, tail in conn.execute(
+        "SELECT filename, timestamp, size, tail FROM sessions"
+    ).fetchall():
+        messages = load_session(os.path.join(history_dir, filename))
+        if messages:
+            _upsert(conn, filename, timestamp, messages, size, tail)
+
+def _rebuild_index(conn, history_dir):
+    """Index existing JSONL sessions and migrate legacy whole-JSON sessions."""
+    try:
+        filenames = sorted(os.listdir(history_dir))
+    except OSError:
+        return
+    for filename in filenames:
+        filepath = os.path.join(history_dir, filename)
+        if filename.endswith(SESSION_SUFFIX):
+            messages = load_session(filepath)
+            if messages is None:
+                continue
+            timestamp = datetime.fromtimestamp(os.path.getmtime(filepath)).isoformat()
+            size, tail = _write_session_file(filepath, messages)
+            _upsert(conn, filename, timestamp, messages, size, tail)
+        elif filename.endswith(LEGACY_SESSION_SUFFIX):
+            try:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    session_data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue  # Skip corrupted files
+            messages = session_data.get("messages", []) if isinstance(session_data, dict) else []
+            if not messages:
+                continue
+            timestamp = session_data.get("timestamp") or datetime.now().isoformat()
+            new_name = filename[: -len(LEGACY_SESSION_SUFFIX)] + SESSION_SUFFIX
+            size, tail = _write_session_file(os.path.join(history_dir, new_name), messages)
+            _upsert(conn, new_name, timestamp, messages, size, tail)
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+    cleanup_old_sessions(history_dir, conn)
+
 def save_session(conversation_history, filepath=None):
     """
     Save a conversation session to disk.
-    
+
+    When `filepath` is a session previously returned by this function and
+    `conversation_history` extends what was saved, only the new messages are
+    appended; otherwise the file is rewritten atomically.
+
     Args:
         conversation_history: List of message dicts with 'role' and 'content'
-        filepath: Optional existing session filepath to overwrite
-    
+        filepath: Optional existing session filepath to update
+
     Returns:
-        Path to the saved session file
+        Path to the saved session file (may differ from `filepath` when a
+        legacy .json session is migrated)
     """
     if not conversation_history:
         # Don't save empty sessions
         return None
-    
+
     history_dir = get_history_dir()
 
     # Always refresh timestamp so updated sessions sort to the top.
     timestamp = datetime.now().isoformat()
-    session_data = {
-        "timestamp": timestamp,
-        "messages": conversation_history
-    }
-
+    legacy_path = None
+    if filepath and not filepath.endswith(SESSION_SUFFIX):
+        legacy_path = filepath
+        filepath = None
     if not filepath:
-        # Generate filename from timestamp (sanitized)
-        filename = timestamp.replace(":", "-").replace(".", "-") + ".json"
-        filepath = os.path.join(history_dir, filename)
+        filepath = os.path.join(history_dir, _new_session_filename(timestamp))
+    filename = os.path.basename(filepath)
+
+    with _open_index(history_dir) as conn:
+        row = conn.execute(
+            "SELECT message_count, size, tail FROM sessions WHERE filename = ?",
+            (filename,),
+        ).fetchone()
+
+        appended = False
+        indexed_count = 0
+        if row is not None:
+            stored_count, size, tail = row
+            if 0 < stored_count <= len(conversation_history) and os.path.exists(filepath):
+                if _digest(_encode_message(conversation_history[stored_count - 1])) == tail:
+                    # Drop any partial line left by an interrupted append.
+                    if os.path.getsize(filepath) > size:
+                        os.truncate(filepath, size)
+                    new_lines = [_encode_message(m) for m in conversation_history[stored_count:]]
+                    if new_lines:
+                        with open(filepath, "ab") as f:
+                            f.writelines(new_lines)
+                        size += sum(len(line) for line in new_lines)
+                        tail = _digest(new_lines[-1])
+                    appended = True
+                    indexed_count = stored_count
+        if not appended:
+            size, tail = _write_session_file(filepath, conversation_history)
+
+        _upsert(conn, filename, timestamp, conversation_history, size, tail, indexed_count)
+        # Clean up old sessions (keep only last MAX_SESSIONS, if set)
+        cleanup_old_sessions(history_dir, conn)
+
+    if legacy_path:
+        try:
+            os.remove(legacy_path)
+        except OSError:
+            pass
 
-    # Save session
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(session_data, f, indent=2, ensure_ascii=False)
-    
-    # Clean up old sessions (keep only last MAX_SESSIONS)
-    cleanup_old_sessions(history_dir)
-    
     return filepath
 
-def cleanup_old_sessions(history_dir):
+def cleanup_old_sessions(history_dir, conn=None):
     """
-    Remove old sessions, keeping only the last MAX_SESSIONS.
-    
+    Remove old sessions, keeping only the last MAX_SESSIONS (0 keeps all).
+
     Args:
         history_dir: Directory containing session files
+        conn: Open index connection (one is opened when omitted)
     """
-    try:
-        # Get all session files
-        session_files = []
-        for filename in os.listdir(history_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(history_dir, filename)
-                # Get modification time as a way to sort
-                mtime = os.path.getmtime(filepath)
-                session_files.append((mtime, filepath))
-        
-        # Sort by modification time (oldest first)
-        session_files.sort(key=lambda x: x[0])
-        
-        # Delete oldest sessions if we have more than MAX_SESSIONS
-        if len(session_files) > MAX_SESSIONS:
-            files_to_delete = session_files[:-MAX_SESSIONS]  # All except last MAX_SESSIONS
-            for _, filepath in files_to_delete:
-                try:
-                    os.remove(filepath)
-                except OSError:
-                    pass  # Ignore errors when deleting
-    except OSError:
-        pass  # Ignore errors if directory doesn't exist or can't be read
+    if conn is None:
+        with _open_index(history_dir) as own_conn:
+            cleanup_old_sessions(history_dir, own_conn)
+        return
+    if MAX_SESSIONS <= 0:
+        return
+    stale = conn.execute(
+        "SELECT rowid, filename FROM sessions ORDER BY timestamp DESC LIMIT -1 OFFSET ?",
+        (MAX_SESSIONS,),
+    ).fetchall()
+    for session_rowid, filename in stale:
+        try:
+            os.remove(os.path.join(history_dir, filename))
+        except OSError:
+            pass  # Ignore errors when deleting
+        _unindex_session(conn, session_rowid)
+        conn.execute("DELETE FROM sessions WHERE rowid = ?", (session_rowid,))
+        conn.execute("DELETE FROM session_labels WHERE filename = ?", (filename,))
 
 def list_sessions():
     """
     List all saved sessions, sorted by timestamp (newest first).
-    
+
+    Reads only the metadata index; session files are not opened.
+
     Returns:
-        List of dicts with 'timestamp', 'filepath', and 'message_count'
+        List of dicts with 'timestamp', 'filepath', 'message_count' and
+        'title' (the generated title, else the last user message, up to
+        TITLE_MAX_CHARS characters)
     """
     history_dir = get_history_dir()
-    sessions = []
-    
     try:
-        for filename in os.listdir(history_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(history_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        session_data = json.load(f)
-                    
-                    sessions.append({
-                        "timestamp": session_data.get("timestamp", ""),
-                        "filepath": filepath,
-                        "message_count": len(session_data.get("messages", []))
-                    })
-                except (json.JSONDecodeError, KeyError):
-                    continue  # Skip corrupted files
-        
-        # Sort by timestamp (newest first)
-        sessions.sort(key=lambda x: x["timestamp"], reverse=True)
-    except OSError:
-        pass  # Directory doesn't exist yet
-    
-    return sessions
+        with _open_index(history_dir) as conn:
+            rows = conn.execute(
+                f"SELECT filename, timestamp, message_count, {_TITLE_SQL} FROM sessions"
+                " LEFT JOIN session_labels USING (filename)"
+                " ORDER BY timestamp DESC"
+            ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [
+        {
+            "timestamp": timestamp,
+            "filepath": os.path.join(history_dir, filename),
+            "message_count": message_count,
+            "title": title,
+        }
+        for filename, timestamp, message_count, title in rows
+    ]
 
 def load_session(filepath):
     """
     Load a session from disk.
-    
+
     Args:
-        filepath: Path to the session file
-    
+        filepath: Path to the session file (.jsonl, or legacy .json)
+
     Returns:
         List of message dicts, or None if file doesn't exist or is invalid
     """
+    if filepath.endswith(LEGACY_SESSION_SUFFIX):
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                session_data = json.load(f)
+            return session_data.get("messages", [])
+        except (OSError, json.JSONDecodeError, KeyError, AttributeError):
+            return None
+
+    messages = []
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            session_data = json.load(f)
-        return session_data.get("messages", [])
-    except (OSError, json.JSONDecodeError, KeyError):
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Truncated last line from an interrupted write
+                if isinstance(message, dict):
+                    messages.append(message)
+    except (OSError, UnicodeDecodeError):
         return None
+    return messages
+
+def set_session_label(filepath, label):
+    """Store a generated title for the session at `filepath` (empty clears it)."""
+    with _open_index(get_history_dir()) as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO session_labels (filename, label) VALUES (?, ?)",
+            (os.path.basename(filepath), label[:TITLE_MAX_CHARS]),
+        )
+
+def session_label(filepath):
+    """The generated title of the session at `filepath`, or ''."""
+    try:
+        with _open_index(get_history_dir()) as conn:
+            row = conn.execute(
+                "SELECT label FROM session_labels WHERE filename = ?",
+                (os.path.basename(filepath),),
+            ).fetchone()
+    except sqlite3.Error:
+        return ""
+    return row[0] if row else ""
+
+def _query_terms(query):
+    return [t for t in re.findall(r"\w+", query.lower()) if t]
+
+def _plain_snippet(content, terms, width=80):
+    lowered = content.lower()
+    hit = min((i for i in (lowered.find(t) for t in terms) if i >= 0), default=0)
+    start = max(0, hit - width // 3)
+    snippet = content[start:start + width].replace("\n", " ")
+    return ("…" if start > 0 else "") + snippet + ("…" if start + width < len(content) else "")
+
+def _escape_like(term):
+    """Match `term` literally in a LIKE pattern (ESCAPE '\\')."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _lexical_candidates(conn, terms, limit, match_any=False):
+    """Return [(rowid, role, snippet)] best-first."""
+    if _uses_fts(conn):
+        # Quote each term (no FTS query syntax from user input); prefix-match it.
+        joiner = " OR " if match_any else " "
+        match = joiner.join('"' + t.replace('"', '""') + '"*' for t in terms)
+        return conn.execute(
+            "SELECT rowid, role, snippet(messages, 0, '', '', '…', 12) FROM messages"
+            " WHERE messages MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit),
+        ).fetchall()
+    clauses = " OR " if match_any else " AND "
+    where = clauses.join("content LIKE ? ESCAPE '\\'" for _ in terms)
+    rows = conn.execute(
+        f"SELECT id, role, content FROM messages WHERE {where} ORDER BY id DESC LIMIT ?",
+        [f"%{_escape_like(t)}%" for t in terms] + [limit],
+    ).fetchall()
+    return [(rowid, role, _plain_snippet(content, terms)) for rowid, role, content in rows]
+
+def _semantic_rerank(conn, query, candidates):
+    """Order candidates by embedding similarity; caches message vectors in the index."""
+    import embeddings  # Optional: only needed when semantic search is requested
+
+    rowids = [c[0] for c in candidates]
+    cached = {}
+    for start in range(0, len(rowids), 500):
+        chunk = rowids[start:start + 500]
+        marks = ",".join("?" * len(chunk))
+        for rowid, blob in conn.execute(
+            f"SELECT id, vec FROM message_vectors WHERE id IN ({marks})", chunk
+        ):
+            vec = array("f")
+            vec.frombytes(blob)
+            cached[rowid] = vec
+    missing = [r for r in rowids if r not in cached]
+    if missing:
+        texts = {}
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            texts.update(conn.execute(
+                f"SELECT rowid, content FROM messages WHERE rowid IN ({marks})", chunk
+            ).fetchall())
+        vectors = embeddings.embed_batch([texts.get(r, "") for r in missing])
+        for rowid, values in zip(missing, vectors):
+            vec = array("f", values)
+            cached[rowid] = vec
+            conn.execute(
+                "INSERT OR REPLACE INTO message_vectors (id, vec) VALUES (?, ?)",
+                (rowid, vec.tobytes()),
+            )
+    query_vec = embeddings.embed_one(query)
+
+    def score(candidate):
+        vec = cached.get(candidate[0])
+        return sum(a * b for a, b in zip(query_vec, vec)) if vec is not None else -1.0
+
+    return sorted(candidates, key=score, reverse=True)
+
+def search_history(query, limit=20, semantic=None):
+    """
+    Search message text across all saved sessions.
+
+    Every word in `query` must match (prefix match, case/diacritic
+    insensitive), best matches first. With `semantic` (default: the
+    MEERA_HISTORY_SEMANTIC env var), messages matching any word are instead
+    re-ranked by embedding similarity to the query; if the embedding server
+    is unavailable the lexical ranking is used.
+
+    Args:
+        query: Free-text search string
+        limit: Maximum number of results
+        semantic: Re-rank with embeddings (None = follow the env var)
+
+    Returns:
+        List of dicts with 'filepath', 'timestamp', 'title', 'role',
+        'position' (message index in the session) and 'snippet'
+    """
+    terms = _query_terms(query or "")
+    if not terms or limit <= 0:
+        return []
+    if semantic is None:
+        semantic = _history_semantic_enabled()
+
+    history_dir = get_history_dir()
+    try:
+        with _open_index(history_dir) as conn:
+            if semantic:
+                candidates = _lexical_candidates(conn, terms, _SEMANTIC_CANDIDATES, match_any=True)
+                try:
+                    candidates = _semantic_rerank(conn, query, candidates)
+                except Exception:
+                    candidates = _lexical_candidates(conn, terms, limit)
+            else:
+                candidates = _lexical_candidates(conn, terms, limit)
+            candidates = candidates[:limit]
+            sessions = {}
+            for session_rowid in {rowid >> _POSITION_BITS for rowid, _, _ in candidates}:
+                row = conn.execute(
+                    f"SELECT filename, timestamp, {_TITLE_SQL} FROM sessions"
+                    " LEFT JOIN session_labels USING (filename) WHERE sessions.rowid = ?",
+                    (session_rowid,),
+                ).fetchone()
+                if row is not None:
+                    sessions[session_rowid] = row
+    except sqlite3.Error:
+        return []
+
+    results = []
+    for rowid, role, snippet in candidates:
+        session = sessions.get(rowid >> _POSITION_BITS)
+        if session is None:
+            continue
+        filename, timestamp, title = session
+        results.append({
+            "filepath": os.path.join(history_dir, filename),
+            "timestamp": timestamp,
+            "title": title,
+            "role": role,
+            "position": rowid & _POSITION_MASK,
+            "snippet": snippet,
+        })
+    return results
+
+
+def _autosave_delay_from_env():
+    try:
+        return max(0.0, min(60.0, float(os.environ.get("MEERA_AUTOSAVE_DELAY", "1.0"))))
+    except ValueError:
+        return 1.0
+
+class SessionAutosaver:
+    """
+    Debounced background writer for chat sessions.
+
+    `schedule()` snapshots the conversation and returns immediately; the
+    writer thread saves it once no newer snapshot for the same session has
+    arrived for `delay` seconds. `flush()` writes everything pending now and
+    waits for it, for use on exit and before reading sessions back: `load()`
+    does that, so a session whose save is still pending never loads stale.
+    """
+
+    def __init__(self, delay=None):
+        self.delay = _autosave_delay_from_env() if delay is None else max(0.0, float(delay))
+        self._cond = threading.Condition()
+        self._pending = {}  # filepath -> (due monotonic time, message snapshot)
+        self._writing = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="meera-autosave", daemon=True)
+        self._thread.start()
+
+    def schedule(self, conversation_history, filepath):
+        """
+        Queue a save of `conversation_history` to `filepath`.
+
+        Args:
+            conversation_history: List of message dicts (copied here)
+            filepath: Session path, e.g. from new_session_path()
+        """
+        if not conversation_history or not filepath:
+            return
+        with self._cond:
+            if self._closed:
+                return
+            self._pending[filepath] = (time.monotonic() + self.delay, list(conversation_history))
+            self._cond.notify_all()
+
+    def flush(self, timeout=10.0):
+        """Write all pending sessions now and wait; True when nothing is left."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._pending = {path: (0.0, snap) for path, (_, snap) in self._pending.items()}
+            self._cond.notify_all()
+            while self._pending or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def load(self, filepath, timeout=10.0):
+        """load_session(filepath) after writing every pending save."""
+        if not self.flush(timeout):
+            print(f"[history] pending saves not written before loading {filepath}", file=sys.stderr)
+        return load_session(filepath)
+
+    def close(self, timeout=10.0):
+        """Flush and stop the writer thread."""
+        done = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return done
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed and not self._pending:
+                        return
+                    now = time.monotonic()
+                    due = [path for path, (at, _) in self._pending.items() if at <= now]
+                    if due:
+                        break
+                    wait = min((at for at, _ in self._pending.values()), default=None)
+                    self._cond.wait(None if wait is None else wait - now)
+                batch = [(path, self._pending.pop(path)[1]) for path in due]
+                self._writing = True
+            try:
+                for path, messages in batch:
+                    try:
+                        save_session(messages, path)
+                    except (OSError, sqlite3.Error) as e:
+                        print(f"[history] autosave failed for {path}: {e}", file=sys.stderr)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+
+
+_TITLE_PROMPT = (
+    "Write a title of at most six words for the conversation below. "
+    "Reply with the title only."
+)
+# Characters of each opening message shown to the model when titling.
+_TITLE_CONTEXT_CHARS = 800
+_TITLE_MAX_TOKENS = 24
+
+def _title_messages(messages):
+    """Prompt for titling: the first question and the first reply to it."""
+    opening = []
+    for role in ("user", "assistant"):
+        msg = next((m for m in messages if m.get("role") == role and m.get("content")), None)
+        if msg is not None:
+            opening.append(f"{role}: {str(msg['content'])[:_TITLE_CONTEXT_CHARS]}")
+    return [
+        {"role": "system", "content": _TITLE_PROMPT},
+        {"role": "user", "content": "\n\n".join(opening)},
+    ]
+
+def _clean_title(text):
+    line = next((ln.strip() for ln in (text or "").splitlines() if ln.strip()), "")
+    return line.strip("\"'*#` ").rstrip(".").strip()[:TITLE_MAX_CHARS]
+
+class SessionTitler:
+    """
+    Background titles for chat sessions.
+
+    `request()` queues a session once it has a reply; a worker thread asks
+    `complete` (default: `inference.complete_background`) for a short title
+    and stores it with set_session_label(). A session is titled once. When
+    the server has no slot to spare, or an interactive turn preempts the
+    call, the session stays untitled and the next request() tries again.
+    """
+
+    def __init__(self, complete=None):
+        self._complete = complete
+        self._cond = threading.Condition()
+        self._pending = {}  # filepath -> message snapshot
+        self._titled = set()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="meera-titles", daemon=True)
+        self._thread.start()
+
+    def request(self, conversation_history, filepath):
+        """
+        Queue `filepath` for titling unless it already has a title.
+
+        Args:
+            conversation_history: List of message dicts (copied here)
+            filepath: Session path the title is stored for
+        """
+        if not filepath or not any(
+            m.get("role") == "assistant" and m.get("content") for m in conversation_history or []
+        ):
+            return
+        with self._cond:
+            if self._closed or filepath in self._titled:
+                return
+            self._pending[filepath] = list(conversation_history)
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=10.0):
+        """Wait until no request is queued or running; True when idle."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=1.0):
+        """Drop queued requests and stop the worker (a running call is not waited for long)."""
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                filepath, messages = self._pending.popitem()
+                self._busy = True
+            try:
+                if self._title(filepath, messages):
+                    with self._cond:
+                        self._titled.add(filepath)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _title(self, filepath, messages):
+        """Generate and store a title; True once the session has one."""
+        from slot_scheduler import BackgroundUnavailable
 
+        if session_label(filepath):
+            return True
+        complete = self._complete
+        if complete is None:
+            from inference import complete_background as complete
+        try:
+            title = _clean_title(complete(_title_messages(messages), max_tokens=_TITLE_MAX_TOKENS))
+        except BackgroundUnavailable:
+            return False  # No slot to spare, or preempted: retried on the next request
+        except Exception as e:
+            print(f"[history] title generation failed for {filepath}: {e}", file=sys.stderr)
+            return False
+        if not title:
+            return False
+        try:
+            set_session_label(filepath, title)
+        except (OSError, sqlite3.Error) as e:
+            print(f"[history] saving title failed for {filepath}: {e}", file=sys.stderr)
+            return False
+        return True
@@ -7,46 +7,221 @@ Dispatch chat streaming to Ollama or llama.cpp (llama-server) based on MEERA_BAC
 Native tool calling (`tools` / `tool_choice`) is implemented for the llama.cpp
 backend only. The Ollama backend silently ignores those args (callers fall back
 to chat-only mode).
+
+Each call takes a `GenerationPolicy`. llama.cpp calls go through the
+`slot_scheduler`: interactive calls (the default) are pinned to the
+conversation slot (MEERA_LLAMACPP_SLOT, default 0) with prompt caching on,
+so a follow-up pass only prefills what it appended to the previous pass's
+prompt; background calls (`background_policy()`, `complete_background()`)
+use the other slots (none on a single-slot server) and give way while the
+user waits on a stream.
+Answers get the full token budget
+(MEERA_MAX_TOKENS). Tool-calling ("routing") passes keep that budget for
+any text they stream to the user, but stop reading as soon as one complete
+tool call has arrived, and read at most MEERA_TOOL_CALL_MAX_TOKENS tokens of
+tool-call output (counted as streamed chunks); a call cut off by that cap
+is dropped, not run.
+
+`astream_llm_events` is the asyncio API: the same events, policies and
+slot scheduling, so one event loop can overlap model calls with
+`embeddings.aembed_batch` and `tools.runner.arun_tool`; the agent turn
+(`agent.arun_agent_turn`) uses it. llama.cpp calls go over a non-blocking
+transport; the Ollama backend runs its blocking stream on a worker thread.
+`stream_llm_events` remains the API for threads.
 """
 from __future__ import annotations
 
+import asyncio
 import os
-from collections.abc import Iterator
-from typing import Any
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+import slot_scheduler
+import tracing
+from slot_scheduler import BACKGROUND, INTERACTIVE, BackgroundUnavailable, Preempted
+from tracing import atraced_stream, traced_stream
+
+_T = TypeVar("_T")
 
 
 def _backend_mode() -> str:
     return os.environ.get("MEERA_BACKEND", "llamacpp").strip().lower()
 
 
+@dataclass(frozen=True, slots=True)
+class GenerationPolicy:
+    """How much one model call may generate, when to stop reading it, and its priority."""
+    max_tokens: int = 1024
+    stop_after_tool_call: bool = False
+    tool_call_tokens: int | None = None  # cap on tool-call SSE chunks (≈ tokens) read (None: no cap)
+    priority: str = INTERACTIVE  # INTERACTIVE or BACKGROUND (see slot_scheduler)
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        value = int(os.environ.get(name, "") or default)
+    except ValueError:
+        value = default
+    return max(lo, min(value, hi))
+
+
+def conversation_slot() -> int | None:
+    """Server slot whose KV cache holds the conversation (None with MEERA_LLAMACPP_SLOT=auto)."""
+    raw = os.environ.get("MEERA_LLAMACPP_SLOT", "").strip().lower()
+    if raw in ("auto", "-1"):
+        return None
+    try:
+        return max(0, int(raw or 0))
+    except ValueError:
+        return 0
+
+
+def answer_policy() -> GenerationPolicy:
+    """Budget for passes whose output is the reply the user reads."""
+    return GenerationPolicy(max_tokens=_env_int("MEERA_MAX_TOKENS", 1024, 64, 8192))
+
+
+def background_policy(max_tokens: int = 256) -> GenerationPolicy:
+    """Work the user is not waiting on: other slots, preempted by interactive calls.
+
+    Used by complete_background() (session titles, history.SessionTitler).
+    """
+    return GenerationPolicy(max_tokens=max_tokens, priority=BACKGROUND)
+
+
+def routing_policy() -> GenerationPolicy:
+    """Tool-calling pass: full budget for text, early stop once a call is complete."""
+    return GenerationPolicy(
+        max_tokens=_env_int("MEERA_MAX_TOKENS", 1024, 64, 8192),
+        stop_after_tool_call=True,
+        tool_call_tokens=_env_int("MEERA_TOOL_CALL_MAX_TOKENS", 256, 16, 4096),
+    )
+
+
 def supports_tools() -> bool:
     """True when the active backend can handle native tool calling."""
     return _backend_mode() == "llamacpp"
 
 
+def _scheduler() -> slot_scheduler.SlotScheduler:
+    from llamacpp_backend import _base_url
+
+    return slot_scheduler.get_default(_base_url(), conversation_slot())
+
+
 def stream_llm(messages: list) -> Iterator[str]:
     mode = _backend_mode()
     if mode == "llamacpp":
         from llamacpp_backend import stream_llm as _run
 
-        yield from _run(messages)
+        with _scheduler().lease(INTERACTIVE) as lease:
+            yield from traced_stream(_run(messages, slot=lease.slot))
         return
     from backend import stream_llm as _run
 
-    yield from _run(messages)
+    yield from traced_stream(_run(messages))
 
 
 def stream_llm_events(
     messages: list,
     tools: list[dict[str, Any]] | None = None,
     tool_choice: str | dict[str, Any] | None = None,
+    policy: GenerationPolicy | None = None,
 ) -> Iterator[dict[str, Any]]:
+    """Stream one model call's events under `policy` (answer_policy() by default).
+
+    A background call that is preempted ends its events early and then
+    raises `Preempted`; background calls may also wait for a slot first, and
+    raise `BackgroundUnavailable` when the server has none to spare.
+    """
+    policy = policy or answer_policy()
     mode = _backend_mode()
     if mode == "llamacpp":
         from llamacpp_backend import stream_llm_events as _run
 
-        yield from _run(messages, tools=tools, tool_choice=tool_choice)
+        background = policy.priority == BACKGROUND
+        with _scheduler().lease(policy.priority) as lease:
+            trace = tracing.current_turn()
+            if trace is not None and lease.waited_s > 0:
+                trace.accumulate("slot_wait", lease.waited_s)
+            yield from traced_stream(
+                _run(
+                    messages,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                    max_tokens=policy.max_tokens,
+                    stop_after_tool_call=policy.stop_after_tool_call,
+                    tool_call_tokens=policy.tool_call_tokens,
+                    slot=lease.slot,
+                    cancel=lease.cancel if background else None,
+                ),
+                tools=len(tools or []),
+            )
+        if background and lease.preempted:
+            raise Preempted("background request preempted by an interactive one")
+        return
+    from backend import stream_llm_events as _run
+
+    yield from traced_stream(_run(messages, num_predict=policy.max_tokens))
+
+
+def complete_background(messages: list, max_tokens: int = 256) -> str:
+    """Text of one background completion.
+
+    Raises BackgroundUnavailable (or its subclass Preempted); callers drop
+    the work or retry later. Only llama-server has slots to keep background
+    work off the conversation, so other backends always raise it.
+    """
+    if _backend_mode() != "llamacpp":
+        raise BackgroundUnavailable("background completions need the llama.cpp backend")
+    return "".join(
+        ev.get("text") or ""
+        for ev in stream_llm_events(messages, policy=background_policy(max_tokens))
+        if ev.get("kind") == "content"
+    )
+
+
+async def astream_llm_events(
+    messages: list,
+    tools: list[dict[str, Any]] | None = None,
+    tool_choice: str | dict[str, Any] | None = None,
+    policy: GenerationPolicy | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """stream_llm_events for asyncio; a background call may wait for a slot or raise Preempted."""
+    policy = policy or answer_policy()
+    mode = _backend_mode()
+    if mode == "llamacpp":
+        from llamacpp_backend import astream_llm_events as _run
+
+        background = policy.priority == BACKGROUND
+        async with _scheduler().alease(policy.priority) as lease:
+            trace = tracing.current_turn()
+            if trace is not None and lease.waited_s > 0:
+                trace.accumulate("slot_wait", lease.waited_s)
+            events = _run(
+                messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                max_tokens=policy.max_tokens,
+                stop_after_tool_call=policy.stop_after_tool_call,
+                tool_call_tokens=policy.tool_call_tokens,
+                slot=lease.slot,
+                cancel=lease.cancel if background else None,
+            )
+            async for ev in atraced_stream(events, tools=len(tools or [])):
+                yield ev
+        if background and lease.preempted:
+            raise Preempted("background request preempted by an interactive one")
         return
     from backend import stream_llm_events as _run
 
-    yield from _run(messages)
+    async for ev in atraced_stream(_in_thread(_run(messages, num_predict=policy.max_tokens))):
+        yield ev
+
+
+async def _in_thread(events: Iterator[_T]) -> AsyncIterator[_T]:
+    """Drive a blocking iterator from worker threads, one item per hop."""
+    end = object()
+    while (item := await asyncio.to_thread(next, events, end)) is not end:
+        yield item
@@ -7,18 +7,43 @@ Supports two flavors:
                                             then {"kind":"tool_calls", "tool_calls":[...]}
                                             once the response is complete.
 
+Either way the stream ends with one {"kind":"usage"} event built from the
+server's `usage` block and llama.cpp `timings` (see `usage_event`), when the
+server sent them.
+
+Requests set `cache_prompt` and, given a `slot`, pin to that server slot
+(`id_slot`): the slot keeps the previous request's KV cache, so a request
+whose messages extend the previous one's (a follow-up pass after a tool
+call, the next turn of a chat) only prefills the new tail.
+
+Tool-calling passes can end early: with `stop_after_tool_call` the stream is
+closed as soon as the first tool call's arguments parse as a complete JSON
+object (llama-server cancels generation when the client disconnects), and
+`tool_call_tokens` caps how many tool-call tokens are read. The cap counts
+SSE chunks that carry tool-call deltas; llama-server streams one token per
+chunk. Calls still incomplete at the cap are dropped and reported as a
+content notice, never passed on half-written. See inference.GenerationPolicy.
+
+`astream_llm_events` is the asyncio twin of `stream_llm_events`: same
+payload, parsing and events, over the `async_http` transport instead of
+`requests`.
+
 Env: MEERA_LLAMACPP_URL (default http://127.0.0.1:8080), MEERA_LLAMACPP_MODEL (default local).
 """
 from __future__ import annotations
 
 import json
 import os
-from collections.abc import Iterator
+import threading
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
 from typing import Any
 
 import requests
 
-_MAX_TOKENS = 1024  # align with backend.py Ollama num_predict
+import async_http
+
+_MAX_TOKENS = 1024  # default answer budget; align with backend.py Ollama num_predict
 
 
 def _base_url() -> str:
@@ -58,69 +83,257 @@ def _merge_tool_call_delta(acc: list[dict[str, Any]], delta_calls: list[dict[str
             cur_fn["arguments"] = (cur_fn.get("arguments") or "") + args_part
 
 
-def stream_llm_events(
-    messages: list,
-    tools: list[dict[str, Any]] | None = None,
-    tool_choice: str | dict[str, Any] | None = None,
-) -> Iterator[dict[str, Any]]:
-    """Yield assistant events from llama-server SSE stream.
+def _tool_call_complete(call: dict[str, Any]) -> bool:
+    """True once a streamed call has a name and a full JSON object of arguments."""
+    fn = call.get("function") or {}
+    args = (fn.get("arguments") or "").rstrip()
+    if not fn.get("name") or not args.endswith("}"):
+        return False
+    try:
+        return isinstance(json.loads(args), dict)
+    except json.JSONDecodeError:
+        return False
 
-    When `tools` is provided, accumulated tool_calls are emitted as a single
-    {"kind": "tool_calls"} event after the stream completes.
+
+def usage_event(usage: dict[str, Any] | None, timings: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Normalize OpenAI `usage` and llama.cpp `timings` into a {"kind":"usage"} event.
+
+    `prompt_tokens` counts the whole prompt; `cached_tokens` of them were
+    reused from the slot's KV cache, so only the rest cost prefill time
+    (`prompt_ms`). None when the server reported neither block.
     """
-    url = f"{_base_url()}/v1/chat/completions"
+    if not usage and not timings:
+        return None
+    usage = usage or {}
+    timings = timings or {}
+
+    def num(value: Any) -> float:
+        return float(value) if isinstance(value, (int, float)) else 0.0
+
+    details = usage.get("prompt_tokens_details") or {}
+    cached = int(num(details.get("cached_tokens")) or num(timings.get("cache_n")))
+    prompt = int(num(usage.get("prompt_tokens")) or num(timings.get("prompt_n")) + cached)
+    completion = int(num(usage.get("completion_tokens")) or num(timings.get("predicted_n")))
+    prompt_ms = num(timings.get("prompt_ms"))
+    generation_ms = num(timings.get("predicted_ms"))
+    prompt_tps = num(timings.get("prompt_per_second")) or (
+        1000.0 * (prompt - cached) / prompt_ms if prompt_ms > 0 else 0.0
+    )
+    generation_tps = num(timings.get("predicted_per_second")) or (
+        1000.0 * completion / generation_ms if generation_ms > 0 else 0.0
+    )
+    return {
+        "kind": "usage",
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "completion_tokens": completion,
+        "prompt_ms": round(prompt_ms, 2),
+        "generation_ms": round(generation_ms, 2),
+        "prompt_tps": round(prompt_tps, 1),
+        "generation_tps": round(generation_tps, 1),
+    }
+
+
+def _chat_payload(
+    messages: list,
+    tools: list[dict[str, Any]] | None,
+    tool_choice: str | dict[str, Any] | None,
+    *,
+    max_tokens: int,
+    early_stop: bool,
+    slot: int | None,
+) -> dict[str, Any]:
     payload: dict[str, Any] = {
         "model": _model_name(),
         "messages": messages,
         "stream": True,
-        "max_tokens": _MAX_TOKENS,
+        "max_tokens": max_tokens,
         "chat_template_kwargs": {"enable_thinking": False},
+        "stream_options": {"include_usage": True},
+        "cache_prompt": True,
     }
+    if slot is not None:
+        payload["id_slot"] = slot
     if tools:
         payload["tools"] = tools
         payload["tool_choice"] = tool_choice if tool_choice is not None else "auto"
+    if early_stop:
+        # One call per pass, so the first complete call ends it; timings on
+        # every chunk keep usage accounting intact when we hang up early.
+        payload["parallel_tool_calls"] = False
+        payload["timings_per_token"] = True
+    return payload
+
 
-    tool_call_acc: list[dict[str, Any]] = []
+class _ChatStream:
+    """Turns one response's SSE lines into events (shared by the sync and async clients)."""
+
+    def __init__(self, early_stop_enabled: bool, stop_after_tool_call: bool, tool_call_tokens: int | None):
+        self.early_stop_enabled = early_stop_enabled
+        self.stop_after_tool_call = stop_after_tool_call
+        self.tool_call_tokens = tool_call_tokens
+        self.tool_call_acc: list[dict[str, Any]] = []
+        self.usage: dict[str, Any] | None = None
+        self.timings: dict[str, Any] | None = None
+        self.tool_call_chunks = 0  # SSE chunks with tool-call deltas (one token each from llama-server)
+        self.early_stop = ""
+        self.done = False  # stop reading: [DONE], a server error, or an early stop
+
+    def feed(self, line: str) -> list[dict[str, Any]]:
+        """Events for one SSE line; sets `done` when the stream should be closed."""
+        if not line or not line.startswith("data:"):
+            return []
+        data = line.split(":", 1)[1].lstrip()
+        if data == "[DONE]":
+            self.done = True
+            return []
+        try:
+            obj = json.loads(data)
+        except json.JSONDecodeError:
+            return []
+        err = obj.get("error")
+        if err is not None:
+            msg = err if isinstance(err, str) else err.get("message", str(err))
+            self.done = True
+            return [{"kind": "content", "text": f"[Model error: {msg}]"}]
+        # Usage comes on the last chunk (possibly with no choices); timings
+        # on the last chunk, or on every chunk with timings_per_token.
+        if isinstance(obj.get("usage"), dict):
+            self.usage = obj["usage"]
+        if isinstance(obj.get("timings"), dict):
+            self.timings = obj["timings"]
+        events: list[dict[str, Any]] = []
+        for choice in obj.get("choices") or []:
+            delta = choice.get("delta") or {}
+            chunk = delta.get("content")
+            if chunk:
+                events.append({"kind": "content", "text": chunk})
+            delta_tools = delta.get("tool_calls")
+            if isinstance(delta_tools, list) and delta_tools:
+                _merge_tool_call_delta(self.tool_call_acc, delta_tools)
+                self.tool_call_chunks += 1
+        if self.early_stop_enabled and self.tool_call_acc:
+            if self.stop_after_tool_call and _tool_call_complete(self.tool_call_acc[0]):
+                self.early_stop = "tool_call"
+            elif self.tool_call_tokens is not None and self.tool_call_chunks >= self.tool_call_tokens:
+                self.early_stop = "tool_call_budget"
+            self.done = bool(self.early_stop)
+        return events
+
+    def preempt(self) -> None:
+        self.early_stop = "preempted"
+        self.done = True
+
+    def finish(self) -> list[dict[str, Any]]:
+        """The closing tool_calls and usage events.
+
+        After a budget stop only complete calls are kept; the cut-off ones
+        are reported as a content notice instead of running with whatever
+        arguments arrived.
+        """
+        events: list[dict[str, Any]] = []
+        calls = self.tool_call_acc
+        if self.early_stop == "tool_call_budget":
+            calls = [tc for tc in calls if _tool_call_complete(tc)]
+            cut = [(tc.get("function") or {}).get("name") or "?" for tc in self.tool_call_acc if tc not in calls]
+            if cut:
+                events.append({
+                    "kind": "content",
+                    "text": f"[Tool call {', '.join(cut)} cut off after {self.tool_call_chunks} chunks]",
+                })
+        if calls:
+            events.append({"kind": "tool_calls", "tool_calls": calls})
+        timings = self.timings
+        if self.early_stop and timings is None and self.tool_call_chunks:
+            timings = {"predicted_n": self.tool_call_chunks}  # server without per-token timings
+        usage_ev = usage_event(self.usage, timings)
+        if usage_ev is not None:
+            if self.early_stop:
+                usage_ev["early_stop"] = self.early_stop
+            events.append(usage_ev)
+        return events
+
+
+def stream_llm_events(
+    messages: list,
+    tools: list[dict[str, Any]] | None = None,
+    tool_choice: str | dict[str, Any] | None = None,
+    *,
+    max_tokens: int = _MAX_TOKENS,
+    stop_after_tool_call: bool = False,
+    tool_call_tokens: int | None = None,
+    slot: int | None = None,
+    cancel: threading.Event | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield assistant events from llama-server SSE stream.
+
+    When `tools` is provided, accumulated tool_calls are emitted as a single
+    {"kind": "tool_calls"} event after the stream completes. A final
+    {"kind": "usage"} event follows when the server reported token counts;
+    it carries `early_stop` ("tool_call", "tool_call_budget" or
+    "preempted", when `cancel` was set) when the stream was closed before the
+    server finished. Tool calls cut off by `tool_call_tokens` are not
+    emitted; a content event names them instead.
+    """
+    early_stop_enabled = bool(tools) and (stop_after_tool_call or tool_call_tokens is not None)
+    payload = _chat_payload(
+        messages, tools, tool_choice, max_tokens=max_tokens, early_stop=early_stop_enabled, slot=slot
+    )
+    stream = _ChatStream(early_stop_enabled, stop_after_tool_call, tool_call_tokens)
     try:
-        with requests.post(url, json=payload, stream=True, timeout=300) as resp:
+        with requests.post(f"{_base_url()}/v1/chat/completions", json=payload, stream=True, timeout=300) as resp:
             resp.raise_for_status()
             resp.encoding = "utf-8"
             for line in resp.iter_lines(decode_unicode=True):
-                if not line:
-                    continue
-                if not line.startswith("data:"):
-                    continue
-                data = line.split(":", 1)[1].lstrip()
-                if data == "[DONE]":
-                    break
-                try:
-                    obj = json.loads(data)
-                except json.JSONDecodeError:
-                    continue
-                err = obj.get("error")
-                if err is not None:
-                    msg = err if isinstance(err, str) else err.get("message", str(err))
-                    yield {"kind": "content", "text": f"[Model error: {msg}]"}
+                if cancel is not None and cancel.is_set():
+                    stream.preempt()
                     break
-                for choice in obj.get("choices") or []:
-                    delta = choice.get("delta") or {}
-                    chunk = delta.get("content")
-                    if chunk:
-                        yield {"kind": "content", "text": chunk}
-                    delta_tools = delta.get("tool_calls")
-                    if isinstance(delta_tools, list) and delta_tools:
-                        _merge_tool_call_delta(tool_call_acc, delta_tools)
+                yield from stream.feed(line)
+                if stream.done:
+                    break  # leaving the with-block closes the connection
     except Exception as e:
         yield {"kind": "content", "text": f"[Error contacting model: {e}]"}
         return
+    yield from stream.finish()
 
-    if tool_call_acc:
-        yield {"kind": "tool_calls", "tool_calls": tool_call_acc}
+
+async def astream_llm_events(
+    messages: list,
+    tools: list[dict[str, Any]] | None = None,
+    tool_choice: str | dict[str, Any] | None = None,
+    *,
+    max_tokens: int = _MAX_TOKENS,
+    stop_after_tool_call: bool = False,
+    tool_call_tokens: int | None = None,
+    slot: int | None = None,
+    cancel: threading.Event | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """stream_llm_events for asyncio: the same events, over `async_http`."""
+    early_stop_enabled = bool(tools) and (stop_after_tool_call or tool_call_tokens is not None)
+    payload = _chat_payload(
+        messages, tools, tool_choice, max_tokens=max_tokens, early_stop=early_stop_enabled, slot=slot
+    )
+    stream = _ChatStream(early_stop_enabled, stop_after_tool_call, tool_call_tokens)
+    try:
+        async with aclosing(async_http.stream_lines(f"{_base_url()}/v1/chat/completions", payload)) as lines:
+            async for line in lines:
+                if cancel is not None and cancel.is_set():
+                    stream.preempt()
+                    break
+                for event in stream.feed(line):
+                    yield event
+                if stream.done:
+                    break  # aclosing closes the connection
+    except Exception as e:
+        yield {"kind": "content", "text": f"[Error contacting model: {e}]"}
+        return
+    for event in stream.finish():
+        yield event
 
 
-def stream_llm(messages: list) -> Iterator[str]:
+def stream_llm(messages: list, slot: int | None = None) -> Iterator[str]:
     """Backward-compatible content-only text stream."""
-    for event in stream_llm_events(messages):
+    for event in stream_llm_events(messages, slot=slot):
         if event.get("kind") == "content":
             chunk = event.get("text")
             if chunk:
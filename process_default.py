@@ -0,0 +1,52 @@
+"""Process-wide instances of Meera's background services.
+
+The server supervisor, the telemetry sampler, the in-process reminder queue
+and the llama-server slot scheduler each run once per process: created on
+first use (by the window at startup, or by a tool), and stopped when the
+window closes. `ProcessDefault` holds such an instance and serializes
+creating, replacing and stopping it, so each service module only says how
+to build and how to stop its own.
+"""
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+_T = TypeVar("_T")
+
+
+class ProcessDefault(Generic[_T]):
+    """The process-wide instance of one service (thread-safe)."""
+
+    def __init__(self, stop: Callable[[_T], None] | None = None):
+        self._stop = stop
+        self._instance: _T | None = None
+        self._lock = threading.Lock()
+
+    def start(self, create: Callable[[], _T | None], *, stale: Callable[[_T], bool] | None = None) -> _T | None:
+        """The instance, made by `create()` when there is none yet.
+
+        An instance for which `stale(instance)` is true is stopped and
+        replaced. `create` runs under the lock, so concurrent first callers
+        share one instance; it may return None to leave the slot empty.
+        """
+        with self._lock:
+            if self._instance is not None and stale is not None and stale(self._instance):
+                self._stop_locked()
+            if self._instance is None:
+                self._instance = create()
+            return self._instance
+
+    def get(self) -> _T | None:
+        """The instance if one is running (never creates one)."""
+        return self._instance
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop_locked()
+
+    def _stop_locked(self) -> None:
+        instance, self._instance = self._instance, None
+        if instance is not None and self._stop is not None:
+            self._stop(instance)
@@ -4,26 +4,41 @@ Public API:
     - RetrievalIndex / IndexEntry / IndexHit (index.py)
     - chunk_rag_directory (rag_chunker.py)
     - get_index / build_index / RetrievalResult (query.py)
+    - start_index_build / current_index / index_status / subscribe_index:
+      background build and readiness events (lifecycle.py)
+    - prebuilt index file: retrieval/prebuilt.py, `python3 -m retrieval build`
 """
 from retrieval.index import IndexEntry, IndexHit, RetrievalIndex
+from retrieval.lifecycle import IndexStatus
 from retrieval.query import (
     RetrievalResult,
     build_index,
+    current_index,
+    embedder_recovered,
     get_index,
+    index_status,
     reset_index,
     retrieve,
+    start_index_build,
+    subscribe_index,
 )
 from retrieval.rag_chunker import RagChunk, chunk_rag_directory
 
 __all__ = [
     "IndexEntry",
     "IndexHit",
+    "IndexStatus",
     "RetrievalIndex",
     "RagChunk",
     "RetrievalResult",
     "build_index",
     "chunk_rag_directory",
+    "current_index",
+    "embedder_recovered",
     "get_index",
+    "index_status",
     "reset_index",
     "retrieve",
+    "start_index_build",
+    "subscribe_index",
 ]
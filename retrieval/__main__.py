@@ -0,0 +1,64 @@
+"""Command line for the prebuilt retrieval index (see retrieval/prebuilt.py).
+
+    python3 -m retrieval build [--out PATH] [--rag-dir DIR]
+    python3 -m retrieval info [PATH]
+
+`build` needs the embedding server (or MEERA_EMBED_FAKE=1 for tests) and
+records embeddings.model_fingerprint() so a different model ignores the file.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from embeddings import model_fingerprint
+from retrieval.prebuilt import (
+    FORMAT_VERSION,
+    PrebuiltIndexError,
+    default_index_path,
+    open_index_file,
+    write_index_file,
+)
+from retrieval.query import build_index
+
+
+def _cmd_build(args: argparse.Namespace) -> int:
+    out = args.out or default_index_path()
+    index = build_index(args.rag_dir, precision="f32", use_prebuilt=False)
+    size = write_index_file(index, out, model_fingerprint())
+    print(f"wrote {out}: {index.size} entries, dim {index.dim}, {size / 1e6:.2f} MB, {model_fingerprint()}")
+    return 0
+
+
+def _cmd_info(args: argparse.Namespace) -> int:
+    path = args.path or default_index_path()
+    try:
+        prebuilt = open_index_file(path)
+    except PrebuiltIndexError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    kinds: dict[str, int] = {}
+    for e in prebuilt.entries():
+        kinds[e.kind] = kinds.get(e.kind, 0) + 1
+    print(f"{path}: format {FORMAT_VERSION}, {prebuilt.count} entries x {prebuilt.dim}, fingerprint {prebuilt.fingerprint}")
+    for kind, n in sorted(kinds.items()):
+        print(f"  {kind}: {n}")
+    prebuilt.close()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect the prebuilt retrieval index")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_build = sub.add_parser("build", help="embed tool exemplars + rag_data and write the index file")
+    p_build.add_argument("--out", type=Path, help="default: MEERA_INDEX_FILE or retrieval/prebuilt.idx")
+    p_build.add_argument("--rag-dir", type=Path)
+    p_info = sub.add_parser("info", help="print header and entry counts")
+    p_info.add_argument("path", type=Path, nargs="?")
+    args = parser.parse_args(argv)
+    return _cmd_build(args) if args.cmd == "build" else _cmd_info(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,37 @@
 """In-memory cosine-similarity retrieval index.
 
-Pure-Python (no numpy dependency) — sized for hundreds to a few thousand
-entries which is enough for this project's tool exemplars + RAG chunks. Each
-vector is L2-normalized at ingest time so cosine similarity reduces to a dot
-product.
+Pure-Python (no numpy dependency). Each vector is L2-normalized at ingest
+time so cosine similarity reduces to a dot product. Vectors are packed into a
+`VectorStore` (retrieval/vectors.py): float32 by default, or float16/int8
+via MEERA_INDEX_PRECISION. Quantized scans are followed by an exact rescoring
+of the top `rescore_factor * k` candidates (MEERA_INDEX_RESCORE, 0 disables).
+
+A BM25 index over the same texts (retrieval/lexical.py) is built alongside;
+`query_split(mode=...)` scores dense, hybrid (reciprocal rank fusion) or
+lexical only. An index built with `build_lexical_only()` has no vectors and
+answers lexical queries without any embedding call.
 """
 from __future__ import annotations
 
+import heapq
+import os
 from dataclasses import dataclass, field
-from typing import Iterable
+from typing import Iterable, Protocol
 
-from embeddings import embed_batch
+from embeddings import EmbeddingUnavailableError, embed_batch, query_timeout
+from retrieval.lexical import LexicalIndex, reciprocal_rank_fusion
 from retrieval.rag_chunker import RagChunk
+from retrieval.vectors import PRECISIONS, VectorStore, precision_from_env
+from tracing import span
 
 
 KIND_TOOL = "tool_exemplar"
 KIND_RAG = "rag_chunk"
 
+MODES = ("dense", "hybrid", "lexical")
+
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IndexEntry:
     """One indexed item — either a tool exemplar or a RAG chunk."""
     kind: str          # KIND_TOOL or KIND_RAG
@@ -27,31 +40,62 @@ class IndexEntry:
     rag_chunk: RagChunk | None = None  # only set for KIND_RAG
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IndexHit:
     entry: IndexEntry
     score: float
+    lexical: float = 0.0  # query-term coverage when the hit matched lexically
+
+
+def _dedup_key(entry: IndexEntry) -> object | None:
+    """Hits sharing a key are duplicates: same tool, or same (doc, section)."""
+    if entry.kind == KIND_TOOL:
+        return entry.tool_name
+    if entry.kind == KIND_RAG and entry.rag_chunk is not None:
+        return (entry.rag_chunk.doc_path, entry.rag_chunk.section)
+    return None
+
+
+_DEFAULT_RESCORE_FACTOR = 4
+_BUILD_BATCH = 1024  # texts per embed_batch call, bounds the float-list peak
+
+
+class PrebuiltVectors(Protocol):
+    """Read side of a prebuilt index file (retrieval.prebuilt.PrebuiltIndex)."""
+    dim: int
+    count: int
+    vectors: memoryview
 
+    def lookup(self, texts: list[str]) -> list[int | None]: ...
 
-def _dot(a: list[float], b: list[float]) -> float:
-    n = len(a)
-    if n != len(b):
-        return 0.0
-    s = 0.0
-    for i in range(n):
-        s += a[i] * b[i]
-    return s
+
+def _rescore_factor_from_env() -> int:
+    raw = os.environ.get("MEERA_INDEX_RESCORE", "").strip()
+    try:
+        value = int(raw) if raw else _DEFAULT_RESCORE_FACTOR
+    except ValueError:
+        value = _DEFAULT_RESCORE_FACTOR
+    return max(0, min(value, 64))
 
 
 @dataclass
 class RetrievalIndex:
     """Holds entries + their embeddings, supports top-k cosine queries."""
+    precision: str = field(default_factory=precision_from_env)
+    rescore_factor: int = field(default_factory=_rescore_factor_from_env)
     _entries: list[IndexEntry] = field(default_factory=list)
-    _vectors: list[list[float]] = field(default_factory=list)
+    _store: VectorStore | None = None
+    _lexical: LexicalIndex | None = None
     _built: bool = False
+    _embedded: int = 0
+    _partial: bool = False
+
+    def __post_init__(self) -> None:
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"unknown precision {self.precision!r}; expected one of {', '.join(PRECISIONS)}")
 
     def add(self, entry: IndexEntry) -> None:
-        if self._built:
+        if self._built or self._lexical is not None:
             raise RuntimeError("Cannot add entries after build()")
         self._entries.append(entry)
 
@@ -67,27 +111,191 @@ class RetrievalIndex:
     def is_built(self) -> bool:
         return self._built
 
-    def build(self) -> None:
-        """Embed all queued entries in a single batch call. Idempotent.
+    @property
+    def has_dense(self) -> bool:
+        """True once built with vectors (False for a lexical-only index)."""
+        return self._built and (self._store is not None or not self._entries)
+
+    @property
+    def partial(self) -> bool:
+        """True for a lexical_snapshot() or build_tier() copy served before build()."""
+        return self._partial
+
+    @property
+    def entries(self) -> list[IndexEntry]:
+        return list(self._entries)
+
+    @property
+    def dim(self) -> int:
+        """Vector dimension (0 before build or when empty)."""
+        return self._store.dim if self._store is not None else 0
+
+    @property
+    def embedded_count(self) -> int:
+        """Entries whose vectors came from the embedder (not a prebuilt file) in build()."""
+        return self._embedded
+
+    def vector(self, i: int) -> list[float]:
+        if self._store is None:
+            raise RuntimeError("Index not built — call build() first")
+        return self._store.row(i)
+
+    @property
+    def vector_bytes(self) -> int:
+        """Resident bytes used by the packed vectors (0 before build)."""
+        return self._store.nbytes if self._store is not None else 0
+
+    def build(self, prebuilt: PrebuiltVectors | None = None, *, reuse: RetrievalIndex | None = None) -> None:
+        """Embed all queued entries in batched calls. Idempotent.
+
+        With `prebuilt` (a mapped index file, see retrieval/prebuilt.py), entries
+        whose text hash is in the file reuse its vectors and only the rest are
+        embedded. If the file matches the entries row for row, a float32 index
+        scans the mapped rows directly. With `reuse` (a tier from build_tier()
+        on this index), the rows it already has are copied, not re-embedded.
 
         Raises EmbeddingUnavailableError if the embedding server is unreachable.
         """
         if self._built:
             return
-        if not self._entries:
-            self._vectors = []
-            self._built = True
+        if self._lexical is None:
+            self._lexical = LexicalIndex(e.index_text for e in self._entries)
+        if self._entries:
+            texts = [e.index_text for e in self._entries]
+            reused = reuse._store if reuse is not None else None
+            self._store, self._embedded = self._make_store(texts, prebuilt, reused)
+        self._built = True
+
+    def build_tier(self, count: int, prebuilt: PrebuiltVectors | None = None) -> RetrievalIndex:
+        """A built copy with vectors for the first `count` entries only.
+
+        Lets a caller serve the first tier (e.g. tool exemplars, queued first)
+        while the rest is embedded: query_split() scores kinds whose rows all
+        have vectors as usual and the others lexically (`partial` is True).
+        Pass the tier to build(reuse=...) so its rows are not embedded again.
+        No entries can be added afterwards.
+        """
+        if self._lexical is None:
+            self._lexical = LexicalIndex(e.index_text for e in self._entries)
+        texts = [e.index_text for e in self._entries[:count]]
+        store, embedded = self._make_store(texts, prebuilt, None) if texts else (None, 0)
+        return RetrievalIndex(
+            precision=self.precision,
+            rescore_factor=self.rescore_factor,
+            _entries=list(self._entries),
+            _store=store,
+            _lexical=self._lexical,
+            _built=True,
+            _embedded=embedded,
+            _partial=True,
+        )
+
+    def _make_store(
+        self, texts: list[str], prebuilt: PrebuiltVectors | None, reuse: VectorStore | None
+    ) -> tuple[VectorStore, int]:
+        """Vectors for `texts` in order, and how many had to be embedded."""
+        rows = prebuilt.lookup(texts) if prebuilt is not None else [None] * len(texts)
+        if prebuilt is not None and rows == list(range(len(texts))):
+            return self._store_from_file(prebuilt, len(texts)), 0
+
+        reused = len(reuse) if reuse is not None else 0
+        missing = [i for i, row in enumerate(rows) if row is None and i >= reused]
+        fresh: dict[int, list[float]] = {}
+        for start in range(0, len(missing), _BUILD_BATCH):
+            batch = missing[start:start + _BUILD_BATCH]
+            vectors = embed_batch([texts[i] for i in batch])
+            if len(vectors) != len(batch):
+                raise RuntimeError(
+                    f"Embedding count mismatch: got {len(vectors)} for {len(batch)} entries"
+                )
+            fresh.update(zip(batch, vectors))
+
+        if fresh:
+            dim = len(next(iter(fresh.values())))
+        else:
+            dim = reuse.dim if reused else prebuilt.dim
+        store = VectorStore(dim, self.precision, keep_exact=self.rescore_factor > 0)
+        for i, row in enumerate(rows):
+            if i < reused:
+                store.append(reuse.exact_row(i))
+            elif row is None:
+                store.append(fresh.pop(i))
+            else:
+                store.append(prebuilt.vectors[row * dim:(row + 1) * dim])
+        store.seal()
+        return store, len(missing)
+
+    def build_lexical_only(self) -> None:
+        """Finish without vectors; only mode="lexical" queries work. Idempotent."""
+        if self._built:
             return
-        texts = [e.index_text for e in self._entries]
-        self._vectors = embed_batch(texts)
-        if len(self._vectors) != len(self._entries):
-            raise RuntimeError(
-                f"Embedding count mismatch: got {len(self._vectors)} for {len(self._entries)} entries"
-            )
+        if self._lexical is None:
+            self._lexical = LexicalIndex(e.index_text for e in self._entries)
         self._built = True
 
+    def lexical_snapshot(self) -> RetrievalIndex:
+        """A built, lexical-only index over the queued entries, before build().
+
+        The BM25 index is shared, so the later build() does not tokenize again.
+        No entries can be added afterwards.
+        """
+        if self._lexical is None:
+            self._lexical = LexicalIndex(e.index_text for e in self._entries)
+        return RetrievalIndex(
+            precision=self.precision,
+            rescore_factor=self.rescore_factor,
+            _entries=list(self._entries),
+            _lexical=self._lexical,
+            _built=True,
+            _partial=True,
+        )
+
+    def _store_from_file(self, prebuilt: PrebuiltVectors, count: int) -> VectorStore:
+        """Store for entries matching the file's first `count` rows: zero-copy for float32."""
+        dim = prebuilt.dim
+        rows = prebuilt.vectors[:count * dim]
+        if self.precision == "f32":
+            return VectorStore.from_buffer(dim, rows)
+        store = VectorStore(dim, self.precision)
+        for row in range(count):
+            store.append(rows[row * dim:(row + 1) * dim])
+        store.seal()
+        if self.rescore_factor > 0:
+            store.attach_exact(rows)
+        return store
+
+    @property
+    def _rescoring(self) -> bool:
+        return (
+            self._store is not None
+            and self._store.approximate
+            and self._store.can_rescore
+            and self.rescore_factor > 0
+        )
+
     def _query_vector(self, text: str) -> list[float]:
-        return embed_batch([text])[0]
+        with span("query_embed"):
+            return embed_batch([text], timeout=query_timeout())[0]
+
+    def _top(
+        self,
+        qv: list[float],
+        scores: list[float],
+        rows: Iterable[int],
+        k: int,
+        threshold: float | None = None,
+    ) -> list[IndexHit]:
+        """Best `k` of `rows`, rescoring a candidate shortlist when quantized."""
+        if k <= 0:
+            return []
+        if self._rescoring:
+            rows = heapq.nlargest(k * self.rescore_factor, rows, key=scores.__getitem__)
+            for i, exact in self._store.exact_scores(qv, rows).items():
+                scores[i] = exact
+        if threshold is not None:
+            rows = [i for i in rows if scores[i] >= threshold]
+        top = heapq.nlargest(k, rows, key=scores.__getitem__)
+        return [IndexHit(entry=self._entries[i], score=scores[i]) for i in top]
 
     def query(self, text: str, k: int = 8) -> list[IndexHit]:
         """Return the top-k entries by cosine similarity."""
@@ -95,13 +303,12 @@ class RetrievalIndex:
             raise RuntimeError("Index not built — call build() first")
         if not self._entries or k <= 0:
             return []
+        if self._store is None:
+            raise EmbeddingUnavailableError("Index was built without vectors (lexical only)")
         qv = self._query_vector(text)
-        scored = [
-            IndexHit(entry=self._entries[i], score=_dot(qv, self._vectors[i]))
-            for i in range(len(self._entries))
-        ]
-        scored.sort(key=lambda h: h.score, reverse=True)
-        return scored[:k]
+        with span("index_scoring", entries=len(self._entries)):
+            scores = self._store.scores(qv)
+            return self._top(qv, scores, range(len(scores)), k)
 
     def query_split(
         self,
@@ -110,36 +317,131 @@ class RetrievalIndex:
         k_rag: int = 3,
         tool_threshold: float = 0.0,
         rag_threshold: float = 0.0,
+        *,
+        mode: str = "dense",
+        lexical_threshold: float = 0.75,
+        partial_threshold: float | None = None,
     ) -> tuple[list[IndexHit], list[IndexHit]]:
         """Return (tool_hits, rag_hits), each thresholded and deduped.
 
         Tool hits are deduplicated by tool_name (keeping the highest-scoring
         exemplar for each tool). RAG hits are deduplicated by (doc, section).
+        With a quantized store, thresholds are first applied with the store's
+        error bound as slack and then again on the rescored candidates.
+
+        `mode` picks the scorer (see MODES):
+        - "dense": cosine similarity only; `score` is the cosine.
+        - "hybrid": cosine hits above the thresholds plus lexical hits whose
+          query coverage reaches `lexical_threshold`, ordered by reciprocal
+          rank fusion of both rankings. `score` stays the cosine, so the
+          cosine thresholds and the agent's tool/RAG margin keep their meaning.
+        - "lexical": BM25 only, no embedding call. Hits need coverage >=
+          `lexical_threshold`, are ordered by BM25 and `score` is the coverage.
+
+        On a partial index (build_tier()), a kind without vectors yet is scored
+        as in "lexical" mode, with `partial_threshold` (default
+        `lexical_threshold`).
         """
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r}; expected one of {', '.join(MODES)}")
         if not self._built:
             raise RuntimeError("Index not built — call build() first")
         if not self._entries:
             return [], []
+        if mode == "lexical":
+            with span("index_scoring", entries=len(self._entries), mode=mode):
+                lexical = self._lexical.search(text)
+                return (
+                    self._lexical_top(lexical, KIND_TOOL, k_tools, lexical_threshold),
+                    self._lexical_top(lexical, KIND_RAG, k_rag, lexical_threshold),
+                )
+        if self._store is None:
+            raise EmbeddingUnavailableError("Index was built without vectors (lexical only)")
         qv = self._query_vector(text)
 
-        tool_best: dict[str, IndexHit] = {}
-        rag_best: dict[tuple[str, str], IndexHit] = {}
-        for i, entry in enumerate(self._entries):
-            score = _dot(qv, self._vectors[i])
-            if entry.kind == KIND_TOOL and entry.tool_name is not None:
-                if score < tool_threshold:
+        with span("index_scoring", entries=len(self._entries), mode=mode):
+            scores = self._store.scores(qv)
+            covered = len(scores)
+            pending = {e.kind for e in self._entries[covered:]}
+            slack = self._store.error_bound if self._rescoring else 0.0
+            floors = {KIND_TOOL: tool_threshold - slack, KIND_RAG: rag_threshold - slack}
+            best: dict[str, dict[object, int]] = {KIND_TOOL: {}, KIND_RAG: {}}
+            for i, entry in enumerate(self._entries[:covered]):
+                key = _dedup_key(entry)
+                if key is None or scores[i] < floors[entry.kind]:
                     continue
-                cur = tool_best.get(entry.tool_name)
-                if cur is None or score > cur.score:
-                    tool_best[entry.tool_name] = IndexHit(entry=entry, score=score)
-            elif entry.kind == KIND_RAG and entry.rag_chunk is not None:
-                if score < rag_threshold:
-                    continue
-                key = (entry.rag_chunk.doc_path, entry.rag_chunk.section)
-                cur = rag_best.get(key)
-                if cur is None or score > cur.score:
-                    rag_best[key] = IndexHit(entry=entry, score=score)
-
-        tools_sorted = sorted(tool_best.values(), key=lambda h: h.score, reverse=True)
-        rag_sorted = sorted(rag_best.values(), key=lambda h: h.score, reverse=True)
-        return tools_sorted[:k_tools], rag_sorted[:k_rag]
+                cur = best[entry.kind].get(key)
+                if cur is None or scores[i] > scores[cur]:
+                    best[entry.kind][key] = i
+
+            lexical = self._lexical.search(text) if mode == "hybrid" or pending else {}
+            floor = lexical_threshold if partial_threshold is None else partial_threshold
+            hits: list[list[IndexHit]] = []
+            for kind, k, threshold in ((KIND_TOOL, k_tools, tool_threshold), (KIND_RAG, k_rag, rag_threshold)):
+                if kind in pending:
+                    hits.append(self._lexical_top(lexical, kind, k, floor))
+                elif mode == "dense":
+                    hits.append(self._top(qv, scores, best[kind].values(), k, threshold))
+                else:
+                    hits.append(self._fuse(
+                        qv, scores, lexical, kind,
+                        self._top(qv, scores, best[kind].values(), k * 3, threshold),
+                        k, lexical_threshold,
+                    ))
+        return hits[0], hits[1]
+
+    def _lexical_ranking(
+        self, lexical: dict[int, tuple[float, float]], kind: str, threshold: float
+    ) -> list[int]:
+        """Best-BM25 row per dedup key among rows covering >= threshold, best first."""
+        best: dict[object, int] = {}
+        for i, (bm25, coverage) in lexical.items():
+            entry = self._entries[i]
+            key = _dedup_key(entry)
+            if entry.kind != kind or key is None or coverage < threshold:
+                continue
+            cur = best.get(key)
+            if cur is None or bm25 > lexical[cur][0]:
+                best[key] = i
+        return sorted(best.values(), key=lambda i: lexical[i][0], reverse=True)
+
+    def _lexical_top(
+        self, lexical: dict[int, tuple[float, float]], kind: str, k: int, threshold: float
+    ) -> list[IndexHit]:
+        if k <= 0:
+            return []
+        rows = self._lexical_ranking(lexical, kind, threshold)[:k]
+        return [
+            IndexHit(entry=self._entries[i], score=lexical[i][1], lexical=lexical[i][1])
+            for i in rows
+        ]
+
+    def _fuse(
+        self,
+        qv: list[float],
+        scores: list[float],
+        lexical: dict[int, tuple[float, float]],
+        kind: str,
+        dense_hits: list[IndexHit],
+        k: int,
+        lexical_threshold: float,
+    ) -> list[IndexHit]:
+        """Reciprocal rank fusion of dense hits and lexical matches, by dedup key."""
+        if k <= 0:
+            return []
+        dense_keys = [_dedup_key(h.entry) for h in dense_hits]
+        hits: dict[object, IndexHit] = dict(zip(dense_keys, dense_hits))
+        lex_rows = self._lexical_ranking(lexical, kind, lexical_threshold)
+        lex_keys = [_dedup_key(self._entries[i]) for i in lex_rows]
+        extra = [i for key, i in zip(lex_keys, lex_rows) if key not in hits]
+        exact = self._store.exact_scores(qv, extra) if self._rescoring else {}
+        for key, i in zip(lex_keys, lex_rows):
+            if key not in hits:
+                hits[key] = IndexHit(entry=self._entries[i], score=exact.get(i, scores[i]))
+        coverage = {key: lexical[i][1] for key, i in zip(lex_keys, lex_rows)}
+        fused = reciprocal_rank_fusion([dense_keys, lex_keys])
+        order = sorted(hits, key=lambda key: (fused[key], hits[key].score), reverse=True)[:k]
+        return [
+            IndexHit(entry=hits[key].entry, score=hits[key].score, lexical=coverage.get(key, 0.0))
+            for key in order
+        ]
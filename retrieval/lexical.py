@@ -0,0 +1,96 @@
+"""In-process BM25 inverted index over index texts.
+
+Complements the dense index for exact-term queries ("sed -i", "journalctl")
+that a small embedding model may not rank well, and keeps retrieval working
+with zero embedding calls when the embedding server is down.
+
+`LexicalIndex.search()` returns, per matching entry, the Okapi BM25 score
+(for ranking) and an IDF-weighted query coverage in [0, 1] (the share of the
+query's known terms that the entry contains; used for thresholds, since raw
+BM25 has no fixed scale). `reciprocal_rank_fusion()` merges ranked lists.
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections.abc import Iterable, Sequence
+
+_TOKEN_RE = re.compile(r"--?[a-z0-9][\w-]*|[a-z0-9]\w*(?:[.+]\w+)*")
+
+# Function words that carry no routing signal in short assistant requests.
+_STOPWORDS = frozenset(
+    """
+    a about an and any are as at be can could do does for from have how i if in
+    into is it its me my of on or please show tell that the this to up want was
+    what when where which who why will with would you your
+    """.split()
+)
+
+RRF_K = 60
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased terms; keeps command flags ("-i", "--user") and dotted names."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class LexicalIndex:
+    """BM25 over a fixed list of texts; entry ids are list positions."""
+
+    __slots__ = ("k1", "b", "_postings", "_doc_len", "_avgdl", "_idf")
+
+    def __init__(self, texts: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._doc_len: list[int] = []
+        for doc_id, text in enumerate(texts):
+            terms = tokenize(text)
+            self._doc_len.append(len(terms))
+            counts: dict[str, int] = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                self._postings.setdefault(term, []).append((doc_id, tf))
+        n = len(self._doc_len)
+        self._avgdl = (sum(self._doc_len) / n) if n else 0.0
+        # Lucene-style idf: always positive, so common terms still count a little.
+        self._idf = {
+            term: math.log(1.0 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    def search(self, query: str) -> dict[int, tuple[float, float]]:
+        """{entry id: (bm25, coverage)} for every entry sharing a term with `query`."""
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t in self._idf]
+        if not terms:
+            return {}
+        total_idf = sum(self._idf[t] for t in terms)
+        k1, b, avgdl = self.k1, self.b, self._avgdl or 1.0
+        out: dict[int, list[float]] = {}
+        for term in terms:
+            idf = self._idf[term]
+            for doc_id, tf in self._postings[term]:
+                norm = k1 * (1.0 - b + b * self._doc_len[doc_id] / avgdl)
+                acc = out.get(doc_id)
+                if acc is None:
+                    acc = out[doc_id] = [0.0, 0.0]
+                acc[0] += idf * tf * (k1 + 1.0) / (tf + norm)
+                acc[1] += idf
+        return {doc_id: (bm25, cov / total_idf) for doc_id, (bm25, cov) in out.items()}
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = RRF_K) -> dict[int, float]:
+    """Sum of 1 / (k + rank) over every ranking an id appears in (rank from 1)."""
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return fused
@@ -0,0 +1,236 @@
+"""Background build and readiness tracking for the process-wide index.
+
+`IndexLifecycle` owns one index and the thread that builds it:
+
+    idle ──start()──▶ building ──▶ ready      (dense vectors available)
+                          │
+                          ├──────▶ degraded   (built lexical-only: embedder down)
+                          └──────▶ failed     (build raised; nothing to serve)
+
+Callers never wait on a build they do not ask to wait for: `current()`
+returns whatever can be served right now — the latest partial index the
+running build published (lexical-only before any embedding, then with the
+tool exemplars embedded), else the last finished one — and `get()` blocks
+until the running build settles. Degraded and failed
+builds are retried in the background with exponential backoff;
+`retry_now()` skips the wait (used when the embedding server comes back).
+
+Every transition, and every partial index published, is reported to the
+subscribers as an `IndexStatus` (on the build thread).
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from retrieval.index import RetrievalIndex
+
+STATES = ("idle", "building", "ready", "degraded", "failed")
+
+Publish = Callable[[RetrievalIndex], None]
+BuildFn = Callable[[Publish], RetrievalIndex]
+
+
+@dataclass(frozen=True, slots=True)
+class IndexStatus:
+    """Snapshot of the lifecycle, as passed to subscribers."""
+    state: str
+    size: int = 0  # entries in the index being served (0 when none)
+    has_dense: bool = False
+    partial: bool = False  # serving an index published before the build finished
+    attempts: int = 0  # consecutive degraded/failed builds
+    error: str = ""
+    retry_in_s: float | None = None
+
+
+class IndexLifecycle:
+    """Builds the index on a worker thread and serves the best available one."""
+
+    def __init__(
+        self,
+        build: BuildFn,
+        retry_delay: Callable[[int], float],
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._build = build
+        self._retry_delay = retry_delay
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._state = "idle"
+        self._index: RetrievalIndex | None = None
+        self._partial: RetrievalIndex | None = None
+        self._error: BaseException | None = None
+        self._attempts = 0
+        self._settled_at = 0.0
+        self._generation = 0
+        self._subscribers: list[Callable[[IndexStatus], None]] = []
+
+    # ---- queries -------------------------------------------------------------
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def status(self) -> IndexStatus:
+        with self._cond:
+            return self._status_locked()
+
+    def _status_locked(self) -> IndexStatus:
+        serving = self._partial if self._partial is not None else self._index
+        retry_in = None
+        if self._state in ("degraded", "failed"):
+            retry_in = max(0.0, self._retry_delay(self._attempts) - (self._clock() - self._settled_at))
+        return IndexStatus(
+            state=self._state,
+            size=serving.size if serving is not None else 0,
+            has_dense=serving.has_dense if serving is not None else False,
+            partial=self._partial is not None,
+            attempts=self._attempts,
+            error=str(self._error) if self._error is not None else "",
+            retry_in_s=None if retry_in is None else round(retry_in, 1),
+        )
+
+    def subscribe(self, fn: Callable[[IndexStatus], None]) -> Callable[[], None]:
+        """Call `fn(status)` on every transition; returns an unsubscribe function."""
+        with self._cond:
+            self._subscribers.append(fn)
+
+        def unsubscribe() -> None:
+            with self._cond:
+                if fn in self._subscribers:
+                    self._subscribers.remove(fn)
+
+        return unsubscribe
+
+    # ---- control -------------------------------------------------------------
+
+    def start(self) -> bool:
+        """Start a background build if none has run yet or a retry is due."""
+        with self._cond:
+            started = self._start_locked()
+        return self._launch(started)
+
+    def _start_locked(self, force: bool = False) -> tuple[int, IndexStatus] | None:
+        if self._state == "building" or self._state == "ready":
+            return None
+        if self._state in ("degraded", "failed") and not force:
+            if self._clock() - self._settled_at < self._retry_delay(self._attempts):
+                return None
+        self._generation += 1
+        self._state = "building"
+        return self._generation, self._status_locked()
+
+    def _launch(self, started: tuple[int, IndexStatus] | None) -> bool:
+        """Announce a build claimed by _start_locked(), then run it."""
+        if started is None:
+            return False
+        generation, status = started
+        self._notify(status)  # before the thread, so "building" precedes its events
+        threading.Thread(target=self._run, args=(generation,), name="meera-index-build", daemon=True).start()
+        return True
+
+    def retry_now(self) -> bool:
+        """Rebuild immediately unless a build is running or the index is ready."""
+        with self._cond:
+            started = self._start_locked(force=True)
+        return self._launch(started)
+
+    def reset(self) -> None:
+        """Forget everything; a build still running is discarded when it ends."""
+        with self._cond:
+            self._generation += 1
+            self._state = "idle"
+            self._index = None
+            self._partial = None
+            self._error = None
+            self._attempts = 0
+            self._settled_at = 0.0
+            self._cond.notify_all()
+
+    def current(self, timeout: float = 0.0) -> RetrievalIndex | None:
+        """Best index servable now, waiting up to `timeout` s for a first one.
+
+        Starts (or retries) a build when needed. Returns None when nothing is
+        servable within `timeout`.
+        """
+        deadline = self._clock() + timeout
+        self.start()
+        with self._cond:
+            while True:
+                serving = self._partial if self._partial is not None else self._index
+                if serving is not None or self._state != "building":
+                    break
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        return serving
+
+    def get(self, timeout: float | None = None) -> RetrievalIndex:
+        """Block until the build settles; the index, or the build's error.
+
+        Raises TimeoutError if the build is still running after `timeout`.
+        """
+        deadline = None if timeout is None else self._clock() + timeout
+        self.start()
+        with self._cond:
+            while self._state == "building":
+                remaining = None if deadline is None else deadline - self._clock()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("index build still running")
+                self._cond.wait(remaining)
+            if self._index is not None:
+                return self._index
+            if self._error is not None:
+                raise self._error
+            raise RuntimeError(f"index {self._state}")
+
+    # ---- build thread --------------------------------------------------------
+
+    def _publish(self, generation: int, index: RetrievalIndex) -> None:
+        with self._cond:
+            if generation != self._generation or self._state != "building":
+                return
+            self._partial = index
+            status = self._status_locked()
+            self._cond.notify_all()
+        self._notify(status)
+
+    def _run(self, generation: int) -> None:
+        error: BaseException | None = None
+        index: RetrievalIndex | None = None
+        try:
+            index = self._build(lambda partial: self._publish(generation, partial))
+        except Exception as exc:
+            error = exc
+        with self._cond:
+            if generation != self._generation:
+                return  # reset() while building
+            self._settled_at = self._clock()
+            if index is not None:
+                self._index = index
+                self._error = None
+                self._state = "ready" if index.has_dense else "degraded"
+            else:
+                self._error = error
+                # Keep serving what a previous (lexical-only) build left, if anything.
+                self._state = "degraded" if self._index is not None else "failed"
+            self._attempts = 0 if self._state == "ready" else self._attempts + 1
+            self._partial = None
+            status = self._status_locked()
+            self._cond.notify_all()
+        self._notify(status)
+
+    def _notify(self, status: IndexStatus) -> None:
+        """Deliver `status` to the subscribers (call without holding the lock)."""
+        with self._cond:
+            subscribers = list(self._subscribers)
+        for fn in subscribers:
+            try:
+                fn(status)
+            except Exception as exc:  # a subscriber must not break the build thread
+                print(f"[retrieval] index subscriber failed: {exc}", file=sys.stderr, flush=True)
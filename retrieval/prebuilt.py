@@ -0,0 +1,182 @@
+"""Prebuilt retrieval index file, memory-mapped at startup.
+
+Tool exemplars and rag_data are fixed per release, so their embeddings are
+computed once at release time (`python3 -m retrieval build`) and
+shipped next to the code. At startup `get_index()` maps the file read-only
+and reuses every vector whose text hash still matches; only entries that
+diverge (edited exemplars, user-added rag_data) are sent to the embedder.
+
+Layout (little-endian, version 1):
+
+    header       magic "MEERAIDX", u32 version, dim, count, fingerprint_len, meta_len
+    fingerprint  utf-8 embeddings.model_fingerprint() of the build
+    meta         utf-8 JSON list, one [kind, index_text, tool_name, rag] per entry
+    (pad to 16)
+    hashes       count x 16-byte blake2b(index_text)
+    vectors      count x dim float32, row order = entry order
+
+A file whose magic, version, fingerprint or size does not match is ignored.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Any
+
+from retrieval.index import KIND_RAG, IndexEntry, RetrievalIndex
+from retrieval.rag_chunker import RagChunk
+
+MAGIC = b"MEERAIDX"
+FORMAT_VERSION = 1
+HASH_SIZE = 16
+
+_HEADER = struct.Struct("<8sIIIII")
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_DEFAULT_PATH = _PROJECT_ROOT / "retrieval" / "prebuilt.idx"
+
+
+class PrebuiltIndexError(ValueError):
+    """The index file is missing, truncated, stale or from another format version."""
+
+
+def default_index_path() -> Path:
+    """MEERA_INDEX_FILE, or retrieval/prebuilt.idx in the app tree."""
+    raw = os.environ.get("MEERA_INDEX_FILE", "").strip()
+    return Path(raw).expanduser() if raw else _DEFAULT_PATH
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=HASH_SIZE).digest()
+
+
+def _pad16(n: int) -> int:
+    return (n + 15) & ~15
+
+
+def _entry_meta(entry: IndexEntry) -> list[Any]:
+    rag = None
+    if entry.rag_chunk is not None:
+        c = entry.rag_chunk
+        rag = [c.doc_path, c.doc_title, c.section, c.body]
+    return [entry.kind, entry.index_text, entry.tool_name, rag]
+
+
+def write_index_file(index: RetrievalIndex, path: Path, fingerprint: str) -> int:
+    """Serialize a built float32 index to `path` (atomically); returns bytes written."""
+    if not index.is_built:
+        raise RuntimeError("Index not built — call build() first")
+    if index.precision != "f32":
+        raise ValueError("prebuilt index files are written from a float32 index")
+    entries = index.entries
+    dim = index.dim
+    fp = fingerprint.encode("utf-8")
+    meta = json.dumps([_entry_meta(e) for e in entries], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    head_len = _HEADER.size + len(fp) + len(meta)
+    row = struct.Struct(f"<{dim}f")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, dim, len(entries), len(fp), len(meta)))
+        f.write(fp)
+        f.write(meta)
+        f.write(b"\0" * (_pad16(head_len) - head_len))
+        for e in entries:
+            f.write(text_hash(e.index_text))
+        for i in range(len(entries)):
+            f.write(row.pack(*index.vector(i)))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+class PrebuiltIndex:
+    """A mapped index file: fingerprint, per-entry text hashes and float32 rows."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as exc:  # empty file
+                raise PrebuiltIndexError(f"{path}: {exc}") from exc
+        try:
+            self._parse()
+        except Exception:
+            self._map.close()
+            raise
+
+    def _parse(self) -> None:
+        buf = self._map
+        if sys.byteorder != "little":
+            # The file is little-endian and cast("f") is native; such hosts re-embed.
+            raise PrebuiltIndexError(f"{self.path}: big-endian host, cannot map float32 rows")
+        if len(buf) < _HEADER.size:
+            raise PrebuiltIndexError(f"{self.path}: truncated header")
+        magic, version, dim, count, fp_len, meta_len = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise PrebuiltIndexError(f"{self.path}: not a Meera index file")
+        if version != FORMAT_VERSION:
+            raise PrebuiltIndexError(f"{self.path}: format version {version}, expected {FORMAT_VERSION}")
+        fp_start = _HEADER.size
+        meta_start = fp_start + fp_len
+        hashes_start = _pad16(meta_start + meta_len)
+        vectors_start = hashes_start + count * HASH_SIZE
+        end = vectors_start + count * dim * 4
+        if len(buf) != end or (count and dim <= 0):
+            raise PrebuiltIndexError(f"{self.path}: size {len(buf)} does not match header (expected {end})")
+        self.dim = dim
+        self.count = count
+        self.fingerprint = bytes(buf[fp_start:meta_start]).decode("utf-8", errors="replace")
+        self._meta_span = (meta_start, meta_start + meta_len)
+        self._hashes = memoryview(buf)[hashes_start:vectors_start]
+        self.vectors = memoryview(buf)[vectors_start:end].cast("f")
+        self._rows: dict[bytes, int] | None = None
+
+    def close(self) -> None:
+        """Drop this object's views; the mapping closes once no store uses it."""
+        self._hashes.release()
+        self.vectors.release()
+
+    def hash_at(self, i: int) -> bytes:
+        return bytes(self._hashes[i * HASH_SIZE:(i + 1) * HASH_SIZE])
+
+    def lookup(self, texts: list[str]) -> list[int | None]:
+        """File row for each text (None when its hash is not in the file)."""
+        if self._rows is None:
+            self._rows = {self.hash_at(i): i for i in range(self.count)}
+        return [self._rows.get(text_hash(t)) for t in texts]
+
+    def entries(self) -> list[IndexEntry]:
+        """Entry metadata as stored at build time."""
+        start, end = self._meta_span
+        out = []
+        for kind, text, tool_name, rag in json.loads(bytes(self._map[start:end]).decode("utf-8")):
+            chunk = RagChunk(*rag) if kind == KIND_RAG and rag else None
+            out.append(IndexEntry(kind=kind, index_text=text, tool_name=tool_name, rag_chunk=chunk))
+        return out
+
+
+def open_index_file(path: Path | None = None, fingerprint: str | None = None) -> PrebuiltIndex:
+    """Map `path` (default: default_index_path()).
+
+    Raises PrebuiltIndexError when the file is missing or unusable, including
+    a model fingerprint different from `fingerprint` (when given).
+    """
+    path = path or default_index_path()
+    try:
+        prebuilt = PrebuiltIndex(path)
+    except OSError as exc:
+        raise PrebuiltIndexError(f"{path}: {exc.strerror or exc}") from exc
+    if fingerprint is not None and prebuilt.fingerprint != fingerprint:
+        found = prebuilt.fingerprint
+        prebuilt.close()
+        raise PrebuiltIndexError(f"{path}: built for {found!r}, embedder is {fingerprint!r}")
+    return prebuilt
@@ -1,20 +1,42 @@
 """High-level retrieval: build a process-wide index from tools + rag_data.
 
 Public surface:
-    - build_index(): assemble (but don't cache) a fresh RetrievalIndex
-    - get_index(): lazy, cached singleton (build on first call)
+    - build_index(): assemble (but don't cache) a fresh RetrievalIndex,
+      reusing vectors from the prebuilt index file when it matches
+    - get_index(): lazy, cached singleton (waits for its build)
+    - start_index_build() / current_index() / index_status() /
+      subscribe_index(): background build and readiness (retrieval/lifecycle.py)
     - reset_index(): clear the singleton (used by tests)
+    - embedder_recovered(): rebuild a lexical-only or failed singleton now
     - retrieve(): convenience wrapper returning a RetrievalResult
+
+Retrieval is hybrid by default: dense cosine hits fused with BM25 matches
+(MEERA_RETRIEVAL_HYBRID=0 for dense only). When the embedding server is
+unreachable, at build or at query time, it degrades to lexical-only instead
+of returning nothing.
+
+Each retrieval has a latency budget (MEERA_RETRIEVAL_DEADLINE_MS): the dense
+query runs on a worker thread while the BM25 router scores the exemplars on
+the caller's thread, and the lexical result is used if the dense one is not
+back in time. Repeated embedding failures open the circuit breaker in
+embeddings.py, after which the dense path fails fast until the cool-down ends.
+
+retrieve() never waits for the index build: until it finishes, queries are
+answered from a lexical-only snapshot of the entries.
 """
 from __future__ import annotations
 
 import os
 import sys
 import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import dataclass, field
 from pathlib import Path
 
-from embeddings import EmbeddingUnavailableError
+from embeddings import EmbeddingUnavailableError, model_fingerprint
 from retrieval.index import (
     KIND_RAG,
     KIND_TOOL,
@@ -22,8 +44,11 @@ from retrieval.index import (
     IndexHit,
     RetrievalIndex,
 )
+from retrieval.lifecycle import IndexLifecycle, IndexStatus, Publish
+from retrieval.prebuilt import PrebuiltIndex, PrebuiltIndexError, open_index_file
 from retrieval.rag_chunker import chunk_rag_directory
 from tools.registry import TOOLS
+from tracing import attach_turn, current_turn
 
 _PROJECT_ROOT = Path(__file__).resolve().parent.parent
 _DEFAULT_RAG_DIR = _PROJECT_ROOT / "rag_data"
@@ -35,6 +60,9 @@ class RetrievalResult:
     query: str
     tools: list[IndexHit] = field(default_factory=list)
     rag: list[IndexHit] = field(default_factory=list)
+    mode: str = "dense"  # "dense" | "hybrid" | "lexical" | "none" (no index)
+    deadline_missed: bool = False  # dense result not back within the budget
+    partial: bool = False  # served while the index was still being built
 
     @property
     def candidate_tool_names(self) -> list[str]:
@@ -45,6 +73,36 @@ def _debug_retrieval_enabled() -> bool:
     return os.environ.get("MEERA_DEBUG_RETRIEVAL", "").strip().lower() in ("1", "true", "yes", "on")
 
 
+def _hybrid_enabled() -> bool:
+    return os.environ.get("MEERA_RETRIEVAL_HYBRID", "1").strip().lower() in ("1", "true", "yes", "on")
+
+
+# A lexical match that the dense scorer missed must cover most of the query
+# to be added in hybrid mode; lexical-only mode is laxer since it is all we have.
+_HYBRID_LEXICAL_THRESHOLD = 0.8
+
+
+def _lexical_threshold() -> float:
+    """Minimum IDF-weighted query coverage for a lexical-only hit (0-1)."""
+    try:
+        value = float(os.environ.get("MEERA_RETRIEVAL_LEXICAL_THRESHOLD", "0.5"))
+    except ValueError:
+        return 0.5
+    return max(0.0, min(value, 1.0))
+
+
+_DEFAULT_DEADLINE_MS = 500
+
+
+def _deadline_s() -> float:
+    """Dense retrieval budget in seconds (MEERA_RETRIEVAL_DEADLINE_MS; 0 = wait)."""
+    try:
+        ms = int(os.environ.get("MEERA_RETRIEVAL_DEADLINE_MS", str(_DEFAULT_DEADLINE_MS)))
+    except ValueError:
+        ms = _DEFAULT_DEADLINE_MS
+    return max(0, min(ms, 60_000)) / 1000.0
+
+
 def _debug(msg: str) -> None:
     if _debug_retrieval_enabled():
         print(f"[retrieval] {msg}", file=sys.stderr, flush=True)
@@ -80,53 +138,165 @@ def _populate_rag_entries(index: RetrievalIndex, rag_dir: Path) -> int:
     return len(chunks)
 
 
-def build_index(rag_dir: Path | None = None) -> RetrievalIndex:
+def _load_prebuilt() -> PrebuiltIndex | None:
+    try:
+        prebuilt = open_index_file(fingerprint=model_fingerprint())
+    except PrebuiltIndexError as exc:
+        _debug(f"no prebuilt index: {exc}")
+        return None
+    _debug(f"prebuilt index {prebuilt.path} ({prebuilt.count} entries)")
+    return prebuilt
+
+
+def build_index(
+    rag_dir: Path | None = None,
+    *,
+    precision: str | None = None,
+    use_prebuilt: bool = True,
+    lexical_fallback: bool = False,
+    on_partial: Publish | None = None,
+) -> RetrievalIndex:
     """Construct and embed a fresh RetrievalIndex.
 
-    Raises EmbeddingUnavailableError if the embedding server is unreachable.
-    Callers that want a graceful no-retrieval fallback should catch this.
+    Vectors found in the prebuilt index file (see retrieval/prebuilt.py) are
+    reused, so only entries that changed since the release are embedded.
+
+    Raises EmbeddingUnavailableError if the embedding server is unreachable
+    and some entry still needs embedding, unless `lexical_fallback` is set:
+    then the index is finished lexical-only (`has_dense` is False).
+
+    `on_partial`, if given, receives a lexical-only copy of the index before
+    any embedding starts, then one with the tool exemplars embedded (RAG
+    still lexical, `partial` True) before the RAG chunks are, so callers can
+    serve queries during the build and route tools densely early.
     """
     rag_dir = rag_dir or _DEFAULT_RAG_DIR
-    index = RetrievalIndex()
+    index = RetrievalIndex(precision=precision) if precision else RetrievalIndex()
     n_tools = _populate_tool_entries(index)
     n_rag = _populate_rag_entries(index, rag_dir)
     _debug(f"queued entries: {n_tools} tool exemplars + {n_rag} rag chunks")
-    index.build()
-    _debug(f"index built ({index.size} entries embedded)")
+    if on_partial is not None:
+        on_partial(index.lexical_snapshot())
+    prebuilt = _load_prebuilt() if use_prebuilt else None
+    try:
+        tier = None
+        if on_partial is not None and 0 < n_tools < index.size:
+            tier = index.build_tier(n_tools, prebuilt)
+            _debug(f"tool tier built ({tier.embedded_count} embedded); rag chunks pending")
+            on_partial(tier)
+        index.build(prebuilt=prebuilt, reuse=tier)
+    except EmbeddingUnavailableError as exc:
+        if not lexical_fallback:
+            raise
+        index.build_lexical_only()
+        _debug(f"embedding unavailable ({exc}); index is lexical-only")
+        return index
+    _debug(f"index built ({index.size} entries, {index.embedded_count} embedded)")
     return index
 
 
-_lock = threading.Lock()
-_singleton: RetrievalIndex | None = None
-_build_error: Exception | None = None
+_DENSE_RETRY_S = 30.0
+_DENSE_RETRY_MAX_S = 600.0
+
+
+def _retry_delay(attempts: int) -> float:
+    """Backoff before rebuilding after `attempts` degraded/failed builds in a row."""
+    return min(_DENSE_RETRY_MAX_S, _DENSE_RETRY_S * 2.0 ** max(0, attempts - 1))
+
+
+_rag_dir: Path | None = None
+
+
+def _build_singleton(publish: Publish) -> RetrievalIndex:
+    return build_index(_rag_dir, lexical_fallback=True, on_partial=publish)
+
+
+def _log_status(status: IndexStatus) -> None:
+    detail = f" error={status.error!r}" if status.error else ""
+    retry = f" retry_in={status.retry_in_s}s" if status.retry_in_s is not None else ""
+    _debug(f"index {status.state} size={status.size} dense={status.has_dense} partial={status.partial}{detail}{retry}")
+
+
+_lifecycle = IndexLifecycle(_build_singleton, _retry_delay)
+_lifecycle.subscribe(_log_status)
 
 
 def get_index(rag_dir: Path | None = None) -> RetrievalIndex:
-    """Return a process-wide singleton index, building it on first call.
+    """Return the process-wide singleton index, waiting for its build.
 
-    Subsequent calls return the same object. If the first build fails, the
-    failure is cached and re-raised — call reset_index() to retry.
+    The first call starts the build (see start_index_build()) and blocks
+    until it settles. If the embedding server is unreachable the index is
+    built lexical-only, and a full rebuild is tried again once the backoff
+    (_DENSE_RETRY_S, doubling per attempt) has passed, or right away after
+    embedder_recovered(). If the build fails for another reason, the error
+    is re-raised until the backoff has passed.
     """
-    global _singleton, _build_error
-    with _lock:
-        if _singleton is not None:
-            return _singleton
-        if _build_error is not None:
-            raise _build_error
-        try:
-            _singleton = build_index(rag_dir)
-        except Exception as exc:
-            _build_error = exc
-            raise
-        return _singleton
+    global _rag_dir
+    if rag_dir is not None:
+        _rag_dir = rag_dir
+    return _lifecycle.get()
+
+
+def start_index_build() -> bool:
+    """Build the singleton in the background (no-op if built or building)."""
+    return _lifecycle.start()
+
+
+def current_index(timeout: float = 0.0) -> RetrievalIndex | None:
+    """The best index servable now without waiting on the whole build.
+
+    While the first build runs this is a partial index (lexical-only until
+    the vectors are ready); None if nothing is servable within `timeout`.
+    """
+    return _lifecycle.current(timeout)
+
+
+def index_status() -> IndexStatus:
+    """State of the singleton: idle | building | ready | degraded | failed."""
+    return _lifecycle.status()
+
+
+def subscribe_index(fn: Callable[[IndexStatus], None]) -> Callable[[], None]:
+    """Call `fn(status)` on every index state change; returns an unsubscribe function."""
+    return _lifecycle.subscribe(fn)
 
 
 def reset_index() -> None:
     """Drop the cached singleton; next get_index() will rebuild."""
-    global _singleton, _build_error
-    with _lock:
-        _singleton = None
-        _build_error = None
+    global _rag_dir
+    _rag_dir = None
+    _lifecycle.reset()
+
+
+def embedder_recovered() -> None:
+    """The embedding server is back: rebuild a lexical-only or failed index now.
+
+    A dense index that is already built is kept.
+    """
+    _lifecycle.retry_now()
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _submit(fn, /, *args, **kwargs) -> Future:
+    """Run `fn` on the shared retrieval worker, attributed to the caller's turn."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Two workers: one stuck on a slow embed request must not queue the next turn.
+            _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="meera-retrieve")
+    trace = current_turn()
+
+    def run():
+        attach_turn(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            attach_turn(None)
+
+    return _executor.submit(run)
 
 
 def retrieve(
@@ -139,23 +309,68 @@ def retrieve(
 ) -> RetrievalResult:
     """Convenience wrapper: query the singleton and return a RetrievalResult.
 
-    Returns an empty RetrievalResult on EmbeddingUnavailableError so callers
-    can degrade gracefully without try/except boilerplate at every call site.
+    Falls back to lexical-only scoring (`mode="lexical"`, thresholds replaced
+    by MEERA_RETRIEVAL_LEXICAL_THRESHOLD) when the query cannot be embedded
+    or the dense query misses its deadline (`deadline_missed=True`), so
+    callers can degrade gracefully without try/except boilerplate at every
+    call site. Without `index`, uses the singleton as far as it is built
+    (current_index()); returns an empty result (`mode="none"`) only when
+    nothing is servable within the deadline. A result from an index still
+    being built has `partial=True`: RAG chunks not embedded yet are matched
+    lexically (MEERA_RETRIEVAL_LEXICAL_THRESHOLD) whatever the mode.
+    Waiting for the index and the dense query share one deadline.
     """
-    idx = index if index is not None else _try_get_index()
+    started = time.monotonic()
+    deadline = _deadline_s()
+    idx = index if index is not None else current_index(deadline)
     if idx is None:
-        return RetrievalResult(query=query)
-    try:
-        tools, rag = idx.query_split(
-            query,
-            k_tools=k_tools,
-            k_rag=k_rag,
-            tool_threshold=tool_threshold,
-            rag_threshold=rag_threshold,
-        )
-    except EmbeddingUnavailableError as exc:
-        _debug(f"retrieve failed: {exc}")
-        return RetrievalResult(query=query)
+        return RetrievalResult(query=query, mode="none")
+    mode = "hybrid" if _hybrid_enabled() else "dense"
+    if not idx.has_dense:
+        mode = "lexical"
+    lexical_threshold = _lexical_threshold()
+    remaining = deadline - (time.monotonic() - started)
+    missed = False
+
+    def lexical_only() -> tuple[list[IndexHit], list[IndexHit]]:
+        return idx.query_split(query, k_tools=k_tools, k_rag=k_rag, mode="lexical", lexical_threshold=lexical_threshold)
+
+    dense_kwargs = dict(
+        k_tools=k_tools,
+        k_rag=k_rag,
+        tool_threshold=tool_threshold,
+        rag_threshold=rag_threshold,
+        mode=mode,
+        lexical_threshold=lexical_threshold if mode == "lexical" else _HYBRID_LEXICAL_THRESHOLD,
+        partial_threshold=lexical_threshold,
+    )
+    if mode == "lexical":
+        tools, rag = idx.query_split(query, **dense_kwargs)
+    elif deadline <= 0:
+        try:
+            tools, rag = idx.query_split(query, **dense_kwargs)
+        except EmbeddingUnavailableError as exc:
+            _debug(f"dense retrieval failed ({exc}); using lexical only")
+            mode = "lexical"
+            tools, rag = lexical_only()
+    elif remaining <= 0:
+        _debug(f"waiting for the index used the {deadline * 1000:.0f} ms deadline; using lexical only")
+        mode, missed = "lexical", True
+        tools, rag = lexical_only()
+    else:
+        future = _submit(idx.query_split, query, **dense_kwargs)
+        # The cheap router runs meanwhile, so a miss costs no extra latency.
+        fallback = lexical_only()
+        try:
+            tools, rag = future.result(timeout=max(0.0, deadline - (time.monotonic() - started)))
+        except FutureTimeoutError:
+            _debug(f"dense retrieval missed its {deadline * 1000:.0f} ms deadline; using lexical only")
+            mode, missed = "lexical", True
+            tools, rag = fallback
+        except EmbeddingUnavailableError as exc:
+            _debug(f"dense retrieval failed ({exc}); using lexical only")
+            mode = "lexical"
+            tools, rag = fallback
     if _debug_retrieval_enabled():
         names = [(h.entry.tool_name, round(h.score, 3)) for h in tools]
         rags = [
@@ -166,14 +381,7 @@ def retrieve(
             )
             for h in rag
         ]
-        _debug(f"query={query!r} tools={names} rag={rags}")
-    return RetrievalResult(query=query, tools=tools, rag=rag)
-
-
-def _try_get_index() -> RetrievalIndex | None:
-    """Best-effort access to the singleton; returns None if unavailable."""
-    try:
-        return get_index()
-    except EmbeddingUnavailableError as exc:
-        _debug(f"index unavailable: {exc}")
-        return None
+        _debug(f"query={query!r} mode={mode} partial={idx.partial} tools={names} rag={rags}")
+    return RetrievalResult(
+        query=query, tools=tools, rag=rag, mode=mode, deadline_missed=missed, partial=idx.partial
+    )
@@ -19,7 +19,7 @@ _H2_RE = re.compile(r"^##\s+(.+?)\s*$", re.MULTILINE)
 _EXCLUDE_FILENAMES = {"README.md", "readme.md"}
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RagChunk:
     """A retrievable section of an rag_data document."""
     doc_path: str       # repo-relative path, e.g. "rag_data/grep_basics.md"
@@ -0,0 +1,233 @@
+"""Packed vector storage for the retrieval index.
+
+Vectors live in one contiguous buffer per index instead of a list of Python
+float lists (a 384-d list costs ~12 KB of boxed floats; the same row packed
+as float32 is 1.5 KB). Three precisions are supported:
+
+- "f32": `array('f')`, 4 bytes/dim, scores are exact for practical purposes.
+- "f16": IEEE half floats, 2 bytes/dim, scores within ~1e-3.
+- "int8": symmetric per-row quantization (codes in [-127, 127] plus one
+  float scale per row), 1 byte/dim — 100k x 384 is ~37 MB.
+
+Quantized stores can keep the original float32 rows in an unlinked temporary
+file that is memory-mapped read-only (`keep_exact=True`), or rescore from an
+already-mapped float32 buffer (`attach_exact()`, e.g. a prebuilt index file).
+Scans use the compact codes; `exact_scores()` rescores a short candidate list
+from the mapped originals, so only the touched pages become resident.
+`from_buffer()` wraps a mapped float32 buffer as a zero-copy, read-only store.
+
+Scores are dot products against an already L2-normalized query.
+"""
+from __future__ import annotations
+
+import math
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from collections.abc import Iterable, Sequence
+from itertools import repeat
+from operator import mul
+
+PRECISIONS = ("f32", "f16", "int8")
+
+_F16_EPS = 2.0 ** -11  # half-float relative rounding error
+
+
+def precision_from_env(default: str = "f32") -> str:
+    """MEERA_INDEX_PRECISION, falling back to `default` when unset or unknown."""
+    raw = os.environ.get("MEERA_INDEX_PRECISION", "").strip().lower()
+    return raw if raw in PRECISIONS else default
+
+
+class VectorStore:
+    """Append-only, fixed-dimension row store with optional quantization."""
+
+    __slots__ = (
+        "dim",
+        "precision",
+        "_count",
+        "_sealed",
+        "_f32",
+        "_f16",
+        "_f32_row",
+        "_f16_row",
+        "_codes",
+        "_scales",
+        "_max_scale",
+        "_exact_file",
+        "_exact_map",
+        "_exact_view",
+    )
+
+    def __init__(self, dim: int, precision: str = "f32", *, keep_exact: bool = False):
+        if dim <= 0:
+            raise ValueError(f"dim must be positive, got {dim}")
+        if precision not in PRECISIONS:
+            raise ValueError(f"unknown precision {precision!r}; expected one of {', '.join(PRECISIONS)}")
+        self.dim = dim
+        self.precision = precision
+        self._count = 0
+        self._sealed = False
+        self._f32 = array("f") if precision == "f32" else None
+        self._f16 = bytearray() if precision == "f16" else None
+        self._f32_row = struct.Struct(f"={dim}f")  # native order, as array('f') and cast("f")
+        self._f16_row = struct.Struct(f"<{dim}e") if precision == "f16" else None
+        self._codes = array("b") if precision == "int8" else None
+        self._scales = array("f") if precision == "int8" else None
+        self._max_scale = 0.0
+        # Quantized stores spill float32 originals to disk for rescoring.
+        self._exact_file = (
+            tempfile.TemporaryFile(prefix="meera-vectors-") if keep_exact and precision != "f32" else None
+        )
+        self._exact_map: mmap.mmap | None = None
+        self._exact_view: memoryview | None = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def approximate(self) -> bool:
+        """True when scan scores are quantized (rescoring may reorder them)."""
+        return self.precision != "f32"
+
+    @classmethod
+    def from_buffer(cls, dim: int, buffer: memoryview) -> VectorStore:
+        """Read-only float32 store over `buffer` (format "f", rows back to back)."""
+        if buffer.format != "f" or len(buffer) % dim:
+            raise ValueError(f"buffer is not a sequence of {dim}-d float32 rows")
+        store = cls(dim)
+        store._f32 = buffer
+        store._count = len(buffer) // dim
+        store._sealed = True
+        return store
+
+    @property
+    def can_rescore(self) -> bool:
+        return self._exact_view is not None
+
+    @property
+    def error_bound(self) -> float:
+        """Upper bound on |scan score - exact score| for a unit-length query."""
+        if self.precision == "int8":
+            # Each component is off by at most scale/2 and ||q||_1 <= sqrt(dim).
+            return self._max_scale / 2.0 * math.sqrt(self.dim)
+        if self.precision == "f16":
+            return _F16_EPS
+        return 0.0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in memory by the packed rows (excludes the mapped originals)."""
+        if self._f32 is not None:
+            return self._f32.itemsize * len(self._f32)
+        if self._f16 is not None:
+            return len(self._f16)
+        return len(self._codes) + self._scales.itemsize * len(self._scales)
+
+    def append(self, vec: Sequence[float]) -> None:
+        if len(vec) != self.dim:
+            raise ValueError(f"expected a {self.dim}-d vector, got {len(vec)}")
+        if self._sealed:
+            raise RuntimeError("VectorStore is sealed")
+        if self._f32 is not None:
+            self._f32.frombytes(self._f32_row.pack(*vec))
+        elif self._f16 is not None:
+            self._f16 += self._f16_row.pack(*vec)
+        else:
+            peak = max(map(abs, vec))
+            scale = peak / 127.0 if peak > 0.0 else 1.0
+            # |v| <= peak, so every code already lies in [-127, 127].
+            self._codes.extend(map(round, map(mul, vec, repeat(127.0 / peak if peak > 0.0 else 0.0))))
+            self._scales.append(scale)
+            self._max_scale = max(self._max_scale, scale)
+        if self._exact_file is not None:
+            self._exact_file.write(self._f32_row.pack(*vec))
+        self._count += 1
+
+    def extend(self, vectors: Iterable[Sequence[float]]) -> None:
+        for vec in vectors:
+            self.append(vec)
+
+    def seal(self) -> None:
+        """Finish appending; maps the spilled originals for rescoring."""
+        self._sealed = True
+        if self._exact_file is None or self._exact_map is not None or not self._count:
+            return
+        self._exact_file.flush()
+        self._exact_map = mmap.mmap(self._exact_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._exact_view = memoryview(self._exact_map).cast("f")
+
+    def attach_exact(self, buffer: memoryview) -> None:
+        """Rescore from `buffer` (float32 rows in this store's row order)."""
+        if not self.approximate:
+            return
+        if buffer.format != "f" or len(buffer) != self._count * self.dim:
+            raise ValueError("exact buffer does not match the stored rows")
+        self.close()
+        self._exact_view = buffer[:]
+
+    def close(self) -> None:
+        """Release the mapped originals (the store stays usable without rescoring)."""
+        if self._exact_view is not None:
+            self._exact_view.release()
+            self._exact_view = None
+        if self._exact_map is not None:
+            self._exact_map.close()
+            self._exact_map = None
+        if self._exact_file is not None:
+            self._exact_file.close()
+            self._exact_file = None
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except (AttributeError, BufferError, ValueError):
+            pass
+
+    def row(self, i: int) -> list[float]:
+        """Row `i` as floats (dequantized for f16/int8)."""
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        d = self.dim
+        if self._f32 is not None:
+            return self._f32[i * d:(i + 1) * d].tolist()
+        if self._f16 is not None:
+            return list(self._f16_row.unpack_from(self._f16, i * d * 2))
+        scale = self._scales[i]
+        return [c * scale for c in self._codes[i * d:(i + 1) * d]]
+
+    def exact_row(self, i: int) -> list[float]:
+        """Row `i` from the float32 originals when kept, else row(i)."""
+        if self._exact_view is None:
+            return self.row(i)
+        d = self.dim
+        return self._exact_view[i * d:(i + 1) * d].tolist()
+
+    def scores(self, qv: Sequence[float]) -> list[float]:
+        """Dot product of `qv` with every row, in row order."""
+        if len(qv) != self.dim:
+            return [0.0] * self._count
+        d = self.dim
+        if self._f32 is not None:
+            view = memoryview(self._f32)
+            return [sum(map(mul, qv, view[off:off + d])) for off in range(0, self._count * d, d)]
+        if self._f16 is not None:
+            return [sum(map(mul, qv, row)) for row in self._f16_row.iter_unpack(self._f16)]
+        view = memoryview(self._codes)
+        return [
+            sum(map(mul, qv, view[i * d:(i + 1) * d])) * scale
+            for i, scale in enumerate(self._scales)
+        ]
+
+    def exact_scores(self, qv: Sequence[float], rows: Iterable[int]) -> dict[int, float]:
+        """Rescore `rows` against the float32 originals; {} when none were kept."""
+        rows = list(rows)
+        if self._exact_view is None or not rows:
+            return {}
+        if len(qv) != self.dim:
+            return {i: 0.0 for i in rows}
+        d = self.dim
+        view = self._exact_view
+        return {i: sum(map(mul, qv, view[i * d:(i + 1) * d])) for i in rows}
@@ -325,15 +325,29 @@ except Exception:
     fi
     echo "Backend: ${_meera_llama_backend:-cpu}, chat -ngl=${_chat_ngl}"
     echo "Log: /tmp/llama_meera.log"
-    # One server slot (default llama-server is --parallel auto → 4): sequential turns
-    # reuse the same slot/KV cache instead of LRU-picking an empty slot and paying full
-    # prompt prefill. To use more slots, pass --parallel N in MEERA_LLAMACPP_SERVER_EXTRA
-    # (llama-server uses the last --parallel value if specified twice).
+    # MEERA_LLAMACPP_PARALLEL server slots, default 1 (llama-server's default is
+    # --parallel auto → 4): sequential turns reuse the same slot/KV cache instead of
+    # LRU-picking an empty slot and paying full prompt prefill. A second slot lets
+    # background work (session titles) run beside the conversation. Each slot gets a
+    # 1/N share of -c, so with more than one slot -c is MEERA_LLAMACPP_CTX (per slot,
+    # default 4096) times the slot count.
+    _chat_parallel="${MEERA_LLAMACPP_PARALLEL:-1}"
+    case "$_chat_parallel" in '' | *[!0-9]* | 0) _chat_parallel=1 ;; esac
+    _chat_ctx="${MEERA_LLAMACPP_CTX:-}"
+    case "$_chat_ctx" in *[!0-9]* | 0) _chat_ctx="" ;; esac
+    if [ -z "$_chat_ctx" ] && [ "$_chat_parallel" -gt 1 ]; then
+      _chat_ctx=4096
+    fi
+    _chat_slot_args="--parallel $_chat_parallel"
+    if [ -n "$_chat_ctx" ]; then
+      _chat_slot_args="$_chat_slot_args -c $((_chat_ctx * _chat_parallel))"
+    fi
+    echo "Slots: $_chat_slot_args"
     # shellcheck disable=SC2086
     env LD_LIBRARY_PATH="${MEERA_LLAMA_LIB_DIR}${LD_LIBRARY_PATH:+:$LD_LIBRARY_PATH}" \
       "$LLAMA_BIN" -m "$MEERA_LLAMACPP_GGUF" --host "$_LLAMA_HOST" --port "$_LLAMA_PORT" \
       -ngl "$_chat_ngl" \
-      --parallel 1 \
+      $_chat_slot_args \
       $MEERA_LLAMACPP_SERVER_EXTRA >/tmp/llama_meera.log 2>&1 &
     _wait=0
     while [ "$_wait" -lt 30 ] && ! llama_server_reachable; do
@@ -438,9 +452,17 @@ except Exception:
       echo "embedding llama-server is up at $EMBED_BASE"
     fi
     export MEERA_EMBED_URL="$EMBED_BASE"
+    export MEERA_EMBED_MODEL_FILE="${MEERA_EMBED_MODEL_FILE:-$(basename "$MEERA_EMBED_GGUF")}"
   else
     echo "MEERA_DISABLE_EMBED=1 — skipping embedding server (retrieval / RAG disabled)."
   fi
+
+  # Let the in-app supervisor (supervisor.py) restart servers this script started.
+  if [ -n "${LLAMA_BIN:-}" ]; then
+    export MEERA_LLAMA_SERVER="$LLAMA_BIN"
+    export MEERA_LLAMA_LIB_DIR
+    export MEERA_LLAMACPP_NGL="${_chat_ngl:-${MEERA_LLAMACPP_NGL:-0}}"
+  fi
 else
   if ! command -v ollama >/dev/null 2>&1; then
     section "Installing Ollama"
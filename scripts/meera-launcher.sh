@@ -408,6 +408,42 @@ stop_pid_file() {
   rm -f "$_pid_file"
 }
 
+# Tell the in-app supervisor (supervisor.py) how to restart the servers.
+# llama-server slot arguments. MEERA_LLAMACPP_PARALLEL slots (default 1: one
+# conversation keeps its KV cache, instead of --parallel auto's 4 empty ones);
+# a second slot lets background work (session titles) run beside the user.
+# Each slot gets a 1/N share of -c, so with more than one slot -c is
+# MEERA_LLAMACPP_CTX (per slot, default 4096) times the slot count.
+chat_slot_args() {
+  local parallel="${MEERA_LLAMACPP_PARALLEL:-1}" ctx="${MEERA_LLAMACPP_CTX:-}"
+  case "$parallel" in '' | *[!0-9]* | 0) parallel=1 ;; esac
+  case "$ctx" in *[!0-9]* | 0) ctx="" ;; esac
+  if [ -z "$ctx" ] && [ "$parallel" -gt 1 ]; then
+    ctx=4096
+  fi
+  printf -- '--parallel %s' "$parallel"
+  if [ -n "$ctx" ]; then
+    printf -- ' -c %s' "$((ctx * parallel))"
+  fi
+}
+
+export_supervisor_env() {
+  if [ -z "${LLAMA_BIN:-}" ]; then
+    select_llama_asset "${MEERA_LLAMACPP_BACKEND:-cpu}"
+    _bindir="$MEERA_LLAMA_CACHE/$MEERA_LLAMA_CPP_TAG/$LLAMA_ID/$MEERA_LLAMA_DIR_NAME"
+    [ -x "$_bindir/llama-server" ] || return 0
+    LLAMA_BIN="$_bindir/llama-server"
+    LLAMA_LIB_DIR="$_bindir"
+    LLAMA_BACKEND="${MEERA_LLAMACPP_BACKEND:-cpu}"
+  fi
+  export MEERA_LLAMA_SERVER="$LLAMA_BIN"
+  export MEERA_LLAMA_LIB_DIR="$LLAMA_LIB_DIR"
+  export MEERA_LLAMACPP_GGUF="$MEERA_MODEL_DIR/$MEERA_CHAT_MODEL_NAME"
+  export MEERA_EMBED_GGUF="$MEERA_MODEL_DIR/$MEERA_EMBED_MODEL_NAME"
+  export MEERA_LLAMACPP_NGL="$([ "${LLAMA_BACKEND:-cpu}" = "vulkan" ] && printf '99' || printf '0')"
+  export MEERA_LOG_DIR
+}
+
 ensure_servers() {
   mkdir -p "$MEERA_RUNTIME_DIR" "$MEERA_LOG_DIR" "$MEERA_MODEL_DIR" "$MEERA_LLAMA_CACHE"
 
@@ -442,9 +478,10 @@ ensure_servers() {
     _chat_ngl=0
     [ "${LLAMA_BACKEND:-cpu}" = "vulkan" ] && _chat_ngl=99
     section "Starting Meera chat model on $_chat_url"
+    # shellcheck disable=SC2046,SC2086
     env LD_LIBRARY_PATH="${LLAMA_LIB_DIR}${LD_LIBRARY_PATH:+:$LD_LIBRARY_PATH}" \
       "$LLAMA_BIN" -m "$_chat_model" --host 127.0.0.1 --port "$_chat_port" \
-      -ngl "$_chat_ngl" --parallel 1 >"$MEERA_LOG_DIR/llama-chat.log" 2>&1 &
+      -ngl "$_chat_ngl" $(chat_slot_args) ${MEERA_LLAMACPP_SERVER_EXTRA:-} >"$MEERA_LOG_DIR/llama-chat.log" 2>&1 &
     echo "$!" >"$MEERA_CHAT_PID"
     if ! wait_for_server "$_chat_url" "$MEERA_LOG_DIR/llama-chat.log"; then
       if [ "${LLAMA_BACKEND:-cpu}" = "vulkan" ]; then
@@ -468,9 +505,10 @@ ensure_servers() {
         fi
         ensure_llama_bundle_for cpu
         _chat_ngl=0
+        # shellcheck disable=SC2046,SC2086
         env LD_LIBRARY_PATH="${LLAMA_LIB_DIR}${LD_LIBRARY_PATH:+:$LD_LIBRARY_PATH}" \
           "$LLAMA_BIN" -m "$_chat_model" --host 127.0.0.1 --port "$_chat_port" \
-          -ngl "$_chat_ngl" --parallel 1 >"$MEERA_LOG_DIR/llama-chat.log" 2>&1 &
+          -ngl "$_chat_ngl" $(chat_slot_args) ${MEERA_LLAMACPP_SERVER_EXTRA:-} >"$MEERA_LOG_DIR/llama-chat.log" 2>&1 &
         echo "$!" >"$MEERA_CHAT_PID"
         wait_for_server "$_chat_url" "$MEERA_LOG_DIR/llama-chat.log" || die "CPU fallback server did not become reachable at $_chat_url"
       else
@@ -514,6 +552,8 @@ EOF
   export MEERA_BACKEND=llamacpp
   export MEERA_LLAMACPP_URL="$_chat_url"
   export MEERA_EMBED_URL="$_embed_url"
+  export MEERA_EMBED_MODEL_FILE="$MEERA_EMBED_MODEL_NAME"
+  export_supervisor_env
 }
 
 cmd_run() {
@@ -562,6 +602,10 @@ cmd_logs() {
     printf '\n--- %s ---\n' "$_log"
     tail -n 80 "$_log"
   done
+  if [ -f "$MEERA_LOG_DIR/turns.jsonl" ] && [ -f "$MEERA_APP_DIR/tracing.py" ]; then
+    printf '\n--- %s ---\n' "$MEERA_LOG_DIR/turns.jsonl"
+    MEERA_LOG_DIR="$MEERA_LOG_DIR" python3 "$MEERA_APP_DIR/tracing.py" tail 20 || true
+  fi
 }
 
 cmd_doctor() {
@@ -597,6 +641,14 @@ cmd_doctor() {
   fi
   pid_alive "$MEERA_CHAT_PID" && info "chat server process: running" || info "chat server process: stopped"
   pid_alive "$MEERA_EMBED_PID" && info "embedding server process: running" || info "embedding server process: stopped"
+  if [ -f "$MEERA_APP_DIR/supervisor.py" ]; then
+    info "Server supervisor:"
+    python3 "$MEERA_APP_DIR/supervisor.py" status | sed 's/^/  /' || true
+  fi
+  if [ -f "$MEERA_APP_DIR/tracing.py" ]; then
+    info "Turn latency (recent turns):"
+    MEERA_LOG_DIR="$MEERA_LOG_DIR" python3 "$MEERA_APP_DIR/tracing.py" summary 200 | sed 's/^/  /' || true
+  fi
 }
 
 cmd_update() {
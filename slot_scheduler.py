@@ -0,0 +1,275 @@
+"""Priority scheduling of chat requests onto llama-server slots.
+
+llama-server decodes up to `--parallel N` requests at once, one per slot,
+and each slot keeps the KV cache of the last prompt it ran. Meera sends two
+kinds of request:
+
+- interactive: the user's turn, streamed while they watch. Always pinned to
+  the conversation slot (MEERA_LLAMACPP_SLOT, default 0) so its prompt
+  prefix stays cached, and never kept waiting by background work;
+- background: anything the user is not waiting on (summaries, titles,
+  speculative work). Runs on the other slots only. A server with a single
+  slot runs no background work: a background request there would hold the
+  only slot, and llama-server would queue the user's next turn behind its
+  prefill, which cannot be interrupted before the first token.
+
+`SlotScheduler.lease()` hands out slots by that priority. While the user is
+waiting (an interactive request running, or one finished less than
+`idle_grace_s` ago, the gap between the passes of a tool turn) new background
+requests wait, and running ones are preempted: their lease's `cancel` event
+is set, the stream is closed (llama-server stops decoding when the client
+disconnects) and the caller gets `Preempted` to retry later. The stream is
+closed when its next line arrives, so a request still in prefill runs on
+until its first token; being on its own slot, it never makes the
+interactive request wait for a slot, and it never evicts the conversation's
+cache. When there is no slot to spare, background leases raise
+`BackgroundUnavailable` (the base class of `Preempted`) at once.
+
+`alease()` is the same for coroutines (`inference.astream_llm_events`).
+
+The slot count comes from MEERA_LLAMACPP_SLOTS, else llama-server's
+`/props` (`total_slots`). `/props` is read when a background lease first
+asks for a slot, never on the interactive path, and read again on the next
+background lease while it cannot be read; until then there are no
+background slots.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+
+import requests
+
+from process_default import ProcessDefault
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+_DEFAULT_IDLE_GRACE_S = 2.0
+_ASYNC_POLL_S = 0.05
+
+
+class BackgroundUnavailable(RuntimeError):
+    """Background work cannot run now; callers drop it or retry later."""
+
+
+class Preempted(BackgroundUnavailable):
+    """A background request was stopped so an interactive one could run."""
+
+
+@dataclass
+class Lease:
+    """One request's claim on a slot; `slot` None lets the server choose."""
+    priority: str
+    slot: int | None
+    cancel: threading.Event = field(default_factory=threading.Event)
+    waited_s: float = 0.0
+
+    @property
+    def preempted(self) -> bool:
+        return self.cancel.is_set()
+
+
+class SlotScheduler:
+    """Assigns slots to interactive and background requests (thread-safe)."""
+
+    def __init__(
+        self,
+        total_slots: int | None = 1,
+        *,
+        interactive_slot: int | None = 0,
+        idle_grace_s: float = _DEFAULT_IDLE_GRACE_S,
+        clock: Callable[[], float] = time.monotonic,
+        base_url: str = "",
+        probe: Callable[[], int | None] | None = None,
+    ):
+        self.base_url = base_url  # the server this scheduler was sized for
+        # None until known: `probe()` is asked when background work first needs a slot.
+        self.total_slots = max(1, total_slots) if total_slots is not None else None
+        self._probe = probe
+        self.interactive_slot = interactive_slot
+        self.idle_grace_s = idle_grace_s
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._interactive = 0
+        self._last_interactive = float("-inf")
+        self._background: list[Lease] = []
+
+    @property
+    def background_slots(self) -> list[int]:
+        """Slots background work may use: all but the conversation's (slot 0 when unpinned)."""
+        reserved = self.interactive_slot if self.interactive_slot is not None else 0
+        return [s for s in range(self.total_slots or 1) if s != reserved]
+
+    def user_waiting(self) -> bool:
+        with self._cond:
+            return self._user_waiting_locked()
+
+    def _user_waiting_locked(self) -> bool:
+        return self._interactive > 0 or self._clock() - self._last_interactive < self.idle_grace_s
+
+    @contextmanager
+    def lease(self, priority: str = INTERACTIVE, timeout: float | None = None) -> Iterator[Lease]:
+        """Hold a slot for one request.
+
+        Interactive leases are granted at once and preempt background ones.
+        Background leases wait until the user is not waiting and a
+        background slot is free; TimeoutError after `timeout` seconds, and
+        BackgroundUnavailable when the server has no slot to spare.
+        """
+        _check_priority(priority)
+        lease = self._acquire_interactive() if priority == INTERACTIVE else self._acquire_background(timeout)
+        try:
+            yield lease
+        finally:
+            self._release(lease)
+
+    @asynccontextmanager
+    async def alease(self, priority: str = INTERACTIVE, timeout: float | None = None) -> AsyncIterator[Lease]:
+        """lease() for coroutines: a background lease waits without blocking the event loop."""
+        _check_priority(priority)
+        if priority == INTERACTIVE:
+            lease = self._acquire_interactive()
+        else:
+            if self.total_slots is None:
+                await asyncio.to_thread(self._probe_total_slots)
+            self._check_background_slots()
+            start = self._clock()
+            deadline = None if timeout is None else start + timeout
+            while True:
+                with self._cond:
+                    lease = self._try_background_locked(start)
+                    if lease is not None:
+                        break
+                    wait = self._background_wait_locked(deadline)
+                # Releases notify the Condition, which a coroutine cannot wait on; poll.
+                await asyncio.sleep(_ASYNC_POLL_S if wait is None else min(wait, _ASYNC_POLL_S))
+        try:
+            yield lease
+        finally:
+            self._release(lease)
+
+    def _acquire_interactive(self) -> Lease:
+        with self._cond:
+            self._interactive += 1
+            for running in self._background:
+                running.cancel.set()
+            return Lease(INTERACTIVE, self.interactive_slot)
+
+    def _acquire_background(self, timeout: float | None) -> Lease:
+        if self.total_slots is None:
+            self._probe_total_slots()
+        self._check_background_slots()
+        start = self._clock()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            while True:
+                lease = self._try_background_locked(start)
+                if lease is not None:
+                    return lease
+                self._cond.wait(self._background_wait_locked(deadline))
+
+    def _probe_total_slots(self) -> None:
+        total = self._probe() if self._probe is not None else None
+        if total is not None:
+            with self._cond:
+                self.total_slots = max(1, total)
+
+    def _check_background_slots(self) -> None:
+        if not self.background_slots:
+            raise BackgroundUnavailable(
+                f"no slot to spare for background work ({self.total_slots or 'unknown'} slot(s), "
+                f"conversation on slot {self.interactive_slot})"
+            )
+
+    def _try_background_locked(self, start: float) -> Lease | None:
+        if self._user_waiting_locked():
+            return None
+        busy = {b.slot for b in self._background}
+        slot = next((s for s in self.background_slots if s not in busy), None)
+        if slot is None:
+            return None
+        lease = Lease(BACKGROUND, slot, waited_s=self._clock() - start)
+        self._background.append(lease)
+        return lease
+
+    def _background_wait_locked(self, deadline: float | None) -> float | None:
+        """How long a waiting background lease may sleep (None: until notified)."""
+        now = self._clock()
+        if deadline is not None and now >= deadline:
+            raise TimeoutError("no slot free for background work")
+        # Wake when the grace period after the last interactive request ends.
+        wait = None if deadline is None else deadline - now
+        if self._interactive == 0:
+            grace_left = self._last_interactive + self.idle_grace_s - now
+            if grace_left > 0:
+                wait = grace_left if wait is None else min(wait, grace_left)
+        return wait
+
+    def _release(self, lease: Lease) -> None:
+        with self._cond:
+            if lease.priority == INTERACTIVE:
+                self._interactive -= 1
+                self._last_interactive = self._clock()
+            elif lease in self._background:
+                self._background.remove(lease)
+            self._cond.notify_all()
+
+
+def _check_priority(priority: str) -> None:
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {PRIORITIES}, got {priority!r}")
+
+
+def _slots_from_env() -> int | None:
+    raw = os.environ.get("MEERA_LLAMACPP_SLOTS", "").strip()
+    try:
+        return max(1, int(raw)) if raw else None
+    except ValueError:
+        return None
+
+
+def probe_total_slots(base_url: str, timeout: float = 2.0) -> int | None:
+    """`total_slots` from llama-server's /props (None when it cannot be read)."""
+    try:
+        resp = requests.get(f"{base_url.rstrip('/')}/props", timeout=timeout)
+        total = resp.json().get("total_slots") if resp.ok else None
+    except (requests.RequestException, ValueError, AttributeError):
+        total = None
+    return total if isinstance(total, int) and total > 0 else None
+
+
+_default: ProcessDefault[SlotScheduler] = ProcessDefault()
+
+
+def get_default(base_url: str, interactive_slot: int | None) -> SlotScheduler:
+    """The process-wide scheduler for the chat server at `base_url`.
+
+    Rebuilt when the server moves (the supervisor restarted it on another
+    port) or the conversation slot changes, since either may change the slots.
+    Never blocks on the network: `/props` is probed by the first background
+    lease.
+    """
+    def create() -> SlotScheduler:
+        return SlotScheduler(
+            _slots_from_env(),
+            interactive_slot=interactive_slot,
+            base_url=base_url,
+            probe=lambda: probe_total_slots(base_url),
+        )
+
+    scheduler = _default.start(
+        create, stale=lambda s: s.base_url != base_url or s.interactive_slot != interactive_slot
+    )
+    assert scheduler is not None
+    return scheduler
+
+
+def reset_default() -> None:
+    _default.stop()
@@ -0,0 +1,660 @@
+"""Supervisor for the local llama-server processes (chat and embeddings).
+
+The launchers start both servers once; this module keeps them running for
+the lifetime of the app. One `ManagedServer` per server runs a monitor
+thread that:
+
+- adopts a server that is already answering on its URL (launcher-started),
+- health-checks it (`/health`, which returns 503 while the model loads),
+- restarts it when the process exits or stops answering, on the same port if
+  it is still free, otherwise on the next free port in its range,
+- backs off exponentially between restarts, and gives up (state "failed")
+  when it crashes MEERA_SUPERVISOR_CRASH_LIMIT times within
+  MEERA_SUPERVISOR_CRASH_WINDOW seconds, until restart() is called.
+
+A server whose launch command is unknown (no MEERA_LLAMA_SERVER / GGUF in
+the environment, or a non-local URL) is only health-checked.
+
+When a server becomes ready its URL is written back to the environment
+variable the clients read (MEERA_LLAMACPP_URL, MEERA_EMBED_URL), to the
+launcher's pid file and servers.env, and listeners are notified. The default
+supervisor uses that to reset the embedding circuit breaker and let retrieval
+rebuild its dense index immediately.
+
+Transitions are logged to stderr with MEERA_DEBUG_SUPERVISOR=1 (giving up
+is always logged). The current status is mirrored to `$XDG_RUNTIME_DIR/meera/supervisor.json`
+for `meera doctor`:
+
+    python3 supervisor.py status [--json]
+"""
+from __future__ import annotations
+
+import json
+import os
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+
+from process_default import ProcessDefault
+
+STATES = ("stopped", "starting", "ready", "unhealthy", "backoff", "failed")
+
+STATUS_FILENAME = "supervisor.json"
+
+_LOCAL_HOSTS = ("127.0.0.1", "localhost")
+
+
+def supervision_enabled() -> bool:
+    v = os.environ.get("MEERA_SUPERVISE", "1").strip().lower()
+    return v not in ("0", "false", "no", "off")
+
+
+def _debug_enabled() -> bool:
+    return os.environ.get("MEERA_DEBUG_SUPERVISOR", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def runtime_dir() -> Path:
+    """Same directory the launcher keeps pid files and servers.env in."""
+    return Path(os.environ.get("XDG_RUNTIME_DIR", "").strip() or "/tmp") / "meera"
+
+
+def status_path() -> Path:
+    return runtime_dir() / STATUS_FILENAME
+
+
+def _env_int(name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        value = int(os.environ.get(name, str(default)))
+    except ValueError:
+        return default
+    return max(lo, min(value, hi))
+
+
+@dataclass(frozen=True)
+class RestartPolicy:
+    """Backoff and crash-loop limits for one server."""
+    backoff_base_s: float = 1.0
+    backoff_max_s: float = 60.0
+    crash_limit: int = 5
+    crash_window_s: float = 300.0
+    ready_timeout_s: float = 120.0  # model load on a cold CPU can be slow
+    health_interval_s: float = 2.0
+    health_failures: int = 3  # consecutive failed probes of a live process
+
+    @classmethod
+    def from_env(cls) -> RestartPolicy:
+        return cls(
+            crash_limit=_env_int("MEERA_SUPERVISOR_CRASH_LIMIT", 5, 1, 100),
+            crash_window_s=float(_env_int("MEERA_SUPERVISOR_CRASH_WINDOW", 300, 10, 86_400)),
+        )
+
+    def backoff(self, recent_crashes: int) -> float:
+        return min(self.backoff_max_s, self.backoff_base_s * 2.0 ** max(0, recent_crashes - 1))
+
+
+@dataclass
+class ServerSpec:
+    """How to find, probe and (optionally) start one llama-server."""
+    name: str  # "chat" | "embed"
+    url_env: str
+    default_url: str
+    port_range: tuple[int, int]
+    argv: list[str] | None = None  # command without --host/--port; None = probe only
+    env: dict[str, str] = field(default_factory=dict)
+    log_path: Path | None = None
+    pid_path: Path | None = None
+
+
+def _port_free(port: int) -> bool:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind(("127.0.0.1", port))
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def find_free_port(preferred: int, start: int, end: int, exclude: set[int] = frozenset()) -> int | None:
+    """First bindable port among `preferred`, then start..end (as the launcher does)."""
+    for port in (preferred, *range(start, end + 1)):
+        if port not in exclude and _port_free(port):
+            return port
+    return None
+
+
+def probe(url: str, timeout: float = 2.0) -> bool:
+    """True when llama-server at `url` has loaded its model."""
+    try:
+        return requests.get(f"{url}/health", timeout=timeout).ok
+    except requests.exceptions.RequestException:
+        return False
+
+
+class ManagedServer:
+    """Monitor thread and restart state machine for one server."""
+
+    def __init__(
+        self,
+        spec: ServerSpec,
+        policy: RestartPolicy | None = None,
+        *,
+        probe_fn: Callable[[str], bool] = probe,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.spec = spec
+        self.policy = policy or RestartPolicy()
+        self._probe = probe_fn
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._proc: subprocess.Popen | None = None
+        self._crashes: deque[float] = deque()
+        self._force = False
+        self._listeners: list[Callable[[str, dict[str, Any]], None]] = []
+        self.exclude_ports: Callable[[], set[int]] = set
+        self.url = os.environ.get(spec.url_env, "").strip().rstrip("/") or spec.default_url
+        self.state = "stopped"
+        self.restarts = 0
+        self.last_error = ""
+        self._since = time.time()
+
+    # ---- public ------------------------------------------------------------
+
+    @property
+    def managed(self) -> bool:
+        """True when this supervisor can (re)start the server itself."""
+        host = urlsplit(self.url).hostname or ""
+        return self.spec.argv is not None and host in _LOCAL_HOSTS
+
+    @property
+    def pid(self) -> int | None:
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            return proc.pid
+        return None
+
+    @property
+    def port(self) -> int | None:
+        return urlsplit(self.url).port
+
+    def add_listener(self, fn: Callable[[str, dict[str, Any]], None]) -> None:
+        """Call `fn(name, status)` on every state change (from the monitor thread)."""
+        self._listeners.append(fn)
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "url": self.url,
+                "pid": self.pid,
+                "managed": self.managed,
+                "restarts": self.restarts,
+                "recent_crashes": len(self._crashes),
+                "last_error": self.last_error,
+                "since": round(self._since, 3),
+            }
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"meera-supervise-{self.spec.name}", daemon=True)
+        self._thread.start()
+
+    def restart(self) -> None:
+        """Leave the "failed" state (or force a restart) on the next monitor tick."""
+        with self._lock:
+            self._crashes.clear()
+            self._force = True
+        self._wake.set()
+
+    def close(self, *, terminate: bool = False) -> None:
+        """Stop monitoring. Servers keep running for the next launch unless `terminate`."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        if terminate:
+            self._terminate()
+        self._proc = None
+
+    def wait_for(self, *states: str, timeout: float = 10.0) -> bool:
+        """Block until the server is in one of `states` (tests, startup)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.state in states:
+                return True
+            time.sleep(0.02)
+        return self.state in states
+
+    # ---- monitor loop ------------------------------------------------------
+
+    def _set_state(self, state: str, error: str | None = None) -> None:
+        with self._lock:
+            changed = state != self.state or (error is not None and error != self.last_error)
+            if state != self.state:
+                self._since = time.time()
+            self.state = state
+            if error is not None:
+                self.last_error = error
+        if changed:
+            status = self.status()
+            for fn in list(self._listeners):
+                try:
+                    fn(self.spec.name, status)
+                except Exception as exc:  # a listener must not kill the monitor
+                    print(f"[supervisor] listener failed: {exc}", file=sys.stderr, flush=True)
+
+    def _sleep(self, seconds: float) -> bool:
+        """Wait `seconds` or until woken; False once close() was called."""
+        self._wake.wait(seconds)
+        self._wake.clear()
+        return not self._stop.is_set()
+
+    def _run(self) -> None:
+        if self._probe(self.url):
+            self._set_state("ready")
+        elif self._adopted_alive():
+            self._set_state("starting")  # launcher-started, still loading the model
+        elif self.managed:
+            self._spawn_or_give_up(initial=True)
+        else:
+            self._set_state("unhealthy", "not reachable")
+        failures = 0
+        started = self._clock()
+        while self._sleep(self.policy.health_interval_s):
+            if self._force:
+                self._force = False
+                self._spawn_or_give_up()
+                failures = 0
+                started = self._clock()
+                continue
+            if self.state == "failed":
+                if self._probe(self.url):  # restarted by someone else
+                    self._set_state("ready")
+                continue
+            proc = self._proc
+            exited = proc is not None and proc.poll() is not None
+            if not exited and self._probe(self.url):
+                failures = 0
+                if self.state != "ready":
+                    self._set_state("ready")
+                continue
+            if self.state == "starting" and not exited and self._clock() - started < self.policy.ready_timeout_s:
+                continue
+            failures += 1
+            if exited:
+                self._on_down(f"exited with status {proc.returncode}")
+            elif self.state == "starting":
+                self._on_down(f"not ready after {self.policy.ready_timeout_s:.0f}s")
+            elif failures >= self.policy.health_failures:
+                self._on_down(f"health check failed {failures} times")
+            else:
+                continue
+            failures = 0
+            started = self._clock()
+
+    def _adopted_alive(self) -> bool:
+        pid = self._read_pid()
+        if pid is None:
+            return False
+        try:
+            os.kill(pid, 0)
+        except OSError:
+            return False
+        return True
+
+    def _on_down(self, reason: str) -> None:
+        if not self.managed:
+            self._set_state("unhealthy", reason)
+            return
+        now = self._clock()
+        self._crashes.append(now)
+        while self._crashes and now - self._crashes[0] > self.policy.crash_window_s:
+            self._crashes.popleft()
+        if len(self._crashes) >= self.policy.crash_limit:
+            self._terminate()
+            self._set_state(
+                "failed",
+                f"{reason}; {len(self._crashes)} crashes in {self.policy.crash_window_s:.0f}s, not restarting",
+            )
+            return
+        delay = self.policy.backoff(len(self._crashes))
+        self._set_state("backoff", f"{reason}; restarting in {delay:.1f}s")
+        if self._sleep(delay):
+            self._spawn_or_give_up()
+
+    def _spawn_or_give_up(self, *, initial: bool = False) -> None:
+        if not self.managed:
+            return
+        try:
+            self._spawn(initial=initial)
+        except OSError as exc:
+            self._on_down(f"could not start: {exc}")
+
+    def _spawn(self, *, initial: bool = False) -> None:
+        spec = self.spec
+        self._terminate()
+        lo, hi = spec.port_range
+        current = self.port or lo
+        port = find_free_port(current, lo, hi, self.exclude_ports())
+        if port is None:
+            raise OSError(f"no free port in {lo}-{hi}")
+        url = f"http://127.0.0.1:{port}"
+        log = open(spec.log_path, "ab") if spec.log_path else subprocess.DEVNULL
+        try:
+            self._proc = subprocess.Popen(
+                [*spec.argv, "--host", "127.0.0.1", "--port", str(port)],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                env={**os.environ, **spec.env},
+                start_new_session=True,  # outlives the app, like launcher-started servers
+            )
+        finally:
+            if log is not subprocess.DEVNULL:
+                log.close()
+        with self._lock:
+            self.url = url
+            if not initial:
+                self.restarts += 1
+        self._write_pid(self._proc.pid)
+        self._set_state("starting")
+
+    def _terminate(self) -> None:
+        proc = self._proc
+        if proc is None:
+            pid = self._read_pid() if self.managed and self.state != "ready" else None
+            if pid is not None:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:
+                    pass
+            return
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10.0)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        self._proc = None
+
+    def _read_pid(self) -> int | None:
+        path = self.spec.pid_path
+        try:
+            return int(path.read_text().strip()) if path else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_pid(self, pid: int) -> None:
+        path = self.spec.pid_path
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"{pid}\n")
+        except OSError:
+            pass
+
+
+class Supervisor:
+    """The chat and embedding servers, with a shared status file."""
+
+    def __init__(self, servers: list[ManagedServer], *, status_file: Path | None = None):
+        self.servers = {s.spec.name: s for s in servers}
+        self._status_file = status_file
+        self._lock = threading.Lock()
+        for server in servers:
+            server.exclude_ports = self._ports_in_use(server)
+            server.add_listener(self._on_change)
+
+    def _ports_in_use(self, me: ManagedServer) -> Callable[[], set[int]]:
+        return lambda: {s.port for s in self.servers.values() if s is not me and s.port}
+
+    def _on_change(self, name: str, status: dict[str, Any]) -> None:
+        server = self.servers[name]
+        if status["state"] == "ready":
+            os.environ[server.spec.url_env] = server.url
+            _update_state_file(server.spec.url_env, server.url)
+        state = status["state"]
+        if state == "failed" or _debug_enabled():
+            detail = f" ({status['last_error']})" if state in ("backoff", "unhealthy", "failed") else ""
+            print(f"[supervisor] {name}: {state}{detail}", file=sys.stderr, flush=True)
+        self.write_status()
+
+    def add_listener(self, fn: Callable[[str, dict[str, Any]], None]) -> None:
+        for server in self.servers.values():
+            server.add_listener(fn)
+
+    def start(self) -> None:
+        for server in self.servers.values():
+            server.start()
+        self.write_status()
+
+    def close(self, *, terminate: bool = False) -> None:
+        for server in self.servers.values():
+            server.close(terminate=terminate)
+
+    def status(self) -> dict[str, dict[str, Any]]:
+        return {name: s.status() for name, s in self.servers.items()}
+
+    def write_status(self) -> None:
+        if self._status_file is None:
+            return
+        with self._lock:
+            try:
+                self._status_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self._status_file.with_name(f".{self._status_file.name}.tmp")
+                tmp.write_text(json.dumps({"pid": os.getpid(), "servers": self.status()}, indent=2))
+                os.replace(tmp, self._status_file)
+            except OSError:
+                pass
+
+
+def _update_state_file(key: str, value: str) -> None:
+    """Rewrite `key` in the launcher's servers.env so the next launch adopts the server."""
+    path = runtime_dir() / "servers.env"
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return
+    prefix = f"{key}="
+    new = f'{key}="{value}"'
+    out = [new if line.startswith(prefix) else line for line in lines]
+    if out == lines:
+        return
+    try:
+        path.write_text("\n".join(out) + "\n")
+    except OSError:
+        pass
+
+
+def _llama_env() -> dict[str, str]:
+    lib = os.environ.get("MEERA_LLAMA_LIB_DIR", "").strip()
+    if not lib:
+        return {}
+    current = os.environ.get("LD_LIBRARY_PATH", "")
+    return {"LD_LIBRARY_PATH": f"{lib}:{current}" if current else lib}
+
+
+def _argv(model_env: str, *args: str) -> list[str] | None:
+    binary = os.environ.get("MEERA_LLAMA_SERVER", "").strip()
+    model = os.environ.get(model_env, "").strip()
+    if not binary or not model:
+        return None
+    return [binary, "-m", model, *args]
+
+
+def _chat_slot_args() -> list[str]:
+    """--parallel MEERA_LLAMACPP_PARALLEL (default 1) and a -c that gives each slot its context.
+
+    llama-server splits -c across its slots, so with more than one slot -c is
+    MEERA_LLAMACPP_CTX (per slot, default 4096) times the slot count; the
+    launchers pass the same arguments.
+    """
+    parallel = _env_int("MEERA_LLAMACPP_PARALLEL", 1, 1, 64)
+    ctx = _env_int("MEERA_LLAMACPP_CTX", 0, 0, 1 << 20)
+    if not ctx and parallel > 1:
+        ctx = 4096
+    return ["--parallel", str(parallel), *(["-c", str(ctx * parallel)] if ctx else [])]
+
+
+def specs_from_env() -> list[ServerSpec]:
+    """Chat + embed specs from what the launchers export."""
+    log_dir = Path(os.environ.get("MEERA_LOG_DIR", "").strip() or runtime_dir())
+    run_dir = runtime_dir()
+    env = _llama_env()
+    chat_argv = _argv(
+        "MEERA_LLAMACPP_GGUF",
+        "-ngl", os.environ.get("MEERA_LLAMACPP_NGL", "0").strip() or "0",
+        *_chat_slot_args(),
+        *shlex.split(os.environ.get("MEERA_LLAMACPP_SERVER_EXTRA", "")),
+    )
+    embed_argv = _argv(
+        "MEERA_EMBED_GGUF",
+        "-ngl", os.environ.get("MEERA_EMBED_NGL", "0").strip() or "0",
+        "--embeddings", "-c", "512",
+    )
+    specs = [
+        ServerSpec(
+            name="chat",
+            url_env="MEERA_LLAMACPP_URL",
+            default_url="http://127.0.0.1:8080",
+            port_range=(8082, 8089),
+            argv=chat_argv,
+            env=env,
+            log_path=log_dir / "llama-chat.log",
+            pid_path=run_dir / "llama-chat.pid",
+        )
+    ]
+    if os.environ.get("MEERA_DISABLE_EMBED", "0") != "1":
+        specs.append(
+            ServerSpec(
+                name="embed",
+                url_env="MEERA_EMBED_URL",
+                default_url="http://127.0.0.1:8081",
+                port_range=(8090, 8099),
+                argv=embed_argv,
+                env=env,
+                log_path=log_dir / "llama-embed.log",
+                pid_path=run_dir / "llama-embed.pid",
+            )
+        )
+    return specs
+
+
+def _recover_retrieval(name: str, status: dict[str, Any]) -> None:
+    if name != "embed" or status["state"] != "ready":
+        return
+    import embeddings
+    from retrieval import embedder_recovered
+
+    embeddings.reset_breaker()
+    embedder_recovered()  # rebuilds in the background if the index is lexical-only
+
+
+def _create_default() -> Supervisor:
+    sup = Supervisor(
+        [ManagedServer(spec, RestartPolicy.from_env()) for spec in specs_from_env()],
+        status_file=status_path(),
+    )
+    sup.add_listener(_recover_retrieval)
+    sup.start()
+    return sup
+
+
+def _stop_default(sup: Supervisor) -> None:
+    sup.close()
+    try:
+        status_path().unlink()
+    except OSError:
+        pass
+
+
+_default: ProcessDefault[Supervisor] = ProcessDefault(_stop_default)
+
+
+def start_default() -> Supervisor | None:
+    """Start the process-wide supervisor (None when MEERA_SUPERVISE=0 or not llama.cpp)."""
+    if not supervision_enabled() or os.environ.get("MEERA_BACKEND", "llamacpp").strip().lower() != "llamacpp":
+        return None
+    return _default.start(_create_default)
+
+
+def get_default() -> Supervisor | None:
+    return _default.get()
+
+
+def stop_default() -> None:
+    _default.stop()
+
+
+def status() -> dict[str, dict[str, Any]]:
+    """Live status from this process's supervisor, else from the status file."""
+    sup = _default.get()
+    if sup is not None:
+        return sup.status()
+    return read_status()
+
+
+def read_status(path: Path | None = None) -> dict[str, dict[str, Any]]:
+    path = path or status_path()
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    pid = data.get("pid")
+    try:
+        os.kill(int(pid), 0)
+    except (OSError, TypeError, ValueError):
+        return {}  # written by an app that is no longer running
+    servers = data.get("servers")
+    return servers if isinstance(servers, dict) else {}
+
+
+def _print_status(as_json: bool) -> None:
+    servers = read_status()
+    if as_json:
+        print(json.dumps(servers, indent=2))
+        return
+    if not servers:
+        print("supervisor: not running")
+        return
+    for name, st in servers.items():
+        line = f"{name}: {st.get('state', '?')} {st.get('url', '')} restarts={st.get('restarts', 0)}"
+        if not st.get("managed"):
+            line += " (probe only)"
+        if st.get("state") != "ready" and st.get("last_error"):
+            line += f" — {st['last_error']}"
+        print(line)
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) >= 2 and argv[1] == "status":
+        _print_status("--json" in argv[2:])
+        return 0
+    print("usage: python3 supervisor.py status [--json]", file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
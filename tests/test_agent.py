@@ -2,21 +2,33 @@
 
 Covers:
 - Heuristic fast-path patterns produce the right tool/params (no LLM, no embeds).
-- decide_turn picks fastpath > llm_tools > llm_chat correctly.
+- decide_turn picks fastpath > llm_tools > llm_chat correctly, and lexical
+  RAG scores from a partial index do not outbid dense tool scores.
 - toolspec_to_openai_tool emits a well-formed OpenAI function-tool schema.
 - build_agent_system_prompt inlines RAG <KNOWLEDGE> blocks when supplied.
 - Tool memory/result formatting prefixes are stable.
+- Unparseable tool-call arguments are logged and recorded on the turn trace.
+- Per-turn usage accounting sums model calls and charges prefill time to
+  the uncached prompt sections.
+- arun_agent_turn runs one pass's tool calls concurrently and retrieval
+  alongside prompt assembly; run_agent_turn drives it from a thread.
 
 These tests deliberately avoid touching the LLM or the embedding server. We
 stub `agent.retrieve` with a fake function whose result drives `decide_turn`.
 """
 from __future__ import annotations
 
+import asyncio
+import io
+import os
+import threading
+import time
 import unittest
 from typing import Callable
 from unittest.mock import patch
 
 import agent
+import tracing
 from agent import (
     DEFAULT_BASE_IDENTITY,
     TOOL_FEEDBACK_PREFIX,
@@ -24,14 +36,18 @@ from agent import (
     build_agent_system_prompt,
     decide_turn,
     format_tool_memory_message,
+    TurnPrefix,
+    arun_agent_turn,
     format_tool_result_message,
     match_fastpath,
+    prompt_sections,
+    run_agent_turn,
     toolspec_to_openai_tool,
 )
 from retrieval.index import KIND_RAG, KIND_TOOL, IndexEntry, IndexHit
 from retrieval.query import RetrievalResult
 from retrieval.rag_chunker import RagChunk
-from tools.registry import get_tool
+from tools.registry import TOOLS, get_tool
 from tools.schema import tool_result_ok
 
 
@@ -162,6 +178,23 @@ class TestDecideTurn(unittest.TestCase):
         self.assertEqual(plan.candidate_tools, ["file_search_name", "file_list_dir"])
         self.assertEqual(len(plan.rag_hits), 0)
 
+    def test_partial_index_lexical_rag_does_not_outbid_tools(self) -> None:
+        lexical_rag = _rag_hit("rag_data/grep_basics.md", "Common usage", "find files", 1.0)
+
+        def fake_retrieve(query, **_):
+            return RetrievalResult(
+                query=query,
+                tools=[_tool_hit("file_search_name", 0.81)],
+                rag=[IndexHit(entry=lexical_rag.entry, score=1.0, lexical=1.0)],
+                mode="hybrid",
+                partial=True,
+            )
+
+        with _patch_retrieve(fake_retrieve), patch.object(agent, "supports_tools", return_value=True):
+            plan = decide_turn("can you find a file called notes.md?")
+        self.assertEqual(plan.kind, "llm_tools")
+        self.assertEqual(plan.candidate_tools, ["file_search_name"])
+
     def test_chat_when_no_tool_candidates(self) -> None:
         def fake_retrieve(query, **_):
             return RetrievalResult(
@@ -234,6 +267,33 @@ class TestToolspecConversion(unittest.TestCase):
             payload = toolspec_to_openai_tool(spec)
             self.assertFalse(payload["function"]["parameters"]["additionalProperties"])
 
+    def test_enums_and_ranges_constrain_arguments(self) -> None:
+        props = toolspec_to_openai_tool(get_tool("brightness_set"))["function"]["parameters"]["properties"]
+        self.assertEqual(props["action"]["enum"], ["set", "up", "down"])
+        self.assertEqual((props["value"]["minimum"], props["value"]["maximum"]), (0, 100))
+        alt_tab = toolspec_to_openai_tool(get_tool("gnome_alt_tab_switch_windows_mode"))
+        self.assertEqual(alt_tab["function"]["parameters"]["properties"]["mode"]["enum"], ["traditional", "default"])
+        kill = toolspec_to_openai_tool(get_tool("process_kill_by_name"))["function"]["parameters"]["properties"]
+        self.assertEqual(kill["signal"]["enum"], ["SIGTERM", "SIGKILL"])
+        self.assertNotIn("enum", kill["name"])
+
+    def test_defaults_satisfy_their_constraints(self) -> None:
+        for spec in TOOLS:
+            props = toolspec_to_openai_tool(spec)["function"]["parameters"]["properties"]
+            for p in spec.parameters:
+                if p.name == "distro":
+                    continue
+                schema = props[p.name]
+                if "One of:" in p.description:
+                    self.assertIn("enum", schema, msg=f"{spec.name}.{p.name}")
+                if p.default is None:
+                    continue
+                if "enum" in schema:
+                    self.assertIn(p.default, schema["enum"], msg=f"{spec.name}.{p.name}")
+                if "minimum" in schema:
+                    self.assertGreaterEqual(p.default, schema["minimum"], msg=f"{spec.name}.{p.name}")
+                    self.assertLessEqual(p.default, schema["maximum"], msg=f"{spec.name}.{p.name}")
+
 
 class TestSystemPrompt(unittest.TestCase):
     def test_prompt_has_distro_and_identity(self) -> None:
@@ -283,5 +343,165 @@ class TestToolMemoryFormatting(unittest.TestCase):
         self.assertIn("...(", msg)
 
 
+class TestParseToolCall(unittest.TestCase):
+    def test_unparseable_arguments_are_reported(self) -> None:
+        tc = {"function": {"name": "file_search_name", "arguments": '{"pattern": "no'}}
+        trace = tracing.TurnTrace()
+        tracing.attach_turn(trace)
+        try:
+            with patch("sys.stderr", new_callable=io.StringIO) as err:
+                self.assertEqual(agent._parse_tool_call(tc), ("file_search_name", {}))
+        finally:
+            tracing.detach_turn()
+        self.assertIn("[agent] unparseable arguments for 'file_search_name'", err.getvalue())
+        self.assertEqual(trace.attrs["unparseable_tool_args"], ["file_search_name"])
+
+
+class TestUsageAccounting(unittest.TestCase):
+    def _usage(self, prompt: int, cached: int, prompt_ms: float) -> dict:
+        return {
+            "kind": "usage", "prompt_tokens": prompt, "cached_tokens": cached, "completion_tokens": 10,
+            "prompt_ms": prompt_ms, "generation_ms": 100.0, "prompt_tps": 0.0, "generation_tps": 100.0,
+        }
+
+    def test_cached_prefix_is_not_charged(self) -> None:
+        turn = agent.TurnUsage()
+        sections = {"system": 400, "rag": 0, "tools": 400, "history": 100, "turn": 100}
+        turn.add("tools", self._usage(250, 200, 50.0), sections)  # only the last 20% was prefilled
+        split = turn.passes[0]["prefill_ms"]
+        self.assertEqual((split["system"], split["tools"]), (0.0, 0.0))
+        self.assertEqual((split["history"], split["turn"]), (25.0, 25.0))
+
+    def test_chat_turn_reports_usage_before_done(self) -> None:
+        def fake_retrieve(query, **_):
+            return RetrievalResult(query=query, tools=[], rag=[_rag_hit("rag_data/x.md", "S", "body " * 50, 0.7)])
+
+        async def fake_stream(msgs, **_):
+            yield {"kind": "content", "text": "hello"}
+            yield self._usage(1000, 0, 200.0)
+
+        with _patch_retrieve(fake_retrieve), patch.object(agent, "astream_llm_events", side_effect=fake_stream):
+            events = list(run_agent_turn([{"role": "user", "content": "earlier"}], "Explain systemd timers", "fedora"))
+        self.assertEqual([e["kind"] for e in events[-3:]], ["content", "usage", "done"])
+        usage = events[-2]
+        self.assertEqual((usage["calls"], usage["prompt_tokens"], usage["prompt_ms"]), (1, 1000, 200.0))
+        self.assertGreater(usage["prefill_ms"]["rag"], 0)
+        self.assertAlmostEqual(sum(usage["prefill_ms"].values()), 200.0, places=1)
+        self.assertNotIn("usage", [e["kind"] for e in events[:-2]])
+
+    def test_tool_pass_uses_routing_policy(self) -> None:
+        def fake_retrieve(query, **_):
+            return RetrievalResult(query=query, tools=[_tool_hit("file_search_name", 0.9)], rag=[])
+
+        policies = []
+
+        async def fake_stream(msgs, **kwargs):
+            policies.append(kwargs.get("policy"))
+            yield {"kind": "content", "text": "I can't search right now."}
+
+        with _patch_retrieve(fake_retrieve), patch.object(agent, "supports_tools", return_value=True), \
+                patch.object(agent, "astream_llm_events", side_effect=fake_stream), \
+                patch.dict("os.environ", {"MEERA_TOOL_CALL_MAX_TOKENS": "64"}):
+            list(run_agent_turn([], "find a file called notes.md", "fedora"))
+        self.assertEqual(len(policies), 1)
+        self.assertTrue(policies[0].stop_after_tool_call)
+        self.assertEqual(policies[0].tool_call_tokens, 64)
+
+    def test_prompt_sections_split_history_from_turn(self) -> None:
+        history = [{"role": "user", "content": "old"}]
+        msgs = [{"role": "system", "content": "sys+rag"}, *history, {"role": "user", "content": "new"}]
+        sections = prompt_sections("sys+rag", "+rag", history, msgs)
+        self.assertEqual((sections["system"], sections["rag"], sections["tools"]), (3, 4, 0))
+        self.assertEqual(sections["history"], sections["turn"])
+
+
+class TestAsyncTurn(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        env = patch.dict(os.environ, {"MEERA_TRACE": "0"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    async def test_tool_calls_of_one_pass_run_concurrently(self) -> None:
+        def fake_retrieve(query, **_):
+            return RetrievalResult(query=query, tools=[_tool_hit("file_search_name", 0.9)], rag=[])
+
+        calls = [
+            {"id": f"call_{name}", "type": "function", "function": {"name": name, "arguments": "{}"}}
+            for name in ("disk_space", "system_info")
+        ]
+        requests: list[list[dict]] = []
+
+        async def fake_stream(msgs, **_):
+            requests.append(list(msgs))
+            if len(requests) == 1:
+                yield {"kind": "tool_calls", "tool_calls": calls}
+            else:
+                yield {"kind": "content", "text": "Done."}
+
+        async def slow_tool(name, params=None, **_):
+            await asyncio.sleep(0.2)
+            return tool_result_ok(f"{name} ok")
+
+        with _patch_retrieve(fake_retrieve), patch.object(agent, "supports_tools", return_value=True), \
+                patch.object(agent, "astream_llm_events", side_effect=fake_stream), \
+                patch.object(agent, "arun_tool", side_effect=slow_tool):
+            start = time.perf_counter()
+            events = [ev async for ev in arun_agent_turn([], "how much disk and cpu do I have?", "fedora")]
+            elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, 0.35)  # one after the other would take 0.4 s
+        kinds = [e["kind"] for e in events if e["kind"].startswith("tool_")]
+        self.assertEqual(kinds, ["tool_running", "tool_running", "tool_result", "tool_result"])
+        tool_msgs = [m for m in requests[1] if m["role"] == "tool"]
+        self.assertEqual([m["tool_call_id"] for m in tool_msgs], ["call_disk_space", "call_system_info"])
+        self.assertEqual(events[-1], {"kind": "done", "memory_messages": [e["memory_message"] for e in events
+                                                                           if e["kind"] == "tool_result"]})
+
+    async def test_retrieval_overlaps_prompt_assembly(self) -> None:
+        assembling = threading.Event()
+        overlapped: list[bool] = []
+
+        def fake_retrieve(query, **_):
+            overlapped.append(assembling.wait(2.0))  # sequential code would time out here
+            return RetrievalResult(query=query, tools=[], rag=[])
+
+        real_prefix = agent._turn_prefix
+
+        def prefix(*args) -> TurnPrefix:
+            assembling.set()
+            return real_prefix(*args)
+
+        async def fake_stream(msgs, **_):
+            yield {"kind": "content", "text": "hi"}
+
+        with _patch_retrieve(fake_retrieve), patch.object(agent, "_turn_prefix", side_effect=prefix), \
+                patch.object(agent, "astream_llm_events", side_effect=fake_stream):
+            events = [ev async for ev in arun_agent_turn([], "tell me about timers", "fedora")]
+        self.assertEqual(overlapped, [True])
+        self.assertEqual(events[-1]["kind"], "done")
+
+
+class TestSyncTurn(unittest.TestCase):
+    def test_closing_early_ends_the_turn(self) -> None:
+        def fake_retrieve(query, **_):
+            return RetrievalResult(query=query, tools=[], rag=[])
+
+        async def fake_stream(msgs, **_):
+            for word in ("one", " two", " three"):
+                yield {"kind": "content", "text": word}
+
+        trace = tracing.TurnTrace()
+        tracing.attach_turn(trace)
+        try:
+            with _patch_retrieve(fake_retrieve), patch.object(agent, "astream_llm_events", side_effect=fake_stream):
+                turn = run_agent_turn([], "tell me about timers", "fedora")
+                first = [next(turn) for _ in range(2)]
+                turn.close()
+        finally:
+            tracing.detach_turn()
+        self.assertEqual([e["kind"] for e in first], ["thinking", "content"])
+        self.assertEqual(trace.attrs["plan"], "llm_chat")  # set inside the loop, on the caller's turn
+        self.assertIn("prompt_assembly", [s["name"] for s in trace.spans])
+
+
 if __name__ == "__main__":
     unittest.main()
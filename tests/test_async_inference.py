@@ -0,0 +1,257 @@
+"""Tests for the asyncio inference API.
+
+Covers:
+- async_http reads chunked and Content-Length bodies and raises HTTPError
+  for error statuses.
+- llamacpp_backend.astream_llm_events yields the same events as the sync
+  client, including early stop after a tool call.
+- aembed_batch matches embed_batch over HTTP, with the same chunking, and a
+  cancelled half-open trial re-opens the breaker instead of wedging it.
+- One event loop overlaps a model call with an embedding request.
+- A background astream_llm_events is preempted by an interactive lease.
+- arun_tool records its span on the calling thread's turn.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from unittest.mock import patch
+
+import async_http
+import embeddings
+import inference
+import llamacpp_backend
+import slot_scheduler
+import tracing
+from bench.mock_llama_server import MockLlamaConfig, MockLlamaServer
+from slot_scheduler import BACKGROUND, INTERACTIVE, Preempted
+from tools.runner import arun_tool
+
+_FAST = MockLlamaConfig(tokens_per_sec=0, first_token_ms=0, reply_tokens=5)
+
+
+class AsyncServerTestCase(unittest.IsolatedAsyncioTestCase):
+    def serve(self, server: Any) -> Any:
+        """Start `server` for this test; stopping it blocks, so it happens outside the event loop."""
+        server.__enter__()
+        self.addCleanup(server.__exit__, None, None, None)
+        return server
+
+
+class _EmbedServer:
+    """/v1/embeddings answering [len(text), 1.0] per input; /chunked and /fail for the transport."""
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+        self.batches: list[int] = []
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *_args: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+                if self.path == "/fail":
+                    self.send_error(503)
+                elif self.path == "/chunked":
+                    self.send_response(200)
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for part in (b"data: one\n", b"data: t", b"wo\r\n\ndata: three"):
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    time.sleep(outer.delay_s)
+                    outer.batches.append(len(payload["input"]))
+                    data = [{"index": i, "embedding": [len(t), 1.0]} for i, t in enumerate(payload["input"])]
+                    body = json.dumps({"data": data}).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = "http://127.0.0.1:%d" % self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "_EmbedServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join(timeout=5)
+
+
+class TestAsyncHTTP(AsyncServerTestCase):
+    def setUp(self) -> None:
+        self.server = self.serve(_EmbedServer())
+
+    async def test_chunked_lines_and_json(self) -> None:
+        lines = [line async for line in async_http.stream_lines(f"{self.server.url}/chunked", {})]
+        body = await async_http.post_json(f"{self.server.url}/v1/embeddings", {"input": ["ab"]})
+        self.assertEqual(lines, ["data: one", "data: two", "", "data: three"])
+        self.assertEqual(body["data"][0]["embedding"], [2, 1.0])
+
+    async def test_error_status(self) -> None:
+        with self.assertRaises(async_http.HTTPError) as ctx:
+            await async_http.post_json(f"{self.server.url}/fail", {})
+        self.assertEqual(ctx.exception.status, 503)
+
+
+class TestAsyncChatStream(AsyncServerTestCase):
+    async def test_matches_sync_events(self) -> None:
+        tool = {"type": "function", "function": {"name": "file_search_name", "parameters": {
+            "type": "object", "properties": {"pattern": {"type": "string"}}, "required": ["pattern"],
+        }}}
+        msgs = [{"role": "user", "content": "find notes"}]
+
+        def comparable(events: list[dict[str, Any]]) -> list[Any]:
+            return [(e["kind"], e.get("text"), e.get("tool_calls"), e.get("early_stop")) for e in events]
+
+        server = self.serve(MockLlamaServer(config=_FAST))
+        with patch.dict(os.environ, {"MEERA_LLAMACPP_URL": server.url}):
+            for kwargs in ({}, {"tools": [tool], "stop_after_tool_call": True}):
+                sync = list(llamacpp_backend.stream_llm_events(msgs, **kwargs))
+                aio = [ev async for ev in llamacpp_backend.astream_llm_events(msgs, **kwargs)]
+                self.assertEqual(comparable(aio), comparable(sync))
+        self.assertEqual(aio[-1]["early_stop"], "tool_call")
+
+    async def test_unreachable_server(self) -> None:
+        with patch.dict(os.environ, {"MEERA_LLAMACPP_URL": "http://127.0.0.1:9"}):
+            events = [ev async for ev in llamacpp_backend.astream_llm_events([{"role": "user", "content": "hi"}])]
+        self.assertEqual(len(events), 1)
+        self.assertTrue(events[0]["text"].startswith("[Error contacting model:"))
+
+
+class TestAsyncEmbeddings(AsyncServerTestCase):
+    def setUp(self) -> None:
+        embeddings.reset_breaker()
+        self.addCleanup(embeddings.reset_breaker)
+
+    async def test_matches_embed_batch(self) -> None:
+        texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+        server = self.serve(_EmbedServer())
+        with patch.dict(os.environ, {
+            "MEERA_EMBED_FAKE": "0", "MEERA_EMBED_URL": server.url, "MEERA_EMBED_BATCH_SIZE": "2",
+        }):
+            aio = await embeddings.aembed_batch(texts)
+            self.assertEqual(server.batches, [2, 2, 1])
+            self.assertEqual(aio, embeddings.embed_batch(texts))
+        self.assertEqual(await embeddings.aembed_batch([]), [])
+
+    async def test_unreachable_feeds_breaker(self) -> None:
+        env = {"MEERA_EMBED_FAKE": "0", "MEERA_EMBED_URL": "http://127.0.0.1:9", "MEERA_EMBED_BREAKER_FAILURES": "1"}
+        with patch.dict(os.environ, env):
+            with self.assertRaises(embeddings.EmbeddingUnavailableError):
+                await embeddings.aembed_batch(["x"], timeout=1.0)
+            with self.assertRaisesRegex(embeddings.EmbeddingUnavailableError, "unhealthy"):
+                await embeddings.aembed_batch(["x"])
+
+    async def test_cancelled_trial_releases_breaker(self) -> None:
+        env = {
+            "MEERA_EMBED_FAKE": "0", "MEERA_EMBED_URL": "http://127.0.0.1:9",
+            "MEERA_EMBED_BREAKER_FAILURES": "1", "MEERA_EMBED_COOLDOWN": "0.3",
+        }
+        slow, fast = self.serve(_EmbedServer(delay_s=0.5)), self.serve(_EmbedServer())
+        with patch.dict(os.environ, env):
+            with self.assertRaises(embeddings.EmbeddingUnavailableError):
+                await embeddings.aembed_batch(["x"], timeout=1.0)  # opens the breaker
+            await asyncio.sleep(0.35)
+            os.environ["MEERA_EMBED_URL"] = slow.url
+            with self.assertRaises(TimeoutError):
+                await asyncio.wait_for(embeddings.aembed_batch(["x"]), 0.1)  # the half-open trial
+            self.assertEqual(embeddings.breaker_status()["state"], "open")  # not stuck in its trial
+            await asyncio.sleep(0.35)
+            os.environ["MEERA_EMBED_URL"] = fast.url
+            self.assertEqual(len(embeddings.embed_batch(["ab"])), 1)
+        self.assertEqual(embeddings.breaker_status()["state"], "closed")
+
+
+class TestAsyncInference(AsyncServerTestCase):
+    def setUp(self) -> None:
+        slot_scheduler.reset_default()
+        self.addCleanup(slot_scheduler.reset_default)
+        embeddings.reset_breaker()
+        self.addCleanup(embeddings.reset_breaker)
+
+    async def test_model_call_overlaps_embedding(self) -> None:
+        config = MockLlamaConfig(tokens_per_sec=0, first_token_ms=300, reply_tokens=3)
+        llm = self.serve(MockLlamaServer(config=config))
+        embed = self.serve(_EmbedServer(delay_s=0.3))
+        with patch.dict(os.environ, {
+            "MEERA_BACKEND": "llamacpp", "MEERA_LLAMACPP_URL": llm.url,
+            "MEERA_EMBED_FAKE": "0", "MEERA_EMBED_URL": embed.url,
+        }):
+            async def chat() -> list[dict[str, Any]]:
+                return [ev async for ev in inference.astream_llm_events([{"role": "user", "content": "hi"}])]
+
+            start = time.perf_counter()
+            events, vectors = await asyncio.gather(chat(), embeddings.aembed_batch(["query"]))
+            elapsed = time.perf_counter() - start
+        self.assertEqual(events[-1]["kind"], "usage")
+        self.assertEqual(len(vectors), 1)
+        self.assertLess(elapsed, 0.55)  # sequential would take at least 0.6 s
+
+    async def test_background_stream_is_preempted(self) -> None:
+        config = MockLlamaConfig(tokens_per_sec=200, first_token_ms=0, reply_tokens=200, slots=2)
+        msgs = [{"role": "user", "content": "summarize the conversation"}]
+        server = self.serve(MockLlamaServer(config=config))
+        with patch.dict(os.environ, {
+            "MEERA_LLAMACPP_URL": server.url, "MEERA_BACKEND": "llamacpp", "MEERA_LLAMACPP_SLOT": "0",
+        }):
+            stream = inference.astream_llm_events(msgs, policy=inference.background_policy(max_tokens=200))
+            received = [await anext(stream)]
+            async with inference._scheduler().alease(INTERACTIVE):
+                with self.assertRaises(Preempted):
+                    async for ev in stream:
+                        received.append(ev)
+        self.assertEqual(received[0]["kind"], "content")
+        self.assertLess(len(received), 200)
+
+    async def test_background_lease_waits_for_interactive(self) -> None:
+        sched = slot_scheduler.SlotScheduler(2, idle_grace_s=0.1)
+
+        async def background() -> float:
+            async with sched.alease(BACKGROUND) as lease:
+                return lease.waited_s
+
+        async with sched.alease(INTERACTIVE):
+            waiter = asyncio.ensure_future(background())
+            await asyncio.sleep(0.05)
+            self.assertFalse(waiter.done())
+        self.assertGreater(await asyncio.wait_for(waiter, 1.0), 0.1)
+
+    async def test_single_slot_refuses_background(self) -> None:
+        with self.assertRaises(slot_scheduler.BackgroundUnavailable):
+            async with slot_scheduler.SlotScheduler(1).alease(BACKGROUND):
+                pass
+
+
+class TestArunTool(unittest.IsolatedAsyncioTestCase):
+    async def test_span_goes_to_callers_turn(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, patch.dict(os.environ, {"MEERA_LOG_DIR": tmp}):
+            trace = tracing.begin_turn(source="test")
+            try:
+                result = await arun_tool("no_such_tool")
+            finally:
+                tracing.end_turn(trace)
+        self.assertEqual(result.error_code, "UNKNOWN_TOOL")
+        self.assertEqual([s["name"] for s in trace.spans], ["run_tool"])
+
+
+if __name__ == "__main__":
+    unittest.main()
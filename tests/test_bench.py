@@ -0,0 +1,147 @@
+"""Smoke tests for the offline benchmark harnesses (bench/).
+
+Covers:
+- The mock llama-server streams content and tool calls in the OpenAI SSE
+  shape that llamacpp_backend parses, and counts requests.
+- run_benchmark drives fast-path, tool and chat turns and reports per-stage
+  percentiles, HTTP calls and prompt tokens.
+- The retrieval suite reports build/query/memory per backend and size, RAG
+  chunking throughput, and compares against a previous report.
+"""
+from __future__ import annotations
+
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+from bench import retrieval_bench
+from bench.agent_bench import run_benchmark
+from bench.mock_llama_server import MockLlamaConfig, MockLlamaServer, synthesize_arguments
+
+_FAST = MockLlamaConfig(tokens_per_sec=0, first_token_ms=0, reply_tokens=5)
+
+
+class TestMockServer(unittest.TestCase):
+    def test_streams_content_and_tool_calls(self) -> None:
+        import llamacpp_backend
+
+        tool = {
+            "type": "function",
+            "function": {
+                "name": "volume_set_percent",
+                "parameters": {
+                    "type": "object",
+                    "properties": {"percent": {"type": "integer", "minimum": 0}},
+                    "required": ["percent"],
+                },
+            },
+        }
+        with MockLlamaServer(config=_FAST) as server, patch.dict(
+            os.environ, {"MEERA_LLAMACPP_URL": server.url}
+        ):
+            chat = list(llamacpp_backend.stream_llm([{"role": "user", "content": "hi"}]))
+            events = list(
+                llamacpp_backend.stream_llm_events([{"role": "user", "content": "louder"}], tools=[tool])
+            )
+            stats = server.stats()
+        self.assertEqual(len(chat), 5)
+        self.assertEqual([e["kind"] for e in events[-2:]], ["tool_calls", "usage"])
+        self.assertGreater(events[-1]["prompt_tokens"], 0)
+        self.assertGreater(events[-1]["completion_tokens"], 0)
+        fn = events[-2]["tool_calls"][0]["function"]
+        self.assertEqual(fn["name"], "volume_set_percent")
+        self.assertEqual(fn["arguments"], '{"percent": 0}')
+        self.assertEqual(stats["requests"], 2)
+        self.assertGreater(stats["prompt_tokens"], 0)
+
+    def test_tool_pass_stops_after_complete_call(self) -> None:
+        import llamacpp_backend
+
+        tool = {"type": "function", "function": {"name": "file_search_name", "parameters": {
+            "type": "object",
+            "properties": {"pattern": {"type": "string"}, "root": {"type": "string"}},
+            "required": ["pattern", "root"],
+        }}}
+        msgs = [{"role": "user", "content": "find notes"}]
+        with MockLlamaServer(config=_FAST) as server, patch.dict(os.environ, {"MEERA_LLAMACPP_URL": server.url}):
+            stopped = list(llamacpp_backend.stream_llm_events(msgs, tools=[tool], stop_after_tool_call=True))
+            capped = list(llamacpp_backend.stream_llm_events(msgs, tools=[tool], tool_call_tokens=3))
+        calls, usage = stopped[-2]["tool_calls"], stopped[-1]
+        self.assertEqual(json.loads(calls[0]["function"]["arguments"]), {"pattern": "benchmark", "root": "benchmark"})
+        self.assertEqual(usage["early_stop"], "tool_call")
+        self.assertGreater(usage["prompt_tokens"], 0)  # from the per-token timings
+        self.assertEqual(capped[-1]["early_stop"], "tool_call_budget")
+        self.assertEqual(capped[-1]["completion_tokens"], 3)
+        self.assertNotIn("tool_calls", [e["kind"] for e in capped])  # the cut-off call is dropped
+        self.assertEqual(capped[-2]["text"], "[Tool call file_search_name cut off after 3 chunks]")
+
+    def test_prompt_cache_is_per_slot(self) -> None:
+        import llamacpp_backend
+
+        first = [{"role": "user", "content": "a long opening question " * 20}]
+        longer = [*first, {"role": "assistant", "content": "ok"}, {"role": "user", "content": "and then?"}]
+
+        def usage(msgs, slot):
+            return list(llamacpp_backend.stream_llm_events(msgs, slot=slot))[-1]
+
+        with MockLlamaServer(config=_FAST) as server, patch.dict(os.environ, {"MEERA_LLAMACPP_URL": server.url}):
+            self.assertEqual(usage(first, 0)["cached_tokens"], 0)
+            hot = usage(longer, 0)
+            cold = usage(longer, 1)
+        self.assertGreater(hot["cached_tokens"], 100)
+        self.assertEqual(cold["cached_tokens"], 0)
+
+    def test_synthesize_arguments_prefers_enum(self) -> None:
+        tool = {"function": {"parameters": {
+            "properties": {"state": {"type": "string", "enum": ["on", "off"]}, "x": {"type": "string"}},
+            "required": ["state"],
+        }}}
+        self.assertEqual(synthesize_arguments(tool), {"state": "on"})
+
+
+class TestAgentBench(unittest.TestCase):
+    def test_report_shape(self) -> None:
+        report = run_benchmark(
+            ["set volume to 40", "how much disk space do I have", "Explain systemd timers"],
+            config=_FAST,
+        )
+        summary = report["summary"]
+        self.assertEqual(summary["turns"], 3)
+        self.assertEqual(summary["plans"], {"fastpath": 1, "llm_tools": 1, "llm_chat": 1})
+        for stage in ("fastpath_match", "query_embed", "index_scoring", "prompt_assembly", "ttft", "generation", "run_tool"):
+            self.assertIn(stage, summary["stages"])
+            self.assertIn("p95_ms", summary["stages"][stage])
+        by_plan = {t["plan"]: t for t in report["turns"]}
+        self.assertEqual(by_plan["fastpath"]["http_calls"], 1)
+        self.assertEqual(by_plan["llm_tools"]["http_calls"], 2)
+        self.assertGreater(summary["prompt_tokens_per_turn"]["p50"], 0)
+        self.assertEqual(by_plan["llm_tools"]["usage"]["calls"], 2)
+        # The summary pass extends the tool-call pass's prompt on the same slot.
+        tool_pass, followup = by_plan["llm_tools"]["usage"]["passes"]
+        self.assertGreaterEqual(followup["cached_tokens"], tool_pass["prompt_tokens"] - 1)
+        self.assertGreater(by_plan["llm_tools"]["usage"]["followup_cached_share"], 0.5)
+        self.assertGreater(by_plan["llm_chat"]["usage"]["prompt_tokens"], 0)
+        self.assertEqual(summary["usage"]["prompt_tokens"]["count"], 3)
+
+
+class TestRetrievalBench(unittest.TestCase):
+    def test_suite_report_shape(self) -> None:
+        with patch("builtins.print"):
+            report = retrieval_bench.run_suite(
+                [60], list(retrieval_bench.BACKENDS), dim=16, queries=2, rag_files=4, rag_sections=2
+            )
+        self.assertEqual(len(report["results"]), len(retrieval_bench.BACKENDS))
+        row = report["results"][0]
+        self.assertEqual(row["size"], 60)
+        self.assertGreater(row["retained_kb"], 0)
+        self.assertIn("p95_ms", row["query"])
+        self.assertIn("p50_ms", row["query_split"])
+        self.assertIn("p50_ms", row["query_hybrid"])
+        self.assertEqual(report["rag_chunking"]["chunks"], 8)
+        lines = retrieval_bench.compare(report, report)
+        self.assertIn("query p50 x1.00", lines[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Tests for the coalescing worker -> UI event pump.
+
+Covers:
+- Only one main-loop source is scheduled no matter how many events are posted.
+- Consecutive text chunks for the same callback are merged into one call.
+- Ordering between chunks and plain callbacks is preserved.
+- Producers block when the pending backlog is full and resume after a drain.
+
+The pump is gi-free; a list stands in for GLib's idle source queue.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from ui.event_pump import EventPump
+
+
+class _FakeLoop:
+    def __init__(self) -> None:
+        self.sources: list = []
+
+    def idle_add(self, fn) -> int:
+        self.sources.append(fn)
+        return len(self.sources)
+
+    def run_pending(self) -> None:
+        while self.sources:
+            fn = self.sources.pop(0)
+            while fn():
+                pass
+
+
+class TestEventPump(unittest.TestCase):
+    def test_single_source_and_chunk_coalescing(self) -> None:
+        loop = _FakeLoop()
+        pump = EventPump(loop.idle_add)
+        seen: list[str] = []
+        for tok in ["Hel", "lo", ", ", "world"]:
+            pump.post_chunk(seen.append, tok)
+        self.assertEqual(len(loop.sources), 1)
+        loop.run_pending()
+        self.assertEqual(seen, ["Hello, world"])
+        # A new burst re-arms exactly one source.
+        pump.post_chunk(seen.append, "!")
+        self.assertEqual(len(loop.sources), 1)
+        loop.run_pending()
+        self.assertEqual(seen, ["Hello, world", "!"])
+
+    def test_order_preserved_across_kinds(self) -> None:
+        loop = _FakeLoop()
+        pump = EventPump(loop.idle_add)
+        log: list[tuple[str, str]] = []
+        chunk = lambda text: log.append(("chunk", text))
+        pump.post_chunk(chunk, "a")
+        pump.post_chunk(chunk, "b")
+        pump.post(lambda: log.append(("tool", "x")))
+        pump.post_chunk(chunk, "c")
+        pump.post(lambda: log.append(("done", "")))
+        loop.run_pending()
+        self.assertEqual(
+            log, [("chunk", "ab"), ("tool", "x"), ("chunk", "c"), ("done", "")]
+        )
+
+    def test_backpressure_blocks_producer_until_drained(self) -> None:
+        loop = _FakeLoop()
+        pump = EventPump(loop.idle_add, max_pending_chars=4)
+        seen: list[str] = []
+        pump.post_chunk(seen.append, "abcd")
+        finished = threading.Event()
+
+        def producer() -> None:
+            pump.post_chunk(seen.append, "efgh")
+            finished.set()
+
+        t = threading.Thread(target=producer, daemon=True)
+        t.start()
+        time.sleep(0.1)
+        self.assertFalse(finished.is_set())
+        loop.run_pending()
+        self.assertTrue(finished.wait(2.0))
+        loop.run_pending()
+        self.assertEqual("".join(seen), "abcdefgh")
+
+    def test_close_releases_blocked_producer(self) -> None:
+        loop = _FakeLoop()
+        pump = EventPump(loop.idle_add, max_pending_events=1)
+        pump.post(lambda: None)
+        finished = threading.Event()
+
+        def producer() -> None:
+            pump.post(lambda: None)
+            finished.set()
+
+        threading.Thread(target=producer, daemon=True).start()
+        time.sleep(0.1)
+        self.assertFalse(finished.is_set())
+        pump.close()
+        self.assertTrue(finished.wait(2.0))
+        self.assertEqual(pump.pending(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
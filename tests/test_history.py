@@ -0,0 +1,283 @@
+"""Tests for the append-only, indexed chat session store.
+
+Covers:
+- save_session appends only new messages when the conversation grows.
+- A diverged conversation (e.g. filtered on load) rewrites the file.
+- list_sessions serves timestamp/count/title from the index alone.
+- Legacy whole-JSON sessions are migrated when the index is first built.
+- A truncated trailing line (interrupted write) is ignored on load and
+  dropped before the next append.
+- Only the newest MAX_SESSIONS sessions are kept (0 keeps all).
+- search_history finds messages across sessions (FTS5 and LIKE fallback),
+  keeps results in sync with rewrites, and re-ranks with fake embeddings.
+- SessionAutosaver debounces bursts into one write and flushes on demand,
+  and load() reads a session whose save is still pending with its last turn.
+- SessionTitler titles a session once it has a reply, once, leaves it for
+  the next request when no slot is spare, and listings show the title.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import history
+
+
+def _msg(role: str, content: str) -> dict:
+    return {"role": role, "content": content}
+
+
+class HistoryStoreTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+        patcher = patch("history.get_history_dir", return_value=self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmp.cleanup)
+
+
+class TestSaveAndLoad(HistoryStoreTestCase):
+    def test_append_only_on_growth(self) -> None:
+        convo = [_msg("user", "hi"), _msg("assistant", "hello")]
+        path = history.save_session(convo)
+        self.assertTrue(path.endswith(history.SESSION_SUFFIX))
+        size_before = os.path.getsize(path)
+        with open(path, "rb") as f:
+            prefix = f.read()
+
+        convo += [_msg("user", "how are you"), _msg("assistant", "fine")]
+        self.assertEqual(history.save_session(convo, path), path)
+        with open(path, "rb") as f:
+            data = f.read()
+        self.assertTrue(data.startswith(prefix))
+        self.assertGreater(len(data), size_before)
+        self.assertEqual(history.load_session(path), convo)
+
+    def test_diverged_history_is_rewritten(self) -> None:
+        path = history.save_session([_msg("user", "a"), _msg("assistant", "b")])
+        replaced = [_msg("user", "x"), _msg("assistant", "y"), _msg("user", "z")]
+        history.save_session(replaced, path)
+        self.assertEqual(history.load_session(path), replaced)
+
+    def test_truncated_tail_ignored_and_repaired(self) -> None:
+        convo = [_msg("user", "one")]
+        path = history.save_session(convo)
+        with open(path, "ab") as f:
+            f.write(b'{"role": "assistant", "con')
+        self.assertEqual(history.load_session(path), convo)
+        convo.append(_msg("assistant", "two"))
+        history.save_session(convo, path)
+        self.assertEqual(history.load_session(path), convo)
+
+    def test_empty_history_not_saved(self) -> None:
+        self.assertIsNone(history.save_session([]))
+
+
+class TestListing(HistoryStoreTestCase):
+    def test_list_uses_index_metadata(self) -> None:
+        path = history.save_session(
+            [_msg("user", "first question"), _msg("assistant", "a"), _msg("user", "latest question")]
+        )
+        sessions = history.list_sessions()
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(sessions[0]["filepath"], path)
+        self.assertEqual(sessions[0]["message_count"], 3)
+        self.assertEqual(sessions[0]["title"], "latest question")
+        # Listing must not depend on the session body.
+        os.remove(path)
+        self.assertEqual(history.list_sessions()[0]["message_count"], 3)
+
+    def test_legacy_json_sessions_migrated(self) -> None:
+        legacy = os.path.join(self.dir, "2024-01-01T10-00-00-000000.json")
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump(
+                {"timestamp": "2024-01-01T10:00:00", "messages": [_msg("user", "old"), _msg("assistant", "r")]},
+                f,
+            )
+        sessions = history.list_sessions()
+        self.assertEqual(len(sessions), 1)
+        self.assertEqual(sessions[0]["timestamp"], "2024-01-01T10:00:00")
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(history.load_session(sessions[0]["filepath"])[0]["content"], "old")
+
+    def test_keeps_newest_sessions(self) -> None:
+        with patch.object(history, "MAX_SESSIONS", 2):
+            paths = [history.save_session([_msg("user", f"q{i}")]) for i in range(3)]
+            listed = [s["filepath"] for s in history.list_sessions()]
+        self.assertEqual(listed, [paths[2], paths[1]])
+        self.assertFalse(os.path.exists(paths[0]))
+
+    def test_no_cap_by_default(self) -> None:
+        with patch.object(history, "MAX_SESSIONS", 0):
+            for i in range(12):
+                history.save_session([_msg("user", f"q{i}")])
+        self.assertEqual(len(history.list_sessions()), 12)
+
+
+class TestSearch(HistoryStoreTestCase):
+    def _seed(self) -> tuple[str, str]:
+        a = history.save_session([
+            _msg("user", "How do I check disk space?"),
+            _msg("assistant", "Use the df command to see free space per mount."),
+        ])
+        b = history.save_session([
+            _msg("user", "Set a reminder for the dentist"),
+            _msg("assistant", "Reminder created for tomorrow."),
+        ])
+        return a, b
+
+    def test_finds_messages_across_sessions(self) -> None:
+        a, b = self._seed()
+        hits = history.search_history("disk")
+        self.assertEqual([h["filepath"] for h in hits], [a])
+        self.assertEqual(hits[0]["position"], 0)
+        self.assertEqual(hits[0]["role"], "user")
+        self.assertIn("disk", hits[0]["snippet"])
+        # Prefix match, multi-word AND.
+        self.assertEqual(history.search_history("dent remind")[0]["filepath"], b)
+        self.assertEqual(history.search_history("dentist disk"), [])
+        self.assertEqual(history.search_history("  "), [])
+
+    def test_appended_and_rewritten_messages_are_searchable(self) -> None:
+        convo = [_msg("user", "alpha")]
+        path = history.save_session(convo)
+        convo.append(_msg("assistant", "bravo"))
+        history.save_session(convo, path)
+        self.assertEqual(len(history.search_history("bravo")), 1)
+        history.save_session([_msg("user", "charlie")], path)
+        self.assertEqual(history.search_history("alpha"), [])
+        self.assertEqual(history.search_history("charlie")[0]["filepath"], path)
+
+    def test_query_syntax_is_not_interpreted(self) -> None:
+        self._seed()
+        self.assertEqual(history.search_history('disk" OR "NEAR('), [])
+        self.assertEqual(len(history.search_history("df")), 1)
+
+    def test_like_fallback_without_fts5(self) -> None:
+        with patch.object(history, "_FTS_SCHEMA", "CREATE VIRTUAL TABLE messages USING nosuchmodule()"):
+            a, _ = self._seed()
+            hits = history.search_history("free space")
+        self.assertEqual([h["filepath"] for h in hits], [a])
+        self.assertIn("free space", hits[0]["snippet"])
+
+    def test_like_fallback_matches_wildcards_literally(self) -> None:
+        with patch.object(history, "_FTS_SCHEMA", "CREATE VIRTUAL TABLE messages USING nosuchmodule()"):
+            literal = history.save_session([_msg("user", "set MEERA_HISTORY_MAX to 50")])
+            history.save_session([_msg("user", "MEERAXHISTORYXMAX is not a setting")])
+            hits = history.search_history("MEERA_HISTORY_MAX")
+        self.assertEqual([h["filepath"] for h in hits], [literal])
+
+    def test_semantic_rerank_with_fake_embeddings(self) -> None:
+        self._seed()
+        with patch.dict(os.environ, {"MEERA_EMBED_FAKE": "1"}):
+            hits = history.search_history("reminder dentist", semantic=True)
+            again = history.search_history("reminder dentist", semantic=True)
+        self.assertTrue(hits)
+        self.assertEqual(hits, again)
+
+
+class TestAutosaver(HistoryStoreTestCase):
+    def test_debounces_and_flushes(self) -> None:
+        saver = history.SessionAutosaver(delay=30.0)
+        self.addCleanup(saver.close)
+        path = history.new_session_path()
+        convo = [_msg("user", "one")]
+        with patch("history.save_session", wraps=history.save_session) as save:
+            saver.schedule(convo, path)
+            convo.append(_msg("assistant", "two"))
+            saver.schedule(convo, path)
+            # Still inside the debounce window: nothing written yet.
+            self.assertFalse(os.path.exists(path))
+            self.assertTrue(saver.flush())
+            self.assertEqual(save.call_count, 1)
+        self.assertEqual(history.load_session(path), convo)
+
+    def test_load_right_after_schedule_sees_last_turn(self) -> None:
+        saver = history.SessionAutosaver(delay=30.0)
+        self.addCleanup(saver.close)
+        path = history.new_session_path()
+        convo = [_msg("user", "first")]
+        history.save_session(convo, path)
+        convo += [_msg("assistant", "reply"), _msg("user", "last turn")]
+        saver.schedule(convo, path)
+        self.assertEqual(history.load_session(path), [_msg("user", "first")])  # still pending
+        self.assertEqual(saver.load(path), convo)
+
+    def test_snapshot_is_taken_at_schedule_time(self) -> None:
+        saver = history.SessionAutosaver(delay=0.0)
+        path = history.new_session_path()
+        convo = [_msg("user", "kept")]
+        saver.schedule(convo, path)
+        self.assertTrue(saver.close())
+        convo.append(_msg("assistant", "after close"))
+        saver.schedule(convo, path)
+        self.assertEqual(history.load_session(path), [_msg("user", "kept")])
+
+
+
+class TestTitler(HistoryStoreTestCase):
+    def _titler(self, complete) -> history.SessionTitler:
+        titler = history.SessionTitler(complete=complete)
+        self.addCleanup(titler.close)
+        return titler
+
+    def test_generated_title_replaces_last_question(self) -> None:
+        calls = []
+
+        def complete(messages, max_tokens):
+            calls.append(messages)
+            return '"Packing for Lisbon."\nextra line'
+
+        titler = self._titler(complete)
+        path = history.new_session_path()
+        convo = [_msg("user", "what should I pack for lisbon"), _msg("assistant", "Layers.")]
+        titler.request([convo[0]], path)  # no reply yet: not queued
+        self.assertTrue(titler.wait_idle())
+        self.assertEqual(calls, [])
+        history.save_session(convo, path)
+        titler.request(convo, path)
+        self.assertTrue(titler.wait_idle())
+        convo.append(_msg("user", "and shoes?"))
+        history.save_session(convo, path)
+        titler.request(convo, path)  # titled once
+        self.assertTrue(titler.wait_idle())
+        self.assertEqual(len(calls), 1)
+        self.assertIn("lisbon", calls[0][-1]["content"])
+        self.assertEqual(history.list_sessions()[0]["title"], "Packing for Lisbon")
+        self.assertEqual(history.search_history("shoes")[0]["title"], "Packing for Lisbon")
+
+    def test_no_spare_slot_leaves_session_for_next_request(self) -> None:
+        from slot_scheduler import BackgroundUnavailable, Preempted
+
+        outcomes = [BackgroundUnavailable("one slot"), Preempted("user typed"), "Weekend plans"]
+
+        def complete(messages, max_tokens):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        titler = self._titler(complete)
+        path = history.new_session_path()
+        convo = [_msg("user", "plans?"), _msg("assistant", "Hiking.")]
+        history.save_session(convo, path)
+        for expected in ("", "", "Weekend plans"):
+            titler.request(convo, path)
+            self.assertTrue(titler.wait_idle())
+            self.assertEqual(history.session_label(path), expected)
+        self.assertEqual(history.list_sessions()[0]["title"], "Weekend plans")
+
+    def test_labels_are_dropped_with_their_session(self) -> None:
+        with patch.object(history, "MAX_SESSIONS", 1):
+            first = history.save_session([_msg("user", "old")])
+            history.set_session_label(first, "Old topic")
+            history.save_session([_msg("user", "new")])
+        self.assertEqual(history.session_label(first), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
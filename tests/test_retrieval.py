@@ -9,6 +9,8 @@ not retrieval *quality*.
 from __future__ import annotations
 
 import os
+import threading
+import time
 import unittest
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -27,7 +29,12 @@ from retrieval import (  # noqa: E402
     chunk_rag_directory,
     reset_index,
 )
+from retrieval import query as retrieval_query  # noqa: E402
 from retrieval.index import KIND_RAG, KIND_TOOL  # noqa: E402
+from retrieval.lifecycle import IndexLifecycle, IndexStatus  # noqa: E402
+from retrieval.lexical import LexicalIndex, reciprocal_rank_fusion, tokenize  # noqa: E402
+from retrieval.prebuilt import PrebuiltIndexError, open_index_file, write_index_file  # noqa: E402
+from retrieval.vectors import VectorStore  # noqa: E402
 
 try:
     import transformers  # noqa: F401  # type: ignore[import-not-found]
@@ -146,6 +153,49 @@ class TestEmbedBatchChunking(unittest.TestCase):
             self.assertEqual(embeddings._batch_size(), 1)
 
 
+class TestEmbedCircuitBreaker(unittest.TestCase):
+    """Consecutive failures open the breaker; one trial after the cool-down decides."""
+
+    def setUp(self) -> None:
+        embeddings.reset_breaker()
+        self.addCleanup(embeddings.reset_breaker)
+
+    def test_state_machine(self) -> None:
+        now = [0.0]
+        breaker = embeddings.CircuitBreaker(lambda: 2, lambda: 10.0, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.status()["state"], "open")
+        now[0] = 10.5
+        self.assertTrue(breaker.allow())  # the single half-open trial
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.status()["state"], "open")
+        now[0] = 21.0
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.status(), {"state": "closed", "failures": 0})
+
+    def test_open_breaker_fails_fast_without_http(self) -> None:
+        calls: list = []
+
+        def refuse(url, json=None, timeout=None):  # noqa: A002 — mirrors requests API
+            calls.append(timeout)
+            raise embeddings.requests.exceptions.ConnectionError("refused")
+
+        env = {"MEERA_EMBED_FAKE": "0", "MEERA_EMBED_BREAKER_FAILURES": "2", "MEERA_EMBED_COOLDOWN": "60"}
+        with patch.dict(os.environ, env), patch.object(embeddings.requests, "post", side_effect=refuse):
+            for _ in range(2):
+                with self.assertRaises(embeddings.EmbeddingUnavailableError):
+                    embed_batch(["x"], timeout=1.5)
+            with self.assertRaisesRegex(embeddings.EmbeddingUnavailableError, "unhealthy"):
+                embed_batch(["x"])
+        self.assertEqual(calls, [1.5, 1.5])
+        self.assertEqual(embeddings.breaker_status()["state"], "open")
+
+
 class TestRagChunker(unittest.TestCase):
     def test_h2_split_preserves_h1_title(self) -> None:
         with TemporaryDirectory() as tmp:
@@ -334,6 +384,503 @@ class TestRetrievalIndex(unittest.TestCase):
         self.assertTrue(idx.is_built)
 
 
+class TestVectorStore(unittest.TestCase):
+    def _vectors(self, n: int = 20) -> list[list[float]]:
+        return [embed_one(f"vector store row {i}") for i in range(n)]
+
+    def test_f32_scores_match_plain_dot(self) -> None:
+        vecs = self._vectors()
+        store = VectorStore(len(vecs[0]))
+        store.extend(vecs)
+        qv = vecs[3]
+        expected = [sum(a * b for a, b in zip(qv, v)) for v in vecs]
+        for got, want in zip(store.scores(qv), expected):
+            self.assertAlmostEqual(got, want, places=5)
+        self.assertEqual(store.nbytes, 4 * len(vecs) * len(vecs[0]))
+        self.assertAlmostEqual(store.row(3)[0], vecs[3][0], places=6)
+
+    def test_quantized_scores_within_error_bound(self) -> None:
+        vecs = self._vectors()
+        exact = VectorStore(len(vecs[0]))
+        exact.extend(vecs)
+        qv = vecs[0]
+        want = exact.scores(qv)
+        for precision, bytes_per_dim in (("f16", 2), ("int8", 1)):
+            store = VectorStore(len(vecs[0]), precision)
+            store.extend(vecs)
+            self.assertTrue(store.approximate)
+            self.assertLess(store.nbytes, len(vecs) * len(vecs[0]) * (bytes_per_dim + 1))
+            for got, ref in zip(store.scores(qv), want):
+                self.assertLessEqual(abs(got - ref), store.error_bound + 1e-6, precision)
+
+    def test_exact_scores_come_from_spilled_originals(self) -> None:
+        vecs = self._vectors()
+        store = VectorStore(len(vecs[0]), "int8", keep_exact=True)
+        store.extend(vecs)
+        self.assertEqual(store.exact_scores(vecs[0], [0]), {})  # not sealed yet
+        store.seal()
+        try:
+            rescored = store.exact_scores(vecs[0], [0, 5])
+            self.assertAlmostEqual(rescored[0], 1.0, places=5)
+            self.assertAlmostEqual(rescored[5], sum(a * b for a, b in zip(vecs[0], vecs[5])), places=5)
+            with self.assertRaises(RuntimeError):
+                store.append(vecs[0])
+        finally:
+            store.close()
+
+    def test_rejects_bad_shapes(self) -> None:
+        with self.assertRaises(ValueError):
+            VectorStore(4, "f8")
+        store = VectorStore(4)
+        with self.assertRaises(ValueError):
+            store.append([1.0, 0.0])
+
+
+class TestQuantizedIndex(unittest.TestCase):
+    def _build(self, precision: str, rescore: int = 4) -> RetrievalIndex:
+        idx = RetrievalIndex(precision=precision, rescore_factor=rescore)
+        for i in range(30):
+            idx.add(IndexEntry(kind=KIND_TOOL, index_text=f"exemplar {i}", tool_name=f"tool_{i % 6}"))
+        idx.build()
+        return idx
+
+    def test_rescored_hits_match_f32(self) -> None:
+        reference = self._build("f32").query("exemplar 7", k=5)
+        for precision in ("f16", "int8"):
+            hits = self._build(precision).query("exemplar 7", k=5)
+            self.assertEqual(hits[0].entry.index_text, "exemplar 7")
+            self.assertEqual([h.entry for h in hits], [h.entry for h in reference], precision)
+            for got, want in zip(hits, reference):
+                self.assertAlmostEqual(got.score, want.score, places=5)
+
+    def test_query_split_thresholds_rescored_scores(self) -> None:
+        idx = self._build("int8")
+        tools, _rag = idx.query_split("exemplar 7", k_tools=6, tool_threshold=0.999)
+        self.assertEqual([h.entry.tool_name for h in tools], ["tool_1"])
+        self.assertAlmostEqual(tools[0].score, 1.0, places=5)
+
+    def test_without_rescoring_keeps_scan_scores(self) -> None:
+        idx = self._build("int8", rescore=0)
+        self.assertEqual(idx.vector_bytes, 30 * 384 + 30 * 4)
+        hits = idx.query("exemplar 7", k=1)
+        self.assertEqual(hits[0].entry.index_text, "exemplar 7")
+        self.assertNotEqual(hits[0].score, 1.0)
+
+    def test_unknown_precision_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            RetrievalIndex(precision="bf16")
+
+
+class TestPrebuiltIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "prebuilt.idx"
+        self.entries = [
+            IndexEntry(kind=KIND_TOOL, index_text=f"prebuilt exemplar {i}", tool_name=f"tool_{i % 3}")
+            for i in range(6)
+        ]
+        self.entries.append(
+            IndexEntry(
+                kind=KIND_RAG,
+                index_text="doc — Section\nbody",
+                rag_chunk=RagChunk(doc_path="rag_data/doc.md", doc_title="doc", section="Section", body="body"),
+            )
+        )
+        idx = RetrievalIndex(precision="f32")
+        idx.add_many(self.entries)
+        idx.build()
+        write_index_file(idx, self.path, embeddings.model_fingerprint())
+        self.reference = idx
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _build(self, entries: list[IndexEntry], precision: str = "f32") -> RetrievalIndex:
+        idx = RetrievalIndex(precision=precision)
+        idx.add_many(entries)
+        idx.build(prebuilt=open_index_file(self.path, embeddings.model_fingerprint()))
+        return idx
+
+    def test_round_trip_metadata(self) -> None:
+        prebuilt = open_index_file(self.path)
+        self.assertEqual(prebuilt.count, len(self.entries))
+        self.assertEqual(prebuilt.entries(), self.entries)
+        self.assertEqual(prebuilt.lookup(["prebuilt exemplar 2", "nope"]), [2, None])
+        prebuilt.close()
+
+    def test_unchanged_entries_embed_nothing(self) -> None:
+        with patch("retrieval.index.embed_batch", side_effect=AssertionError("embedded")):
+            idx = self._build(self.entries)
+        self.assertEqual(idx.embedded_count, 0)
+        self.assertEqual(idx.vector(3), self.reference.vector(3))
+        hits = idx.query("prebuilt exemplar 4", k=1)
+        self.assertEqual(hits[0].entry.index_text, "prebuilt exemplar 4")
+
+    def test_only_divergent_entries_are_embedded(self) -> None:
+        changed = list(reversed(self.entries[1:])) + [
+            IndexEntry(kind=KIND_TOOL, index_text="a brand new exemplar", tool_name="tool_9")
+        ]
+        calls: list[list[str]] = []
+
+        def fake(texts):
+            calls.append(list(texts))
+            return embed_batch(texts)
+
+        with patch("retrieval.index.embed_batch", side_effect=fake):
+            idx = self._build(changed)
+        self.assertEqual(calls, [["a brand new exemplar"]])
+        self.assertEqual(idx.embedded_count, 1)
+        self.assertEqual(idx.vector(0), self.reference.vector(len(self.entries) - 1))
+
+    def test_quantized_index_rescores_from_file(self) -> None:
+        idx = self._build(self.entries, precision="int8")
+        hits = idx.query("prebuilt exemplar 4", k=1)
+        self.assertAlmostEqual(hits[0].score, 1.0, places=5)
+
+    def test_stale_or_damaged_files_rejected(self) -> None:
+        with self.assertRaises(PrebuiltIndexError):
+            open_index_file(self.path, fingerprint="other-model+l2")
+        with self.assertRaises(PrebuiltIndexError):
+            open_index_file(Path(self._tmp.name) / "missing.idx")
+        data = self.path.read_bytes()
+        self.path.write_bytes(data[:-4])
+        with self.assertRaises(PrebuiltIndexError):
+            open_index_file(self.path)
+
+    def test_build_index_uses_configured_file(self) -> None:
+        out = Path(self._tmp.name) / "project.idx"
+        with patch.dict(os.environ, {"MEERA_INDEX_FILE": str(out)}):
+            first = build_index()
+            write_index_file(first, out, embeddings.model_fingerprint())
+            with patch("retrieval.index.embed_batch", side_effect=AssertionError("embedded")):
+                second = build_index()
+        self.assertGreater(first.embedded_count, 0)
+        self.assertEqual(second.embedded_count, 0)
+        self.assertEqual(second.size, first.size)
+
+
+class TestLexicalIndex(unittest.TestCase):
+    def test_tokenize_keeps_flags_and_drops_stopwords(self) -> None:
+        self.assertEqual(tokenize("How do I use sed -i on a file?"), ["use", "sed", "-i", "file"])
+        self.assertEqual(tokenize("systemctl --user restart foo.service"), ["systemctl", "--user", "restart", "foo.service"])
+
+    def test_bm25_prefers_rare_exact_terms(self) -> None:
+        lex = LexicalIndex([
+            "check the system logs",
+            "read logs with journalctl -u",
+            "list system services",
+        ])
+        hits = lex.search("journalctl logs")
+        best = max(hits, key=lambda i: hits[i][0])
+        self.assertEqual(best, 1)
+        self.assertAlmostEqual(hits[1][1], 1.0)
+        self.assertLess(hits[0][1], 0.5)
+        self.assertEqual(lex.search("nothing matches here"), {})
+
+    def test_reciprocal_rank_fusion(self) -> None:
+        fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], k=1)
+        self.assertEqual(sorted(fused, key=fused.get, reverse=True), ["b", "a", "c"])
+
+
+class TestHybridRetrieval(unittest.TestCase):
+    def _entries(self) -> list[IndexEntry]:
+        chunk = RagChunk(
+            doc_path="rag_data/sed.md", doc_title="sed", section="In-place edits",
+            body="Use sed -i to edit a file in place.",
+        )
+        return [
+            IndexEntry(kind=KIND_TOOL, index_text="how much disk space is left", tool_name="disk_space"),
+            IndexEntry(kind=KIND_TOOL, index_text="show free space on my drives", tool_name="disk_space"),
+            IndexEntry(kind=KIND_TOOL, index_text="turn on wifi", tool_name="wifi_toggle"),
+            IndexEntry(kind=KIND_RAG, index_text=chunk.index_text, rag_chunk=chunk),
+        ]
+
+    def test_lexical_mode_makes_no_embedding_calls(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        idx.build_lexical_only()
+        self.assertFalse(idx.has_dense)
+        with patch("retrieval.index.embed_batch", side_effect=AssertionError("embedded")):
+            tools, rag = idx.query_split("disk space", mode="lexical", lexical_threshold=0.5)
+            with self.assertRaises(embeddings.EmbeddingUnavailableError):
+                idx.query_split("disk space", mode="hybrid")
+        self.assertEqual([h.entry.tool_name for h in tools], ["disk_space"])
+        self.assertAlmostEqual(tools[0].score, 1.0)
+        self.assertEqual(rag, [])
+
+    def test_hybrid_adds_exact_term_matches_dense_missed(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        idx.build()
+        # Fake vectors make every cosine tiny, so dense alone finds nothing.
+        dense_tools, dense_rag = idx.query_split("sed -i in place", tool_threshold=0.5, rag_threshold=0.5)
+        self.assertEqual((dense_tools, dense_rag), ([], []))
+        tools, rag = idx.query_split(
+            "sed -i in place", tool_threshold=0.5, rag_threshold=0.5, mode="hybrid", lexical_threshold=0.8
+        )
+        self.assertEqual(tools, [])
+        self.assertEqual(rag[0].entry.rag_chunk.section, "In-place edits")
+        self.assertLess(rag[0].score, 0.5)  # score stays the cosine
+        self.assertAlmostEqual(rag[0].lexical, 1.0)
+
+    def test_hybrid_keeps_dense_hits_first_when_both_agree(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        idx.build()
+        tools, _rag = idx.query_split("turn on wifi", k_tools=2, mode="hybrid", lexical_threshold=0.5)
+        self.assertEqual(tools[0].entry.tool_name, "wifi_toggle")
+        self.assertAlmostEqual(tools[0].score, 1.0, places=5)
+
+    def test_retrieve_falls_back_to_lexical_when_query_embedding_fails(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        idx.build()
+        down = embeddings.EmbeddingUnavailableError("down")
+        with patch("retrieval.index.embed_batch", side_effect=down):
+            result = retrieval_query.retrieve("how much disk space", index=idx, tool_threshold=0.9)
+        self.assertEqual(result.mode, "lexical")
+        self.assertEqual(result.candidate_tool_names, ["disk_space"])
+
+    def test_retrieve_uses_lexical_router_when_dense_misses_deadline(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        idx.build()
+
+        def slow(texts, **_):
+            time.sleep(0.3)
+            return embed_batch(texts)
+
+        with patch.dict(os.environ, {"MEERA_RETRIEVAL_DEADLINE_MS": "20"}), patch(
+            "retrieval.index.embed_batch", side_effect=slow
+        ):
+            started = time.monotonic()
+            result = retrieval_query.retrieve("how much disk space", index=idx, tool_threshold=0.9)
+            elapsed = time.monotonic() - started
+        self.assertLess(elapsed, 0.25)
+        self.assertEqual(result.mode, "lexical")
+        self.assertTrue(result.deadline_missed)
+        self.assertEqual(result.candidate_tool_names, ["disk_space"])
+
+    def test_waiting_for_the_index_counts_against_the_deadline(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        idx.build()
+
+        def index_after(delay_s):
+            def current(timeout):
+                time.sleep(delay_s)
+                return idx
+            return current
+
+        def slow(texts, **_):
+            time.sleep(0.5)
+            return embed_batch(texts)
+
+        with patch.dict(os.environ, {"MEERA_RETRIEVAL_DEADLINE_MS": "200"}), patch(
+            "retrieval.index.embed_batch", side_effect=slow
+        ) as embed:
+            with patch.object(retrieval_query, "current_index", index_after(0.15)):
+                started = time.monotonic()
+                result = retrieval_query.retrieve("how much disk space", tool_threshold=0.9)
+                elapsed = time.monotonic() - started
+            self.assertLess(elapsed, 0.3)  # not 0.15 s + a fresh 0.2 s budget
+            self.assertTrue(result.deadline_missed)
+            embed.reset_mock()
+            with patch.object(retrieval_query, "current_index", index_after(0.25)):
+                result = retrieval_query.retrieve("how much disk space", tool_threshold=0.9)
+            embed.assert_not_called()  # no budget left for the dense query
+        self.assertEqual(result.mode, "lexical")
+        self.assertTrue(result.deadline_missed)
+        self.assertEqual(result.candidate_tool_names, ["disk_space"])
+
+    def test_retrieve_within_deadline_stays_dense(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        idx.build()
+        with patch.dict(os.environ, {"MEERA_RETRIEVAL_DEADLINE_MS": "5000", "MEERA_RETRIEVAL_HYBRID": "0"}):
+            result = retrieval_query.retrieve("turn on wifi", index=idx, tool_threshold=0.9)
+        self.assertEqual(result.mode, "dense")
+        self.assertFalse(result.deadline_missed)
+        self.assertEqual(result.candidate_tool_names, ["wifi_toggle"])
+
+    def test_get_index_serves_lexical_while_embedder_is_down(self) -> None:
+        reset_index()
+        self.addCleanup(reset_index)
+        down = embeddings.EmbeddingUnavailableError("down")
+        with patch.dict(os.environ, {"MEERA_INDEX_FILE": "/nonexistent/prebuilt.idx"}):
+            with patch("retrieval.index.embed_batch", side_effect=down):
+                first = retrieval_query.get_index()
+                self.assertFalse(first.has_dense)
+                self.assertIs(retrieval_query.get_index(), first)  # within the retry window
+            with patch.object(retrieval_query, "_DENSE_RETRY_S", 0.0):
+                second = retrieval_query.get_index()
+        self.assertTrue(second.has_dense)
+        self.assertIsNot(second, first)
+
+
+class TestTieredBuild(unittest.TestCase):
+    """Tool exemplars are embedded and served before the RAG chunks."""
+
+    _entries = TestHybridRetrieval._entries  # same tools + one RAG chunk
+
+    def test_tool_tier_scores_tools_densely_and_rag_lexically(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        tier = idx.build_tier(3)
+        self.assertTrue(tier.partial and tier.has_dense)
+        self.assertEqual(tier.embedded_count, 3)
+        tools, rag = tier.query_split(
+            "edit a file in place with sed -i", tool_threshold=-1.0, rag_threshold=0.99, partial_threshold=0.5
+        )
+        self.assertEqual({h.entry.tool_name for h in tools}, {"disk_space", "wifi_toggle"})
+        self.assertEqual([h.entry.rag_chunk.section for h in rag], ["In-place edits"])
+        self.assertEqual(len(tier.query("wifi", k=8)), 3)
+
+    def test_build_reuses_tier_vectors(self) -> None:
+        idx = RetrievalIndex()
+        idx.add_many(self._entries())
+        tier = idx.build_tier(3)
+        with patch("retrieval.index.embed_batch", wraps=embed_batch) as spy:
+            idx.build(reuse=tier)
+        self.assertEqual([len(c.args[0]) for c in spy.call_args_list], [1])
+        self.assertEqual((idx.embedded_count, idx.partial), (1, False))
+        full = RetrievalIndex()
+        full.add_many(self._entries())
+        full.build()
+        self.assertEqual(
+            [(h.entry.index_text, round(h.score, 6)) for h in idx.query("free space", k=4)],
+            [(h.entry.index_text, round(h.score, 6)) for h in full.query("free space", k=4)],
+        )
+
+    def test_build_index_publishes_lexical_then_tool_tier(self) -> None:
+        published: list[RetrievalIndex] = []
+        with patch.dict(os.environ, {"MEERA_INDEX_FILE": "/nonexistent/prebuilt.idx"}):
+            idx = build_index(on_partial=published.append)
+        self.assertEqual([(p.has_dense, p.partial) for p in published], [(False, True), (True, True)])
+        self.assertFalse(idx.partial)
+        n_tools = sum(e.kind == KIND_TOOL for e in idx.entries)
+        self.assertEqual(published[1].embedded_count, n_tools)
+        self.assertEqual(idx.embedded_count, idx.size - n_tools)
+
+
+class TestIndexLifecycle(unittest.TestCase):
+    """Background build, partial serving, readiness events and retry backoff."""
+
+    def _index(self, *, dense: bool = True) -> RetrievalIndex:
+        idx = RetrievalIndex()
+        idx.add(IndexEntry(kind=KIND_TOOL, index_text="turn on wifi", tool_name="wifi_toggle"))
+        if dense:
+            idx.build()
+        else:
+            idx.build_lexical_only()
+        return idx
+
+    def _lifecycle(self, build, now: list[float] | None = None) -> tuple[IndexLifecycle, list[IndexStatus]]:
+        clock = (lambda: now[0]) if now is not None else time.monotonic
+        lifecycle = IndexLifecycle(build, lambda attempts: 10.0 * 2 ** (attempts - 1), clock=clock)
+        events: list[IndexStatus] = []
+        lifecycle.subscribe(events.append)
+        return lifecycle, events
+
+    def test_serves_partial_index_while_building(self) -> None:
+        release = threading.Event()
+        partial = self._index(dense=False)
+        final = self._index()
+
+        def build(publish):
+            publish(partial)
+            release.wait(5.0)
+            return final
+
+        lifecycle, events = self._lifecycle(build)
+        self.assertIs(lifecycle.current(timeout=5.0), partial)
+        self.assertEqual(lifecycle.state, "building")
+        self.assertTrue(lifecycle.status().partial)
+        release.set()
+        self.assertIs(lifecycle.get(timeout=5.0), final)
+        self.assertIs(lifecycle.current(), final)
+        self.assertEqual(
+            [(e.state, e.partial) for e in events],
+            [("building", False), ("building", True), ("ready", False)],
+        )
+
+    def test_degraded_build_is_retried_with_backoff(self) -> None:
+        now = [0.0]
+        results = [self._index(dense=False), self._index(dense=False), self._index()]
+        lifecycle, events = self._lifecycle(lambda publish: results.pop(0), now)
+        first = lifecycle.get(timeout=5.0)
+        self.assertEqual(lifecycle.state, "degraded")
+        self.assertIs(lifecycle.get(timeout=5.0), first)  # within the backoff
+        now[0] = 10.5
+        lifecycle.get(timeout=5.0)
+        self.assertEqual(lifecycle.status().attempts, 2)
+        now[0] = 25.0
+        self.assertFalse(lifecycle.start())  # second retry waits 20 s
+        self.assertTrue(lifecycle.retry_now())
+        self.assertTrue(lifecycle.get(timeout=5.0).has_dense)
+        self.assertEqual(lifecycle.status().attempts, 0)
+        self.assertEqual(events[-1].state, "ready")
+
+    def test_failed_build_raises_until_retry(self) -> None:
+        now = [0.0]
+        calls = []
+
+        def build(publish):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OSError("rag_data unreadable")
+            return self._index()
+
+        lifecycle, events = self._lifecycle(build, now)
+        with self.assertRaises(OSError):
+            lifecycle.get(timeout=5.0)
+        self.assertIsNone(lifecycle.current())
+        status = lifecycle.status()
+        self.assertEqual((status.state, status.error, status.retry_in_s), ("failed", "rag_data unreadable", 10.0))
+        now[0] = 11.0
+        self.assertEqual(lifecycle.get(timeout=5.0).size, 1)
+        self.assertEqual([e.state for e in events], ["building", "failed", "building", "ready"])
+
+    def test_reset_discards_running_build(self) -> None:
+        release = threading.Event()
+        stale = self._index()
+
+        def build(publish):
+            release.wait(5.0)
+            return stale
+
+        lifecycle, _ = self._lifecycle(build)
+        lifecycle.start()
+        lifecycle.reset()
+        self.assertEqual(lifecycle.state, "idle")
+        release.set()
+        time.sleep(0.05)
+        self.assertEqual(lifecycle.state, "idle")
+
+    def test_retrieve_does_not_wait_for_the_build(self) -> None:
+        reset_index()
+        self.addCleanup(reset_index)
+        release = threading.Event()
+
+        def slow(texts, **_):
+            release.wait(5.0)
+            return embed_batch(texts)
+
+        with patch.dict(os.environ, {"MEERA_INDEX_FILE": "/nonexistent/prebuilt.idx"}), patch(
+            "retrieval.index.embed_batch", side_effect=slow
+        ):
+            retrieval_query.start_index_build()
+            result = retrieval_query.retrieve("how much disk space do I have", tool_threshold=0.9)
+            self.assertEqual(retrieval_query.index_status().state, "building")
+            release.set()
+            built = retrieval_query.get_index()
+        self.assertEqual(result.mode, "lexical")
+        self.assertTrue(result.partial)
+        self.assertIn("disk_space", result.candidate_tool_names)
+        self.assertTrue(built.has_dense)
+        self.assertEqual(retrieval_query.index_status().state, "ready")
+
+
 class TestBuildSingleton(unittest.TestCase):
     def test_build_index_uses_real_tools_and_rag(self) -> None:
         # Build the actual project index against the real rag_data directory.
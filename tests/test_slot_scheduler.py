@@ -0,0 +1,160 @@
+"""Tests for priority scheduling onto llama-server slots.
+
+Covers:
+- Background work gets its own slots when the server has several, and is
+  refused at once (BackgroundUnavailable) when it has one.
+- Background leases wait while the user is waiting (an interactive lease,
+  or the grace period after one) and time out.
+- Interactive leases preempt running background ones, including a
+  background stream through the mock server, which ends with Preempted.
+- complete_background runs on a spare slot, and is refused on a one-slot
+  server or a backend without slots.
+- The slot count is read from /props unless MEERA_LLAMACPP_SLOTS is set,
+  only for background leases, and again after a failed read.
+"""
+from __future__ import annotations
+
+import os
+import unittest
+from unittest.mock import patch
+
+import inference
+import slot_scheduler
+from bench.mock_llama_server import MockLlamaConfig, MockLlamaServer
+from slot_scheduler import BACKGROUND, INTERACTIVE, BackgroundUnavailable, Preempted, SlotScheduler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSlotScheduler(unittest.TestCase):
+    def test_background_slots(self) -> None:
+        self.assertEqual(SlotScheduler(1).background_slots, [])
+        self.assertEqual(SlotScheduler(3, interactive_slot=1).background_slots, [0, 2])
+        self.assertEqual(SlotScheduler(2, interactive_slot=None).background_slots, [1])
+
+    def test_single_slot_refuses_background(self) -> None:
+        sched = SlotScheduler(1, idle_grace_s=0)
+        with self.assertRaises(BackgroundUnavailable):
+            with sched.lease(BACKGROUND):
+                pass
+        with sched.lease(INTERACTIVE) as lease:
+            self.assertEqual(lease.slot, 0)
+
+    def test_interactive_lease_uses_conversation_slot(self) -> None:
+        sched = SlotScheduler(2, interactive_slot=0)
+        with sched.lease(INTERACTIVE) as lease:
+            self.assertEqual(lease.slot, 0)
+            self.assertTrue(sched.user_waiting())
+
+    def test_background_waits_for_grace_period(self) -> None:
+        clock = FakeClock()
+        sched = SlotScheduler(2, idle_grace_s=2.0, clock=clock)
+        with sched.lease(INTERACTIVE):
+            with self.assertRaises(TimeoutError):
+                with sched.lease(BACKGROUND, timeout=0):
+                    pass
+        clock.now += 1.0
+        with self.assertRaises(TimeoutError):
+            with sched.lease(BACKGROUND, timeout=0):
+                pass
+        clock.now += 1.5
+        with sched.lease(BACKGROUND, timeout=0) as lease:
+            self.assertEqual(lease.slot, 1)
+
+    def test_background_slots_are_not_shared(self) -> None:
+        sched = SlotScheduler(3, idle_grace_s=0)
+        with sched.lease(BACKGROUND) as a, sched.lease(BACKGROUND) as b:
+            self.assertEqual({a.slot, b.slot}, {1, 2})
+            with self.assertRaises(TimeoutError):
+                with sched.lease(BACKGROUND, timeout=0):
+                    pass
+
+    def test_interactive_preempts_background(self) -> None:
+        sched = SlotScheduler(2, idle_grace_s=0)
+        with sched.lease(BACKGROUND) as background:
+            self.assertEqual(background.slot, 1)
+            with sched.lease(INTERACTIVE) as interactive:
+                self.assertEqual(interactive.slot, 0)
+            self.assertTrue(background.preempted)
+
+    def test_probes_slots_for_background_only_until_known(self) -> None:
+        answers = [None, 2]
+        calls: list[int] = []
+
+        def probe() -> int | None:
+            calls.append(1)
+            return answers.pop(0)
+
+        sched = SlotScheduler(None, idle_grace_s=0, probe=probe)
+        with sched.lease(INTERACTIVE) as lease:
+            self.assertEqual(lease.slot, 0)
+        self.assertEqual(calls, [])
+        with self.assertRaises(BackgroundUnavailable):
+            with sched.lease(BACKGROUND):
+                pass
+        for _ in range(2):
+            with sched.lease(BACKGROUND) as lease:
+                self.assertEqual(lease.slot, 1)
+        self.assertEqual((len(calls), sched.total_slots), (2, 2))
+
+    def test_rejects_unknown_priority(self) -> None:
+        with self.assertRaises(ValueError):
+            with SlotScheduler().lease("urgent"):
+                pass
+
+
+class TestSchedulingThroughServer(unittest.TestCase):
+    def setUp(self) -> None:
+        slot_scheduler.reset_default()
+        self.addCleanup(slot_scheduler.reset_default)
+
+    def test_total_slots_from_props_and_env(self) -> None:
+        with MockLlamaServer(config=MockLlamaConfig(slots=3)) as server:
+            self.assertEqual(slot_scheduler.probe_total_slots(server.url), 3)
+            sched = slot_scheduler.get_default(server.url, 0)
+            self.assertIsNone(sched.total_slots)  # not probed until background work asks
+            with sched.lease(BACKGROUND, timeout=5):
+                self.assertEqual(sched.total_slots, 3)
+            with patch.dict(os.environ, {"MEERA_LLAMACPP_SLOTS": "2"}):
+                self.assertEqual(slot_scheduler.get_default(server.url, 1).total_slots, 2)
+        self.assertIsNone(slot_scheduler.probe_total_slots(server.url, timeout=0.5))
+
+    def test_background_stream_is_preempted(self) -> None:
+        config = MockLlamaConfig(tokens_per_sec=200, first_token_ms=0, reply_tokens=200, slots=2)
+        msgs = [{"role": "user", "content": "summarize the conversation"}]
+        with MockLlamaServer(config=config) as server, patch.dict(os.environ, {
+            "MEERA_LLAMACPP_URL": server.url, "MEERA_BACKEND": "llamacpp", "MEERA_LLAMACPP_SLOT": "0",
+        }):
+            stream = inference.stream_llm_events(msgs, policy=inference.background_policy(max_tokens=200))
+            received = [next(stream)]
+            with inference._scheduler().lease(INTERACTIVE):
+                with self.assertRaises(Preempted):
+                    received.extend(stream)
+        self.assertEqual(received[0]["kind"], "content")
+        self.assertLess(len(received), 200)
+
+    def test_complete_background_needs_a_spare_slot(self) -> None:
+        msgs = [{"role": "user", "content": "title this conversation"}]
+        for slots in (1, 2):
+            slot_scheduler.reset_default()
+            with MockLlamaServer(config=MockLlamaConfig(slots=slots, first_token_ms=0)) as server, patch.dict(
+                os.environ, {"MEERA_LLAMACPP_URL": server.url, "MEERA_BACKEND": "llamacpp"},
+            ):
+                if slots == 1:
+                    with self.assertRaises(BackgroundUnavailable):
+                        inference.complete_background(msgs, max_tokens=8)
+                else:
+                    self.assertTrue(inference.complete_background(msgs, max_tokens=8))
+        with patch.dict(os.environ, {"MEERA_BACKEND": "ollama"}):
+            with self.assertRaises(BackgroundUnavailable):
+                inference.complete_background(msgs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+"""Tests for the llama-server supervisor (supervisor.py).
+
+A tiny HTTP server stands in for llama-server: it answers /health and can
+be told to exit on start. Covers:
+- A managed server is started, becomes ready, and its URL is published.
+- A server that dies is restarted with backoff; a crash loop ends in "failed"
+  until restart().
+- A server already answering is adopted; an unmanaged one is only probed.
+- The status file round-trips through read_status().
+- specs_from_env starts the chat server with MEERA_LLAMACPP_PARALLEL slots
+  and a -c that keeps each slot's share of the context.
+- Retrieval retries a failed build after embedder_recovered().
+- ProcessDefault (the process-wide instance holder the supervisor, sampler,
+  reminder queue and slot scheduler share) creates once, replaces stale
+  instances and stops on stop().
+"""
+from __future__ import annotations
+
+import io
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Force fake embeddings before importing anything that pulls embeddings.py.
+os.environ["MEERA_EMBED_FAKE"] = "1"
+
+import supervisor  # noqa: E402
+from retrieval import query as retrieval_query  # noqa: E402
+from process_default import ProcessDefault  # noqa: E402
+from supervisor import ManagedServer, RestartPolicy, ServerSpec, Supervisor  # noqa: E402
+
+_FAKE_SERVER = r"""
+import os, sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+if os.environ.get("FAKE_LLAMA_EXIT"):
+    sys.exit(3)
+port = int(sys.argv[sys.argv.index("--port") + 1])
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200 if self.path == "/health" else 404)
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+"""
+
+_FAST = RestartPolicy(
+    backoff_base_s=0.01,
+    backoff_max_s=0.05,
+    crash_limit=3,
+    crash_window_s=60.0,
+    ready_timeout_s=10.0,
+    health_interval_s=0.05,
+    health_failures=1,
+)
+
+
+def _spec(tmp: str, *, managed: bool = True, env: dict[str, str] | None = None) -> ServerSpec:
+    return ServerSpec(
+        name="chat",
+        url_env="MEERA_TEST_SUPERVISED_URL",
+        default_url="http://127.0.0.1:18180",
+        port_range=(18181, 18199),
+        argv=[sys.executable, "-c", _FAKE_SERVER] if managed else None,
+        env=env or {},
+        log_path=Path(tmp) / "server.log",
+        pid_path=Path(tmp) / "server.pid",
+    )
+
+
+class SupervisorTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        env = patch.dict(os.environ, {"XDG_RUNTIME_DIR": self._tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        os.environ.pop("MEERA_TEST_SUPERVISED_URL", None)
+
+    def _supervise(self, spec: ServerSpec, **kw) -> tuple[Supervisor, ManagedServer]:
+        server = ManagedServer(spec, _FAST, **kw)
+        sup = Supervisor([server], status_file=Path(self._tmp.name) / "supervisor.json")
+        self.addCleanup(sup.close, terminate=True)
+        sup.start()
+        return sup, server
+
+
+class TestManagedServer(SupervisorTestCase):
+    def test_starts_publishes_url_and_restarts_after_crash(self) -> None:
+        sup, server = self._supervise(_spec(self._tmp.name))
+        self.assertTrue(server.wait_for("ready"))
+        self.assertEqual(os.environ["MEERA_TEST_SUPERVISED_URL"], server.url)
+        self.assertEqual(int((Path(self._tmp.name) / "server.pid").read_text()), server.pid)
+        self.assertEqual(server.restarts, 0)
+
+        first_pid = server.pid
+        os.kill(first_pid, signal.SIGKILL)
+        self.assertTrue(server.wait_for("backoff", "starting"))
+        self.assertTrue(server.wait_for("ready"))
+        self.assertNotEqual(server.pid, first_pid)
+        self.assertEqual(server.restarts, 1)
+        self.assertEqual(sup.status()["chat"]["recent_crashes"], 1)
+
+    def test_crash_loop_gives_up_until_restart(self) -> None:
+        with patch("sys.stderr", new_callable=io.StringIO) as err:
+            _, server = self._supervise(_spec(self._tmp.name, env={"FAKE_LLAMA_EXIT": "1"}))
+            self.assertTrue(server.wait_for("failed"))
+        self.assertIn("[supervisor] chat: failed", err.getvalue())
+        self.assertIn("3 crashes", server.last_error)
+        self.assertEqual(server.restarts, _FAST.crash_limit - 1)
+
+        server.spec.env.clear()
+        server.restart()
+        self.assertTrue(server.wait_for("ready"))
+
+    def test_adopts_running_server_and_probes_unmanaged(self) -> None:
+        port = supervisor.find_free_port(18180, 18181, 18199)
+        proc = subprocess.Popen([sys.executable, "-c", _FAKE_SERVER, "--port", str(port)])
+        self.addCleanup(proc.wait)
+        self.addCleanup(proc.kill)
+        url = f"http://127.0.0.1:{port}"
+        with patch.dict(os.environ, {"MEERA_TEST_SUPERVISED_URL": url}):
+            _, server = self._supervise(_spec(self._tmp.name, managed=False))
+            self.assertTrue(server.wait_for("ready"))
+            self.assertFalse(server.managed)
+            self.assertIsNone(server.pid)
+            proc.kill()
+            self.assertTrue(server.wait_for("unhealthy"))
+        self.assertEqual(server.restarts, 0)
+
+    def test_backoff_is_exponential_and_capped(self) -> None:
+        policy = RestartPolicy(backoff_base_s=1.0, backoff_max_s=10.0)
+        self.assertEqual([policy.backoff(n) for n in (1, 2, 3, 4, 5)], [1.0, 2.0, 4.0, 8.0, 10.0])
+
+
+class TestStatus(SupervisorTestCase):
+    def test_status_file_round_trip(self) -> None:
+        sup, server = self._supervise(_spec(self._tmp.name))
+        self.assertTrue(server.wait_for("ready"))
+        sup.write_status()
+        status = supervisor.read_status(Path(self._tmp.name) / "supervisor.json")
+        self.assertEqual(status["chat"]["state"], "ready")
+        self.assertEqual(status["chat"]["url"], server.url)
+        self.assertTrue(status["chat"]["managed"])
+
+    def test_missing_status_file_reads_empty(self) -> None:
+        self.assertEqual(supervisor.read_status(Path(self._tmp.name) / "nope.json"), {})
+
+    def test_ready_updates_launcher_state_file(self) -> None:
+        state = Path(self._tmp.name) / "meera" / "servers.env"
+        state.parent.mkdir()
+        state.write_text('MEERA_TEST_SUPERVISED_URL="http://127.0.0.1:1"\nMEERA_LLAMACPP_BACKEND="cpu"\n')
+        _, server = self._supervise(_spec(self._tmp.name))
+        self.assertTrue(server.wait_for("ready"))
+        self.assertEqual(
+            state.read_text(),
+            f'MEERA_TEST_SUPERVISED_URL="{server.url}"\nMEERA_LLAMACPP_BACKEND="cpu"\n',
+        )
+
+
+class TestSpecsFromEnv(unittest.TestCase):
+    _ENV = {
+        "MEERA_LLAMA_SERVER": "/opt/llama-server",
+        "MEERA_LLAMACPP_GGUF": "/models/chat.gguf",
+        "MEERA_DISABLE_EMBED": "1",
+    }
+
+    def _chat_argv(self, **env: str) -> list[str]:
+        with patch.dict(os.environ, {**self._ENV, **env}, clear=True):
+            (chat,) = supervisor.specs_from_env()
+        return chat.argv
+
+    def test_one_slot_by_default(self) -> None:
+        argv = self._chat_argv()
+        self.assertEqual(argv[argv.index("--parallel") + 1], "1")
+        self.assertNotIn("-c", argv)
+
+    def test_slots_get_their_share_of_context(self) -> None:
+        argv = self._chat_argv(MEERA_LLAMACPP_PARALLEL="2")
+        self.assertEqual(argv[argv.index("--parallel") + 1], "2")
+        self.assertEqual(argv[argv.index("-c") + 1], "8192")
+        argv = self._chat_argv(MEERA_LLAMACPP_PARALLEL="3", MEERA_LLAMACPP_CTX="2048")
+        self.assertEqual(argv[argv.index("-c") + 1], "6144")
+
+    def test_extra_args_come_last(self) -> None:
+        argv = self._chat_argv(MEERA_LLAMACPP_SERVER_EXTRA="--parallel 4 --flash-attn")
+        self.assertEqual(argv[-3:], ["--parallel", "4", "--flash-attn"])
+
+
+class TestRetrievalRecovery(unittest.TestCase):
+    def test_failed_build_is_retried_after_recovery(self) -> None:
+        retrieval_query.reset_index()
+        self.addCleanup(retrieval_query.reset_index)
+        with patch.object(retrieval_query, "build_index", side_effect=OSError("rag_data unreadable")):
+            with self.assertRaises(OSError):
+                retrieval_query.get_index()
+        with self.assertRaises(OSError):
+            retrieval_query.get_index()  # cached within the retry window
+        retrieval_query.embedder_recovered()
+        self.assertGreater(retrieval_query.get_index().size, 0)
+
+
+
+class TestProcessDefault(unittest.TestCase):
+    def test_create_once_replace_stale_and_stop(self) -> None:
+        stopped: list[str] = []
+        holder: ProcessDefault[str] = ProcessDefault(stopped.append)
+        self.assertIsNone(holder.get())
+        self.assertEqual(holder.start(lambda: "a"), "a")
+        self.assertEqual(holder.start(lambda: "b"), "a")
+        self.assertEqual(holder.start(lambda: "c", stale=lambda old: old == "a"), "c")
+        self.assertEqual(stopped, ["a"])
+        holder.stop()
+        holder.stop()
+        self.assertEqual((stopped, holder.get()), (["a", "c"], None))
+        self.assertIsNone(holder.start(lambda: None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,20 @@
 from __future__ import annotations
 
 import json
+import os
+import tempfile
+import threading
+import time
 import unittest
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import patch
 
+from tools import reminder_queue, scheduler, sysmetrics, telemetry
+from tools._cmd import CmdOutput
 from tools.gsettings import _build_titlebar_layout
+from tools.reminder_queue import InProcessReminders
+from tools.reminders import ReminderBatch, SystemdReminders
 from tools.registry import TOOLS, get_tool, tools_prompt_catalog_json
 from tools.scheduler import (
     _build_vevent_ics_document,
@@ -103,6 +112,177 @@ class TestRunner(unittest.TestCase):
             self.assertTrue(str(r.data.get("path", "")).startswith(home))
 
 
+def _proc_stat(pid: int, name: str, cpu_ticks: int, rss_pages: int = 256) -> str:
+    """A /proc/<pid>/stat line: utime=cpu_ticks, stime=0, starttime=1000."""
+    fields = ["S"] + ["0"] * 10 + [str(cpu_ticks), "0"] + ["0"] * 6 + ["1000", "0", str(rss_pages)]
+    return f"{pid} ({name}) {' '.join(fields)} 0 0\n"
+
+
+class FakeProcTestCase(unittest.TestCase):
+    """Points tools.sysmetrics at a fake /proc and /sys tree."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        proc, sys_ = self.root / "proc", self.root / "sys"
+        files = {
+            proc / "uptime": "93784.52 180000.00\n",
+            proc / "loadavg": "0.52 0.48 0.40 2/811 12345\n",
+            proc / "stat": "cpu  1000 0 0 9000 0 0 0 0 0 0\ncpu0 1000 0 0 9000 0 0 0 0 0 0\n",
+            proc / "meminfo": "MemTotal: 8000000 kB\nMemFree: 1000000 kB\nMemAvailable: 6000000 kB\n",
+            proc / "101" / "stat": _proc_stat(101, "Web Content", 0),
+            proc / "net" / "route": (
+                "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+                "wlan0\t00000000\t0101A8C0\t0003\t0\t0\t600\t00000000\t0\t0\t0\n"
+                "eth0\t00000000\t0100000A\t0003\t0\t0\t100\t00000000\t0\t0\t0\n"
+                "eth0\t0000000A\t00000000\t0001\t0\t0\t100\t00FFFFFF\t0\t0\t0\n"
+            ),
+            proc / "net" / "if_inet6": "fe800000000000000000000000000001 03 40 20 80 eth0\n",
+            proc / "self" / "mounts": (
+                f"/dev/sda1 {self.root.as_posix()} ext4 rw 0 0\n"
+                "/dev/sdb1 /media/My\\040Disk ext4 rw 0 0\n"
+                "tmpfs /run tmpfs rw 0 0\n"
+                "server:/export /mnt/nfs nfs4 rw 0 0\n"
+            ),
+            sys_ / "class" / "thermal" / "thermal_zone0" / "temp": "47500\n",
+            sys_ / "class" / "net" / "eth0" / "operstate": "up\n",
+            sys_ / "class" / "net" / "eth0" / "speed": "1000\n",
+            sys_ / "class" / "net" / "eth0" / "mtu": "1500\n",
+            sys_ / "class" / "net" / "wlan0" / "operstate": "down\n",
+            sys_ / "class" / "net" / "wlan0" / "speed": "-1\n",
+        }
+        for path, text in files.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+        (sys_ / "class" / "net" / "wlan0" / "wireless").mkdir()
+        self.proc = proc
+        for name, value in (("_PROC_ROOT", proc), ("_SYS_ROOT", sys_), ("CLOCK_TICKS", 100)):
+            p = patch.object(sysmetrics, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+
+class TestSysmetrics(FakeProcTestCase):
+    """/proc and /sys readers against a fake tree; the tools must not fork."""
+
+    def test_uptime_load_and_temperature(self) -> None:
+        self.assertEqual(sysmetrics.uptime_seconds(), 93784.52)
+        self.assertEqual(sysmetrics.format_uptime(93784.52), "up 1 day, 2 hours, 3 minutes")
+        self.assertEqual(sysmetrics.load_average(), sysmetrics.LoadAverage(0.52, 0.48, 0.40, 2, 811))
+        self.assertEqual(sysmetrics.cpu_temperature(), 47.5)
+
+    def test_disk_usage_skips_virtual_and_remote_mounts(self) -> None:
+        self.assertIn(("/dev/sdb1", "/media/My Disk", "ext4"), sysmetrics.mounts())
+        disks = sysmetrics.disk_usage()  # /media/My Disk does not exist: skipped
+        self.assertEqual([(d.device, d.mountpoint) for d in disks], [("/dev/sda1", self.root.as_posix())])
+        st = os.statvfs(self.root)
+        self.assertEqual(disks[0].avail_bytes, st.f_bavail * st.f_frsize)
+        self.assertEqual(sysmetrics.format_bytes(1536), "1.5K")
+        self.assertEqual(sysmetrics.format_bytes(250 * 2**30), "250G")
+
+    def test_default_route_and_interfaces(self) -> None:
+        self.assertEqual(sysmetrics.default_route(), sysmetrics.DefaultRoute("eth0", "10.0.0.1"))
+        by_name = {i.name: i for i in sysmetrics.network_interfaces()}
+        self.assertEqual((by_name["eth0"].state, by_name["eth0"].speed_mbps), ("up", 1000))
+        self.assertEqual(by_name["eth0"].ipv6, ("fe80::1/64",))
+        self.assertEqual((by_name["wlan0"].wireless, by_name["wlan0"].speed_mbps), (True, None))
+
+    def test_tools_answer_without_subprocesses(self) -> None:
+        with patch("tools._cmd.subprocess.run", side_effect=AssertionError("forked")):
+            info = run_tool("system_info", {})
+            disk = run_tool("disk_space", {})
+            net = run_tool("network_info", {})
+        self.assertEqual(info.data["load_average"], {"1m": 0.52, "5m": 0.48, "15m": 0.40})
+        self.assertEqual(info.data["uptime_s"], 93785)
+        self.assertEqual(disk.data["filesystems"][0]["device"], "/dev/sda1")
+        self.assertEqual((net.data["default_interface"], net.data["link_speed_mbps"]), ("eth0", 1000))
+
+
+    def test_cpu_memory_and_process_readers(self) -> None:
+        self.assertEqual(sysmetrics.cpu_times(), sysmetrics.CpuTimes(busy=1000, total=10000))
+        mem = sysmetrics.memory_info()
+        self.assertEqual((mem.total_bytes, mem.used_percent), (8000000 * 1024, 25.0))
+        (proc,) = sysmetrics.process_stats()
+        self.assertEqual((proc.pid, proc.name, proc.cpu_ticks, proc.start_ticks), (101, "Web Content", 0, 1000))
+
+
+class TestTelemetry(FakeProcTestCase):
+    """Ring-buffer sampler: interval CPU %, trends over a window, tool answers."""
+
+    def _advance(self, now: list[float], busy: int, procs: dict[int, tuple[str, int]]) -> None:
+        now[0] += 5.0
+        total = 10000 + int(now[0] - 1000) * 200
+        (self.proc / "stat").write_text(f"cpu  {busy} 0 0 {total - busy} 0 0 0 0 0 0\n")
+        for pid, (name, ticks) in procs.items():
+            (self.proc / str(pid)).mkdir(exist_ok=True)
+            (self.proc / str(pid) / "stat").write_text(_proc_stat(pid, name, ticks))
+
+    def _sampled(self) -> telemetry.TelemetrySampler:
+        now = [1000.0]
+        sampler = telemetry.TelemetrySampler(5.0, 600.0, clock=lambda: now[0])
+        self.assertIsNone(sampler.sample())  # primes the counters
+        self._advance(now, 1500, {101: ("Web Content", 250)})  # 0.5 core for 5 s
+        first = sampler.sample()
+        self._advance(now, 2500, {101: ("Web Content", 250), 202: ("make", 500)})  # new, 1 core
+        sampler.sample()
+        self.assertEqual(first.cpu_percent, 50.0)
+        return sampler
+
+    def test_interval_usage_and_window_ranking(self) -> None:
+        sampler = self._sampled()
+        self.assertEqual(
+            [(p.name, p.cpu_percent) for p in sampler.latest_processes()],
+            [("make", 100.0), ("Web Content", 0.0)],
+        )
+        top = sampler.top_processes(600.0, by="cpu")
+        self.assertEqual([(r["name"], r["cpu_s"], r["cpu_avg"], r["cpu_max"]) for r in top], [
+            ("make", 5.0, 50.0, 100.0),
+            ("Web Content", 2.5, 25.0, 50.0),
+        ])
+        summary = sampler.summary(600.0)
+        self.assertEqual((summary["samples"], summary["cpu_percent"]), (2, {"avg": 75.0, "max": 100.0}))
+        self.assertEqual([(r["name"], r["cpu_avg"]) for r in sampler.top_processes(4.0)], [("make", 100.0)])
+
+    def test_ring_buffer_is_bounded(self) -> None:
+        now = [1000.0]
+        sampler = telemetry.TelemetrySampler(5.0, 10.0, clock=lambda: now[0])
+        for _ in range(6):
+            sampler.sample()
+            now[0] += 5.0
+        self.assertEqual(len(sampler.history(3600.0)), 3)
+
+    def test_tools_answer_from_the_sampler(self) -> None:
+        disabled = run_tool("usage_history", {})
+        self.assertEqual(disabled.error_code, "TELEMETRY_DISABLED")
+        with patch.object(telemetry._default, "_instance", self._sampled()), patch(
+            "tools._cmd.subprocess.run", side_effect=AssertionError("forked")
+        ):
+            history = run_tool("usage_history", {"window_minutes": 10})
+            high = run_tool("process_high_usage", {})
+            listed = run_tool("process_list", {"limit": 1})
+        self.assertEqual(history.data["processes"][0]["name"], "make")
+        self.assertEqual(history.data["system"]["samples"], 2)
+        self.assertIn("Only 0.2 min of history", history.data["notes"])
+        self.assertEqual([m["comm"] for m in high.data["matches"]], ["make"])
+        self.assertEqual(listed.data["processes"], ["202 make 100.0 0.0"])
+        self.assertEqual((listed.data["total"], listed.data["capped"]), (2, True))
+        self.assertIn("Top 1 of 2", listed.message)
+
+    def test_process_list_sees_past_the_ring_buffer_top_k(self) -> None:
+        now = [1000.0]
+        sampler = telemetry.TelemetrySampler(5.0, 600.0, top_k=1, clock=lambda: now[0])
+        procs = {101: ("Web Content", 0), 202: ("make", 0), 303: ("sshd", 0)}
+        self._advance(now, 1000, procs)
+        sampler.sample()
+        self._advance(now, 2000, {**procs, 101: ("Web Content", 250), 202: ("make", 500)})
+        sampler.sample()
+        self.assertLess(len(sampler._processes[-1].processes), 3)  # the ring keeps the top 1 of each
+        with patch.object(telemetry._default, "_instance", sampler):
+            listed = run_tool("process_list", {"limit": 10})
+        self.assertEqual([ln.split()[0] for ln in listed.data["processes"]], ["202", "101", "303"])
+        self.assertEqual((listed.data["total"], listed.data["capped"]), (3, False))
+
 class TestGnomeCalendarIcs(unittest.TestCase):
     def test_ics_escape_commas_and_newlines(self) -> None:
         self.assertEqual(_ics_text_escape("a, b"), "a\\, b")
@@ -153,6 +333,204 @@ class TestReminderToolSpecs(unittest.TestCase):
         self.assertEqual(names, ["message", "start", "unit_id"])
 
 
+class TestReminderEngine(unittest.TestCase):
+    """Template-unit reminders: batched transactions with one daemon-reload."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data, self.units = Path(tmp.name) / "data", Path(tmp.name) / "units"
+        self.calls: list[list[str]] = []
+        self.fail_on: str | None = None
+        self.engine = SystemdReminders(self.data, self.units, run=self._run)
+
+    def _run(self, argv, **_kw):
+        self.calls.append(list(argv))
+        code = 1 if self.fail_on and self.fail_on in argv else 0
+        return CmdOutput(code, "", "boom" if code else "")
+
+    def _verbs(self) -> list[str]:
+        return [c[2] for c in self.calls]
+
+    def test_batch_uses_one_reload_and_template_instances(self) -> None:
+        self.units.mkdir(parents=True)
+        (self.units / "meera-reminder-1.timer").write_text("[Timer]\n")  # made by an older version
+        (self.units / "meera-reminder-1.service").write_text("[Service]\n")
+        batch = ReminderBatch()
+        for i in range(3):
+            batch.add(f"stretch #{i}", f"2030-01-01 09:0{i}:00")
+        batch.add("dentist", "2030-01-02 10:00:00", unit_id="dentist")
+        batch.delete("meera-reminder-1")
+        batch.delete("meera-reminder-99")
+        result = self.engine.commit(batch)
+
+        self.assertTrue(result.ok, result.message)
+        self.assertEqual(self._verbs(), ["disable", "daemon-reload", "enable"])
+        self.assertEqual(self.calls[0][-1], "meera-reminder-1.timer")
+        self.assertEqual(self.calls[2][3:], [
+            "--now", "meera-reminder@2.timer", "meera-reminder@3.timer", "meera-reminder@4.timer",
+            "meera-reminder@dentist.timer",
+        ])
+        self.assertEqual(result.data["deleted"], ["meera-reminder-1"])
+        self.assertEqual(result.data["not_found"], ["meera-reminder-99"])
+        self.assertFalse((self.units / "meera-reminder-1.timer").exists())
+        self.assertTrue((self.units / "meera-reminder@.timer").is_file())
+        self.assertIn(
+            "OnCalendar=2030-01-01 09:01:00",
+            (self.units / "meera-reminder@3.timer.d" / "calendar.conf").read_text(),
+        )
+        pending = self.engine.pending()
+        self.assertEqual([r["unit_id"] for r in pending], [
+            "meera-reminder-2", "meera-reminder-3", "meera-reminder-4", "dentist",
+        ])
+        self.assertEqual(pending[0]["message"], "stretch #0")
+
+    def test_failed_enable_rolls_back_new_reminders(self) -> None:
+        self.fail_on = "enable"
+        batch = ReminderBatch()
+        batch.add("water", "2030-01-01 09:00:00")
+        result = self.engine.commit(batch)
+        self.assertEqual(result.error_code, "COMMAND_FAILED")
+        self.assertEqual(self.engine.pending(), [])
+        self.assertEqual(self._verbs(), ["daemon-reload", "enable", "daemon-reload"])
+
+    def test_existing_id_is_rejected(self) -> None:
+        batch = ReminderBatch()
+        batch.add("a", "2030-01-01 09:00:00", unit_id="walk")
+        self.assertTrue(self.engine.commit(batch).ok)
+        again = self.engine.commit(batch)
+        self.assertEqual(again.error_code, "ALREADY_EXISTS")
+
+    def test_id_allocation_is_atomic_across_threads(self) -> None:
+        ids: list[str] = []
+
+        def grab() -> None:
+            for _ in range(5):
+                ids.extend(SystemdReminders(self.data, self.units, run=self._run).allocate_ids(2))
+
+        threads = [threading.Thread(target=grab) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(ids), 80)
+        self.assertEqual(len(set(ids)), 80)
+        self.assertEqual((self.data / "counter").read_text(), "80")
+
+    def test_delete_tool_removes_several_reminders_at_once(self) -> None:
+        batch = ReminderBatch()
+        batch.add("a", "2030-01-01 09:00:00")
+        batch.add("b", "2030-01-01 10:00:00")
+        self.engine.commit(batch)
+        self.calls.clear()
+        with patch.object(scheduler, "_reminders", self.engine):
+            result = run_tool("reminder_delete", {"unit_id": "meera-reminder-1, meera-reminder-2"})
+            missing = run_tool("reminder_delete", {"unit_id": "meera-reminder-7"})
+        self.assertEqual(result.data["deleted"], ["meera-reminder-1", "meera-reminder-2"])
+        self.assertEqual(self._verbs(), ["disable", "daemon-reload"])
+        self.assertEqual(missing.error_code, "NOT_FOUND")
+
+
+class TestReminderQueue(unittest.TestCase):
+    """In-process reminder backend: persistent heap, firing without systemd."""
+
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "queue.jsonl"
+        self.now = datetime(2030, 1, 1, 9, 0, 0).timestamp()
+        self.sent: list[tuple[str, str]] = []
+        self.queue = self._open()
+
+    def _open(self) -> InProcessReminders:
+        return InProcessReminders(self.path, notify=lambda t, b: self.sent.append((t, b)), clock=lambda: self.now)
+
+    def _add(self, *items: tuple[str, str]) -> ToolResult:
+        batch = ReminderBatch()
+        for message, calendar in items:
+            batch.add(message, calendar)
+        return self.queue.commit(batch)
+
+    def test_pending_is_soonest_first_and_survives_reload(self) -> None:
+        result = self._add(("late", "2030-01-01 12:00:00"), ("early", "2030-01-01 09:30:00"))
+        self.assertTrue(result.ok, result.message)
+        self.assertEqual([a["unit_id"] for a in result.data["added"]], ["meera-reminder-1", "meera-reminder-2"])
+        batch = ReminderBatch()
+        batch.delete("meera-reminder-1")
+        batch.delete("meera-reminder-9")
+        deleted = self.queue.commit(batch)
+        self.assertEqual((deleted.data["deleted"], deleted.data["not_found"]), (["meera-reminder-1"], ["meera-reminder-9"]))
+
+        reloaded = self._open()
+        self.assertEqual(reloaded.pending(), [
+            {"unit_id": "meera-reminder-2", "message": "early", "target_time": "2030-01-01 09:30:00"},
+        ])
+        self.queue = reloaded
+        self.assertEqual(self._add(("next", "2030-01-02 08:00:00")).data["added"][0]["unit_id"], "meera-reminder-3")
+
+    def test_fire_due_notifies_in_order_and_skips_deleted(self) -> None:
+        self._add(("b", "2030-01-01 09:02:00"), ("a", "2030-01-01 09:01:00"), ("gone", "2030-01-01 09:00:30"))
+        batch = ReminderBatch()
+        batch.delete("meera-reminder-3")
+        self.queue.commit(batch)
+        self.assertEqual(self.queue.fire_due(), [])
+        self.now += 120
+        self.assertEqual([r.message for r in self.queue.fire_due()], ["a", "b"])
+        self.assertEqual(self.sent, [("Meera Reminder", "a"), ("Meera Reminder", "b")])
+        self.assertEqual(self._open().pending(), [])
+
+    def test_overdue_reminder_fires_on_start_with_its_time(self) -> None:
+        self._add(("call mum", "2030-01-01 09:05:00"))
+        self.now += 3600  # Meera was closed
+        queue = self._open()
+        queue.start()
+        self.addCleanup(queue.stop)
+        deadline = time.monotonic() + 5
+        while not self.sent and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.sent, [("Meera Reminder", "call mum (due 2030-01-01 09:05:00)")])
+
+    def test_journal_is_compacted(self) -> None:
+        for i in range(40):
+            self._add((f"r{i}", "2030-01-02 09:00:00"))
+            batch = ReminderBatch()
+            batch.delete(f"meera-reminder-{i + 1}")
+            self.queue.commit(batch)
+        self.assertLess(len(self.path.read_text().splitlines()), 40)
+        self.assertEqual(self._open().pending(), [])
+        self.assertEqual(self._add(("x", "2030-01-02 09:00:00")).data["added"][0]["unit_id"], "meera-reminder-41")
+
+    def test_notifications_go_through_the_app_with_notify_send_fallback(self) -> None:
+        posted: list[tuple[str, str]] = []
+
+        def broken(_title: str, _body: str) -> None:
+            raise RuntimeError("no application")
+
+        self.addCleanup(reminder_queue.set_app_notifier, None)
+        with patch.object(reminder_queue, "notify_send") as fallback:
+            reminder_queue.set_app_notifier(lambda t, b: posted.append((t, b)))
+            reminder_queue.notify_desktop("Meera Reminder", "tea")
+            fallback.assert_not_called()
+            reminder_queue.set_app_notifier(broken)
+            with patch("builtins.print"):
+                reminder_queue.notify_desktop("Meera Reminder", "stretch")
+            reminder_queue.set_app_notifier(None)
+            reminder_queue.notify_desktop("Meera Reminder", "water")
+        self.assertEqual(posted, [("Meera Reminder", "tea")])
+        self.assertEqual([c.args[1] for c in fallback.call_args_list], ["stretch", "water"])
+
+    def test_tools_use_the_queue_when_selected(self) -> None:
+        with patch.dict(os.environ, {"MEERA_REMINDER_BACKEND": "meera"}), \
+                patch.object(reminder_queue._default, "_instance", self.queue):
+            created = run_tool("reminder_set_time", {"message": "tea", "start": "2030-01-01T10:00:00"})
+            listed = run_tool("reminder_list", {})
+            bad = run_tool("reminder_delete", {"unit_id": "meera-reminder-5"})
+        self.assertTrue(created.ok, created.message)
+        self.assertEqual(created.data["unit_id"], "meera-reminder-1")
+        self.assertEqual([r["message"] for r in listed.data["reminders"]], ["tea"])
+        self.assertEqual(bad.error_code, "NOT_FOUND")
+
+
 class TestGnomeTitlebarLayout(unittest.TestCase):
     """Parsing for gnome_titlebar_button_layout_set (no gsettings I/O)."""
 
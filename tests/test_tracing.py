@@ -0,0 +1,144 @@
+"""Tests for per-turn latency tracing.
+
+Covers:
+- span() is a no-op outside a turn and records inside one.
+- traced_stream records ttft + generation around a streaming iterator.
+- run_tool records a run_tool span with the tool name and ok flag.
+- Concurrent asyncio tasks on one loop each record into their own turn.
+- end_turn writes one JSONL record; the log rotates by size.
+- stage_stats aggregates per-stage p50/p95 across turns.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import tracing
+from tools.runner import run_tool
+
+
+class TracingTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        env = patch.dict(os.environ, {"MEERA_LOG_DIR": self._tmp.name, "MEERA_TRACE": "1"})
+        env.start()
+        self.addCleanup(env.stop)
+        self.addCleanup(tracing.detach_turn)
+
+
+class TestSpans(TracingTestCase):
+    def test_span_without_turn_is_noop(self) -> None:
+        tracing.detach_turn()
+        with tracing.span("x") as attrs:
+            attrs["k"] = 1
+        self.assertIsNone(tracing.current_turn())
+
+    def test_spans_and_stream_recorded(self) -> None:
+        trace = tracing.begin_turn(source="test")
+        with tracing.span("prompt_assembly"):
+            pass
+        out = list(tracing.traced_stream(iter(["a", "b"]), tools=2))
+        self.assertEqual(out, ["a", "b"])
+        trace.accumulate("ui_render", 0.002)
+        trace.accumulate("ui_render", 0.003)
+        names = [s["name"] for s in trace.spans]
+        self.assertEqual(names, ["prompt_assembly", "ttft", "generation"])
+        self.assertEqual(trace.spans[1]["tools"], 2)
+        self.assertEqual(trace.totals["ui_render"]["count"], 2)
+        self.assertAlmostEqual(trace.totals["ui_render"]["total_ms"], 5.0, places=2)
+
+    def test_run_tool_span(self) -> None:
+        trace = tracing.begin_turn()
+        run_tool("not_a_real_tool", {})
+        self.assertEqual(trace.spans[-1]["name"], "run_tool")
+        self.assertEqual(trace.spans[-1]["tool"], "not_a_real_tool")
+        self.assertFalse(trace.spans[-1]["ok"])
+
+    def test_tasks_on_one_loop_keep_their_own_turn(self) -> None:
+        async def turn(name: str) -> tracing.TurnTrace:
+            trace = tracing.begin_turn(source=name)
+            await asyncio.sleep(0)  # let the other task begin its turn
+            with tracing.span(name):
+                await asyncio.sleep(0)
+            return trace
+
+        async def main() -> list[tracing.TurnTrace]:
+            return await asyncio.gather(turn("a"), turn("b"))
+
+        first, second = asyncio.run(main())
+        self.assertEqual([s["name"] for s in first.spans], ["a"])
+        self.assertEqual([s["name"] for s in second.spans], ["b"])
+        self.assertIsNone(tracing.current_turn())
+
+
+class TestLog(TracingTestCase):
+    def test_end_turn_writes_record_once(self) -> None:
+        trace = tracing.begin_turn(source="test")
+        with tracing.span("fastpath_match"):
+            pass
+        tracing.end_turn(trace, plan="fastpath")
+        tracing.end_turn(trace)
+        self.assertIsNone(tracing.current_turn())
+        with open(tracing.trace_log_path(), encoding="utf-8") as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 1)
+        rec = json.loads(lines[0])
+        self.assertEqual(rec["plan"], "fastpath")
+        self.assertEqual(rec["spans"][0]["name"], "fastpath_match")
+        self.assertGreaterEqual(rec["total_ms"], 0.0)
+
+    def test_disabled_does_not_write(self) -> None:
+        with patch.dict(os.environ, {"MEERA_TRACE": "0"}):
+            tracing.end_turn(tracing.begin_turn())
+        self.assertFalse(tracing.trace_log_path().exists())
+
+    def test_rotation_keeps_recent_records_readable(self) -> None:
+        with patch.dict(os.environ, {"MEERA_TRACE_MAX_BYTES": "10000"}):
+            for i in range(120):
+                tracing.write_record({"turn_id": str(i), "total_ms": float(i), "pad": "x" * 200})
+        self.assertTrue(tracing.trace_log_path().with_name("turns.jsonl.1").exists())
+        self.assertLess(tracing.trace_log_path().stat().st_size, 10000)
+        records = tracing.read_records(5)
+        self.assertEqual([r["turn_id"] for r in records], ["115", "116", "117", "118", "119"])
+
+
+class TestStats(unittest.TestCase):
+    def test_percentile_nearest_rank(self) -> None:
+        vals = [float(v) for v in range(1, 101)]
+        self.assertEqual(tracing.percentile(vals, 50), 50.0)
+        self.assertEqual(tracing.percentile(vals, 95), 95.0)
+        self.assertEqual(tracing.percentile([], 50), 0.0)
+
+    def test_stage_stats_sums_per_turn(self) -> None:
+        records = [
+            {"total_ms": 100.0, "spans": [{"name": "run_tool", "dur_ms": 10.0}, {"name": "run_tool", "dur_ms": 5.0}]},
+            {"total_ms": 200.0, "spans": [{"name": "run_tool", "dur_ms": 30.0}], "totals": {"ui_render": {"count": 3, "total_ms": 4.0}}},
+        ]
+        stats = tracing.stage_stats(records)
+        self.assertEqual(stats["run_tool"]["count"], 2)
+        self.assertEqual(stats["run_tool"]["p50_ms"], 15.0)
+        self.assertEqual(stats["run_tool"]["max_ms"], 30.0)
+        self.assertEqual(stats["turn_total"]["p95_ms"], 200.0)
+        self.assertEqual(stats["ui_render"]["count"], 1)
+
+    def test_usage_stats_skips_turns_without_usage(self) -> None:
+        records = [
+            {"usage": {"prompt_tokens": 900, "cached_tokens": 800, "completion_tokens": 20,
+                       "prompt_ms": 40.0, "prefill_ms": {"rag": 0.0, "turn": 40.0}}},
+            {"usage": {"prompt_tokens": 1500, "cached_tokens": 0, "completion_tokens": 60,
+                       "prompt_ms": 300.0, "prefill_ms": {"rag": 120.0, "turn": 20.0}}},
+            {"plan": "fastpath"},
+        ]
+        stats = tracing.usage_stats(records)
+        self.assertEqual(stats["prompt_tokens"]["count"], 2)
+        self.assertEqual(stats["cached_tokens"]["max"], 800.0)
+        self.assertEqual(stats["prefill_ms.rag"]["p95"], 120.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
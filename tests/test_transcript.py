@@ -0,0 +1,99 @@
+"""Tests for the virtualized chat transcript.
+
+Covers:
+- A bound row renders its item once, re-renders on every `notify::text`,
+  and stops following the item after unbind (rows are recycled).
+- Rebinding a row to another item drops the previous item's handler.
+- With gi installed: TranscriptItem.text updates emit `notify::text`, and a
+  RowBinding follows a real TranscriptItem.
+
+The binding is gi-free; a small notifying object stands in for
+TranscriptItem when GObject is not available.
+"""
+from __future__ import annotations
+
+import importlib.util
+import unittest
+from typing import Any
+
+from ui.row_binding import RowBinding
+
+_HAVE_GI = importlib.util.find_spec("gi") is not None
+
+
+class _FakeItem:
+    """The slice of TranscriptItem a row uses: `text` plus notify::text handlers."""
+
+    def __init__(self, text: str = "") -> None:
+        self._text = text
+        self._handlers: dict[int, Any] = {}
+        self._next_id = 1
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._text = value
+        for handler in list(self._handlers.values()):
+            handler(self, None)
+
+    def connect(self, signal: str, handler: Any) -> int:
+        assert signal == "notify::text"
+        handler_id, self._next_id = self._next_id, self._next_id + 1
+        self._handlers[handler_id] = handler
+        return handler_id
+
+    def disconnect(self, handler_id: int) -> None:
+        del self._handlers[handler_id]
+
+
+class TestRowBinding(unittest.TestCase):
+    def test_rerenders_on_text_change_until_unbound(self) -> None:
+        rendered: list[str] = []
+        row = RowBinding(lambda item: rendered.append(item.text))
+        item = _FakeItem("Meera: ")
+        row.bind(item)
+        item.text = "Meera: Hel"
+        item.text = "Meera: Hello"
+        self.assertEqual(rendered, ["Meera: ", "Meera: Hel", "Meera: Hello"])
+        row.unbind()
+        item.text = "Meera: Hello!"
+        self.assertEqual(len(rendered), 3)
+        self.assertIsNone(row.item)
+
+    def test_rebind_drops_previous_item(self) -> None:
+        rendered: list[str] = []
+        row = RowBinding(lambda item: rendered.append(item.text))
+        first, second = _FakeItem("one"), _FakeItem("two")
+        row.bind(first)
+        row.bind(second)
+        first.text = "one, edited"
+        second.text = "two, edited"
+        self.assertEqual(rendered, ["one", "two", "two, edited"])
+        self.assertEqual(first._handlers, {})
+
+    def test_unbind_without_item_is_noop(self) -> None:
+        RowBinding(lambda _item: None).unbind()
+
+
+@unittest.skipUnless(_HAVE_GI, "PyGObject (gi) is not installed")
+class TestTranscriptItem(unittest.TestCase):
+    def test_text_update_notifies_bound_row(self) -> None:
+        from ui.transcript import KIND_MESSAGE, TranscriptItem
+
+        item = TranscriptItem(sender="Meera")
+        self.assertEqual((item.sender, item.text, item.kind), ("Meera", "", KIND_MESSAGE))
+        rendered: list[str] = []
+        row = RowBinding(lambda it: rendered.append(it.text))
+        row.bind(item)
+        item.text = "Hello"
+        item.set_property("text", "Hello there")
+        row.unbind()
+        item.text = "ignored"
+        self.assertEqual(rendered, ["", "Hello", "Hello there"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from tools.platform import DistroUnknownError, detect_distro
 from tools.registry import TOOLS, get_tool, tools_prompt_catalog_json
-from tools.runner import run_tool
+from tools.runner import arun_tool, run_tool
 from tools.schema import (
     ToolParam,
     ToolResult,
@@ -18,6 +18,7 @@ __all__ = [
     "ToolParam",
     "ToolResult",
     "ToolSpec",
+    "arun_tool",
     "detect_distro",
     "get_tool",
     "run_tool",
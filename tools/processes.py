@@ -1,18 +1,58 @@
 """Process tools."""
 from __future__ import annotations
 
+import time
 from collections.abc import Mapping
 from typing import Any
 
+from tools import sysmetrics, telemetry
 from tools._cmd import run_argv
 from tools.schema import ToolParam, ToolResult, ToolSpec, tool_result_err, tool_result_ok
 
 
+def _sampled_processes() -> tuple[list[dict[str, Any]], float] | None:
+    """Every process of the telemetry sampler's last interval, busiest first, and its age in s.
+
+    None when the sampler is off or has no sample yet (callers then run ps).
+    """
+    sampler = telemetry.get_default()
+    latest = sampler.latest() if sampler is not None else None
+    if latest is None:
+        return None
+    mem = sysmetrics.memory_info()
+    total = mem.total_bytes if mem is not None and mem.total_bytes else 0
+    rows = [
+        {
+            "pid": p.pid,
+            "comm": p.name,
+            "cpu": p.cpu_percent,
+            "mem": round(100.0 * p.rss_bytes / total, 1) if total else 0.0,
+        }
+        for p in sampler.latest_processes()
+    ]
+    return rows, max(0.0, time.time() - latest.t)
+
+
+def _listed(shown: int, total: int) -> str:
+    if shown < total:
+        return f"Top {shown} of {total} processes by CPU (capped at the limit)"
+    return f"Top {shown} processes by CPU"
+
+
 def _process_list(params: Mapping[str, Any]) -> ToolResult:
     _ = params["distro"]
     limit = int(params.get("limit") or 25)
     limit = max(1, min(limit, 100))
 
+    sampled = _sampled_processes()
+    if sampled is not None:
+        rows, age = sampled
+        lines = [f"{r['pid']} {r['comm']} {r['cpu']} {r['mem']}" for r in rows[:limit]]
+        return tool_result_ok(
+            f"{_listed(len(lines), len(rows))} (sampled {age:.0f}s ago)",
+            data={"processes": lines, "total": len(rows), "capped": len(rows) > limit, "source": "telemetry"},
+        )
+
     r = run_argv(
         [
             "ps",
@@ -25,10 +65,11 @@ def _process_list(params: Mapping[str, Any]) -> ToolResult:
     )
     if isinstance(r, ToolResult):
         return r
-    lines = [ln.strip() for ln in r.stdout.splitlines() if ln.strip()][:limit]
+    rows = [ln.strip() for ln in r.stdout.splitlines() if ln.strip()]
+    lines = rows[:limit]
     return tool_result_ok(
-        f"Top {len(lines)} processes by CPU",
-        data={"processes": lines},
+        _listed(len(lines), len(rows)),
+        data={"processes": lines, "total": len(rows), "capped": len(rows) > limit},
     )
 
 
@@ -77,6 +118,20 @@ def _process_high_usage(params: Mapping[str, Any]) -> ToolResult:
             "INVALID_PARAMETER",
         )
 
+    sampled = _sampled_processes()
+    if sampled is not None:
+        rows, _age = sampled
+        matches = [r for r in rows if r["cpu"] > cpu_threshold or r["mem"] > mem_threshold][:limit]
+        return tool_result_ok(
+            f"Found {len(matches)} processes exceeding thresholds (CPU>{cpu_threshold}%, MEM>{mem_threshold}%)",
+            data={
+                "matches": matches,
+                "cpu_threshold": cpu_threshold,
+                "mem_threshold": mem_threshold,
+                "source": "telemetry",
+            },
+        )
+
     r = run_argv(
         [
             "ps",
@@ -114,6 +169,59 @@ def _process_high_usage(params: Mapping[str, Any]) -> ToolResult:
     )
 
 
+def _usage_history(params: Mapping[str, Any]) -> ToolResult:
+    window_minutes = int(params.get("window_minutes") or 5)
+    sort_by = str(params.get("sort_by") or "cpu").lower()
+    limit = int(params.get("limit") or 5)
+
+    if not 1 <= window_minutes <= 24 * 60:
+        return tool_result_err(
+            f"window_minutes must be 1–1440, got {window_minutes}",
+            "INVALID_PARAMETER",
+        )
+    if sort_by not in ("cpu", "memory"):
+        return tool_result_err(
+            f"sort_by must be 'cpu' or 'memory', got {sort_by!r}",
+            "INVALID_PARAMETER",
+        )
+    if not 1 <= limit <= 50:
+        return tool_result_err(
+            f"limit must be 1–50, got {limit}",
+            "INVALID_PARAMETER",
+        )
+
+    sampler = telemetry.get_default()
+    if sampler is None:
+        return tool_result_err(
+            "Usage history is not being recorded; set MEERA_TELEMETRY=1 and restart Meera",
+            "TELEMETRY_DISABLED",
+        )
+    window_s = window_minutes * 60.0
+    summary = sampler.summary(window_s)
+    if summary is None:
+        return tool_result_ok(
+            "No usage samples recorded yet; try again in a few seconds",
+            data={"window_minutes": window_minutes, "samples": 0},
+        )
+    top = sampler.top_processes(window_s, by=sort_by, limit=limit)
+    for row in top:
+        row["rss_max"] = sysmetrics.format_bytes(row["rss_max_bytes"])
+    covered_min = summary["covered_s"] / 60.0
+    note = None
+    if covered_min < window_minutes - sampler.interval_s / 60.0:
+        note = f"Only {covered_min:.1f} min of history is available (Meera has not been sampling that long)"
+    return tool_result_ok(
+        f"Resource usage over the last {window_minutes} min, top {len(top)} processes by {sort_by}",
+        data={
+            "window_minutes": window_minutes,
+            "system": summary,
+            "processes": top,
+            "sort_by": sort_by,
+            "notes": note,
+        },
+    )
+
+
 def _process_check_running(params: Mapping[str, Any]) -> ToolResult:
     name = params["name"]
 
@@ -146,7 +254,7 @@ def _process_check_running(params: Mapping[str, Any]) -> ToolResult:
 TOOLS: list[ToolSpec] = [
     ToolSpec(
         name="process_list",
-        description="List top processes by CPU use (ps).",
+        description="List top processes by CPU use (from the usage sampler when enabled, else ps).",
         parameters=[
             ToolParam(
                 name="limit",
@@ -184,6 +292,7 @@ TOOLS: list[ToolSpec] = [
                 required=False,
                 description="Signal to send: SIGTERM or SIGKILL",
                 default="SIGTERM",
+                enum=("SIGTERM", "SIGKILL"),
             ),
         ],
         handler=_process_kill_by_name,
@@ -237,6 +346,48 @@ TOOLS: list[ToolSpec] = [
             "anything pegging the CPU",
         ],
     ),
+    ToolSpec(
+        name="usage_history",
+        description=(
+            "Resource usage trends from the background sampler: average/peak CPU, memory, load and "
+            "temperature over the last N minutes, and the processes that used the most CPU or memory."
+        ),
+        parameters=[
+            ToolParam(
+                name="window_minutes",
+                param_type="integer",
+                required=False,
+                description="How many minutes back to look (1-1440)",
+                default=5,
+            ),
+            ToolParam(
+                name="sort_by",
+                param_type="string",
+                required=False,
+                description="Rank processes by 'cpu' (CPU time in the window) or 'memory' (peak resident size)",
+                default="cpu",
+                enum=("cpu", "memory"),
+            ),
+            ToolParam(
+                name="limit",
+                param_type="integer",
+                required=False,
+                description="Max processes to return (1-50)",
+                default=5,
+            ),
+        ],
+        handler=_usage_history,
+        read_only=True,
+        exemplars=[
+            "what used the most CPU in the last 5 minutes",
+            "what has been eating my CPU lately",
+            "which app used the most memory in the last hour",
+            "how busy has my CPU been recently",
+            "was the system under load in the last 10 minutes",
+            "show CPU usage history",
+            "what slowed my computer down just now",
+        ],
+    ),
     ToolSpec(
         name="process_check_running",
         description="Check whether a process with a given name is currently running (pgrep -x).",
@@ -0,0 +1,321 @@
+"""In-process reminder backend: a persistent heap driven by one thread.
+
+Selected with MEERA_REMINDER_BACKEND=meera (the default, "systemd", keeps
+using tools/reminders.py). Reminders live in memory as a heap of due times
+plus an id -> reminder map, so adding and deleting are O(log n) and
+listing never runs a subprocess. A daemon thread sleeps until the earliest
+due time (or until the heap changes) and posts the notification itself:
+through the app as a Gio.Notification once the window has registered with
+`set_app_notifier`, and through `notify-send` otherwise.
+
+State survives restarts in an append-only journal
+(`~/.local/share/meera_reminders/queue.jsonl`). Each change appends one
+line, and the journal is compacted to the live reminders when it grows past
+twice their number. Reminders that fell due while Meera was not running
+fire when the queue starts, marked as late. Only a running Meera fires
+reminders; the app is single-instance, so one process owns the queue.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+from process_default import ProcessDefault
+from tools._cmd import run_argv
+from tools.reminders import DATA_DIR, ID_PREFIX, ReminderBatch, validate_id
+from tools.schema import ToolResult, tool_result_err, tool_result_ok
+
+QUEUE_FILENAME = "queue.jsonl"
+_CALENDAR_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+Notify = Callable[[str, str], None]
+
+
+def backend_from_env() -> str:
+    v = os.environ.get("MEERA_REMINDER_BACKEND", "systemd").strip().lower()
+    return "meera" if v in ("meera", "inprocess", "in-process") else "systemd"
+
+
+def notify_send(title: str, body: str) -> None:
+    """Fallback notifier: a desktop notification through notify-send."""
+    r = run_argv(["notify-send", title, body], timeout=10.0)
+    if isinstance(r, ToolResult) or r.returncode != 0:
+        detail = r.message if isinstance(r, ToolResult) else (r.stderr or r.stdout)
+        print(f"[reminders] notification failed: {detail}", file=sys.stderr, flush=True)
+
+
+_app_notifier: Notify | None = None
+
+
+def set_app_notifier(notify: Notify | None) -> None:
+    """Post notifications through the running app (the window registers Gio.Notification)."""
+    global _app_notifier
+    _app_notifier = notify
+
+
+def notify_desktop(title: str, body: str) -> None:
+    """Default notifier: through the app when it registered one, else notify-send."""
+    app_notify = _app_notifier
+    if app_notify is not None:
+        try:
+            app_notify(title, body)
+            return
+        except Exception as exc:  # fall back rather than lose the reminder
+            print(f"[reminders] app notification failed, using notify-send: {exc}", file=sys.stderr, flush=True)
+    notify_send(title, body)
+
+
+@dataclass(frozen=True, slots=True)
+class QueuedReminder:
+    unit_id: str
+    message: str
+    due: float  # epoch seconds
+    target_time: str  # local "YYYY-MM-DD HH:MM:SS", as scheduled
+
+
+class InProcessReminders:
+    """Reminder backend with the same commit()/pending() API as SystemdReminders."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        *,
+        notify: Notify = notify_desktop,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path or DATA_DIR / QUEUE_FILENAME
+        self._notify = notify
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._heap: list[tuple[float, str]] = []  # may hold deleted ids; skipped when popped
+        self._live: dict[str, QueuedReminder] = {}
+        self._counter = 0
+        self._journal_lines = 0
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._load()
+
+    # ---- persistence ---------------------------------------------------------
+
+    def _load(self) -> None:
+        try:
+            lines = self.path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                rec = json.loads(line)
+                op = rec["op"]
+                if op == "add":
+                    self._live[rec["unit_id"]] = QueuedReminder(
+                        rec["unit_id"], rec["message"], float(rec["due"]), rec["target_time"]
+                    )
+                elif op == "remove":
+                    self._live.pop(rec["unit_id"], None)
+                elif op == "counter":
+                    self._counter = max(self._counter, int(rec["value"]))
+            except (ValueError, KeyError, TypeError):
+                continue  # a torn last line from a crash mid-write
+            self._journal_lines += 1
+        for r in self._live.values():
+            self._counter = max(self._counter, _id_number(r.unit_id))
+        self._heap = [(r.due, r.unit_id) for r in self._live.values()]
+        heapq.heapify(self._heap)
+
+    def _append(self, records: list[dict]) -> None:
+        """Journal `records` (called with the lock held), compacting when stale."""
+        if self._journal_lines + len(records) > 2 * len(self._live) + 32:
+            self._compact()
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_lines += len(records)
+
+    def _compact(self) -> None:
+        records = [{"op": "counter", "value": self._counter}]
+        records += [{"op": "add", **asdict(r)} for r in self._live.values()]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self._journal_lines = len(records)
+
+    # ---- API -----------------------------------------------------------------
+
+    def commit(self, batch: ReminderBatch) -> ToolResult:
+        """Apply deletions then additions atomically; same result shape as systemd."""
+        parsed: list[tuple[str | None, str, float, str]] = []
+        for add in batch.adds:
+            if add.unit_id:
+                id_err = validate_id(add.unit_id)
+                if id_err is not None:
+                    return id_err
+            try:
+                due = datetime.strptime(add.calendar, _CALENDAR_FORMAT).timestamp()
+            except ValueError:
+                return tool_result_err(
+                    f"target time must look like 2026-05-05 00:30:00, got {add.calendar!r}",
+                    "VALIDATION_ERROR",
+                )
+            parsed.append((add.unit_id, add.message, due, add.calendar))
+
+        with self._cond:
+            deletes = list(dict.fromkeys(batch.deletes))
+            deleted = [u for u in deletes if u in self._live]
+            not_found = [u for u in deletes if u not in self._live]
+            explicit = [u for u, *_ in parsed if u]
+            taken = [u for u in explicit if (u in self._live and u not in deleted) or explicit.count(u) > 1]
+            if taken:
+                return tool_result_err(f"Timer {taken[0]} already exists", "ALREADY_EXISTS")
+
+            added: list[QueuedReminder] = []
+            records: list[dict] = [{"op": "remove", "unit_id": u} for u in deleted]
+            # Deleted entries stay in the heap and are skipped when they surface.
+            removed = [self._live.pop(u) for u in deleted]
+            for unit_id, message, due, target in parsed:
+                if unit_id is None:
+                    unit_id = self._next_id()
+                reminder = QueuedReminder(unit_id, message, due, target)
+                self._live[unit_id] = reminder
+                heapq.heappush(self._heap, (due, unit_id))
+                records.append({"op": "add", **asdict(reminder)})
+                added.append(reminder)
+            if records:
+                try:
+                    self._append(records)
+                except OSError as exc:
+                    for r in added:
+                        self._live.pop(r.unit_id, None)
+                    self._live.update((r.unit_id, r) for r in removed)
+                    return tool_result_err(f"Could not save reminders: {exc}", "OS_ERROR")
+                self._cond.notify_all()
+
+        parts = []
+        if added:
+            parts.append(f"Reminder set: {', '.join(r.unit_id for r in added)}")
+        if deleted:
+            parts.append(f"Reminder deleted: {', '.join(deleted)}")
+        if not_found:
+            parts.append(f"not found: {', '.join(not_found)}")
+        return tool_result_ok(
+            "; ".join(parts) or "Nothing to do",
+            data={
+                "added": [{"unit_id": r.unit_id, "target_time": r.target_time} for r in added],
+                "deleted": deleted,
+                "not_found": not_found,
+            },
+        )
+
+    def pending(self) -> list[dict[str, str]]:
+        """Reminders not fired yet, soonest first."""
+        with self._cond:
+            live = sorted(self._live.values(), key=lambda r: r.due)
+        return [{"unit_id": r.unit_id, "message": r.message, "target_time": r.target_time} for r in live]
+
+    def _next_id(self) -> str:
+        self._counter += 1
+        while f"{ID_PREFIX}{self._counter}" in self._live:
+            self._counter += 1
+        return f"{ID_PREFIX}{self._counter}"
+
+    # ---- firing --------------------------------------------------------------
+
+    def start(self) -> None:
+        """Fire due reminders on a daemon thread until stop()."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="meera-reminders", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopping = True
+            thread, self._thread = self._thread, None
+            self._cond.notify_all()
+        if thread is not None:
+            thread.join(timeout=5.0)
+
+    def fire_due(self) -> list[QueuedReminder]:
+        """Remove and notify every reminder that is due now; returns them."""
+        now = self._clock()
+        due: list[QueuedReminder] = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                _, unit_id = heapq.heappop(self._heap)
+                reminder = self._live.get(unit_id)
+                if reminder is not None and reminder.due <= now:
+                    del self._live[unit_id]
+                    due.append(reminder)
+            if due:
+                try:
+                    self._append([{"op": "remove", "unit_id": r.unit_id} for r in due])
+                except OSError as exc:  # fire anyway; they may fire again after a restart
+                    print(f"[reminders] could not save queue: {exc}", file=sys.stderr, flush=True)
+        for reminder in due:
+            late = now - reminder.due > 60
+            body = f"{reminder.message} (due {reminder.target_time})" if late else reminder.message
+            try:
+                self._notify("Meera Reminder", body)
+            except Exception as exc:  # one bad notification must not stop the queue
+                print(f"[reminders] notification failed: {exc}", file=sys.stderr, flush=True)
+        return due
+
+    def _run(self) -> None:
+        while True:
+            self.fire_due()
+            with self._cond:
+                if self._stopping:
+                    return
+                # Skip heads deleted since they were pushed, then sleep until the next one.
+                while self._heap and self._heap[0][1] not in self._live:
+                    heapq.heappop(self._heap)
+                timeout = max(0.0, self._heap[0][0] - self._clock()) if self._heap else None
+                # Wall-clock jumps (suspend, NTP) are caught by re-checking at least every minute.
+                self._cond.wait(60.0 if timeout is None else min(timeout, 60.0))
+                if self._stopping:
+                    return
+
+
+def _id_number(unit_id: str) -> int:
+    suffix = unit_id[len(ID_PREFIX):] if unit_id.startswith(ID_PREFIX) else ""
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def _create_default() -> InProcessReminders:
+    queue = InProcessReminders()
+    queue.start()
+    return queue
+
+
+_default: ProcessDefault[InProcessReminders] = ProcessDefault(InProcessReminders.stop)
+
+
+def start_default() -> InProcessReminders:
+    """The process-wide queue, loaded and firing (created on first use)."""
+    queue = _default.start(_create_default)
+    assert queue is not None
+    return queue
+
+
+def get_default() -> InProcessReminders | None:
+    return _default.get()
+
+
+def stop_default() -> None:
+    _default.stop()
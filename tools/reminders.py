@@ -0,0 +1,318 @@
+"""Reminder engine on systemd user timers, with batched transactions.
+
+All reminders share one template pair, installed once:
+
+    ~/.config/systemd/user/meera-reminder@.timer    (no OnCalendar of its own)
+    ~/.config/systemd/user/meera-reminder@.service  (notify-send, then cleanup)
+
+A reminder `meera-reminder-7` is the instance `meera-reminder@7.timer`. Its
+time is set by a drop-in (`meera-reminder@7.timer.d/calendar.conf`) and its
+text is in `~/.local/share/meera_reminders/meera-reminder@7.txt`. Firing
+needs no daemon-reload: the service shows the notification, deletes the
+text and the drop-in, and disables its own timer.
+
+`SystemdReminders.commit()` applies any number of additions and deletions
+in one transaction: one `disable --now` for the deletions, one
+`daemon-reload`, and one `enable --now` for the additions. Transactions and
+ID allocation hold an exclusive lock on the data directory, so two Meera
+processes cannot hand out the same ID or interleave unit-file writes.
+
+Reminders made by older versions (one `meera-reminder-N.timer`/`.service`
+pair each) can still be deleted.
+"""
+from __future__ import annotations
+
+import fcntl
+import os
+import shutil
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from tools._cmd import CmdOutput, run_argv
+from tools.schema import ToolResult, tool_result_err, tool_result_ok
+
+DATA_DIR = Path(os.path.expanduser("~/.local/share/meera_reminders"))
+UNIT_DIR = Path(os.path.expanduser("~/.config/systemd/user"))
+
+ID_PREFIX = "meera-reminder-"
+TEMPLATE = "meera-reminder@"
+
+_ID_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-._")
+
+Run = Callable[..., "CmdOutput | ToolResult"]
+
+
+def validate_id(unit_id: str) -> ToolResult | None:
+    if not unit_id or any(ch not in _ID_CHARS for ch in unit_id):
+        return tool_result_err(
+            "unit_id contains invalid characters",
+            "INVALID_VALUE",
+        )
+    return None
+
+
+def instance_name(unit_id: str) -> str:
+    """Template instance for a reminder ID: "meera-reminder-7" -> "7"."""
+    return unit_id[len(ID_PREFIX):] if unit_id.startswith(ID_PREFIX) and len(unit_id) > len(ID_PREFIX) else unit_id
+
+
+def timer_unit(unit_id: str) -> str:
+    return f"{TEMPLATE}{instance_name(unit_id)}.timer"
+
+
+@dataclass(frozen=True, slots=True)
+class NewReminder:
+    message: str
+    calendar: str  # systemd OnCalendar value, "YYYY-MM-DD HH:MM:SS" local time
+    unit_id: str | None = None  # allocated at commit when None
+
+
+@dataclass
+class ReminderBatch:
+    """Additions and deletions to apply together with SystemdReminders.commit()."""
+    adds: list[NewReminder] = field(default_factory=list)
+    deletes: list[str] = field(default_factory=list)
+
+    def add(self, message: str, calendar: str, unit_id: str | None = None) -> None:
+        self.adds.append(NewReminder(message, calendar, unit_id))
+
+    def delete(self, unit_id: str) -> None:
+        self.deletes.append(unit_id)
+
+
+class SystemdReminders:
+    """Creates and deletes reminders as instances of the template timer."""
+
+    def __init__(self, data_dir: Path = DATA_DIR, unit_dir: Path = UNIT_DIR, *, run: Run = run_argv):
+        self.data_dir = data_dir
+        self.unit_dir = unit_dir
+        self._run = run
+
+    # ---- locking and IDs -----------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Exclusive lock shared by every Meera process (flock on the data dir)."""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.data_dir / ".lock", "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def allocate_ids(self, count: int = 1) -> list[str]:
+        """Reserve `count` fresh reminder IDs (atomic, safe across processes)."""
+        with self._locked():
+            return self._allocate_locked(count)
+
+    def _allocate_locked(self, count: int) -> list[str]:
+        counter_path = self.data_dir / "counter"
+        try:
+            counter = int(counter_path.read_text().strip())
+        except (FileNotFoundError, ValueError):
+            counter = 0
+        ids: list[str] = []
+        while len(ids) < count:
+            counter += 1
+            unit_id = f"{ID_PREFIX}{counter}"
+            if not self._exists(unit_id):
+                ids.append(unit_id)
+        tmp = counter_path.with_suffix(".tmp")
+        tmp.write_text(str(counter))
+        os.replace(tmp, counter_path)  # readers never see a half-written counter
+        return ids
+
+    # ---- paths -----------------------------------------------------------------
+
+    def _message_path(self, unit_id: str) -> Path:
+        return self.data_dir / f"{TEMPLATE}{instance_name(unit_id)}.txt"
+
+    def _dropin_dir(self, unit_id: str) -> Path:
+        return self.unit_dir / f"{timer_unit(unit_id)}.d"
+
+    def _legacy_units(self, unit_id: str) -> list[Path]:
+        """Timer, service and text of a reminder made before the template units."""
+        return [
+            self.unit_dir / f"{unit_id}.timer",
+            self.unit_dir / f"{unit_id}.service",
+            self.data_dir / f"{unit_id}.txt",
+        ]
+
+    def _exists(self, unit_id: str) -> bool:
+        return (
+            self._message_path(unit_id).exists()
+            or self._dropin_dir(unit_id).exists()
+            or any(p.exists() for p in self._legacy_units(unit_id))
+        )
+
+    def _install_templates(self) -> None:
+        """Write the template units if missing or out of date."""
+        data = self.data_dir.as_posix()
+        units = self.unit_dir.as_posix()
+        templates = {
+            f"{TEMPLATE}.timer": (
+                "[Unit]\n"
+                "Description=Meera reminder %i\n"
+                "\n"
+                "[Timer]\n"
+                f"# OnCalendar= comes from {TEMPLATE}<id>.timer.d/calendar.conf\n"
+                "Persistent=false\n"
+                "AccuracySec=10\n"
+                "\n"
+                "[Install]\n"
+                "WantedBy=timers.target\n"
+            ),
+            f"{TEMPLATE}.service": (
+                "[Unit]\n"
+                "Description=Meera reminder notification %i\n"
+                "\n"
+                "[Service]\n"
+                "Type=oneshot\n"
+                f"ExecStart=/bin/sh -c 'notify-send \"Meera Reminder\" \"$$(cat {data}/{TEMPLATE}%i.txt)\"'\n"
+                f"ExecStartPost=/bin/sh -c 'rm -rf {data}/{TEMPLATE}%i.txt {units}/{TEMPLATE}%i.timer.d; "
+                f"systemctl --user disable {TEMPLATE}%i.timer'\n"
+            ),
+        }
+        self.unit_dir.mkdir(parents=True, exist_ok=True)
+        for name, content in templates.items():
+            path = self.unit_dir / name
+            try:
+                if path.read_text() == content:
+                    continue
+            except OSError:
+                pass
+            tmp = path.with_name(f".{name}.tmp")
+            tmp.write_text(content)
+            os.replace(tmp, path)
+
+    def pending(self) -> list[dict[str, str]]:
+        """Reminders with a calendar drop-in that have not fired yet, soonest first."""
+        out = []
+        for conf in self.unit_dir.glob(f"{TEMPLATE}*.timer.d/calendar.conf"):
+            instance = conf.parent.name[len(TEMPLATE):-len(".timer.d")]
+            message = self.data_dir / f"{TEMPLATE}{instance}.txt"
+            calendar = ""
+            for line in conf.read_text(errors="replace").splitlines():
+                if line.startswith("OnCalendar="):
+                    calendar = line.partition("=")[2].strip()
+            try:
+                text = message.read_text(errors="replace")
+            except OSError:
+                continue  # fired: the service removed the text first
+            unit_id = f"{ID_PREFIX}{instance}" if instance.isdigit() else instance
+            out.append({"unit_id": unit_id, "message": text, "target_time": calendar})
+        out.sort(key=lambda r: r["target_time"])
+        return out
+
+    # ---- transactions ----------------------------------------------------------
+
+    def _systemctl(self, *args: str) -> ToolResult | None:
+        r = self._run(["systemctl", "--user", *args], timeout=20.0)
+        if isinstance(r, ToolResult):
+            return r
+        if r.returncode != 0:
+            return tool_result_err(
+                r.stderr or r.stdout or f"systemctl {args[0]} failed",
+                "COMMAND_FAILED",
+            )
+        return None
+
+    def commit(self, batch: ReminderBatch) -> ToolResult:
+        """Apply all deletions then all additions with a single daemon-reload.
+
+        Deleting an unknown ID is reported in `not_found`, not as an error.
+        If enabling the new timers fails, their files are removed again and
+        the deletions stand.
+        """
+        for unit_id in [a.unit_id for a in batch.adds if a.unit_id] + batch.deletes:
+            id_err = validate_id(unit_id)
+            if id_err is not None:
+                return id_err
+
+        with self._locked():
+            deleted = [u for u in dict.fromkeys(batch.deletes) if self._exists(u)]
+            not_found = [u for u in dict.fromkeys(batch.deletes) if u not in deleted]
+
+            explicit = [instance_name(a.unit_id) for a in batch.adds if a.unit_id]
+            taken = [
+                a.unit_id for a in batch.adds
+                if a.unit_id and (
+                    (self._exists(a.unit_id) and a.unit_id not in deleted)
+                    or explicit.count(instance_name(a.unit_id)) > 1
+                )
+            ]
+            if taken:
+                return tool_result_err(
+                    f"Timer {taken[0]} already exists",
+                    "ALREADY_EXISTS",
+                )
+            fresh = iter(self._allocate_locked(sum(1 for a in batch.adds if not a.unit_id)))
+            adds = [(a, a.unit_id or next(fresh)) for a in batch.adds]
+
+            if deleted:
+                units = [
+                    timer_unit(u) for u in deleted
+                    if self._message_path(u).exists() or self._dropin_dir(u).exists()
+                ]
+                units += [p.name for u in deleted for p in self._legacy_units(u)[:1] if p.exists()]
+                # Exit status ignored: a reminder that already fired is disabled but may still have files.
+                r = self._run(["systemctl", "--user", "disable", "--now", *units], timeout=20.0) if units else None
+                if isinstance(r, ToolResult):
+                    return r
+                for unit_id in deleted:
+                    self._remove_files(unit_id)
+
+            if adds:
+                self._install_templates()
+                for reminder, unit_id in adds:
+                    self._write_files(unit_id, reminder)
+
+            if deleted or adds:
+                reload_err = self._systemctl("daemon-reload")
+                if reload_err is not None:
+                    for _, unit_id in adds:
+                        self._remove_files(unit_id)
+                    return reload_err
+
+            if adds:
+                enable_err = self._systemctl("enable", "--now", *(timer_unit(u) for _, u in adds))
+                if enable_err is not None:
+                    for _, unit_id in adds:
+                        self._remove_files(unit_id)
+                    self._systemctl("daemon-reload")
+                    return enable_err
+
+        added = [{"unit_id": u, "target_time": r.calendar} for r, u in adds]
+        parts = []
+        if added:
+            parts.append(f"Reminder set: {', '.join(a['unit_id'] for a in added)}")
+        if deleted:
+            parts.append(f"Reminder deleted: {', '.join(deleted)}")
+        if not_found:
+            parts.append(f"not found: {', '.join(not_found)}")
+        return tool_result_ok(
+            "; ".join(parts) or "Nothing to do",
+            data={"added": added, "deleted": deleted, "not_found": not_found},
+        )
+
+    def _write_files(self, unit_id: str, reminder: NewReminder) -> None:
+        self._message_path(unit_id).write_text(reminder.message)
+        dropin = self._dropin_dir(unit_id)
+        dropin.mkdir(parents=True, exist_ok=True)
+        description = reminder.message.replace("\n", " ")[:100]
+        (dropin / "calendar.conf").write_text(
+            "[Unit]\n"
+            f"Description=Meera reminder: {description}\n"
+            "\n"
+            "[Timer]\n"
+            f"OnCalendar={reminder.calendar}\n"
+        )
+
+    def _remove_files(self, unit_id: str) -> None:
+        self._message_path(unit_id).unlink(missing_ok=True)
+        shutil.rmtree(self._dropin_dir(unit_id), ignore_errors=True)
+        for path in self._legacy_units(unit_id):
+            path.unlink(missing_ok=True)
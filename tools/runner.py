@@ -1,9 +1,11 @@
 """Validate parameters and dispatch tool handlers."""
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Mapping
 from typing import Any
 
+import tracing
 from tools.platform import DistroUnknownError, detect_distro
 from tools.registry import get_tool
 from tools.schema import ToolResult, ToolSpec, tool_result_err
@@ -95,6 +97,32 @@ def run_tool(
     params: dict[str, Any] | None = None,
     *,
     allow_elevation: bool = False,
+) -> ToolResult:
+    with tracing.span("run_tool", tool=name) as attrs:
+        result = _run_tool(name, params, allow_elevation=allow_elevation)
+        attrs["ok"] = result.ok
+    return result
+
+
+async def arun_tool(
+    name: str,
+    params: dict[str, Any] | None = None,
+    *,
+    allow_elevation: bool = False,
+) -> ToolResult:
+    """run_tool on a worker thread, so a coroutine can overlap it with model calls.
+
+    The span goes to the calling task's turn: `asyncio.to_thread` runs the
+    worker in a copy of the task's context.
+    """
+    return await asyncio.to_thread(run_tool, name, params, allow_elevation=allow_elevation)
+
+
+def _run_tool(
+    name: str,
+    params: dict[str, Any] | None,
+    *,
+    allow_elevation: bool,
 ) -> ToolResult:
     spec = get_tool(name)
     if spec is None:
@@ -1,4 +1,4 @@
-"""systemd user timers, reminders, and GNOME Calendar import."""
+"""systemd user timers, reminders (systemd or in-process), and GNOME Calendar import."""
 from __future__ import annotations
 
 import os
@@ -12,14 +12,30 @@ from pathlib import Path
 from typing import Any
 
 from tools._cmd import run_argv
+from tools import reminder_queue
+from tools.reminders import ReminderBatch, SystemdReminders
 from tools.schema import ToolParam, ToolResult, ToolSpec, tool_result_err, tool_result_ok
 
-_MEERA_DATA = Path(os.path.expanduser("~/.local/share/meera_reminders"))
-_SYSTEMD_USER = Path(os.path.expanduser("~/.config/systemd/user"))
+# Batched systemd timer transactions; see tools/reminders.py.
+_reminders = SystemdReminders()
+
+
+def _backend() -> SystemdReminders | reminder_queue.InProcessReminders:
+    """Reminder store chosen by MEERA_REMINDER_BACKEND (systemd timers by default)."""
+    if reminder_queue.backend_from_env() == "meera":
+        return reminder_queue.start_default()
+    return _reminders
 
 
 def _reminder_list(params: Mapping[str, Any]) -> ToolResult:
     _ = params["distro"]
+    backend = _backend()
+    if isinstance(backend, reminder_queue.InProcessReminders):
+        pending = backend.pending()
+        return tool_result_ok(
+            f"{len(pending)} pending Meera reminder(s)",
+            data={"reminders": pending},
+        )
     r = run_argv(
         [
             "systemctl",
@@ -41,136 +57,26 @@ def _reminder_list(params: Mapping[str, Any]) -> ToolResult:
         )
     lines = [ln.rstrip() for ln in r.stdout.splitlines() if ln.strip()]
     return tool_result_ok(
-        f"{len(lines)} systemd user timer row(s) (includes Meera reminders: meera-reminder-*)",
-        data={"lines": lines[:300]},
+        f"{len(lines)} systemd user timer row(s) (includes Meera reminders: meera-reminder@*)",
+        data={"lines": lines[:300], "reminders": backend.pending()},
     )
 
 
-def _next_unit_id() -> str:
-    _MEERA_DATA.mkdir(parents=True, exist_ok=True)
-    counter_path = _MEERA_DATA / "counter"
-    try:
-        counter = int(counter_path.read_text().strip())
-    except (FileNotFoundError, ValueError):
-        counter = 0
-    counter += 1
-    counter_path.write_text(str(counter))
-    return f"meera-reminder-{counter}"
-
-
-def _daemon_reload() -> ToolResult | None:
-    r = run_argv(
-        ["systemctl", "--user", "daemon-reload"],
-        timeout=10.0,
-    )
-    if isinstance(r, ToolResult):
-        return r
-    if r.returncode != 0:
-        return tool_result_err(
-            r.stderr or r.stdout or "systemctl daemon-reload failed",
-            "COMMAND_FAILED",
-        )
-    return None
-
-
 _REMINDER_START_ARG_RE = re.compile(
     r"^(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})(?::(\d{2}))?(?:Z|[+-]\d{2}:\d{2})?$"
 )
 
 
-def _validate_unit_id(unit_id: str) -> ToolResult | None:
-    for ch in unit_id:
-        if ch not in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-._":
-            return tool_result_err(
-                "unit_id contains invalid characters",
-                "INVALID_VALUE",
-            )
-    return None
-
-
-def _schedule_reminder(message: str, unit_id: str, calendar_str: str) -> ToolResult:
-    id_err = _validate_unit_id(unit_id)
-    if id_err is not None:
-        return id_err
-
-    timer_path = _SYSTEMD_USER / f"{unit_id}.timer"
-    if timer_path.exists():
-        return tool_result_err(
-            f"Timer {unit_id} already exists",
-            "ALREADY_EXISTS",
-        )
-
-    description = message.replace("\n", " ")[:100]
-
-    timer_content = (
-        f"[Unit]\n"
-        f"Description=Meera reminder: {description}\n"
-        f"\n"
-        f"[Timer]\n"
-        f"OnCalendar={calendar_str}\n"
-        f"Persistent=false\n"
-        f"AccuracySec=10\n"
-        f"\n"
-        f"[Install]\n"
-        f"WantedBy=timers.target\n"
-    )
-
-    msg_file = _MEERA_DATA / f"{unit_id}.txt"
-    _MEERA_DATA.mkdir(parents=True, exist_ok=True)
-    msg_file.write_text(message)
-
-    cleanup_cmd = (
-        f'notify-send "Meera Reminder" '
-        f'"$(cat {_MEERA_DATA}/{unit_id}.txt)" '
-        f'&& rm -f {_MEERA_DATA}/{unit_id}.txt '
-        f'&& systemctl --user disable --now {unit_id}.timer '
-        f'&& systemctl --user stop {unit_id}.timer '
-        f'&& rm -f {_SYSTEMD_USER}/{unit_id}.timer {_SYSTEMD_USER}/{unit_id}.service '
-        f'&& systemctl --user daemon-reload'
-    )
-
-    service_content = (
-        f"[Unit]\n"
-        f"Description=Meera notification\n"
-        f"\n"
-        f"[Service]\n"
-        f"Type=oneshot\n"
-        f"ExecStart=/bin/bash -c '{cleanup_cmd}'\n"
-    )
-
-    _SYSTEMD_USER.mkdir(parents=True, exist_ok=True)
-    service_path = _SYSTEMD_USER / f"{unit_id}.service"
-    timer_path.write_text(timer_content)
-    service_path.write_text(service_content)
-
-    reload_err = _daemon_reload()
-    if reload_err is not None:
-        for p in [timer_path, service_path, msg_file]:
-            if p.exists():
-                p.unlink(missing_ok=True)
-        return reload_err
-
-    r = run_argv(
-        ["systemctl", "--user", "enable", "--now", f"{unit_id}.timer"],
-        timeout=10.0,
-    )
-    if isinstance(r, ToolResult):
-        for p in [timer_path, service_path, msg_file]:
-            if p.exists():
-                p.unlink(missing_ok=True)
-        return r
-    if r.returncode != 0:
-        for p in [timer_path, service_path, msg_file]:
-            if p.exists():
-                p.unlink(missing_ok=True)
-        return tool_result_err(
-            r.stderr or r.stdout or "Failed to enable timer",
-            "COMMAND_FAILED",
-        )
-
+def _schedule_reminder(message: str, unit_id: str | None, calendar_str: str) -> ToolResult:
+    batch = ReminderBatch()
+    batch.add(message, calendar_str, unit_id)
+    result = _backend().commit(batch)
+    if not result.ok:
+        return result
+    (added,) = result.data["added"]
     return tool_result_ok(
-        f"Reminder set: {unit_id}",
-        data={"unit_id": unit_id, "target_time": calendar_str},
+        f"Reminder set: {added['unit_id']}",
+        data={"unit_id": added["unit_id"], "target_time": calendar_str},
     )
 
 
@@ -178,7 +84,7 @@ def _tool_reminder_set_delay(params: Mapping[str, Any]) -> ToolResult:
     _ = params["distro"]
     message: str = params["message"]
     delay_minutes: int = params["delay_minutes"]
-    unit_id: str = params.get("unit_id") or _next_unit_id()
+    unit_id: str | None = params.get("unit_id") or None
 
     if delay_minutes < 1 or delay_minutes > 10080:
         return tool_result_err(
@@ -204,7 +110,7 @@ def _tool_reminder_set_time(params: Mapping[str, Any]) -> ToolResult:
     _ = params["distro"]
     message: str = params["message"]
     start_raw: str = params["start"]
-    unit_id: str = params.get("unit_id") or _next_unit_id()
+    unit_id: str | None = params.get("unit_id") or None
 
     start = start_raw.strip()
     if not start:
@@ -236,43 +142,26 @@ def _tool_reminder_set_time(params: Mapping[str, Any]) -> ToolResult:
 
 def _tool_reminder_delete(params: Mapping[str, Any]) -> ToolResult:
     _ = params["distro"]
-    unit_id: str = params["unit_id"]
-
-    r = run_argv(
-        ["systemctl", "--user", "disable", "--now", f"{unit_id}.timer"],
-        timeout=10.0,
-    )
-    if isinstance(r, ToolResult):
-        return r
-
-    r2 = run_argv(
-        ["systemctl", "--user", "stop", f"{unit_id}.timer"],
-        timeout=10.0,
-    )
-    if isinstance(r2, ToolResult):
-        return r2
-
-    timer_path = _SYSTEMD_USER / f"{unit_id}.timer"
-    service_path = _SYSTEMD_USER / f"{unit_id}.service"
-    msg_file = _MEERA_DATA / f"{unit_id}.txt"
-
-    for p in [timer_path, service_path, msg_file]:
-        if p.exists():
-            p.unlink(missing_ok=True)
-
-    reload_err = _daemon_reload()
-    if reload_err is not None:
-        return reload_err
-
-    if r.returncode != 0 and r2.returncode != 0:
+    unit_ids = [u for u in re.split(r"[\s,]+", params["unit_id"]) if u]
+    if not unit_ids:
+        return tool_result_err("unit_id must name at least one reminder", "VALIDATION_ERROR")
+
+    batch = ReminderBatch()
+    for unit_id in unit_ids:
+        batch.delete(unit_id)
+    result = _backend().commit(batch)
+    if not result.ok:
+        return result
+    deleted, not_found = result.data["deleted"], result.data["not_found"]
+    if not deleted:
         return tool_result_err(
-            r.stderr or r2.stderr or "Timer not found",
+            f"Timer not found: {', '.join(not_found)}",
             "NOT_FOUND",
+            data={"not_found": not_found},
         )
-
     return tool_result_ok(
-        f"Reminder deleted: {unit_id}",
-        data={"unit_id": unit_id},
+        result.message,
+        data={"unit_id": deleted[0], "deleted": deleted, "not_found": not_found},
     )
 
 
@@ -448,8 +337,8 @@ TOOLS: list[ToolSpec] = [
         name="reminder_list",
         description=(
             "List pending scheduled items from systemd user timers. Use this when the user "
-            "asks for their reminders: Meera reminder units are named meera-reminder-* and "
-            "appear in the output together with any other --user timers."
+            "asks for their reminders: Meera reminders are listed with their text and time, and "
+            "their timers (meera-reminder@*) appear in the output with any other --user timers."
         ),
         parameters=[],
         handler=_reminder_list,
@@ -539,13 +428,15 @@ TOOLS: list[ToolSpec] = [
     ),
     ToolSpec(
         name="reminder_delete",
-        description="Delete a previously set reminder by its unit ID.",
+        description="Delete one or more previously set reminders by unit ID, in a single step.",
         parameters=[
             ToolParam(
                 name="unit_id",
                 param_type="string",
                 required=True,
-                description="The timer name to remove (without .timer suffix).",
+                description=(
+                    "Reminder ID to remove, e.g. meera-reminder-3; separate several IDs with commas."
+                ),
             ),
         ],
         handler=_tool_reminder_delete,
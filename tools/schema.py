@@ -1,6 +1,7 @@
 """Tool metadata and execution results (Phase 2)."""
 from __future__ import annotations
 
+import re
 from collections.abc import Callable, Mapping
 from dataclasses import dataclass, field
 from typing import Any
@@ -13,6 +14,38 @@ class ToolParam:
     required: bool
     description: str
     default: Any = None
+    # Allowed values / bounds, sent to the model as JSON-schema constraints.
+    # When unset they are read from the description (see param_enum/param_range).
+    enum: tuple[str, ...] = ()
+    minimum: int | None = None
+    maximum: int | None = None
+
+
+_ONE_OF_RE = re.compile(r"\bOne of:\s*([^.]+)")
+_RANGE_RE = re.compile(r"\((-?\d+)\s*-\s*(-?\d+)\)")
+_ENUM_VALUE_RE = re.compile(r"^[\w-]+$")
+
+
+def param_enum(p: ToolParam) -> tuple[str, ...]:
+    """Allowed values of a string param: `enum`, else a "One of: a, b" description."""
+    if p.enum or p.param_type != "string":
+        return p.enum
+    m = _ONE_OF_RE.search(p.description)
+    if m is None:
+        return ()
+    # "One of: traditional (Alt+Tab ...), default (clear binding)" -> traditional, default
+    values = tuple(v.strip() for v in re.sub(r"\([^)]*\)", "", m.group(1)).split(","))
+    return values if all(_ENUM_VALUE_RE.match(v) for v in values) else ()
+
+
+def param_range(p: ToolParam) -> tuple[int | None, int | None]:
+    """Bounds of an integer param: `minimum`/`maximum`, else a "(lo-hi)" in the description."""
+    if p.param_type != "integer" or p.minimum is not None or p.maximum is not None:
+        return p.minimum, p.maximum
+    m = _RANGE_RE.search(p.description)
+    if m is None:
+        return None, None
+    return int(m.group(1)), int(m.group(2))
 
 
 @dataclass
@@ -0,0 +1,375 @@
+"""Native system metrics read straight from /proc and /sys (no subprocesses).
+
+Each reader returns typed numbers, or None / an empty list when the source
+is missing or unreadable (containers and sandboxes often hide parts of
+/proc and /sys), so callers never need try/except. Sizes are bytes, rates
+Mbit/s, temperatures °C, durations seconds.
+"""
+from __future__ import annotations
+
+import fcntl
+import ipaddress
+import os
+import re
+import socket
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+_PROC_ROOT = Path("/proc")
+_SYS_ROOT = Path("/sys")
+
+# Filesystems that are not storage (df hides them too, as 0-block mounts).
+_VIRTUAL_FS = frozenset({
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs", "devpts",
+    "devtmpfs", "efivarfs", "fusectl", "hugetlbfs", "mqueue", "nsfs", "proc", "pstore",
+    "ramfs", "rpc_pipefs", "securityfs", "selinuxfs", "squashfs", "sysfs", "tmpfs", "tracefs",
+})
+# statvfs() on a dead network mount blocks with no timeout, so these are skipped.
+_REMOTE_FS = frozenset({"9p", "afs", "ceph", "cifs", "fuse.sshfs", "glusterfs", "nfs", "nfs4", "smb3", "smbfs"})
+
+_SIOCGIFADDR = 0x8915
+_SIOCGIFNETMASK = 0x891B
+_RTF_UP = 0x0001
+
+
+@dataclass(frozen=True, slots=True)
+class LoadAverage:
+    one: float
+    five: float
+    fifteen: float
+    running: int  # runnable scheduling entities right now
+    total: int  # scheduling entities that exist
+
+
+@dataclass(frozen=True, slots=True)
+class CpuTimes:
+    busy: int  # jiffies spent on anything but idle/iowait, all cores
+    total: int
+
+
+@dataclass(frozen=True, slots=True)
+class MemoryInfo:
+    total_bytes: int
+    available_bytes: int  # MemAvailable: reclaimable without swapping
+    swap_total_bytes: int
+    swap_free_bytes: int
+
+    @property
+    def used_percent(self) -> float:
+        if not self.total_bytes:
+            return 0.0
+        return round(100.0 * (self.total_bytes - self.available_bytes) / self.total_bytes, 1)
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessStat:
+    pid: int
+    name: str  # comm, at most 15 characters
+    start_ticks: int  # start time since boot; (pid, start_ticks) survives pid reuse
+    cpu_ticks: int  # utime + stime, in clock ticks
+    rss_bytes: int
+
+
+@dataclass(frozen=True, slots=True)
+class DiskUsage:
+    device: str
+    mountpoint: str
+    fstype: str
+    total_bytes: int
+    used_bytes: int
+    avail_bytes: int  # free space usable without root
+    use_percent: float  # used / (used + avail), as df computes Use%
+
+
+@dataclass(frozen=True, slots=True)
+class NetInterface:
+    name: str
+    state: str  # operstate: "up", "down", "dormant", "unknown", ...
+    mac: str | None
+    mtu: int | None
+    speed_mbps: int | None  # None when the driver does not report it (most Wi-Fi)
+    wireless: bool
+    ipv4: tuple[str, ...]  # "addr/prefixlen"
+    ipv6: tuple[str, ...]
+    rx_bytes: int | None
+    tx_bytes: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class DefaultRoute:
+    interface: str
+    gateway: str
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+
+
+def _read_int(path: Path) -> int | None:
+    raw = _read(path)
+    try:
+        return int(raw.strip()) if raw is not None else None
+    except ValueError:
+        return None
+
+
+# ---- uptime, load, temperature, CPU, memory ---------------------------------
+
+
+def uptime_seconds() -> float | None:
+    """Seconds since boot (/proc/uptime)."""
+    raw = _read(_PROC_ROOT / "uptime")
+    try:
+        return float(raw.split()[0]) if raw else None
+    except (ValueError, IndexError):
+        return None
+
+
+def format_uptime(seconds: float) -> str:
+    """`uptime -p` style text: "up 2 days, 3 hours, 4 minutes"."""
+    minutes = int(seconds // 60)
+    parts = []
+    for unit, size in (("week", 7 * 24 * 60), ("day", 24 * 60), ("hour", 60), ("minute", 1)):
+        n, minutes = divmod(minutes, size)
+        if n:
+            parts.append(f"{n} {unit}{'s' if n != 1 else ''}")
+    return "up " + (", ".join(parts) if parts else "0 minutes")
+
+
+def load_average() -> LoadAverage | None:
+    """1/5/15-minute load and scheduling entity counts (/proc/loadavg)."""
+    raw = _read(_PROC_ROOT / "loadavg")
+    try:
+        one, five, fifteen, entities = raw.split()[:4]
+        running, total = entities.split("/")
+        return LoadAverage(float(one), float(five), float(fifteen), int(running), int(total))
+    except (AttributeError, ValueError):
+        return None
+
+
+def cpu_temperature() -> float | None:
+    """Temperature of the first readable thermal zone, in °C."""
+    root = _SYS_ROOT / "class" / "thermal"
+    try:
+        zones = sorted(root.iterdir())
+    except OSError:
+        return None
+    for zone in zones:
+        millideg = _read_int(zone / "temp")
+        if millideg is not None:
+            return round(millideg / 1000, 1)
+    return None
+
+
+def cpu_times() -> CpuTimes | None:
+    """Aggregate CPU time counters (first line of /proc/stat)."""
+    raw = _read(_PROC_ROOT / "stat")
+    try:
+        fields = [int(v) for v in raw.splitlines()[0].split()[1:9]]
+    except (AttributeError, IndexError, ValueError):
+        return None
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    return CpuTimes(busy=sum(fields) - idle, total=sum(fields))
+
+
+def memory_info() -> MemoryInfo | None:
+    """RAM and swap totals (/proc/meminfo)."""
+    raw = _read(_PROC_ROOT / "meminfo")
+    kib: dict[str, int] = {}
+    for line in (raw or "").splitlines():
+        key, _, rest = line.partition(":")
+        try:
+            kib[key] = int(rest.split()[0])
+        except (IndexError, ValueError):
+            continue
+    if "MemTotal" not in kib:
+        return None
+    available = kib.get("MemAvailable", kib.get("MemFree", 0))
+    return MemoryInfo(
+        kib["MemTotal"] * 1024,
+        available * 1024,
+        kib.get("SwapTotal", 0) * 1024,
+        kib.get("SwapFree", 0) * 1024,
+    )
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def process_stats() -> list[ProcessStat]:
+    """CPU time and resident memory of every process (/proc/<pid>/stat).
+
+    Processes that exit while being read are skipped; kernel threads are
+    included (with rss 0).
+    """
+    out: list[ProcessStat] = []
+    try:
+        pids = [e.name for e in os.scandir(_PROC_ROOT) if e.name.isdigit()]
+    except OSError:
+        return out
+    for pid in pids:
+        raw = _read(_PROC_ROOT / pid / "stat")
+        if raw is None:
+            continue
+        # "pid (comm) state ..." — comm may itself contain spaces and parentheses.
+        head, _, rest = raw.rpartition(")")
+        fields = rest.split()
+        try:
+            out.append(ProcessStat(
+                pid=int(pid),
+                name=head.partition("(")[2],
+                start_ticks=int(fields[19]),
+                cpu_ticks=int(fields[11]) + int(fields[12]),
+                rss_bytes=max(0, int(fields[21])) * _PAGE_SIZE,
+            ))
+        except (IndexError, ValueError):
+            continue
+    return out
+
+
+# ---- disks ------------------------------------------------------------------
+
+
+_MOUNT_ESCAPE = re.compile(r"\\([0-7]{3})")
+
+
+def _unescape_mount_field(field: str) -> str:
+    """Undo the octal escapes (\\040 for space, ...) used in /proc/*/mounts."""
+    return _MOUNT_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+def mounts() -> list[tuple[str, str, str]]:
+    """(device, mountpoint, fstype) for every mount in /proc/self/mounts."""
+    raw = _read(_PROC_ROOT / "self" / "mounts")
+    out = []
+    for line in (raw or "").splitlines():
+        fields = line.split()
+        if len(fields) >= 3:
+            out.append((_unescape_mount_field(fields[0]), _unescape_mount_field(fields[1]), fields[2]))
+    return out
+
+
+def disk_usage() -> list[DiskUsage]:
+    """Usage of each local storage filesystem, one row per device.
+
+    Virtual, zero-sized and remote filesystems are skipped; a device mounted
+    several times (bind mounts, btrfs subvolumes) is reported at its first,
+    usually shortest, mountpoint.
+    """
+    out: list[DiskUsage] = []
+    seen: set[str] = set()
+    for device, mountpoint, fstype in mounts():
+        if fstype in _VIRTUAL_FS or fstype in _REMOTE_FS or device in seen:
+            continue
+        try:
+            st = os.statvfs(mountpoint)
+        except OSError:
+            continue
+        if st.f_blocks == 0:
+            continue
+        seen.add(device)
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        avail = st.f_bavail * st.f_frsize
+        percent = 100.0 * used / (used + avail) if used + avail else 0.0
+        out.append(DiskUsage(device, mountpoint, fstype, total, used, avail, round(percent, 1)))
+    return out
+
+
+def format_bytes(n: int) -> str:
+    """Human size with binary units, as `df -h` prints it ("1.5G")."""
+    size = float(n)
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" or size >= 10 else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}T"
+
+
+# ---- network ----------------------------------------------------------------
+
+
+def default_route() -> DefaultRoute | None:
+    """The IPv4 default route with the lowest metric (/proc/net/route)."""
+    raw = _read(_PROC_ROOT / "net" / "route")
+    best: tuple[int, DefaultRoute] | None = None
+    for line in (raw or "").splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        try:
+            dest, gateway, flags = int(fields[1], 16), int(fields[2], 16), int(fields[3], 16)
+            metric, mask = int(fields[6]), int(fields[7], 16)
+        except ValueError:
+            continue
+        if dest != 0 or mask != 0 or not flags & _RTF_UP:
+            continue
+        route = DefaultRoute(fields[0], socket.inet_ntoa(struct.pack("<I", gateway)))
+        if best is None or metric < best[0]:
+            best = (metric, route)
+    return best[1] if best is not None else None
+
+
+def _ipv4_address(sock: socket.socket, name: str) -> str | None:
+    """Primary IPv4 address of `name` as "addr/prefixlen" (ioctl, no fork)."""
+    req = struct.pack("256s", name.encode()[:15])
+    try:
+        addr = socket.inet_ntoa(fcntl.ioctl(sock.fileno(), _SIOCGIFADDR, req)[20:24])
+        mask = socket.inet_ntoa(fcntl.ioctl(sock.fileno(), _SIOCGIFNETMASK, req)[20:24])
+    except OSError:
+        return None  # no IPv4 address configured
+    return f"{addr}/{ipaddress.IPv4Network(f'0.0.0.0/{mask}').prefixlen}"
+
+
+def _ipv6_addresses() -> dict[str, list[str]]:
+    """Interface name → "addr/prefixlen" list, from /proc/net/if_inet6."""
+    raw = _read(_PROC_ROOT / "net" / "if_inet6")
+    out: dict[str, list[str]] = {}
+    for line in (raw or "").splitlines():
+        fields = line.split()
+        if len(fields) < 6:
+            continue
+        try:
+            addr = ipaddress.IPv6Address(bytes.fromhex(fields[0]))
+            prefix = int(fields[2], 16)
+        except ValueError:
+            continue
+        out.setdefault(fields[5], []).append(f"{addr}/{prefix}")
+    return out
+
+
+def network_interfaces(*, include_loopback: bool = False) -> list[NetInterface]:
+    """Every interface under /sys/class/net with its link state and addresses."""
+    root = _SYS_ROOT / "class" / "net"
+    try:
+        names = sorted(p.name for p in root.iterdir())
+    except OSError:
+        return []
+    ipv6 = _ipv6_addresses()
+    out: list[NetInterface] = []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for name in names:
+            if name == "lo" and not include_loopback:
+                continue
+            base = root / name
+            mac = (_read(base / "address") or "").strip() or None
+            ipv4 = _ipv4_address(sock, name)
+            speed = _read_int(base / "speed")
+            out.append(NetInterface(
+                name=name,
+                state=(_read(base / "operstate") or "unknown").strip(),
+                mac=mac,
+                mtu=_read_int(base / "mtu"),
+                speed_mbps=speed if speed is not None and speed > 0 else None,
+                wireless=(base / "wireless").is_dir() or (base / "phy80211").exists(),
+                ipv4=(ipv4,) if ipv4 else (),
+                ipv6=tuple(ipv6.get(name, ())),
+                rx_bytes=_read_int(base / "statistics" / "rx_bytes"),
+                tx_bytes=_read_int(base / "statistics" / "tx_bytes"),
+            ))
+    return out
@@ -1,12 +1,14 @@
 """System tools: Wi-Fi, brightness, volume (read-mostly)."""
 from __future__ import annotations
 
+import os
 import shutil
 from collections.abc import Mapping
 from pathlib import Path
 from typing import Any
 
 from datetime import datetime as _dt
+from tools import sysmetrics, telemetry
 from tools._cmd import run_argv
 from tools.schema import ToolParam, ToolResult, ToolSpec, tool_result_err, tool_result_ok
 from zoneinfo import ZoneInfo
@@ -370,59 +372,68 @@ def _system_info(params: Mapping[str, Any]) -> ToolResult:
     _ = params["distro"]
     data: dict[str, Any] = {}
 
-    r = run_argv(["uptime", "-p"], timeout=10.0)
-    if isinstance(r, ToolResult):
-        return r
-    if r.returncode == 0:
-        data["uptime"] = r.stdout.strip()
-
-    data["cpu_temp_c"] = None
-    temp_found = False
-    thermal_roots = sorted(Path("/sys/class/thermal").iterdir()) if Path("/sys/class/thermal").is_dir() else []
-    for entry in thermal_roots:
-        if not entry.is_dir():
-            continue
-        temp_file = entry / "temp"
-        if not temp_file.is_file():
-            continue
-        try:
-            raw = int(temp_file.read_text(encoding="utf-8", errors="replace").strip())
-            data["cpu_temp_c"] = round(raw / 1000, 1)
-            temp_found = True
-            break
-        except (ValueError, OSError, PermissionError):
-            continue
-
-    r = run_argv(["cat", "/proc/loadavg"], timeout=10.0)
-    if isinstance(r, ToolResult):
-        return r
-    if r.returncode == 0:
-        parts = r.stdout.strip().split()
-        data["load_average"] = {
-            "1m": float(parts[0]) if len(parts) > 0 else None,
-            "5m": float(parts[1]) if len(parts) > 1 else None,
-            "15m": float(parts[2]) if len(parts) > 2 else None,
+    uptime = sysmetrics.uptime_seconds()
+    if uptime is not None:
+        data["uptime"] = sysmetrics.format_uptime(uptime)
+        data["uptime_s"] = round(uptime)
+
+    data["cpu_temp_c"] = sysmetrics.cpu_temperature()
+
+    load = sysmetrics.load_average()
+    if load is not None:
+        data["load_average"] = {"1m": load.one, "5m": load.five, "15m": load.fifteen}
+        data["tasks"] = {"running": load.running, "total": load.total}
+    data["cpu_count"] = os.cpu_count()
+
+    mem = sysmetrics.memory_info()
+    if mem is not None:
+        data["memory"] = {
+            "total": sysmetrics.format_bytes(mem.total_bytes),
+            "available": sysmetrics.format_bytes(mem.available_bytes),
+            "used_percent": mem.used_percent,
         }
 
-    note = "CPU temp unavailable (no accessible thermal zone)" if not temp_found else None
-    data["notes"] = note
+    sampler = telemetry.get_default()
+    latest = sampler.latest() if sampler is not None else None
+    if latest is not None:
+        data["cpu_percent"] = latest.cpu_percent  # over the sampler's last interval
+
+    temp_missing = data["cpu_temp_c"] is None
+    data["notes"] = "CPU temp unavailable (no accessible thermal zone)" if temp_missing else None
     return tool_result_ok("System info retrieved", data=data)
 
 
 def _disk_space(params: Mapping[str, Any]) -> ToolResult:
     _ = params["distro"]
-    r = run_argv(["df", "-h", "--total", "-T"], timeout=15.0)
-    if isinstance(r, ToolResult):
-        return r
-    if r.returncode != 0:
-        return tool_result_err(
-            f"df failed: {r.stderr or r.stdout}",
-            "COMMAND_FAILED",
-        )
-    lines = r.stdout.strip().splitlines()
+    disks = sysmetrics.disk_usage()
+    if not disks:
+        return tool_result_err("No mounted filesystems could be read", "OS_ERROR")
+    filesystems = [
+        {
+            "mountpoint": d.mountpoint,
+            "device": d.device,
+            "fstype": d.fstype,
+            "size": sysmetrics.format_bytes(d.total_bytes),
+            "used": sysmetrics.format_bytes(d.used_bytes),
+            "avail": sysmetrics.format_bytes(d.avail_bytes),
+            "use_percent": d.use_percent,
+            "total_bytes": d.total_bytes,
+            "used_bytes": d.used_bytes,
+            "avail_bytes": d.avail_bytes,
+        }
+        for d in disks
+    ]
+    root = next((d for d in disks if d.mountpoint == "/"), disks[0])
     return tool_result_ok(
-        f"Disk usage: {len(lines) - 1} filesystem(s) listed",
-        data={"raw": r.stdout.strip(), "lines": lines},
+        f"Disk usage: {len(disks)} filesystem(s) listed; {root.mountpoint} is {root.use_percent:.0f}% full "
+        f"({sysmetrics.format_bytes(root.avail_bytes)} free)",
+        data={
+            "filesystems": filesystems,
+            "total": {
+                "size": sysmetrics.format_bytes(sum(d.total_bytes for d in disks)),
+                "avail": sysmetrics.format_bytes(sum(d.avail_bytes for d in disks)),
+            },
+        },
     )
 
 
@@ -430,34 +441,28 @@ def _network_info(params: Mapping[str, Any]) -> ToolResult:
     _ = params["distro"]
     data: dict[str, Any] = {}
 
-    route_r = run_argv(["ip", "-o", "route", "get", "8.8.8.8"], timeout=10.0)
-    default_iface = None
-    if not isinstance(route_r, ToolResult) and route_r.returncode == 0:
-        parts = route_r.stdout.strip().split()
-        for i, part in enumerate(parts):
-            if part == "dev" and i + 1 < len(parts):
-                default_iface = parts[i + 1]
-                break
-
-    addr_r = run_argv(["ip", "-br", "addr"], timeout=10.0)
-    if isinstance(addr_r, ToolResult):
-        return addr_r
-    if addr_r.returncode != 0:
-        return tool_result_err(
-            f"ip addr failed: {addr_r.stderr or addr_r.stdout}",
-            "COMMAND_FAILED",
-        )
-    data["interfaces"] = addr_r.stdout.strip().splitlines()
+    interfaces = sysmetrics.network_interfaces()
+    data["interfaces"] = [
+        {
+            "name": i.name,
+            "state": i.state,
+            "ipv4": list(i.ipv4),
+            "ipv6": list(i.ipv6),
+            "mac": i.mac,
+            "wireless": i.wireless,
+        }
+        for i in interfaces
+    ]
 
-    if default_iface:
-        data["default_interface"] = default_iface
-        speed_path = Path(f"/sys/class/net/{default_iface}/speed")
-        try:
-            data["link_speed_mbps"] = int(speed_path.read_text(encoding="utf-8", errors="replace").strip())
-        except (ValueError, OSError, PermissionError):
-            data["link_speed_mbps"] = None
+    route = sysmetrics.default_route()
+    if route is not None:
+        data["default_interface"] = route.interface
+        data["gateway"] = route.gateway
+        iface = next((i for i in interfaces if i.name == route.interface), None)
+        data["link_speed_mbps"] = iface.speed_mbps if iface is not None else None
+        if data["link_speed_mbps"] is None:
             data["link_speed_note"] = (
-                f"Could not read speed for {default_iface} (common for wireless interfaces)"
+                f"Could not read speed for {route.interface} (common for wireless interfaces)"
             )
 
     return tool_result_ok("Network info retrieved", data=data)
@@ -656,7 +661,7 @@ TOOLS: list[ToolSpec] = [
     ),
     ToolSpec(
         name="system_info",
-        description="Get system info: uptime, CPU temperature, and load average.",
+        description="Get system info: uptime, CPU temperature, load average and memory.",
         parameters=[],
         handler=_system_info,
         read_only=True,
@@ -673,7 +678,7 @@ TOOLS: list[ToolSpec] = [
     ),
     ToolSpec(
         name="disk_space",
-        description="Show disk usage summary using df.",
+        description="Show disk usage: size, used and free space per mounted filesystem.",
         parameters=[],
         handler=_disk_space,
         read_only=True,
@@ -0,0 +1,278 @@
+"""Opt-in background sampler of system and per-process resource usage.
+
+With MEERA_TELEMETRY=1 the app starts one `TelemetrySampler`. Every
+MEERA_TELEMETRY_INTERVAL seconds (default 5) it reads /proc through
+`tools.sysmetrics`, with no subprocesses, and records:
+
+- a `SystemSample`: CPU %, memory %, swap, 1-minute load and temperature;
+- the busiest processes of the interval (`ProcessSample`: CPU % of one core
+  as `top` shows it, and resident memory), the top by CPU plus the top by
+  memory.
+
+Both go into fixed-size ring buffers covering MEERA_TELEMETRY_HISTORY
+minutes (default 30), so memory stays bounded however long the app runs.
+Every process of the latest interval is kept as well, outside the buffers,
+so the process tools list and filter from a complete snapshot instantly, and
+`usage_history` answers trend questions ("what used the most CPU in the last
+5 minutes") from the buffers. Without the sampler the tools fall back to a
+single `ps` snapshot.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from process_default import ProcessDefault
+from tools import sysmetrics
+
+_DEFAULT_INTERVAL_S = 5.0
+_DEFAULT_HISTORY_MIN = 30
+_TOP_K = 20  # processes kept per sample, by CPU and by memory each
+
+
+def telemetry_enabled() -> bool:
+    return os.environ.get("MEERA_TELEMETRY", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _interval_from_env() -> float:
+    try:
+        value = float(os.environ.get("MEERA_TELEMETRY_INTERVAL", "") or _DEFAULT_INTERVAL_S)
+    except ValueError:
+        value = _DEFAULT_INTERVAL_S
+    return max(1.0, min(value, 300.0))
+
+
+def _history_from_env() -> float:
+    try:
+        value = int(os.environ.get("MEERA_TELEMETRY_HISTORY", "") or _DEFAULT_HISTORY_MIN)
+    except ValueError:
+        value = _DEFAULT_HISTORY_MIN
+    return max(1, min(value, 24 * 60)) * 60.0
+
+
+@dataclass(frozen=True, slots=True)
+class SystemSample:
+    t: float  # wall-clock time (time.time()) at the end of the interval
+    cpu_percent: float  # busy share of all cores over the interval, 0-100
+    mem_percent: float
+    mem_available_bytes: int
+    swap_used_bytes: int
+    load_1m: float | None
+    temp_c: float | None
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessSample:
+    pid: int
+    name: str
+    cpu_percent: float  # of one core over the interval (can exceed 100)
+    rss_bytes: int
+
+
+@dataclass(frozen=True, slots=True)
+class _ProcessTick:
+    t: float
+    dt: float
+    processes: tuple[ProcessSample, ...]
+
+
+class TelemetrySampler:
+    """Samples /proc every `interval_s` into ring buffers spanning `history_s`."""
+
+    def __init__(
+        self,
+        interval_s: float = _DEFAULT_INTERVAL_S,
+        history_s: float = _DEFAULT_HISTORY_MIN * 60.0,
+        *,
+        top_k: int = _TOP_K,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.interval_s = interval_s
+        self.history_s = history_s
+        self._top_k = top_k
+        self._clock = clock
+        capacity = max(2, int(history_s // interval_s) + 1)
+        self._system: deque[SystemSample] = deque(maxlen=capacity)
+        self._processes: deque[_ProcessTick] = deque(maxlen=capacity)
+        self._latest_processes: tuple[ProcessSample, ...] = ()
+        self._lock = threading.Lock()
+        self._prev_t: float | None = None
+        self._prev_cpu: sysmetrics.CpuTimes | None = None
+        self._prev_ticks: dict[tuple[int, int], int] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    # ---- sampling ------------------------------------------------------------
+
+    def sample(self) -> SystemSample | None:
+        """Take one sample now. The first call only primes the counters (None)."""
+        now = self._clock()
+        cpu = sysmetrics.cpu_times()
+        procs = sysmetrics.process_stats()
+        mem = sysmetrics.memory_info()
+        ticks = {(p.pid, p.start_ticks): p.cpu_ticks for p in procs}
+        prev_t, prev_cpu, prev_ticks = self._prev_t, self._prev_cpu, self._prev_ticks
+        self._prev_t, self._prev_cpu, self._prev_ticks = now, cpu, ticks
+        if prev_t is None or now <= prev_t:
+            return None
+        dt = now - prev_t
+
+        cpu_percent = 0.0
+        if cpu is not None and prev_cpu is not None and cpu.total > prev_cpu.total:
+            cpu_percent = 100.0 * (cpu.busy - prev_cpu.busy) / (cpu.total - prev_cpu.total)
+        sample = SystemSample(
+            t=now,
+            cpu_percent=round(max(0.0, cpu_percent), 1),
+            mem_percent=mem.used_percent if mem is not None else 0.0,
+            mem_available_bytes=mem.available_bytes if mem is not None else 0,
+            swap_used_bytes=(mem.swap_total_bytes - mem.swap_free_bytes) if mem is not None else 0,
+            load_1m=load.one if (load := sysmetrics.load_average()) is not None else None,
+            temp_c=sysmetrics.cpu_temperature(),
+        )
+
+        usage = []
+        ceiling = 100.0 * (os.cpu_count() or 1)
+        for p in procs:
+            # A process started since the last sample spent all its CPU time in this interval.
+            delta = max(0, p.cpu_ticks - prev_ticks.get((p.pid, p.start_ticks), 0))
+            percent = min(100.0 * delta / sysmetrics.CLOCK_TICKS / dt, ceiling)
+            usage.append(ProcessSample(p.pid, p.name, round(percent, 1), p.rss_bytes))
+        everyone = tuple(sorted(usage, key=lambda p: p.cpu_percent, reverse=True))
+        largest = sorted(usage, key=lambda p: p.rss_bytes, reverse=True)[:self._top_k]
+        kept = {p.pid: p for p in everyone[:self._top_k] + tuple(largest)}
+        tick = _ProcessTick(now, dt, tuple(sorted(kept.values(), key=lambda p: p.cpu_percent, reverse=True)))
+
+        with self._lock:
+            self._system.append(sample)
+            self._processes.append(tick)
+            self._latest_processes = everyone
+        return sample
+
+    def start(self) -> None:
+        """Sample on a daemon thread until stop()."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="meera-telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_s + 1.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        warned = False
+        while True:
+            try:
+                self.sample()
+            except Exception as exc:  # a bad /proc read must not end sampling
+                if not warned:
+                    print(f"[telemetry] sample failed: {exc}", file=sys.stderr, flush=True)
+                    warned = True
+            if self._stop.wait(self.interval_s):
+                return
+
+    # ---- queries -------------------------------------------------------------
+
+    def latest(self) -> SystemSample | None:
+        with self._lock:
+            return self._system[-1] if self._system else None
+
+    def latest_processes(self) -> list[ProcessSample]:
+        """Every process of the last interval, busiest first.
+
+        The ring buffers keep only the top `top_k` by CPU and by memory per
+        interval; this snapshot is complete but covers the last one only.
+        """
+        with self._lock:
+            return list(self._latest_processes)
+
+    def history(self, window_s: float) -> list[SystemSample]:
+        """System samples from the last `window_s` seconds, oldest first."""
+        cutoff = self._clock() - window_s
+        with self._lock:
+            return [s for s in self._system if s.t > cutoff]
+
+    def summary(self, window_s: float) -> dict[str, Any] | None:
+        """Average and peak of each system metric over the window (None if no samples)."""
+        samples = self.history(window_s)
+        if not samples:
+            return None
+
+        def stats(values: list[float]) -> dict[str, float] | None:
+            if not values:
+                return None
+            return {"avg": round(sum(values) / len(values), 1), "max": round(max(values), 1)}
+
+        return {
+            "samples": len(samples),
+            "covered_s": round(samples[-1].t - samples[0].t + self.interval_s),
+            "cpu_percent": stats([s.cpu_percent for s in samples]),
+            "mem_percent": stats([s.mem_percent for s in samples]),
+            "load_1m": stats([s.load_1m for s in samples if s.load_1m is not None]),
+            "temp_c": stats([s.temp_c for s in samples if s.temp_c is not None]),
+        }
+
+    def top_processes(self, window_s: float, *, by: str = "cpu", limit: int = 5) -> list[dict[str, Any]]:
+        """Processes ranked over the window by average CPU or peak memory.
+
+        `cpu_avg` is averaged over the whole window (a process that ran
+        flat out for half of it shows 50), `cpu_max` is its busiest interval.
+        """
+        if by not in ("cpu", "memory"):
+            raise ValueError(f"by must be 'cpu' or 'memory', got {by!r}")
+        cutoff = self._clock() - window_s
+        with self._lock:
+            ticks = [t for t in self._processes if t.t > cutoff]
+        if not ticks:
+            return []
+        span = sum(t.dt for t in ticks)
+        totals: dict[tuple[int, str], dict[str, Any]] = {}
+        for tick in ticks:
+            for p in tick.processes:
+                row = totals.setdefault(
+                    (p.pid, p.name),
+                    {"pid": p.pid, "name": p.name, "cpu_s": 0.0, "cpu_max": 0.0, "rss_max_bytes": 0},
+                )
+                row["cpu_s"] += p.cpu_percent * tick.dt / 100.0
+                row["cpu_max"] = max(row["cpu_max"], p.cpu_percent)
+                row["rss_max_bytes"] = max(row["rss_max_bytes"], p.rss_bytes)
+        rows = [r for r in totals.values() if by == "memory" or r["cpu_s"] > 0]
+        for row in rows:
+            row["cpu_avg"] = round(100.0 * row["cpu_s"] / span, 1) if span else 0.0
+            row["cpu_s"] = round(row["cpu_s"], 1)
+        key = "cpu_s" if by == "cpu" else "rss_max_bytes"
+        rows.sort(key=lambda r: r[key], reverse=True)
+        return rows[:limit]
+
+
+def _create_default() -> TelemetrySampler:
+    sampler = TelemetrySampler(_interval_from_env(), _history_from_env())
+    sampler.start()
+    return sampler
+
+
+_default: ProcessDefault[TelemetrySampler] = ProcessDefault(TelemetrySampler.stop)
+
+
+def start_default() -> TelemetrySampler | None:
+    """Start the process-wide sampler (None unless MEERA_TELEMETRY=1)."""
+    if not telemetry_enabled():
+        return None
+    return _default.start(_create_default)
+
+
+def get_default() -> TelemetrySampler | None:
+    return _default.get()
+
+
+def stop_default() -> None:
+    _default.stop()
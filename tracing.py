@@ -0,0 +1,375 @@
+"""Per-turn latency tracing.
+
+One `TurnTrace` covers one user → assistant turn. Code on the turn's path
+records named spans (fast-path match, query embedding, index scoring, prompt
+assembly, time-to-first-token, generation, each tool run) through
+`span(...)`, which is a cheap no-op when no turn is current. The current
+turn is a context variable: each thread, and each asyncio task, has its
+own, and `asyncio.to_thread` carries it to the worker. Work that happens
+elsewhere (GTK rendering on the main loop) adds time to the trace object
+directly with `TurnTrace.accumulate`.
+
+Finished turns are appended as one JSON object per line to
+`$MEERA_LOG_DIR/turns.jsonl` (default `~/.cache/meera/logs`), rotated by
+size. Set MEERA_TRACE=0 to stop writing records.
+
+    python3 tracing.py summary [N]   # p50/p95 per stage and token use over the last N turns
+    python3 tracing.py tail [N]      # last N turn records, one line each
+"""
+from __future__ import annotations
+
+import contextvars
+import json
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+TRACE_FILENAME = "turns.jsonl"
+_DEFAULT_MAX_BYTES = 2_000_000
+_BACKUP_COUNT = 3
+
+_current: contextvars.ContextVar[TurnTrace | None] = contextvars.ContextVar("meera_turn", default=None)
+_write_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    v = os.environ.get("MEERA_TRACE", "1").strip().lower()
+    return v not in ("0", "false", "no", "off")
+
+
+def _max_bytes() -> int:
+    try:
+        return max(10_000, int(os.environ.get("MEERA_TRACE_MAX_BYTES", str(_DEFAULT_MAX_BYTES))))
+    except ValueError:
+        return _DEFAULT_MAX_BYTES
+
+
+def trace_log_dir() -> Path:
+    """Same directory the launcher uses for server logs."""
+    explicit = os.environ.get("MEERA_LOG_DIR", "").strip()
+    if explicit:
+        return Path(explicit)
+    cache = os.environ.get("XDG_CACHE_HOME", "").strip() or os.path.expanduser("~/.cache")
+    return Path(cache) / "meera" / "logs"
+
+
+def trace_log_path() -> Path:
+    return trace_log_dir() / TRACE_FILENAME
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 2)
+
+
+class TurnTrace:
+    """Spans and accumulated timings for one agent turn (thread-safe)."""
+
+    def __init__(self, **attrs: Any):
+        self.turn_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now().isoformat(timespec="milliseconds")
+        self.attrs: dict[str, Any] = dict(attrs)
+        self.spans: list[dict[str, Any]] = []
+        self.totals: dict[str, dict[str, float]] = {}
+        self.finished = False
+        self._t0 = time.perf_counter()
+        self._end: float | None = None
+        self._lock = threading.Lock()
+
+    def set(self, **attrs: Any) -> None:
+        with self._lock:
+            self.attrs.update(attrs)
+
+    def add_span(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """Record a span from two `time.perf_counter()` readings."""
+        record = {"name": name, "start_ms": _ms(start - self._t0), "dur_ms": _ms(end - start)}
+        record.update(attrs)
+        with self._lock:
+            self.spans.append(record)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+        """Time the block; the yielded dict can be filled with extra attributes."""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.add_span(name, start, time.perf_counter(), **attrs)
+
+    def accumulate(self, name: str, seconds: float) -> None:
+        """Add to a count/total bucket for many small events (e.g. UI renders)."""
+        with self._lock:
+            bucket = self.totals.setdefault(name, {"count": 0, "total_ms": 0.0})
+            bucket["count"] += 1
+            bucket["total_ms"] = round(bucket["total_ms"] + seconds * 1000.0, 3)
+
+    def to_record(self) -> dict[str, Any]:
+        end = self._end if self._end is not None else time.perf_counter()
+        with self._lock:
+            record: dict[str, Any] = {
+                "turn_id": self.turn_id,
+                "ts": self.started_at,
+                "total_ms": _ms(end - self._t0),
+            }
+            record.update(self.attrs)
+            record["spans"] = list(self.spans)
+            if self.totals:
+                record["totals"] = {k: dict(v) for k, v in self.totals.items()}
+        return record
+
+
+# ---- Current turn (per thread and per asyncio task) -------------------------
+
+
+def begin_turn(**attrs: Any) -> TurnTrace:
+    """Start a turn and make it current for the calling thread or task."""
+    trace = TurnTrace(**attrs)
+    _current.set(trace)
+    return trace
+
+
+def current_turn() -> TurnTrace | None:
+    return _current.get()
+
+
+def attach_turn(trace: TurnTrace | None) -> None:
+    """Make `trace` current on the calling thread (e.g. a pool worker doing turn work)."""
+    _current.set(trace)
+
+
+def detach_turn() -> None:
+    """Stop attributing spans in this thread or task to the current turn."""
+    _current.set(None)
+
+
+def end_turn(trace: TurnTrace | None, **attrs: Any) -> None:
+    """Finish `trace` and append it to the trace log (once)."""
+    if trace is None or trace.finished:
+        return
+    if current_turn() is trace:
+        detach_turn()
+    trace.set(**attrs)
+    trace._end = time.perf_counter()
+    trace.finished = True
+    if tracing_enabled():
+        write_record(trace.to_record())
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+    """Time a block against the current turn; no-op outside a turn."""
+    trace = current_turn()
+    if trace is None:
+        yield attrs
+        return
+    with trace.span(name, **attrs) as live:
+        yield live
+
+
+def traced_stream(events: Iterator[Any], **attrs: Any) -> Iterator[Any]:
+    """Pass a streaming iterator through, recording `ttft` and `generation` spans."""
+    trace = current_turn()
+    if trace is None:
+        yield from events
+        return
+    start = time.perf_counter()
+    first: float | None = None
+    try:
+        for ev in events:
+            if first is None:
+                first = time.perf_counter()
+                trace.add_span("ttft", start, first, **attrs)
+            yield ev
+    finally:
+        trace.add_span("generation", start, time.perf_counter(), **attrs)
+
+
+async def atraced_stream(events: AsyncIterator[Any], **attrs: Any) -> AsyncIterator[Any]:
+    """traced_stream for async iterators (the turn is the calling task's)."""
+    trace = current_turn()
+    if trace is None:
+        async for ev in events:
+            yield ev
+        return
+    start = time.perf_counter()
+    first: float | None = None
+    try:
+        async for ev in events:
+            if first is None:
+                first = time.perf_counter()
+                trace.add_span("ttft", start, first, **attrs)
+            yield ev
+    finally:
+        trace.add_span("generation", start, time.perf_counter(), **attrs)
+
+
+# ---- Rotating JSONL sink ---------------------------------------------------
+
+
+def _rotate(path: Path) -> None:
+    for i in range(_BACKUP_COUNT - 1, 0, -1):
+        src = path.with_name(f"{path.name}.{i}")
+        if src.exists():
+            os.replace(src, path.with_name(f"{path.name}.{i + 1}"))
+    os.replace(path, path.with_name(f"{path.name}.1"))
+
+
+def write_record(record: dict[str, Any]) -> None:
+    """Append one record; tracing must never break a turn, so errors are dropped."""
+    path = trace_log_path()
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    with _write_lock:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists() and path.stat().st_size + len(line) > _max_bytes():
+                _rotate(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            pass
+
+
+def read_records(limit: int = 200) -> list[dict[str, Any]]:
+    """Most recent `limit` turn records, oldest first (includes rotated files)."""
+    path = trace_log_path()
+    files = [path.with_name(f"{path.name}.{i}") for i in range(_BACKUP_COUNT, 0, -1)] + [path]
+    records: list[dict[str, Any]] = []
+    for p in files:
+        try:
+            with open(p, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except OSError:
+            continue
+    return records[-limit:] if limit > 0 else records
+
+
+# ---- Reporting -------------------------------------------------------------
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def stage_stats(records: list[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """Per-stage count / p50 / p95 / max in ms; a stage's durations are summed per turn."""
+    per_stage: dict[str, list[float]] = {}
+    for rec in records:
+        per_turn: dict[str, float] = {}
+        for sp in rec.get("spans") or []:
+            name = str(sp.get("name"))
+            per_turn[name] = per_turn.get(name, 0.0) + float(sp.get("dur_ms") or 0.0)
+        for name, bucket in (rec.get("totals") or {}).items():
+            per_turn[name] = per_turn.get(name, 0.0) + float(bucket.get("total_ms") or 0.0)
+        per_turn["turn_total"] = float(rec.get("total_ms") or 0.0)
+        for name, value in per_turn.items():
+            per_stage.setdefault(name, []).append(value)
+    return {
+        name: {
+            "count": len(vals),
+            "p50_ms": round(percentile(vals, 50), 2),
+            "p95_ms": round(percentile(vals, 95), 2),
+            "max_ms": round(max(vals), 2),
+        }
+        for name, vals in per_stage.items()
+    }
+
+
+def usage_stats(records: list[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """p50/p95/max per turn of token counts and prefill ms per prompt section.
+
+    Reads the `usage` summary the agent stores on each turn; turns without
+    one (fast-path answers with no model call, older records) are skipped.
+    """
+    per_key: dict[str, list[float]] = {}
+    for rec in records:
+        usage = rec.get("usage")
+        if not isinstance(usage, dict):
+            continue
+        values = {k: usage.get(k) for k in ("prompt_tokens", "cached_tokens", "completion_tokens", "prompt_ms")}
+        for section, ms in (usage.get("prefill_ms") or {}).items():
+            values[f"prefill_ms.{section}"] = ms
+        for key, value in values.items():
+            per_key.setdefault(key, []).append(float(value or 0.0))
+    return {
+        key: {
+            "count": len(vals),
+            "p50": round(percentile(vals, 50), 2),
+            "p95": round(percentile(vals, 95), 2),
+            "max": round(max(vals), 2),
+        }
+        for key, vals in per_key.items()
+    }
+
+
+def _print_summary(limit: int) -> None:
+    records = read_records(limit)
+    print(f"Turn traces: {trace_log_path()}")
+    if not records:
+        print("  no turns recorded yet")
+        return
+    print(f"  last {len(records)} turns")
+    stats = stage_stats(records)
+    width = max(len(n) for n in stats)
+    print(f"  {'stage'.ljust(width)}  {'n':>5}  {'p50 ms':>9}  {'p95 ms':>9}  {'max ms':>9}")
+    for name, s in sorted(stats.items(), key=lambda kv: -kv[1]["p50_ms"]):
+        print(
+            f"  {name.ljust(width)}  {s['count']:>5}  {s['p50_ms']:>9.1f}"
+            f"  {s['p95_ms']:>9.1f}  {s['max_ms']:>9.1f}"
+        )
+    usage = usage_stats(records)
+    if usage:
+        width = max(len(n) for n in usage)
+        print(f"  {'tokens / prefill'.ljust(width)}  {'n':>5}  {'p50':>9}  {'p95':>9}  {'max':>9}")
+        for name, s in usage.items():
+            print(f"  {name.ljust(width)}  {s['count']:>5}  {s['p50']:>9.1f}  {s['p95']:>9.1f}  {s['max']:>9.1f}")
+
+
+def _print_tail(limit: int) -> None:
+    for rec in read_records(limit):
+        stages = ", ".join(
+            f"{sp.get('name')}={sp.get('dur_ms')}"
+            + (f"[{sp['tool']}]" if sp.get("tool") else "")
+            for sp in rec.get("spans") or []
+        )
+        usage = rec.get("usage") or {}
+        tokens = (
+            f" tokens={usage.get('prompt_tokens')}/{usage.get('cached_tokens')}c/{usage.get('completion_tokens')}"
+            if usage else ""
+        )
+        print(f"{rec.get('ts')} {rec.get('plan', '?')} total={rec.get('total_ms')}ms{tokens} {stages}")
+
+
+def main(argv: list[str]) -> int:
+    cmd = argv[0] if argv else "summary"
+    try:
+        limit = int(argv[1]) if len(argv) > 1 else (200 if cmd == "summary" else 20)
+    except ValueError:
+        limit = 20
+    if cmd == "summary":
+        _print_summary(limit)
+    elif cmd == "tail":
+        _print_tail(limit)
+    else:
+        print("usage: tracing.py [summary|tail] [N]", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
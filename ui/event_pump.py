@@ -0,0 +1,150 @@
+"""Coalescing worker -> GTK main loop event pump.
+
+Worker threads used to call `GLib.idle_add` once per streamed token and once
+per debug line, which at high token rates queues thousands of tiny main-loop
+sources. `EventPump` replaces that with one thread-safe queue and at most one
+pending main-loop source:
+
+- `post(callback, *args)` queues an arbitrary UI callback (ordered FIFO).
+- `post_chunk(callback, text)` queues streamed text; consecutive chunks for
+  the same callback are merged into one string, so a burst of tokens becomes
+  a single UI update.
+- The drain callback runs on the main loop, applies everything pending (up to
+  a small time budget per frame) and re-arms itself only if work remains.
+- Backpressure: when the UI falls behind by more than `max_pending_chars` of
+  un-applied text or `max_pending_events` queued callbacks, producers block
+  (in short waits, so cancellation still works) until the main loop catches up.
+
+The module does not import gi; the scheduling function (normally
+`GLib.idle_add`) is injected so the pump can be unit-tested headless.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+DEFAULT_MAX_PENDING_CHARS = 64_000
+DEFAULT_MAX_PENDING_EVENTS = 512
+# Main-loop time we allow one drain to take before yielding back to GTK
+# (about half a 60 Hz frame).
+DEFAULT_FRAME_BUDGET_S = 0.008
+
+
+class _Chunk:
+    __slots__ = ("callback", "parts", "size")
+
+    def __init__(self, callback: Callable[[str], Any], text: str):
+        self.callback = callback
+        self.parts = [text]
+        self.size = len(text)
+
+
+class EventPump:
+    """Thread-safe queue of UI callbacks drained by a single idle source."""
+
+    def __init__(
+        self,
+        schedule: Callable[[Callable[[], bool]], Any],
+        *,
+        max_pending_chars: int = DEFAULT_MAX_PENDING_CHARS,
+        max_pending_events: int = DEFAULT_MAX_PENDING_EVENTS,
+        frame_budget_s: float = DEFAULT_FRAME_BUDGET_S,
+    ):
+        self._schedule = schedule
+        self._max_chars = max(1, int(max_pending_chars))
+        self._max_events = max(1, int(max_pending_events))
+        self._frame_budget_s = max(0.0, float(frame_budget_s))
+        self._cond = threading.Condition()
+        self._queue: deque[_Chunk | tuple[Callable[..., Any], tuple]] = deque()
+        self._pending_chars = 0
+        self._scheduled = False
+        self._closed = False
+        self._main_thread: threading.Thread | None = None
+
+    # ---------- producer side (any thread) ----------
+
+    def post(self, callback: Callable[..., Any], *args: Any) -> None:
+        """Queue `callback(*args)` to run on the main loop, in order."""
+        with self._cond:
+            self._wait_for_room(0)
+            if self._closed:
+                return
+            self._queue.append((callback, args))
+            self._arm_locked()
+
+    def post_chunk(self, callback: Callable[[str], Any], text: str) -> None:
+        """Queue streamed text; merges with a pending chunk for the same callback."""
+        if not text:
+            return
+        with self._cond:
+            self._wait_for_room(len(text))
+            if self._closed:
+                return
+            tail = self._queue[-1] if self._queue else None
+            if isinstance(tail, _Chunk) and tail.callback == callback:
+                tail.parts.append(text)
+                tail.size += len(text)
+            else:
+                self._queue.append(_Chunk(callback, text))
+            self._pending_chars += len(text)
+            self._arm_locked()
+
+    def close(self) -> None:
+        """Drop pending work and release any blocked producers."""
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self._pending_chars = 0
+            self._cond.notify_all()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def _wait_for_room(self, incoming_chars: int) -> None:
+        # Never block the thread that drains the queue (that would deadlock).
+        if self._main_thread is threading.current_thread():
+            return
+        while not self._closed and (
+            len(self._queue) >= self._max_events
+            or (self._pending_chars > 0 and self._pending_chars + incoming_chars > self._max_chars)
+        ):
+            self._cond.wait(0.05)
+
+    def _arm_locked(self) -> None:
+        if not self._scheduled:
+            self._scheduled = True
+            self._schedule(self._drain)
+
+    # ---------- consumer side (main loop) ----------
+
+    def _drain(self) -> bool:
+        """Main-loop callback: apply pending events; True keeps the source alive."""
+        if self._main_thread is None:
+            self._main_thread = threading.current_thread()
+        deadline = time.monotonic() + self._frame_budget_s
+        while True:
+            with self._cond:
+                if not self._queue:
+                    self._scheduled = False
+                    self._cond.notify_all()
+                    return False
+                entry = self._queue.popleft()
+                if isinstance(entry, _Chunk):
+                    self._pending_chars -= entry.size
+                self._cond.notify_all()
+            if isinstance(entry, _Chunk):
+                entry.callback("".join(entry.parts))
+            else:
+                callback, args = entry
+                callback(*args)
+            if time.monotonic() >= deadline:
+                with self._cond:
+                    if not self._queue:
+                        self._scheduled = False
+                        return False
+                # Yield to GTK for input/redraw; the same source runs again.
+                return True
@@ -0,0 +1,39 @@
+"""Keeps a recycled transcript row in sync with the item bound to it.
+
+Gtk.ListView recycles row widgets: a row is bound to one TranscriptItem,
+later unbound and bound to another. While bound, the row must re-render
+whenever the item's `text` changes (streamed tokens update the last
+message in place), and the change handler must be dropped on unbind, or a
+recycled row would keep rendering a message it no longer shows.
+
+The module does not import gi; items only need GObject's
+`connect("notify::text", ...)` / `disconnect(id)`, so the binding can be
+unit-tested headless.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+
+class RowBinding:
+    """The item a row currently shows, re-rendered on `notify::text`."""
+
+    __slots__ = ("_render", "item", "_handler_id")
+
+    def __init__(self, render: Callable[[Any], None]):
+        self._render = render  # fully (re)writes the row for an item
+        self.item: Any = None
+        self._handler_id: int | None = None
+
+    def bind(self, item: Any) -> None:
+        self.unbind()
+        self._render(item)
+        self.item = item
+        self._handler_id = item.connect("notify::text", lambda it, _pspec: self._render(it))
+
+    def unbind(self) -> None:
+        if self.item is not None and self._handler_id is not None:
+            self.item.disconnect(self._handler_id)
+        self.item = None
+        self._handler_id = None
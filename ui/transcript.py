@@ -0,0 +1,153 @@
+"""Virtualized chat transcript: one lazily rendered row per message.
+
+The transcript model is a Gio.ListStore of lightweight TranscriptItem objects
+(sender / text / kind strings only). A Gtk.ListView creates row widgets just
+for the messages near the viewport and recycles them while scrolling, so
+loading a long session is a single store splice, and widget + text-buffer
+memory is bounded by what is on screen rather than by the conversation length.
+
+Rendering is delegated to a callback supplied by the window, which owns the
+shared Gtk.TextTagTable (theme tags, link tags) and the Markdown renderer.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+
+import gi  # type: ignore
+gi.require_version("Gtk", "4.0")
+from gi.repository import Gio, GLib, GObject, Gtk  # type: ignore
+
+from ui.row_binding import RowBinding
+
+KIND_MESSAGE = "message"   # "You: ..." / "Meera: ..." bubble
+KIND_NOTICE = "notice"     # plain status line (tool running, debug output)
+KIND_TYPING = "typing"     # transient "Meera: Thinking..." placeholder
+
+
+class TranscriptItem(GObject.Object):
+    """One row of the transcript. Updating `text` re-renders the bound row."""
+
+    __gtype_name__ = "MeeraTranscriptItem"
+
+    sender = GObject.Property(type=str, default="")
+    kind = GObject.Property(type=str, default=KIND_MESSAGE)
+    text = GObject.Property(type=str, default="")
+
+    def __init__(self, sender: str = "", text: str = "", kind: str = KIND_MESSAGE):
+        super().__init__(sender=sender, text=text, kind=kind)
+
+
+class ChatTranscript:
+    """Gtk.ListView over a Gio.ListStore of TranscriptItems.
+
+    `render(buffer, item)` must fully (re)write `buffer` for `item`; it is
+    called when a row is bound to an item and whenever that item's text
+    changes while bound. Buffers share `tag_table`, so theme changes only
+    touch the tags once.
+    """
+
+    def __init__(
+        self,
+        tag_table: Gtk.TextTagTable,
+        render: Callable[[Gtk.TextBuffer, TranscriptItem], None],
+        on_click: Callable[[Gtk.TextView, float, float], None] | None = None,
+    ):
+        self._tag_table = tag_table
+        self._render = render
+        self._on_click = on_click
+        self._scroll_pending = False
+
+        self.store = Gio.ListStore(item_type=TranscriptItem)
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup)
+        factory.connect("bind", self._on_bind)
+        factory.connect("unbind", self._on_unbind)
+
+        self.view = Gtk.ListView(model=Gtk.NoSelection(model=self.store), factory=factory)
+        self.view.add_css_class("meera-chat-view")
+
+        self.scroll = Gtk.ScrolledWindow()
+        self.scroll.set_child(self.view)
+        self.scroll.set_hexpand(True)
+        self.scroll.set_vexpand(True)
+
+    # ---------- row factory ----------
+
+    def _on_setup(self, _factory, list_item):
+        list_item.set_activatable(False)
+        list_item.set_selectable(False)
+        text_view = Gtk.TextView.new_with_buffer(Gtk.TextBuffer.new(self._tag_table))
+        text_view.set_editable(False)
+        text_view.set_cursor_visible(False)
+        text_view.set_wrap_mode(Gtk.WrapMode.WORD_CHAR)
+        text_view.set_margin_top(4)
+        text_view.set_margin_bottom(8)
+        text_view.add_css_class("meera-chat-row")
+        if self._on_click is not None:
+            click = Gtk.GestureClick()
+            click.connect(
+                "released",
+                lambda gesture, _n, x, y: self._on_click(gesture.get_widget(), x, y),
+            )
+            text_view.add_controller(click)
+        buf = text_view.get_buffer()
+        text_view._meera_binding = RowBinding(lambda item: self._render(buf, item))
+        list_item.set_child(text_view)
+
+    def _on_bind(self, _factory, list_item):
+        list_item.get_child()._meera_binding.bind(list_item.get_item())
+
+    def _on_unbind(self, _factory, list_item):
+        text_view = list_item.get_child()
+        text_view._meera_binding.unbind()
+        text_view.get_buffer().set_text("")
+
+    # ---------- model helpers ----------
+
+    def __len__(self) -> int:
+        return self.store.get_n_items()
+
+    def append(self, item: TranscriptItem) -> TranscriptItem:
+        self.store.append(item)
+        self.scroll_to_end()
+        return item
+
+    def extend(self, items: Iterable[TranscriptItem]) -> None:
+        """Append many items with a single model change notification."""
+        batch = list(items)
+        if batch:
+            self.store.splice(self.store.get_n_items(), 0, batch)
+            self.scroll_to_end()
+
+    def remove(self, item: TranscriptItem) -> None:
+        found, position = self.store.find(item)
+        if found:
+            self.store.remove(position)
+
+    def clear(self) -> None:
+        self.store.splice(0, self.store.get_n_items(), [])
+
+    def queue_draw(self) -> None:
+        self.view.queue_draw()
+
+    # ---------- scrolling ----------
+
+    def scroll_to_end(self) -> None:
+        """Scroll to the newest row once the list has been re-laid out."""
+        if self._scroll_pending:
+            return
+        self._scroll_pending = True
+        GLib.idle_add(self._scroll_to_end_idle)
+
+    def _scroll_to_end_idle(self):
+        self._scroll_pending = False
+        n = self.store.get_n_items()
+        if n == 0:
+            return False
+        if hasattr(self.view, "scroll_to"):
+            # GTK >= 4.12: realizes the last row even if it was never bound.
+            self.view.scroll_to(n - 1, Gtk.ListScrollFlags.NONE, None)
+        else:
+            adj = self.scroll.get_vadjustment()
+            adj.set_value(adj.get_upper() - adj.get_page_size())
+        return False
@@ -20,9 +20,15 @@ except (ValueError, ImportError):
     ADW_AVAILABLE = False
 
 import threading
-from retrieval import get_index
+import time
+import supervisor
+import tracing
+from retrieval import start_index_build
+from tools import reminder_queue, telemetry
 from inference import stream_llm
-from history import save_session, list_sessions, load_session
+from history import SessionAutosaver, SessionTitler, list_sessions, new_session_path, search_history
+from ui.event_pump import EventPump
+from ui.transcript import KIND_MESSAGE, KIND_NOTICE, KIND_TYPING, ChatTranscript, TranscriptItem
 
 from agent import (
     TOOL_FEEDBACK_PREFIX,
@@ -68,17 +74,26 @@ class MeeraWindow(Gtk.Window):
         # State for streaming
         self.is_streaming = False
         self.cancel_stream = False
+        # Worker threads hand UI updates to the main loop through one coalescing
+        # queue instead of an idle source per streamed token.
+        self._ui_events = EventPump(GLib.idle_add)
+        # Latency trace for the turn in flight (spans recorded by the worker,
+        # render time added here on the main loop).
+        self._active_trace = None
         
         # Conversation history for context
         self.conversation_history = []
         self.current_session_filepath = None
+        # Sessions are written by a background thread, debounced after each turn.
+        self._autosaver = SessionAutosaver()
+        # Titles are generated as background model work, on a spare llama-server slot.
+        self._titler = SessionTitler()
         self._streaming_message_active = False
-        self._streaming_body_start_mark = None
+        self._streaming_item = None
         self._streaming_render_buffer = ""
         self._streaming_render_dirty = False
         self._streaming_refresh_active = False
-        self._typing_start_mark = None
-        self._typing_end_mark = None
+        self._typing_item = None
 
         # Base system identity (Phase 3 augments with tools catalog when MEERA_AGENT_TOOLS is on).
         self._system_identity = (
@@ -197,21 +212,21 @@ class MeeraWindow(Gtk.Window):
         root_box.append(vbox)
 
         # ---------- CHAT AREA WITH OVERLAY BACKGROUND ----------
-        # Chat TextView
-        self.chat_view = Gtk.TextView()
-        self.chat_view.set_editable(False)
-        self.chat_view.set_wrap_mode(Gtk.WrapMode.WORD_CHAR)
-        self.chat_view.add_css_class("meera-chat-view")
-        self.chat_buf = self.chat_view.get_buffer()
+        # Every transcript row renders into its own small buffer; all of them
+        # share this tag table so theme and link tags exist exactly once.
+        self.chat_tag_table = Gtk.TextTagTable()
         self._link_tags: dict[str, str] = {}
 
-        click_controller = Gtk.GestureClick()
-        click_controller.connect("released", self._on_chat_click_released)
-        self.chat_view.add_controller(click_controller)
-
         # Create theme-aware text tags
         self._create_text_tags()
 
+        # Virtualized transcript: rows are created lazily and recycled.
+        self.transcript = ChatTranscript(
+            self.chat_tag_table,
+            self._render_transcript_item,
+            on_click=self._on_chat_click_released,
+        )
+
         # Overlay ONLY for the chat area
         chat_overlay = Gtk.Overlay()
         vbox.append(chat_overlay)
@@ -222,10 +237,7 @@ class MeeraWindow(Gtk.Window):
         chat_overlay.set_child(bg_picture)
 
         # Scrolled chat view on top of the image
-        scroll = Gtk.ScrolledWindow()
-        scroll.set_child(self.chat_view)
-        scroll.set_hexpand(True)
-        scroll.set_vexpand(True)
+        scroll = self.transcript.scroll
         scroll.add_css_class("meera-scroll")
         chat_overlay.add_overlay(scroll)
 
@@ -278,6 +290,17 @@ class MeeraWindow(Gtk.Window):
         # Warm retrieval index in background so first prompt is faster.
         self._start_retrieval_prewarm()
 
+        # Keep the llama-servers running; restarts/failures show up as notices.
+        self._start_server_supervisor()
+
+        # Opt-in (MEERA_TELEMETRY=1): resource history for the process tools.
+        telemetry.start_default()
+
+        # MEERA_REMINDER_BACKEND=meera: reminders fire from this process, overdue ones now.
+        if reminder_queue.backend_from_env() == "meera":
+            reminder_queue.set_app_notifier(self._post_app_notification)
+            reminder_queue.start_default()
+
     # ---------- theme detection and styling ----------
     
     def _detect_theme(self) -> bool:
@@ -318,6 +341,10 @@ class MeeraWindow(Gtk.Window):
             .meera-scroll {
                 background-color: rgba(20,20,20,0.7);
             }
+            .meera-chat-view > row,
+            .meera-chat-row {
+                background-color: transparent;
+            }
             """
         else:
             # Light theme: light background
@@ -327,6 +354,10 @@ class MeeraWindow(Gtk.Window):
             .meera-scroll {
                 background-color: rgba(230,230,230,0.75);
             }
+            .meera-chat-view > row,
+            .meera-chat-row {
+                background-color: transparent;
+            }
             """
         
         self._css_provider.load_from_data(css.encode("utf-8"))
@@ -340,11 +371,11 @@ class MeeraWindow(Gtk.Window):
                 )
                 self._css_provider_installed = True
 
-    def _ensure_tag(self, buf: Gtk.TextBuffer, name: str, **properties) -> Gtk.TextTag:
-        tag_table = buf.get_tag_table()
+    def _ensure_tag(self, tag_table: Gtk.TextTagTable, name: str, **properties) -> Gtk.TextTag:
         tag = tag_table.lookup(name)
         if tag is None:
-            tag = buf.create_tag(name)
+            tag = Gtk.TextTag(name=name)
+            tag_table.add(tag)
         for key, value in properties.items():
             tag.set_property(key, value)
         return tag
@@ -354,45 +385,45 @@ class MeeraWindow(Gtk.Window):
         if self.is_dark_theme:
             # Dark theme: white text
             self.text_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "text_fg",
                 foreground="#ffffff",
             )
             # Bold tag for sender names
             self.bold_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "bold_fg",
                 foreground="#ffffff",
                 weight=Pango.Weight.BOLD,
             )
             # Right alignment tag for user messages
             self.user_right_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "user_right",
                 justification=Gtk.Justification.RIGHT,
             )
             self.italic_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "italic_fg",
                 foreground="#ffffff",
                 style=Pango.Style.ITALIC,
             )
             self.inline_code_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "inline_code",
                 foreground="#d4d4d4",
                 family="monospace",
                 background="#2b2b2b",
             )
             self.code_block_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "code_block",
                 foreground="#d4d4d4",
                 family="monospace",
                 background="#1f1f1f",
             )
             self.heading_h1_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "heading_h1",
                 weight=Pango.Weight.BOLD,
                 size_points=15.0,
@@ -400,7 +431,7 @@ class MeeraWindow(Gtk.Window):
                 pixels_below_lines=4,
             )
             self.heading_h2_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "heading_h2",
                 weight=Pango.Weight.BOLD,
                 size_points=13.0,
@@ -408,7 +439,7 @@ class MeeraWindow(Gtk.Window):
                 pixels_below_lines=3,
             )
             self.heading_h3_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "heading_h3",
                 weight=Pango.Weight.BOLD,
                 size_points=12.0,
@@ -418,45 +449,45 @@ class MeeraWindow(Gtk.Window):
         else:
             # Light theme: black text
             self.text_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "text_fg",
                 foreground="#000000",
             )
             # Bold tag for sender names
             self.bold_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "bold_fg",
                 foreground="#000000",
                 weight=Pango.Weight.BOLD,
             )
             # Right alignment tag for user messages
             self.user_right_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "user_right",
                 justification=Gtk.Justification.RIGHT,
             )
             self.italic_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "italic_fg",
                 foreground="#000000",
                 style=Pango.Style.ITALIC,
             )
             self.inline_code_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "inline_code",
                 foreground="#1f1f1f",
                 family="monospace",
                 background="#e8e8e8",
             )
             self.code_block_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "code_block",
                 foreground="#1f1f1f",
                 family="monospace",
                 background="#efefef",
             )
             self.heading_h1_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "heading_h1",
                 weight=Pango.Weight.BOLD,
                 size_points=15.0,
@@ -464,7 +495,7 @@ class MeeraWindow(Gtk.Window):
                 pixels_below_lines=4,
             )
             self.heading_h2_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "heading_h2",
                 weight=Pango.Weight.BOLD,
                 size_points=13.0,
@@ -472,7 +503,7 @@ class MeeraWindow(Gtk.Window):
                 pixels_below_lines=3,
             )
             self.heading_h3_tag = self._ensure_tag(
-                self.chat_buf,
+                self.chat_tag_table,
                 "heading_h3",
                 weight=Pango.Weight.BOLD,
                 size_points=12.0,
@@ -487,14 +518,14 @@ class MeeraWindow(Gtk.Window):
         if self.is_dark_theme:
             # Dark theme: white text
             self.input_text_tag = self._ensure_tag(
-                self.input_buf,
+                self.input_buf.get_tag_table(),
                 "input_fg",
                 foreground="#ffffff",
             )
         else:
             # Light theme: black text
             self.input_text_tag = self._ensure_tag(
-                self.input_buf,
+                self.input_buf.get_tag_table(),
                 "input_fg",
                 foreground="#000000",
             )
@@ -531,32 +562,18 @@ class MeeraWindow(Gtk.Window):
         start = self.input_buf.get_start_iter()
         end_iter = self.input_buf.get_end_iter()
         self.input_buf.apply_tag(self.input_text_tag, start, end_iter)
-        self.chat_view.queue_draw()
+        self.transcript.queue_draw()
         self.input_view.queue_draw()
         return False
 
     # ---------- helper methods ----------
 
     def _append_text(self, text: str):
-        buf = self.chat_buf
-
-        # Record where this chunk starts
-        start_offset = buf.get_char_count()
-
-        # Insert new text at the end
-        buf.insert(buf.get_end_iter(), text)
-
-        # Record where this chunk ends
-        end_offset = buf.get_char_count()
-
-        # Apply theme-aware text tag just to this new chunk
-        start_iter = buf.get_iter_at_offset(start_offset)
-        end_iter = buf.get_iter_at_offset(end_offset)
-        buf.apply_tag(self.text_tag, start_iter, end_iter)
-
-        # Scroll to bottom
-        mark = buf.create_mark(None, buf.get_end_iter(), False)
-        self.chat_view.scroll_to_mark(mark, 0.0, True, 0.0, 1.0)
+        """Append a plain status line (tool progress, debug output) to the transcript."""
+        line = text.strip("\n")
+        if line:
+            self.transcript.append(TranscriptItem(text=line, kind=KIND_NOTICE))
+        return False
 
     def _append_tool_running_line(self, tool_name: str):
         """UI hint while executing a laptop tool (main thread)."""
@@ -568,8 +585,7 @@ class MeeraWindow(Gtk.Window):
             return False
         if not self._streaming_message_active:
             self._clear_typing_indicator()
-            self._insert_with_tags("Meera: ", [self.text_tag, self.bold_tag])
-            self._streaming_body_start_mark = self.chat_buf.create_mark(None, self.chat_buf.get_end_iter(), True)
+            self._streaming_item = self.transcript.append(TranscriptItem(sender="Meera"))
             self._streaming_message_active = True
             self._streaming_render_buffer = ""
             self._streaming_render_dirty = False
@@ -584,15 +600,10 @@ class MeeraWindow(Gtk.Window):
                 self._streaming_render_buffer = full_response
                 self._streaming_render_dirty = True
             self._refresh_streaming_message_preview()
-            self._insert_with_tags("\n\n", [self.text_tag])
-            mark = self.chat_buf.create_mark(None, self.chat_buf.get_end_iter(), False)
-            self.chat_view.scroll_to_mark(mark, 0.0, True, 0.0, 1.0)
             self._streaming_message_active = False
         self._streaming_render_buffer = ""
         self._streaming_render_dirty = False
-        if self._streaming_body_start_mark is not None:
-            self.chat_buf.delete_mark(self._streaming_body_start_mark)
-            self._streaming_body_start_mark = None
+        self._streaming_item = None
         return False
 
     def _ensure_streaming_refresh_timer(self):
@@ -609,21 +620,43 @@ class MeeraWindow(Gtk.Window):
         return True
 
     def _refresh_streaming_message_preview(self):
-        if not self._streaming_render_dirty or self._streaming_body_start_mark is None:
+        if not self._streaming_render_dirty or self._streaming_item is None:
             return
-        buf = self.chat_buf
-        start_iter = buf.get_iter_at_mark(self._streaming_body_start_mark)
-        end_iter = buf.get_end_iter()
-        buf.delete(start_iter, end_iter)
-        self._insert_markdown(self._streaming_render_buffer)
+        # The bound row (if the message is on screen) re-renders on notify::text.
+        self._streaming_item.set_property("text", self._streaming_render_buffer)
         self._streaming_render_dirty = False
-        mark = buf.create_mark(None, buf.get_end_iter(), False)
-        self.chat_view.scroll_to_mark(mark, 0.0, True, 0.0, 1.0)
+        self.transcript.scroll_to_end()
+
+    def _render_transcript_item(self, buf: Gtk.TextBuffer, item: TranscriptItem):
+        """Write one transcript row into its (recycled) row buffer."""
+        started = time.perf_counter()
+        try:
+            self._render_transcript_row(buf, item)
+        finally:
+            if self._active_trace is not None:
+                self._active_trace.accumulate("ui_render", time.perf_counter() - started)
+
+    def _render_transcript_row(self, buf: Gtk.TextBuffer, item: TranscriptItem):
+        buf.set_text("")
+        kind = item.get_property("kind")
+        text = item.get_property("text")
+        if kind == KIND_NOTICE:
+            self._insert_with_tags(buf, text, [self.text_tag])
+            return
+        sender = item.get_property("sender")
+        self._insert_with_tags(buf, f"{sender}: ", [self.text_tag, self.bold_tag])
+        if kind == KIND_TYPING:
+            self._insert_with_tags(buf, "Thinking...", [self.text_tag, self.italic_tag])
+        elif sender == "Meera":
+            self._insert_markdown(buf, text)
+        else:
+            self._insert_with_tags(buf, text, [self.text_tag])
+        if sender == "You":
+            buf.apply_tag(self.user_right_tag, buf.get_start_iter(), buf.get_end_iter())
 
-    def _insert_with_tags(self, text: str, tags: list[Gtk.TextTag]):
+    def _insert_with_tags(self, buf: Gtk.TextBuffer, text: str, tags: list[Gtk.TextTag]):
         if not text:
             return
-        buf = self.chat_buf
         start = buf.get_char_count()
         buf.insert(buf.get_end_iter(), text)
         end = buf.get_char_count()
@@ -639,10 +672,11 @@ class MeeraWindow(Gtk.Window):
                 existing_name = name
                 break
         if existing_name is not None:
-            return self.chat_buf.get_tag_table().lookup(existing_name)
+            return self.chat_tag_table.lookup(existing_name)
 
         tag_name = f"link_{len(self._link_tags) + 1}"
-        link_tag = self.chat_buf.create_tag(
+        link_tag = self._ensure_tag(
+            self.chat_tag_table,
             tag_name,
             foreground="#4a90e2",
             underline=Pango.Underline.SINGLE,
@@ -651,7 +685,7 @@ class MeeraWindow(Gtk.Window):
         return link_tag
 
     def _insert_inline_markdown(
-        self, text: str, base_tags: list[Gtk.TextTag] | None = None
+        self, buf: Gtk.TextBuffer, text: str, base_tags: list[Gtk.TextTag] | None = None
     ):
         if base_tags is None:
             base_tags = [self.text_tag]
@@ -662,28 +696,28 @@ class MeeraWindow(Gtk.Window):
         for match in token_pattern.finditer(text):
             start, end = match.span()
             if start > pos:
-                self._insert_with_tags(text[pos:start], base_tags)
+                self._insert_with_tags(buf, text[pos:start], base_tags)
 
             if match.group(1):
                 label = match.group(2)
                 url = match.group(3)
-                self._insert_with_tags(label, base_tags + [self._link_tag_for_url(url)])
+                self._insert_with_tags(buf, label, base_tags + [self._link_tag_for_url(url)])
             elif match.group(4):
-                self._insert_with_tags(match.group(5), base_tags + [self.bold_tag])
+                self._insert_with_tags(buf, match.group(5), base_tags + [self.bold_tag])
             elif match.group(6):
-                self._insert_with_tags(match.group(7), base_tags + [self.bold_tag])
+                self._insert_with_tags(buf, match.group(7), base_tags + [self.bold_tag])
             elif match.group(8):
-                self._insert_with_tags(match.group(9), [self.inline_code_tag])
+                self._insert_with_tags(buf, match.group(9), [self.inline_code_tag])
             elif match.group(10):
-                self._insert_with_tags(match.group(11), base_tags + [self.italic_tag])
+                self._insert_with_tags(buf, match.group(11), base_tags + [self.italic_tag])
             elif match.group(12):
-                self._insert_with_tags(match.group(13), base_tags + [self.italic_tag])
+                self._insert_with_tags(buf, match.group(13), base_tags + [self.italic_tag])
             pos = end
 
         if pos < len(text):
-            self._insert_with_tags(text[pos:], base_tags)
+            self._insert_with_tags(buf, text[pos:], base_tags)
 
-    def _insert_markdown(self, text: str):
+    def _insert_markdown(self, buf: Gtk.TextBuffer, text: str):
         lines = text.splitlines(keepends=True)
         in_code_block = False
 
@@ -694,7 +728,7 @@ class MeeraWindow(Gtk.Window):
                 continue
 
             if in_code_block:
-                self._insert_with_tags(line, [self.code_block_tag])
+                self._insert_with_tags(buf, line, [self.code_block_tag])
                 continue
 
             has_newline = line.endswith("\n")
@@ -707,15 +741,15 @@ class MeeraWindow(Gtk.Window):
                     if level == 1
                     else (self.heading_h2_tag if level == 2 else self.heading_h3_tag)
                 )
-                self._insert_inline_markdown(title, [self.text_tag, heading_tag])
+                self._insert_inline_markdown(buf, title, [self.text_tag, heading_tag])
             else:
-                self._insert_inline_markdown(content)
+                self._insert_inline_markdown(buf, content)
             if has_newline:
-                self._insert_with_tags("\n", [self.text_tag])
+                self._insert_with_tags(buf, "\n", [self.text_tag])
 
-    def _on_chat_click_released(self, gesture, n_press, x, y):
+    def _on_chat_click_released(self, text_view: Gtk.TextView, x: float, y: float):
         try:
-            ok, iter_at_click = self.chat_view.get_iter_at_location(int(x), int(y))
+            ok, iter_at_click = text_view.get_iter_at_location(int(x), int(y))
         except Exception:
             return
         if not ok:
@@ -730,69 +764,69 @@ class MeeraWindow(Gtk.Window):
                     pass
                 break
 
+    def _message_item(self, sender: str, text: str) -> TranscriptItem:
+        return TranscriptItem(sender=sender, text=text, kind=KIND_MESSAGE)
+
     def _append_message_line(self, sender: str, text: str):
-        buf = self.chat_buf
         if sender == "Meera":
             self._clear_typing_indicator()
-        start_offset = buf.get_char_count()
-        self._insert_with_tags(f"{sender}: ", [self.text_tag, self.bold_tag])
-
-        if sender == "Meera":
-            self._insert_markdown(text)
-        else:
-            self._insert_with_tags(text, [self.text_tag])
-
-        self._insert_with_tags("\n\n", [self.text_tag])
-
-        if sender == "You":
-            end_offset = buf.get_char_count()
-            start_iter = buf.get_iter_at_offset(start_offset)
-            end_iter = buf.get_iter_at_offset(end_offset)
-            buf.apply_tag(self.user_right_tag, start_iter, end_iter)
-
-        mark = buf.create_mark(None, buf.get_end_iter(), False)
-        self.chat_view.scroll_to_mark(mark, 0.0, True, 0.0, 1.0)
+        self.transcript.append(self._message_item(sender, text))
 
     def _show_typing_indicator(self):
-        if self._typing_start_mark is not None:
+        if self._typing_item is not None:
             return
-        buf = self.chat_buf
-        start_iter = buf.get_end_iter()
-        self._typing_start_mark = buf.create_mark(None, start_iter, True)
-        self._insert_with_tags("Meera: ", [self.text_tag, self.bold_tag])
-        self._insert_with_tags("Thinking...", [self.text_tag, self.italic_tag])
-        self._insert_with_tags("\n\n", [self.text_tag])
-        end_iter = buf.get_end_iter()
-        self._typing_end_mark = buf.create_mark(None, end_iter, False)
-        mark = buf.create_mark(None, buf.get_end_iter(), False)
-        self.chat_view.scroll_to_mark(mark, 0.0, True, 0.0, 1.0)
+        self._typing_item = self.transcript.append(
+            TranscriptItem(sender="Meera", kind=KIND_TYPING)
+        )
 
     def _clear_typing_indicator(self):
-        if self._typing_start_mark is None or self._typing_end_mark is None:
-            self._typing_start_mark = None
-            self._typing_end_mark = None
+        if self._typing_item is None:
             return
-        buf = self.chat_buf
-        start_iter = buf.get_iter_at_mark(self._typing_start_mark)
-        end_iter = buf.get_iter_at_mark(self._typing_end_mark)
-        buf.delete(start_iter, end_iter)
-        buf.delete_mark(self._typing_start_mark)
-        buf.delete_mark(self._typing_end_mark)
-        self._typing_start_mark = None
-        self._typing_end_mark = None
+        self.transcript.remove(self._typing_item)
+        self._typing_item = None
 
     def _set_button_state(self, streaming: bool):
         self.send_button.set_label("⏹" if streaming else "↑")
 
     def _start_retrieval_prewarm(self):
-        def _worker():
-            try:
-                get_index()
-            except Exception:
-                # Best-effort warmup only; runtime retrieval will gracefully degrade.
-                pass
+        # Builds on a background thread; turns before it finishes use the
+        # lexical-only snapshot instead of waiting.
+        start_index_build()
+
+    def _post_app_notification(self, title: str, body: str):
+        """Show a desktop notification from this app (callable from any thread)."""
+        app = self.get_application()
+        if app is None:
+            raise RuntimeError("window has no application")
+        notification = Gio.Notification.new(title)
+        notification.set_body(body)
+        notification.set_priority(Gio.NotificationPriority.HIGH)
+        self._ui_events.post(app.send_notification, None, notification)
+
+    def _start_server_supervisor(self):
+        sup = supervisor.start_default()
+        if sup is None:
+            return
+        labels = {"chat": "Chat model", "embed": "Search model"}
+        last: dict[str, str] = {}
+
+        def _on_change(name, status):
+            state, previous = status["state"], last.get(name)
+            last[name] = state
+            label = labels.get(name, name)
+            if state == "failed":
+                text = f"{label} server keeps crashing; run `meera logs` for details."
+            elif state == "ready" and (
+                previous in ("backoff", "unhealthy", "failed") or (previous == "starting" and status["restarts"])
+            ):
+                text = f"{label} server is back."
+            elif state == "backoff" and previous == "ready":
+                text = f"{label} server stopped; restarting…"
+            else:
+                return
+            self._ui_events.post(self._append_text, text)
 
-        threading.Thread(target=_worker, daemon=True).start()
+        sup.add_listener(_on_change)
 
     def _initial_greeting(self):
         welcome = "Hi, I'm Meera. How can I help you today?"
@@ -877,10 +911,15 @@ class MeeraWindow(Gtk.Window):
         thread.start()
 
     def _stream_reply_worker(self):
-        if agent_tools_enabled():
-            self._stream_reply_worker_agent()
-        else:
-            self._stream_reply_worker_plain()
+        self._active_trace = tracing.begin_turn(source="ui")
+        try:
+            if agent_tools_enabled():
+                self._stream_reply_worker_agent()
+            else:
+                self._active_trace.set(plan="plain")
+                self._stream_reply_worker_plain()
+        finally:
+            tracing.detach_turn()
 
     def _stream_reply_worker_plain(self):
         try:
@@ -891,14 +930,14 @@ class MeeraWindow(Gtk.Window):
                 if self.cancel_stream:
                     break
                 full_response += chunk
-                GLib.idle_add(self._append_streaming_message_chunk, chunk)
+                self._ui_events.post_chunk(self._append_streaming_message_chunk, chunk)
 
             if not self.cancel_stream:
                 if full_response:
                     self.conversation_history.append({"role": "assistant", "content": full_response})
-                GLib.idle_add(self._finish_streaming_message_line, full_response)
+                self._ui_events.post(self._finish_streaming_message_line, full_response)
         finally:
-            GLib.idle_add(self._stream_finished)
+            self._ui_events.post(self._stream_finished)
 
     def _stream_reply_worker_agent(self):
         """Phase 4: drive one turn through the retrieval-first agent loop."""
@@ -907,7 +946,7 @@ class MeeraWindow(Gtk.Window):
         )
         if debug_tool_calls:
             # Keep debug lines visible: typing indicator clears would remove them.
-            GLib.idle_add(self._clear_typing_indicator)
+            self._ui_events.post(self._clear_typing_indicator)
 
         try:
             distro = detect_distro()
@@ -918,7 +957,7 @@ class MeeraWindow(Gtk.Window):
         # before it as history and the prompt itself separately.
         history_for_agent = list(self.conversation_history[:-1])
         if not self.conversation_history or self.conversation_history[-1].get("role") != "user":
-            GLib.idle_add(self._stream_finished)
+            self._ui_events.post(self._stream_finished)
             return
         user_text = str(self.conversation_history[-1].get("content") or "")
 
@@ -940,7 +979,7 @@ class MeeraWindow(Gtk.Window):
                         stage = event.get("stage", "?")
                         tools = event.get("tools") or []
                         rag = event.get("rag") or []
-                        GLib.idle_add(
+                        self._ui_events.post(
                             self._append_text,
                             f"\n[debug] stage={stage} tools={tools} rag={rag}\n",
                         )
@@ -948,17 +987,17 @@ class MeeraWindow(Gtk.Window):
                     tool = str(event.get("tool") or "?")
                     params = event.get("params") or {}
                     if debug_tool_calls:
-                        GLib.idle_add(
+                        self._ui_events.post(
                             self._append_text,
                             f"\n[debug] tool={tool!r} params={json.dumps(params, sort_keys=True, ensure_ascii=False)}\n",
                         )
-                    GLib.idle_add(self._append_tool_running_line, tool)
+                    self._ui_events.post(self._append_tool_running_line, tool)
                 elif kind == "tool_result":
                     mm = event.get("memory_message")
                     if isinstance(mm, str) and mm:
                         memory_messages.append(mm)
                     if debug_tool_calls:
-                        GLib.idle_add(
+                        self._ui_events.post(
                             self._append_text,
                             f"\n[debug] tool_result: ok={getattr(event.get('result'), 'ok', '?')}\n",
                         )
@@ -966,7 +1005,7 @@ class MeeraWindow(Gtk.Window):
                     chunk = event.get("text") or ""
                     if chunk:
                         full_response += chunk
-                        GLib.idle_add(self._append_streaming_message_chunk, chunk)
+                        self._ui_events.post_chunk(self._append_streaming_message_chunk, chunk)
                 elif kind == "done":
                     break
 
@@ -977,34 +1016,45 @@ class MeeraWindow(Gtk.Window):
                     self.conversation_history.append({"role": "assistant", "content": mm})
                 if full_response:
                     self.conversation_history.append({"role": "assistant", "content": full_response})
-                GLib.idle_add(self._finish_streaming_message_line, full_response)
+                self._ui_events.post(self._finish_streaming_message_line, full_response)
         finally:
-            GLib.idle_add(self._stream_finished)
+            self._ui_events.post(self._stream_finished)
 
     def _stream_finished(self):
         self._finish_streaming_message_line()
         self._clear_typing_indicator()
+        tracing.end_turn(self._active_trace, cancelled=self.cancel_stream)
+        self._active_trace = None
         self.is_streaming = False
         self.cancel_stream = False
         self._set_button_state(False)
+        self._autosave_session()
+        self._titler.request(self.conversation_history, self.current_session_filepath)
         return False
 
+    def _autosave_session(self):
+        """Queue the current conversation for the background session writer."""
+        if not self.conversation_history:
+            return
+        if not self.current_session_filepath:
+            self.current_session_filepath = new_session_path()
+        self._autosaver.schedule(self.conversation_history, self.current_session_filepath)
+
     # ---------- menu actions ----------
 
     def _on_new_chat_clicked(self, button=None):
         """Start a new chat session"""
-        if self.conversation_history:
-            self.current_session_filepath = save_session(
-                self.conversation_history,
-                self.current_session_filepath,
-            )
+        self._autosave_session()
         self.conversation_history = []
         self.current_session_filepath = None
-        self.chat_buf.set_text("")
+        self._typing_item = None
+        self.transcript.clear()
         self._initial_greeting()
 
     def _on_history_clicked(self, button=None):
         """Show the Chat History dialog"""
+        self._autosave_session()
+        self._autosaver.flush()  # list and search what is on disk, including the last turn
         sessions = list_sessions()
         
         history_window = Gtk.Window()
@@ -1027,6 +1077,11 @@ class MeeraWindow(Gtk.Window):
             no_sessions_label.set_margin_top(20)
             vbox.append(no_sessions_label)
         else:
+            # Search across every saved message; empty query shows the session list
+            search_entry = Gtk.SearchEntry()
+            search_entry.set_placeholder_text("Search chat history")
+            vbox.append(search_entry)
+
             # Scrolled window for session list
             scroll = Gtk.ScrolledWindow()
             scroll.set_vexpand(True)
@@ -1041,6 +1096,14 @@ class MeeraWindow(Gtk.Window):
             for session in sessions:
                 session_row = self._create_session_row(session, history_window)
                 list_box.append(session_row)
+
+            search_state = {"generation": 0}
+            search_entry.connect(
+                "search-changed",
+                lambda entry: self._on_history_search_changed(
+                    entry, list_box, sessions, history_window, search_state
+                ),
+            )
         
         # Close button
         close_button = Gtk.Button(label="Close")
@@ -1050,6 +1113,88 @@ class MeeraWindow(Gtk.Window):
         
         history_window.present()
     
+    def _on_history_search_changed(self, entry, list_box, sessions, history_window, search_state):
+        """Run a history search off the main thread and show its results."""
+        query = entry.get_text().strip()
+        search_state["generation"] += 1
+        generation = search_state["generation"]
+
+        if not query:
+            self._fill_history_list(
+                list_box, [self._create_session_row(s, history_window) for s in sessions]
+            )
+            return
+
+        def _worker():
+            try:
+                results = search_history(query, limit=50)
+            except Exception:
+                results = []
+            GLib.idle_add(_show_results, results)
+
+        def _show_results(results):
+            # A newer query superseded this one while it ran.
+            if generation != search_state["generation"]:
+                return False
+            if results:
+                rows = [self._create_search_result_row(r, history_window) for r in results]
+            else:
+                no_results_label = Gtk.Label(label="No matching messages.")
+                no_results_label.set_margin_top(20)
+                rows = [no_results_label]
+            self._fill_history_list(list_box, rows)
+            return False
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _fill_history_list(self, list_box, rows):
+        child = list_box.get_first_child()
+        while child is not None:
+            next_child = child.get_next_sibling()
+            list_box.remove(child)
+            child = next_child
+        for row in rows:
+            list_box.append(row)
+
+    def _create_search_result_row(self, result, history_window):
+        """Create a row widget for one matching message"""
+        from datetime import datetime
+
+        try:
+            date_str = datetime.fromisoformat(result["timestamp"]).strftime("%Y-%m-%d")
+        except (ValueError, TypeError):
+            date_str = str(result.get("timestamp") or "Unknown")[:10]
+        speaker = "You" if result.get("role") == "user" else "Meera"
+
+        row_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        row_box.set_margin_start(6)
+        row_box.set_margin_end(6)
+        row_box.set_margin_top(6)
+        row_box.set_margin_bottom(6)
+
+        info_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4)
+        info_box.set_hexpand(True)
+        info_box.set_halign(Gtk.Align.START)
+
+        date_label = Gtk.Label(label=f"{date_str} · {speaker}")
+        date_label.set_halign(Gtk.Align.START)
+        info_box.append(date_label)
+
+        snippet_label = Gtk.Label(label=result.get("snippet") or "")
+        snippet_label.add_css_class("dim-label")
+        snippet_label.set_halign(Gtk.Align.START)
+        snippet_label.set_xalign(0)
+        snippet_label.set_wrap(True)
+        info_box.append(snippet_label)
+
+        row_box.append(info_box)
+
+        load_button = Gtk.Button(label="Load")
+        load_button.connect("clicked", lambda btn: self._load_session(result["filepath"], history_window))
+        row_box.append(load_button)
+
+        return row_box
+
     def _create_session_row(self, session, history_window):
         """Create a row widget for a session"""
         from datetime import datetime
@@ -1061,17 +1206,13 @@ class MeeraWindow(Gtk.Window):
         except (ValueError, TypeError):
             date_str = session.get("timestamp", "Unknown")[:10] if len(session.get("timestamp", "")) >= 10 else "Unknown"
         
-        # Get last user message (up to 30 characters)
+        # Last user message from the session index (up to 50 characters)
         last_question = "No messages"
-        messages = load_session(session["filepath"])
-        if messages:
-            # Iterate in reverse to find the last user message
-            for msg in reversed(messages):
-                if msg.get("role") == "user" and msg.get("content"):
-                    last_question = msg["content"][:50]
-                    if len(msg["content"]) > 50:
-                        last_question += "..."
-                    break
+        title = session.get("title") or ""
+        if title:
+            last_question = title[:50]
+            if len(title) > 50:
+                last_question += "..."
         
         # Create row box
         row_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
@@ -1106,13 +1247,11 @@ class MeeraWindow(Gtk.Window):
     
     def _load_session(self, filepath, history_window):
         """Load a session into the current conversation"""
-        messages = load_session(filepath)
+        # Queue the open conversation first: `load()` writes every pending
+        # save, so reopening it (or one saved moments ago) reads its last turn.
+        self._autosave_session()
+        messages = self._autosaver.load(filepath)
         if messages:
-            if self.conversation_history:
-                self.current_session_filepath = save_session(
-                    self.conversation_history,
-                    self.current_session_filepath,
-                )
             # Drop legacy synthetic tool-result rows (no longer stored in new sessions)
             self.conversation_history = [
                 m
@@ -1124,24 +1263,28 @@ class MeeraWindow(Gtk.Window):
             ]
             self.current_session_filepath = filepath
             # Clear chat view
-            self.chat_buf.set_text("")
+            self._typing_item = None
+            self.transcript.clear()
 
             # Display loaded messages (skip synthetic tool-feedback/memory rows
-            # and legacy raw tool-call JSON from pre-Phase-4 sessions).
+            # and legacy raw tool-call JSON from pre-Phase-4 sessions). Items
+            # are plain data; rows only render once they scroll into view.
+            items = []
             for msg in messages:
                 role = msg.get("role")
                 content = msg.get("content") or ""
                 if role == "user":
                     if content.startswith(TOOL_FEEDBACK_PREFIX):
                         continue
-                    self._append_message_line("You", content)
+                    items.append(self._message_item("You", content))
                 elif role == "assistant":
                     if content.startswith(TOOL_MEMORY_PREFIX):
                         continue
                     if _looks_like_legacy_tool_call(content):
-                        self._append_message_line("Meera", "[Laptop tool was used — see following messages.]")
+                        items.append(self._message_item("Meera", "[Laptop tool was used — see following messages.]"))
                     else:
-                        self._append_message_line("Meera", content)
+                        items.append(self._message_item("Meera", content))
+            self.transcript.extend(items)
             
             # Close history window
             history_window.close()
@@ -1634,11 +1777,8 @@ class MeeraWindow(Gtk.Window):
     def _confirm_quit(self, confirm_window):
         confirm_window.close()
         self.cancel_stream = True
-        if self.conversation_history:
-            self.current_session_filepath = save_session(
-                self.conversation_history,
-                self.current_session_filepath,
-            )
+        self._autosave_session()
+        self._autosaver.flush()
         self._stop_installed_model_servers()
         self.close()
 
@@ -1662,10 +1802,13 @@ class MeeraWindow(Gtk.Window):
 
     def _on_window_close(self, window):
         """Handle window close event - save conversation history"""
-        if self.conversation_history:
-            self.current_session_filepath = save_session(
-                self.conversation_history,
-                self.current_session_filepath,
-            )
+        self._autosave_session()
+        self._autosaver.close()
+        self._titler.close()
+        reminder_queue.set_app_notifier(None)
+        self._ui_events.close()
+        supervisor.stop_default()
+        telemetry.stop_default()
+        reminder_queue.stop_default()
         return False  # Allow window to close normally
 